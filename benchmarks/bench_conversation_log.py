@@ -0,0 +1,80 @@
+"""
+Benchmark de persistência do histórico de conversas.
+Compara o custo por mensagem da reescrita completa do JSON (formato antigo)
+com o diário append-only em JSONL, para históricos de tamanhos crescentes.
+
+Uso:
+    python benchmarks/bench_conversation_log.py [--messages 200] [--sizes 100 1000 5000]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from datetime import datetime
+
+# Ajustar o caminho para importações do projeto
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm.conversation_log import ConversationLog
+
+
+def make_message(index: int) -> dict:
+    """
+    Cria uma mensagem de exemplo com tamanho típico de um turno de conversa.
+    """
+    return {
+        "role": "user" if index % 2 == 0 else "assistant",
+        "content": f"Mensagem {index}: " + "texto de exemplo da conversa " * 6,
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+def bench_json_rewrite(path: str, history_size: int, messages: int) -> float:
+    """
+    Mede o tempo médio por mensagem reescrevendo o histórico inteiro em JSON.
+    """
+    history = [make_message(i) for i in range(history_size)]
+
+    start = time.perf_counter()
+    for i in range(messages):
+        history.append(make_message(history_size + i))
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(history, f, ensure_ascii=False, indent=2)
+    return (time.perf_counter() - start) / messages
+
+
+def bench_journal(path: str, history_size: int, messages: int) -> float:
+    """
+    Mede o tempo médio por mensagem acrescentando registros ao diário JSONL.
+    """
+    log = ConversationLog(path, compact_every=0)
+    log.compact([make_message(i) for i in range(history_size)])
+
+    start = time.perf_counter()
+    for i in range(messages):
+        log.append({"op": "message", "message": make_message(history_size + i)})
+    log.close()
+    return (time.perf_counter() - start) / messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do diário de conversas")
+    parser.add_argument("--messages", type=int, default=200, help="Mensagens gravadas por medição")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000], help="Tamanhos do histórico existente")
+    args = parser.parse_args()
+
+    print(f"{'histórico':>10} | {'json (ms/msg)':>14} | {'jsonl (ms/msg)':>14} | {'ganho':>7}")
+    print("-" * 56)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for size in args.sizes:
+            json_time = bench_json_rewrite(os.path.join(temp_dir, f"legacy_{size}.json"), size, args.messages)
+            journal_time = bench_journal(os.path.join(temp_dir, f"journal_{size}.jsonl"), size, args.messages)
+            print(f"{size:>10} | {json_time * 1000:>14.3f} | {journal_time * 1000:>14.3f} | {json_time / journal_time:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
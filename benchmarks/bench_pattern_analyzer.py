@@ -0,0 +1,135 @@
+"""
+Benchmark do analisador de padrões.
+Compara a análise antiga (um passe pelo texto para cada palavra-chave) com o
+reconhecedor único compilado, mensagem a mensagem e em lote, sobre um corpus
+sintético de mensagens. Também confere se os resultados são idênticos.
+
+Uso:
+    python benchmarks/bench_pattern_analyzer.py [--messages 100000] [--seed 42]
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import logging
+import argparse
+
+# Ajustar o caminho para importações do projeto
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from social.pattern_analyzer import PatternAnalyzer
+
+FILLER = [
+    "eu", "você", "hoje", "amanhã", "ontem", "muito", "pouco", "bem", "aqui", "lá", "gente", "cara",
+    "quando", "porque", "também", "ainda", "depois", "antes", "nada", "tudo", "coisa", "vez", "dia",
+    "noite", "casa", "rua", "pessoal", "galera", "mano", "vamos", "vou", "foi", "era", "tem", "tinha"
+]
+
+
+class LegacyPatternAnalyzer(PatternAnalyzer):
+    """
+    Implementação anterior: um str.count, um `in` ou um re.findall por palavra-chave.
+    """
+
+    def analyze_message(self, content):
+        text = content.lower()
+        return {
+            "sentiment": self.analyze_sentiment(text),
+            "topics": self.extract_topics(text),
+            "expressions": self.detect_expressions(text),
+            "word_count": len(text.split()),
+            "char_count": len(text)
+        }
+
+    def analyze_sentiment(self, text):
+        score = 0.0
+        word_count = 0
+        for emotion, keywords in self.emotion_keywords.items():
+            for keyword in keywords:
+                count = text.count(keyword)
+                if count > 0:
+                    if emotion == "feliz":
+                        score += count * 0.5
+                    elif emotion == "triste":
+                        score -= count * 0.3
+                    elif emotion == "bravo":
+                        score -= count * 0.5
+                    word_count += count
+        if word_count > 0:
+            score = max(-1.0, min(1.0, score / word_count))
+        return score
+
+    def extract_topics(self, text):
+        topics = []
+        for topic, keywords in self.topic_keywords.items():
+            for keyword in keywords:
+                if keyword in text:
+                    if topic not in topics:
+                        topics.append(topic)
+                    break
+        return topics
+
+    def detect_expressions(self, text):
+        expressions = []
+        for expression_pattern in self.common_expressions:
+            for match in re.findall(expression_pattern, text):
+                if match not in expressions:
+                    expressions.append(match)
+        return expressions
+
+
+def build_corpus(analyzer: PatternAnalyzer, size: int, seed: int) -> list:
+    """
+    Gera mensagens curtas no estilo de chat, misturando palavras comuns e palavras-chave.
+    """
+    rng = random.Random(seed)
+    keywords = [k for group in analyzer.topic_keywords.values() for k in group]
+    keywords += [k for group in analyzer.emotion_keywords.values() for k in group]
+    keywords += analyzer.common_expressions
+
+    corpus = []
+    for _ in range(size):
+        words = [rng.choice(FILLER) for _ in range(rng.randint(3, 18))]
+        for _ in range(rng.randint(0, 3)):
+            words.insert(rng.randint(0, len(words)), rng.choice(keywords))
+        message = " ".join(words)
+        corpus.append(message.capitalize() if rng.random() < 0.5 else message.upper())
+    return corpus
+
+
+def timed(function) -> tuple:
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do analisador de padrões")
+    parser.add_argument("--messages", type=int, default=100000, help="Tamanho do corpus")
+    parser.add_argument("--seed", type=int, default=42, help="Semente do gerador do corpus")
+    args = parser.parse_args()
+
+    logging.getLogger("PatternAnalyzer").setLevel(logging.WARNING)
+    analyzer = PatternAnalyzer()
+    legacy = LegacyPatternAnalyzer()
+    corpus = build_corpus(analyzer, args.messages, args.seed)
+
+    legacy_results, legacy_time = timed(lambda: [legacy.analyze_message(m) for m in corpus])
+    single_results, single_time = timed(lambda: [analyzer.analyze_message(m) for m in corpus])
+    batch_results, batch_time = timed(lambda: analyzer.analyze_messages(corpus))
+
+    mismatches = sum(1 for a, b, c in zip(legacy_results, single_results, batch_results) if not a == b == c)
+
+    print(f"{'modo':>28} | {'tempo (s)':>9} | {'mensagens/s':>11} | {'ganho':>6}")
+    print("-" * 64)
+    for name, elapsed in (("palavra a palavra (antigo)", legacy_time),
+                          ("passe único por mensagem", single_time),
+                          ("passe único em lote", batch_time)):
+        print(f"{name:>28} | {elapsed:>9.3f} | {len(corpus) / elapsed:>11.0f} | {legacy_time / elapsed:>5.1f}x")
+    print(f"\nResultados divergentes do método antigo: {mismatches} de {len(corpus)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Benchmark de acesso concorrente ao banco de memória.
+Compara uma conexão nova por operação em modo rollback-journal (padrão antigo)
+com o pool de conexões por thread em modo WAL, com escritores (loop de voz)
+e leitores (interface web) rodando ao mesmo tempo.
+
+Uso:
+    python benchmarks/bench_sqlite_pool.py [--writers 2] [--readers 4] [--ops 300]
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import tempfile
+import threading
+from datetime import datetime
+
+# Ajustar o caminho para importações do projeto
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory.connection_pool import ConnectionPool
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS interactions (
+        interaction_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT,
+        channel_id TEXT,
+        timestamp TIMESTAMP,
+        content_summary TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_interactions_channel_id ON interactions(channel_id);
+"""
+
+INSERT_SQL = "INSERT INTO interactions (user_id, channel_id, timestamp, content_summary) VALUES (?, ?, ?, ?)"
+SELECT_SQL = "SELECT * FROM interactions WHERE channel_id = ? ORDER BY timestamp DESC LIMIT 20"
+
+
+def percentile(values: list, fraction: float) -> float:
+    """
+    Calcula um percentil simples de uma lista de latências.
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def legacy_write(db_path: str, index: int) -> None:
+    """
+    Escrita no padrão antigo: abre, escreve, faz commit e fecha.
+    """
+    conn = sqlite3.connect(db_path, timeout=5.0)
+    try:
+        conn.execute(INSERT_SQL, (f"u{index % 10}", f"c{index % 5}", datetime.now().isoformat(), "mensagem de teste"))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def legacy_read(db_path: str, index: int) -> None:
+    """
+    Leitura no padrão antigo: abre, consulta e fecha.
+    """
+    conn = sqlite3.connect(db_path, timeout=5.0)
+    try:
+        conn.execute(SELECT_SQL, (f"c{index % 5}",)).fetchall()
+    finally:
+        conn.close()
+
+
+def run(write, read, writers: int, readers: int, ops: int) -> dict:
+    """
+    Executa escritores e leitores concorrentes e coleta latências e falhas.
+    """
+    latencies = {"write": [], "read": []}
+    errors = []
+    lock = threading.Lock()
+
+    def worker(kind, operation):
+        local = []
+        for i in range(ops):
+            start = time.perf_counter()
+            try:
+                operation(i)
+            except sqlite3.OperationalError as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies[kind].extend(local)
+
+    threads = [threading.Thread(target=worker, args=("write", write)) for _ in range(writers)]
+    threads += [threading.Thread(target=worker, args=("read", read)) for _ in range(readers)]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    total = len(latencies["write"]) + len(latencies["read"])
+    return {
+        "ops_per_second": total / elapsed,
+        "write_p95_ms": percentile(latencies["write"], 0.95) * 1000 if latencies["write"] else 0.0,
+        "read_p95_ms": percentile(latencies["read"], 0.95) * 1000 if latencies["read"] else 0.0,
+        "errors": len(errors)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do pool de conexões SQLite")
+    parser.add_argument("--writers", type=int, default=2, help="Threads escritoras")
+    parser.add_argument("--readers", type=int, default=4, help="Threads leitoras")
+    parser.add_argument("--ops", type=int, default=300, help="Operações por thread")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        legacy_path = os.path.join(temp_dir, "legacy.db")
+        conn = sqlite3.connect(legacy_path)
+        conn.executescript(SCHEMA)
+        conn.close()
+
+        legacy = run(lambda i: legacy_write(legacy_path, i), lambda i: legacy_read(legacy_path, i),
+                     args.writers, args.readers, args.ops)
+
+        pool = ConnectionPool(os.path.join(temp_dir, "pooled.db"))
+        pool.executescript(SCHEMA)
+        pooled = run(
+            lambda i: pool.execute(INSERT_SQL, (f"u{i % 10}", f"c{i % 5}", datetime.now().isoformat(), "mensagem de teste")),
+            lambda i: pool.query(SELECT_SQL, (f"c{i % 5}",)),
+            args.writers, args.readers, args.ops
+        )
+        pool.close_all()
+
+    print(f"{'modo':>22} | {'ops/s':>9} | {'escrita p95 (ms)':>16} | {'leitura p95 (ms)':>16} | {'erros':>5}")
+    print("-" * 82)
+    for name, result in (("conexão por chamada", legacy), ("pool WAL por thread", pooled)):
+        print(f"{name:>22} | {result['ops_per_second']:>9.0f} | {result['write_p95_ms']:>16.3f} | "
+              f"{result['read_p95_ms']:>16.3f} | {result['errors']:>5}")
+
+
+if __name__ == "__main__":
+    main()
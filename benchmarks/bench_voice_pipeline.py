@@ -0,0 +1,370 @@
+"""
+Suíte de benchmarks do pipeline de voz.
+Mede o fator de tempo real do STT, a ida e volta do LLM, a vazão do TTS em
+caracteres por segundo, a ingestão de mensagens na memória e a latência de
+ponta a ponta dos turnos (p50/p95/p99), usando fixtures locais (falas em WAV,
+servidor Ollama falso, STT/TTS substitutos) para resultados reproduzíveis.
+Os resultados são gravados em JSON e comparados com uma linha de base.
+Métricas informativas (contagens e as que só refletem o custo fixo dos
+substitutos de STT/TTS) aparecem na comparação, mas não apontam regressão.
+
+Uso:
+    python benchmarks/bench_voice_pipeline.py [--turns 12] [--stt auto|stub|whisper] [--tts auto|stub|coqui]
+    python benchmarks/bench_voice_pipeline.py --save-baseline           # atualiza a linha de base
+    python benchmarks/bench_voice_pipeline.py --fail-on-regression      # código de saída 1 se piorar
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import platform
+import argparse
+import tempfile
+import threading
+from datetime import datetime
+from typing import Optional
+
+# Ajustar o caminho para importações do projeto
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import (
+    prepare_utterances, FakeOllamaServer, StubTranscriber, StubSynthesizer
+)
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results", "voice_pipeline.json")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baselines", "voice_pipeline.json")
+
+SYSTEM_PROMPT = "Você é a Nina, uma assistente de voz para jogadores. Responda de forma curta."
+
+
+def percentile(values: list, fraction: float) -> float:
+    """
+    Calcula um percentil simples de uma lista de latências.
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def metric(value: float, unit: str, better: Optional[str]) -> dict:
+    """
+    Monta uma métrica do resultado ("better" = "lower", "higher" ou None
+    para métricas informativas, que não entram na verificação de regressão).
+    """
+    return {"value": round(value, 4), "unit": unit, "better": better}
+
+
+def latency_metrics(prefix: str, values_ms: list) -> dict:
+    """
+    Métricas p50/p95/p99 (ms) de uma lista de latências.
+    """
+    return {
+        f"{prefix}_p{int(q * 100)}_ms": metric(percentile(values_ms, q), "ms", "lower")
+        for q in (0.5, 0.95, 0.99)
+    }
+
+
+def make_transcriber(backend: str, utterances: list):
+    """
+    Cria o transcritor: Whisper se disponível (ou pedido), senão o substituto.
+    """
+    if backend in ("auto", "whisper"):
+        try:
+            from stt.transcriber import WhisperTranscriber
+            return WhisperTranscriber(model_size="base", device="cpu", compute_type="int8", language="pt"), "whisper"
+        except Exception as e:
+            if backend == "whisper":
+                raise
+            logging.info(f"Whisper indisponível ({e}); usando STT substituto")
+    return StubTranscriber({u["path"]: u["text"] for u in utterances}), "stub"
+
+
+def make_synthesizer(backend: str):
+    """
+    Cria o sintetizador: Coqui TTS se disponível (ou pedido), senão o substituto.
+    """
+    if backend in ("auto", "coqui"):
+        try:
+            from tts.tts_synthesizer import TTSSynthesizer
+            return TTSSynthesizer(use_cuda=False), "coqui"
+        except Exception as e:
+            if backend == "coqui":
+                raise
+            logging.info(f"Coqui TTS indisponível ({e}); usando TTS substituto")
+    return StubSynthesizer(), "stub"
+
+
+def bench_stt(transcriber, utterances: list, rounds: int, informational: bool = False) -> dict:
+    """
+    Fator de tempo real do STT (tempo de transcrição / duração do áudio).
+    Com o substituto, o fator só reflete o atraso fixo dele (`informational`).
+    """
+    better = None if informational else "lower"
+    factors = []
+    for _ in range(rounds):
+        for utterance in utterances:
+            start = time.perf_counter()
+            transcriber.transcribe_file(utterance["path"], language="pt")
+            factors.append((time.perf_counter() - start) / utterance["duration"])
+    return {
+        "stt.rtf_mean": metric(sum(factors) / len(factors), "x", better),
+        "stt.rtf_p95": metric(percentile(factors, 0.95), "x", better)
+    }
+
+
+def bench_llm(client, utterances: list, requests_count: int) -> dict:
+    """
+    Ida e volta de uma conversa com o LLM (requisição completa e streaming).
+    """
+    round_trips = []
+    streamed = []
+    for i in range(requests_count):
+        messages = [{"role": "user", "content": utterances[i % len(utterances)]["text"]}]
+        start = time.perf_counter()
+        client.chat(messages, system_prompt=SYSTEM_PROMPT, max_tokens=64)
+        round_trips.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        client.chat(messages, system_prompt=SYSTEM_PROMPT, max_tokens=64, cancel_event=threading.Event())
+        streamed.append((time.perf_counter() - start) * 1000)
+
+    results = latency_metrics("llm.round_trip", round_trips)
+    results.update(latency_metrics("llm.stream_round_trip", streamed))
+    return results
+
+
+def bench_tts(synthesizer, texts: list, output_dir: str, informational: bool = False) -> dict:
+    """
+    Vazão do TTS em caracteres sintetizados por segundo.
+    Com o substituto, a vazão só reflete o atraso fixo dele (`informational`).
+    """
+    characters = 0
+    start = time.perf_counter()
+    for i, text in enumerate(texts):
+        synthesizer.synthesize(text, output_path=os.path.join(output_dir, f"tts_{i}.wav"))
+        characters += len(text)
+    elapsed = time.perf_counter() - start
+    return {"tts.chars_per_second": metric(characters / elapsed, "chars/s", None if informational else "higher")}
+
+
+def bench_memory_ingest(data_dir: str, messages: int, rounds: int = 3) -> dict:
+    """
+    Mensagens por segundo processadas e gravadas pelo sistema de memória
+    (melhor de `rounds` execuções, cada uma com um banco novo).
+    """
+    from memory.memory_system import MemorySystem
+
+    rates = []
+    for round_index in range(rounds):
+        round_dir = os.path.join(data_dir, f"memory_{round_index}")
+        memory = MemorySystem(db_path=os.path.join(round_dir, "bench_memory.db"),
+                              data_dir=os.path.join(round_dir, "memory_data"))
+        try:
+            start = time.perf_counter()
+            for i in range(messages):
+                memory.process_message(
+                    user_id=f"user{i % 8}", username=f"Jogador {i % 8}", channel_id=f"canal{i % 3}",
+                    guild_id="guild", channel_name="geral", channel_type="text",
+                    content=f"Mensagem {i}: alguém viu o jungler inimigo perto do dragão? kkk"
+                )
+            if memory.ingestion is not None:
+                memory.ingestion.flush()
+            rates.append(messages / (time.perf_counter() - start))
+        finally:
+            memory.close()
+    return {"memory.ingest_messages_per_second": metric(max(rates), "msg/s", "higher")}
+
+
+def bench_end_to_end(transcriber, client, synthesizer, utterances: list, turns: int,
+                     capture_scale: float, output_dir: str) -> dict:
+    """
+    Latência dos turnos no pipeline assíncrono: do fim da fala ao início da
+    resposta falada e do início da fala ao fim da resposta.
+    """
+    from core.pipeline import VoicePipeline
+
+    pending = [utterances[i % len(utterances)] for i in range(turns)]
+    lock = threading.Lock()
+    completed = []
+    finished = threading.Event()
+
+    def capture():
+        # Reproduz a gravação na velocidade de fala (escalada) antes de entregá-la
+        with lock:
+            utterance = pending.pop(0) if pending else None
+        if utterance is None:
+            time.sleep(0.05)
+            return None
+        time.sleep(utterance["duration"] * capture_scale)
+        return utterance["path"]
+
+    def think(text):
+        result = client.chat([{"role": "user", "content": text}], system_prompt=SYSTEM_PROMPT, max_tokens=64)
+        return result.get("message", {}).get("content")
+
+    def speak(text):
+        synthesizer.synthesize(text, output_path=os.path.join(output_dir, "e2e_response.wav"))
+
+    def on_turn(turn):
+        completed.append(turn.to_dict())
+        if len(completed) >= turns:
+            finished.set()
+
+    pipeline = VoicePipeline(
+        capture=capture,
+        transcribe=lambda path: transcriber.transcribe_file(path, language="pt"),
+        think=think,
+        speak=speak,
+        on_turn=on_turn
+    )
+    thread = threading.Thread(target=pipeline.run_forever, daemon=True)
+    thread.start()
+    finished.wait(turns * 30.0)
+    pipeline.stop()
+    thread.join(10.0)
+
+    if not completed:
+        raise RuntimeError("Nenhum turno concluído no benchmark de ponta a ponta")
+
+    results = latency_metrics("e2e.response_latency", [turn["response_latency_ms"] for turn in completed])
+    results.update(latency_metrics("e2e.turn", [turn["end_to_end_ms"] for turn in completed]))
+    # Contagem que depende de --turns: informativa
+    results["e2e.completed_turns"] = metric(len(completed), "turns", None)
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Compara as métricas com a linha de base.
+
+    Returns:
+        Lista de (nome, base, atual, variação, regressão); a regressão é None
+        para métricas informativas
+    """
+    rows = []
+    for name, current in results["metrics"].items():
+        base = baseline.get("metrics", {}).get(name)
+        if not base or not base["value"]:
+            continue
+        change = (current["value"] - base["value"]) / base["value"]
+        if current["better"] is None:
+            regression = None
+        elif current["better"] == "lower":
+            regression = change > tolerance
+        else:
+            regression = change < -tolerance
+        rows.append((name, base["value"], current["value"], change, regression))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do pipeline de voz")
+    parser.add_argument("--turns", type=int, default=12, help="Turnos no benchmark de ponta a ponta")
+    parser.add_argument("--stt-rounds", type=int, default=2, help="Passadas pelas falas no benchmark de STT")
+    parser.add_argument("--llm-requests", type=int, default=20, help="Requisições no benchmark do LLM")
+    parser.add_argument("--memory-messages", type=int, default=5000, help="Mensagens no benchmark de ingestão")
+    parser.add_argument("--stt", choices=("auto", "stub", "whisper"), default="stub", help="Backend de STT")
+    parser.add_argument("--tts", choices=("auto", "stub", "coqui"), default="stub", help="Backend de TTS")
+    parser.add_argument("--audio-dir", help="Gravações reais com manifest.json (padrão: falas sintéticas)")
+    parser.add_argument("--llm-url", help="Servidor Ollama real (padrão: servidor falso local)")
+    parser.add_argument("--llm-model", default="bench", help="Modelo usado com --llm-url")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="Taxa do servidor falso")
+    parser.add_argument("--first-token-ms", type=float, default=50.0, help="Latência do primeiro token do servidor falso")
+    parser.add_argument("--capture-scale", type=float, default=0.25, help="Velocidade da fala na captura (1.0 = tempo real)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Arquivo JSON de resultados")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Linha de base para comparação")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Variação aceita antes de apontar regressão")
+    parser.add_argument("--save-baseline", action="store_true", help="Gravar os resultados como nova linha de base")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Sair com código 1 se houver regressão")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    from llm.ollama_client import OllamaClient
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        utterances = prepare_utterances(os.path.join(temp_dir, "utterances"), args.audio_dir)
+        transcriber, stt_backend = make_transcriber(args.stt, utterances)
+        synthesizer, tts_backend = make_synthesizer(args.tts)
+
+        server = None
+        if args.llm_url:
+            client = OllamaClient(base_url=args.llm_url, model=args.llm_model)
+        else:
+            server = FakeOllamaServer(tokens_per_second=args.tokens_per_second,
+                                      first_token_ms=args.first_token_ms).start()
+            client = OllamaClient(base_url=server.url, model="bench")
+
+        try:
+            metrics = {}
+            print("STT...")
+            metrics.update(bench_stt(transcriber, utterances, args.stt_rounds, informational=stt_backend == "stub"))
+            print("LLM...")
+            metrics.update(bench_llm(client, utterances, args.llm_requests))
+            print("TTS...")
+            metrics.update(bench_tts(synthesizer, [u["text"] for u in utterances] * 3, temp_dir,
+                                     informational=tts_backend == "stub"))
+            print("Memória...")
+            metrics.update(bench_memory_ingest(temp_dir, args.memory_messages))
+            print("Ponta a ponta...")
+            metrics.update(bench_end_to_end(transcriber, client, synthesizer, utterances, args.turns,
+                                            args.capture_scale, temp_dir))
+        finally:
+            if server is not None:
+                server.stop()
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backends": {"stt": stt_backend, "tts": tts_backend, "llm": "ollama" if args.llm_url else "fake"},
+            "params": {key: value for key, value in vars(args).items()
+                       if key not in ("output", "baseline", "save_baseline", "fail_on_regression")}
+        },
+        "metrics": metrics
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"Resultados gravados em {args.output}")
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("backends") != results["meta"]["backends"]:
+            print(f"AVISO: backends diferentes da linha de base ({baseline.get('meta', {}).get('backends')})")
+
+        print(f"\n{'métrica':>36} | {'base':>10} | {'atual':>10} | {'variação':>9}")
+        print("-" * 76)
+        for name, base, current, change, regression in compare(results, baseline, args.tolerance):
+            flag = "  REGRESSÃO" if regression else ("  (informativa)" if regression is None else "")
+            print(f"{name:>36} | {base:>10.3f} | {current:>10.3f} | {change:>+8.1%}{flag}")
+            if regression:
+                regressions.append(name)
+    else:
+        print(f"\n{'métrica':>36} | {'valor':>10} | unidade")
+        print("-" * 60)
+        for name, value in metrics.items():
+            print(f"{name:>36} | {value['value']:>10.3f} | {value['unit']}")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Linha de base gravada em {args.baseline}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regressões acima de {args.tolerance:.0%}: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
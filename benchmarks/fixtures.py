@@ -0,0 +1,280 @@
+"""
+Fixtures locais para os benchmarks do pipeline de voz.
+Gera falas em WAV reproduzíveis, sobe um servidor Ollama falso com taxa de
+tokens configurável e fornece substitutos de STT e TTS com custo controlado,
+para que os números não dependam de rede, GPU ou modelos instalados.
+"""
+
+import os
+import json
+import time
+import wave
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+# Frases das falas geradas (o texto é a transcrição esperada)
+UTTERANCES = [
+    "Nina, qual é o tempo de recarga do dragão?",
+    "Me lembra de comprar sentinela de controle na próxima volta para a base.",
+    "O jungler inimigo apareceu no topo agora, vale a pena invadir a selva dele?",
+    "Quantos abates eu tenho nessa partida?",
+    "Resume pra mim o que deu errado na última luta perto do barão, por favor.",
+    "Obrigado, Nina."
+]
+
+MANIFEST = "manifest.json"
+
+
+def _speech_like(duration: float, rng: np.random.Generator) -> np.ndarray:
+    """
+    Sintetiza um sinal com envelope silábico e harmônicos de voz (não é fala real,
+    mas tem a duração, o nível e as pausas que o STT e a detecção de silêncio veem).
+    """
+    t = np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+    pitch = 110 + 30 * np.sin(2 * np.pi * 0.7 * t + rng.uniform(0, np.pi))
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    voice = sum(np.sin(k * phase) / k for k in range(1, 6))
+    syllables = np.clip(np.sin(2 * np.pi * rng.uniform(3.5, 5.0) * t), 0, None) ** 0.5
+    noise = rng.normal(0, 0.02, t.size)
+    signal = 0.25 * voice * syllables + noise
+    # 150 ms de silêncio no início e no fim, como uma gravação com VAD
+    pad = np.zeros(int(0.15 * SAMPLE_RATE))
+    return np.concatenate([pad, signal, pad]).astype(np.float32)
+
+
+def write_wav(path: str, audio: np.ndarray, sample_rate: int = SAMPLE_RATE) -> None:
+    """
+    Grava áudio mono float32 em WAV PCM de 16 bits.
+    """
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
+
+
+def wav_duration(path: str) -> float:
+    """
+    Duração de um arquivo WAV em segundos.
+    """
+    with wave.open(path, "rb") as f:
+        return f.getnframes() / float(f.getframerate())
+
+
+def prepare_utterances(directory: str, audio_dir: Optional[str] = None, seed: int = 42) -> List[Dict[str, Any]]:
+    """
+    Obtém as falas do benchmark: gravações reais de `audio_dir` (com manifest.json)
+    ou falas sintéticas geradas de forma determinística em `directory`.
+
+    Args:
+        directory: Diretório onde as falas sintéticas são gravadas
+        audio_dir: Diretório com gravações reais e um manifest.json
+            ([{"file": "fala1.wav", "text": "transcrição"}, ...]); None = gerar
+        seed: Semente das falas sintéticas
+
+    Returns:
+        Lista de {"path", "text", "duration"}
+    """
+    if audio_dir:
+        with open(os.path.join(audio_dir, MANIFEST), encoding="utf-8") as f:
+            entries = json.load(f)
+        utterances = []
+        for entry in entries:
+            path = os.path.join(audio_dir, entry["file"])
+            utterances.append({"path": path, "text": entry.get("text", ""), "duration": wav_duration(path)})
+        return utterances
+
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    utterances = []
+    for index, text in enumerate(UTTERANCES):
+        # Aproximadamente 14 caracteres por segundo de fala
+        duration = max(1.0, len(text) / 14.0)
+        path = os.path.join(directory, f"utterance_{index:02d}.wav")
+        write_wav(path, _speech_like(duration, rng))
+        utterances.append({"path": path, "text": text, "duration": wav_duration(path)})
+    return utterances
+
+
+class StubTranscriber:
+    """
+    Substituto do WhisperTranscriber com fator de tempo real fixo.
+    Lê o WAV (custo de E/S real) e devolve a transcrição conhecida da fala.
+    """
+
+    def __init__(self, transcripts: Dict[str, str], rtf: float = 0.1):
+        """
+        Args:
+            transcripts: Caminho do WAV -> texto esperado
+            rtf: Tempo de processamento por segundo de áudio
+        """
+        self.transcripts = transcripts
+        self.rtf = rtf
+
+    def transcribe_file(self, audio_path: str, language: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+        with wave.open(audio_path, "rb") as f:
+            frames = f.readframes(f.getnframes())
+            duration = f.getnframes() / float(f.getframerate())
+        np.frombuffer(frames, dtype=np.int16).astype(np.float32).std()
+        time.sleep(duration * self.rtf)
+        return self.transcripts.get(audio_path, ""), {"duration": duration, "language": language or "pt"}
+
+
+class StubSynthesizer:
+    """
+    Substituto do TTSSynthesizer com vazão fixa em caracteres por segundo.
+    Grava um WAV com a duração aproximada da fala.
+    """
+
+    def __init__(self, chars_per_second: float = 400.0, speech_chars_per_second: float = 14.0):
+        """
+        Args:
+            chars_per_second: Caracteres sintetizados por segundo de processamento
+            speech_chars_per_second: Caracteres por segundo da fala gerada
+        """
+        self.chars_per_second = chars_per_second
+        self.speech_chars_per_second = speech_chars_per_second
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def synthesize(self, text: str, output_path: Optional[str] = None,
+                   speaker: Optional[str] = None, language: Optional[str] = None) -> str:
+        time.sleep(len(text) / self.chars_per_second)
+        if output_path is None:
+            import tempfile
+            with self._lock:
+                self._counter += 1
+                counter = self._counter
+            output_path = os.path.join(tempfile.gettempdir(), f"nina_bench_tts_{os.getpid()}_{counter}.wav")
+        duration = max(0.2, len(text) / self.speech_chars_per_second)
+        write_wav(output_path, np.zeros(int(duration * SAMPLE_RATE), dtype=np.float32))
+        return output_path
+
+
+class FakeOllamaServer:
+    """
+    Servidor HTTP com a API do Ollama (/api/chat, /api/generate, /api/tags,
+    /api/version) que responde com latência de primeiro token e taxa de tokens fixas.
+    """
+
+    def __init__(self, tokens_per_second: float = 200.0, response_tokens: int = 24,
+                 first_token_ms: float = 50.0, host: str = "127.0.0.1", port: int = 0):
+        """
+        Args:
+            tokens_per_second: Taxa de geração simulada
+            response_tokens: Tokens por resposta (limitado por num_predict)
+            first_token_ms: Latência até o primeiro token (ms)
+            host: Endereço de escuta
+            port: Porta (0 = escolher uma livre)
+        """
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.first_token_ms = first_token_ms
+        self.requests = 0
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def handle(self):
+                try:
+                    super().handle()
+                except ConnectionError:
+                    pass  # Cliente fechou a conexão mantida aberta
+
+            def _send_json(self, body: Dict[str, Any]) -> None:
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == "/api/version":
+                    self._send_json({"version": "0.0.0-bench"})
+                elif self.path == "/api/tags":
+                    self._send_json({"models": [{"name": "bench"}]})
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                server.requests += 1
+                tokens = server._tokens(payload)
+
+                if self.path not in ("/api/chat", "/api/generate"):
+                    self.send_error(404)
+                    return
+
+                if not payload.get("stream", True):
+                    time.sleep(server._duration(len(tokens)))
+                    text = "".join(tokens)
+                    body = {"model": payload.get("model"), "done": True, "eval_count": len(tokens)}
+                    if self.path == "/api/chat":
+                        body["message"] = {"role": "assistant", "content": text}
+                    else:
+                        body["response"] = text
+                    self._send_json(body)
+                    return
+
+                # Streaming: uma linha JSON por token, em chunked encoding
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                time.sleep(server.first_token_ms / 1000.0)
+                for token in tokens:
+                    time.sleep(1.0 / server.tokens_per_second)
+                    self._chunk({"message": {"role": "assistant", "content": token}, "done": False})
+                self._chunk({"message": {"role": "assistant", "content": ""}, "done": True, "eval_count": len(tokens)})
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _chunk(self, body: Dict[str, Any]) -> None:
+                data = json.dumps(body).encode("utf-8") + b"\n"
+                self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    def _tokens(self, payload: Dict[str, Any]) -> List[str]:
+        count = min(self.response_tokens, payload.get("num_predict") or self.response_tokens)
+        words = "Certo, o dragão volta em cerca de cinco minutos, vale preparar a visão do rio antes".split()
+        return [words[i % len(words)] + " " for i in range(count)]
+
+    def _duration(self, tokens: int) -> float:
+        return self.first_token_ms / 1000.0 + tokens / self.tokens_per_second
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOllamaServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
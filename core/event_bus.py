@@ -0,0 +1,427 @@
+"""
+Barramento de eventos em processo do projeto Nina IA.
+Liga orquestrador, memória, visão e coaching por publicação/assinatura, com
+filas limitadas por assinante, políticas de descarte para tópicos de tempo
+real e métricas de latência e acúmulo por tópico.
+"""
+
+import time
+import atexit
+import logging
+import threading
+from collections import deque
+from typing import Dict, List, Any, Callable, Optional
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Tópicos conhecidos
+TRANSCRIPT = "transcript"  # Fala transcrita pelo STT
+HUD_FRAME = "hud_frame"  # Dados do HUD analisados de um quadro
+MAP_UPDATE = "map_update"  # Estado do minimapa
+CALLOUT = "callout"  # Aviso tático gerado pelo coach
+RESPONSE = "response"  # Resposta gerada pelo LLM
+
+# Campos obrigatórios do payload de cada tópico conhecido
+EVENT_FIELDS = {
+    TRANSCRIPT: ("text",),
+    HUD_FRAME: ("timestamp",),
+    MAP_UPDATE: ("timestamp",),
+    CALLOUT: ("text",),
+    RESPONSE: ("text",)
+}
+
+# Políticas quando a fila de um assinante está cheia
+DROP_OLDEST = "drop_oldest"  # Descarta o evento mais antigo (tempo real: vale o mais recente)
+DROP_NEWEST = "drop_newest"  # Descarta o evento que está chegando
+BLOCK = "block"  # Quem publica espera por espaço (até block_timeout)
+
+# Padrões por tópico: quadros e minimapa são substituídos; fala e respostas não podem se perder
+TOPIC_DEFAULTS = {
+    HUD_FRAME: {"maxsize": 2, "policy": DROP_OLDEST},
+    MAP_UPDATE: {"maxsize": 2, "policy": DROP_OLDEST},
+    TRANSCRIPT: {"maxsize": 100, "policy": BLOCK},
+    CALLOUT: {"maxsize": 20, "policy": DROP_OLDEST},
+    RESPONSE: {"maxsize": 100, "policy": BLOCK}
+}
+DEFAULT_SUBSCRIPTION = {"maxsize": 100, "policy": DROP_NEWEST}
+
+
+class Event:
+    """
+    Evento publicado no barramento.
+    """
+
+    __slots__ = ("topic", "payload", "timestamp", "sequence", "_published_at")
+
+    def __init__(self, topic: str, payload: Dict[str, Any], sequence: int):
+        self.topic = topic
+        self.payload = payload
+        self.timestamp = time.time()
+        self.sequence = sequence
+        self._published_at = time.perf_counter()
+
+    def age_ms(self) -> float:
+        """
+        Tempo desde a publicação (ms).
+        """
+        return (time.perf_counter() - self._published_at) * 1000
+
+    def __repr__(self) -> str:
+        return f"Event({self.topic!r}, #{self.sequence})"
+
+
+class TopicStats:
+    """
+    Contadores de um tópico (atualizados com o lock do barramento).
+    """
+
+    def __init__(self):
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.failed = 0
+        self.total_latency_ms = 0.0
+        self.max_latency_ms = 0.0
+        self.total_handler_ms = 0.0
+
+    def to_dict(self, backlog: int, subscribers: int) -> Dict[str, Any]:
+        return {
+            "subscribers": subscribers,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "backlog": backlog,
+            "avg_latency_ms": round(self.total_latency_ms / self.delivered, 3) if self.delivered else 0.0,
+            "max_latency_ms": round(self.max_latency_ms, 3),
+            "avg_handler_ms": round(self.total_handler_ms / self.delivered, 3) if self.delivered else 0.0
+        }
+
+
+class Subscription:
+    """
+    Assinatura de um tópico: fila limitada própria e uma thread que entrega os eventos em ordem.
+    """
+
+    def __init__(self, bus: "EventBus", topic: str, handler: Callable[[Event], Any],
+                 maxsize: int, policy: str, name: str):
+        self.bus = bus
+        self.topic = topic
+        self.handler = handler
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.name = name
+
+        self._events = deque()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._busy = False
+
+        # Métricas
+        self.delivered = 0
+        self.dropped = 0
+        self.max_backlog = 0
+
+        self._thread = threading.Thread(target=self._run, name=f"event-{topic}-{name}", daemon=True)
+        self._thread.start()
+
+    @property
+    def backlog(self) -> int:
+        """
+        Eventos aguardando entrega.
+        """
+        return len(self._events)
+
+    def _offer(self, event: Event) -> bool:
+        """
+        Coloca um evento na fila aplicando a política de descarte.
+
+        Returns:
+            True se o evento foi enfileirado
+        """
+        dropped = None
+        with self._condition:
+            if self._closed:
+                return False
+
+            if len(self._events) >= self.maxsize:
+                if self.policy == DROP_OLDEST:
+                    dropped = self._events.popleft()
+                elif self.policy == BLOCK:
+                    if not self._condition.wait_for(lambda: len(self._events) < self.maxsize or self._closed,
+                                                    self.bus.block_timeout) or self._closed:
+                        dropped = event
+                else:
+                    dropped = event
+
+            if dropped is not event:
+                self._events.append(event)
+                self.max_backlog = max(self.max_backlog, len(self._events))
+                self._condition.notify_all()
+            if dropped is not None:
+                self.dropped += 1
+
+        if dropped is not None:
+            self.bus._record_drop(self.topic)
+            if dropped is event and self.policy == BLOCK:
+                logger.warning(f"Evento {event!r} descartado: assinante '{self.name}' não liberou espaço")
+        return dropped is not event
+
+    def _run(self) -> None:
+        """
+        Loop de entrega dos eventos ao handler.
+        """
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._events or self._closed)
+                if not self._events:
+                    return
+                event = self._events.popleft()
+                self._busy = True
+                self._condition.notify_all()
+
+            latency_ms = event.age_ms()
+            start = time.perf_counter()
+            failed = False
+            try:
+                self.handler(event)
+            except Exception as e:
+                failed = True
+                logger.error(f"Erro no assinante '{self.name}' do tópico {self.topic}: {e}")
+            handler_ms = (time.perf_counter() - start) * 1000
+
+            with self._condition:
+                self._busy = False
+                self.delivered += 1
+                self._condition.notify_all()
+            self.bus._record_delivery(self.topic, latency_ms, handler_ms, failed)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera a fila esvaziar e o handler terminar o evento atual.
+
+        Args:
+            timeout: Tempo máximo de espera (s; None = sem limite)
+
+        Returns:
+            True se a assinatura ficou ociosa
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._events and not self._busy, timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        Encerra a assinatura depois de entregar os eventos já enfileirados.
+
+        Args:
+            timeout: Tempo máximo de espera pela thread de entrega (s)
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if threading.current_thread() is not self._thread:
+            self._thread.join(timeout)
+
+
+class EventBus:
+    """
+    Barramento publicação/assinatura entre threads.
+
+    Cada assinante tem uma fila limitada e uma thread própria, então um
+    handler lento não atrasa quem publica nem os outros assinantes. O último
+    evento de cada tópico fica disponível em `get_latest`, o que substitui a
+    consulta repetida (polling) de estados como HUD e minimapa.
+    """
+
+    def __init__(self, block_timeout: float = 1.0, validate: bool = True,
+                 topic_settings: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Inicializa o barramento.
+
+        Args:
+            block_timeout: Espera máxima de quem publica em tópicos com política BLOCK (s)
+            validate: Se True, exige os campos de EVENT_FIELDS nos tópicos conhecidos
+            topic_settings: Padrões de fila por tópico ({"maxsize", "policy"}) sobre TOPIC_DEFAULTS
+        """
+        self.block_timeout = block_timeout
+        self.validate = validate
+        self.topic_settings = {topic: dict(settings) for topic, settings in TOPIC_DEFAULTS.items()}
+        for topic, settings in (topic_settings or {}).items():
+            self.topic_settings.setdefault(topic, dict(DEFAULT_SUBSCRIPTION)).update(settings or {})
+
+        self._lock = threading.Lock()
+        self._subscriptions = {}  # tópico -> lista de Subscription
+        self._latest = {}  # tópico -> último Event
+        self._stats = {}  # tópico -> TopicStats
+        self._sequence = 0
+        self._closed = False
+
+        atexit.register(self.close)
+
+    def subscribe(self, topic: str, handler: Callable[[Event], Any], maxsize: Optional[int] = None,
+                  policy: Optional[str] = None, name: Optional[str] = None) -> Subscription:
+        """
+        Assina um tópico.
+
+        Args:
+            topic: Tópico assinado
+            handler: Função chamada com cada Event, na thread da assinatura
+            maxsize: Tamanho da fila do assinante (None = padrão do tópico)
+            policy: DROP_OLDEST, DROP_NEWEST ou BLOCK (None = padrão do tópico)
+            name: Nome do assinante (para logs e métricas)
+
+        Returns:
+            Assinatura criada
+        """
+        defaults = self.topic_settings.get(topic, DEFAULT_SUBSCRIPTION)
+        policy = policy or defaults["policy"]
+        if policy not in (DROP_OLDEST, DROP_NEWEST, BLOCK):
+            raise ValueError(f"Política de descarte inválida: {policy}")
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Barramento de eventos encerrado")
+            subscriptions = self._subscriptions.setdefault(topic, [])
+            subscription = Subscription(
+                self, topic, handler,
+                maxsize if maxsize is not None else defaults["maxsize"], policy,
+                name or getattr(handler, "__qualname__", f"sub{len(subscriptions)}")
+            )
+            # Lista nova a cada alteração: publish percorre uma cópia estável sem lock
+            self._subscriptions[topic] = subscriptions + [subscription]
+            self._stats.setdefault(topic, TopicStats())
+
+        logger.debug(f"Assinatura '{subscription.name}' em {topic} ({subscription.policy}, {subscription.maxsize})")
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """
+        Cancela uma assinatura (os eventos já enfileirados ainda são entregues).
+
+        Args:
+            subscription: Assinatura a cancelar
+        """
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.topic, [])
+            self._subscriptions[subscription.topic] = [s for s in subscriptions if s is not subscription]
+        subscription.close()
+
+    def publish(self, topic: str, payload: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Publica um evento para todos os assinantes do tópico.
+
+        Args:
+            topic: Tópico do evento
+            payload: Dados do evento
+
+        Returns:
+            Número de assinantes que receberam o evento na fila
+
+        Raises:
+            ValueError: Se faltar um campo obrigatório de um tópico conhecido
+        """
+        payload = payload or {}
+        if self.validate:
+            missing = [field for field in EVENT_FIELDS.get(topic, ()) if field not in payload]
+            if missing:
+                raise ValueError(f"Evento {topic} sem os campos obrigatórios: {', '.join(missing)}")
+
+        with self._lock:
+            if self._closed:
+                return 0
+            self._sequence += 1
+            event = Event(topic, payload, self._sequence)
+            self._latest[topic] = event
+            self._stats.setdefault(topic, TopicStats()).published += 1
+            subscriptions = self._subscriptions.get(topic, [])
+
+        return sum(1 for subscription in subscriptions if subscription._offer(event))
+
+    def get_latest(self, topic: str, max_age_ms: Optional[float] = None) -> Optional[Event]:
+        """
+        Obtém o último evento publicado em um tópico.
+
+        Args:
+            topic: Tópico
+            max_age_ms: Idade máxima aceita (None = qualquer idade)
+
+        Returns:
+            Último evento ou None se não houver (ou se for mais antigo que max_age_ms)
+        """
+        with self._lock:
+            event = self._latest.get(topic)
+        if event is None or (max_age_ms is not None and event.age_ms() > max_age_ms):
+            return None
+        return event
+
+    def _record_drop(self, topic: str) -> None:
+        with self._lock:
+            self._stats[topic].dropped += 1
+
+    def _record_delivery(self, topic: str, latency_ms: float, handler_ms: float, failed: bool) -> None:
+        with self._lock:
+            stats = self._stats[topic]
+            stats.delivered += 1
+            stats.failed += int(failed)
+            stats.total_latency_ms += latency_ms
+            stats.max_latency_ms = max(stats.max_latency_ms, latency_ms)
+            stats.total_handler_ms += handler_ms
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera todos os assinantes processarem os eventos enfileirados.
+
+        Args:
+            timeout: Tempo máximo de espera (s; None = sem limite)
+
+        Returns:
+            True se todos os assinantes ficaram ociosos
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            subscriptions = [s for subs in self._subscriptions.values() for s in subs]
+        for subscription in subscriptions:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not subscription.wait_idle(remaining):
+                return False
+        return True
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Obtém métricas por tópico: publicações, entregas, descartes, acúmulo e latência.
+
+        Returns:
+            Dicionário tópico -> métricas
+        """
+        with self._lock:
+            return {
+                topic: stats.to_dict(
+                    sum(s.backlog for s in self._subscriptions.get(topic, [])),
+                    len(self._subscriptions.get(topic, []))
+                )
+                for topic, stats in self._stats.items()
+            }
+
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        Encerra o barramento entregando os eventos já enfileirados.
+
+        Args:
+            timeout: Tempo máximo de espera por assinatura (s)
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            subscriptions = [s for subs in self._subscriptions.values() for s in subs]
+
+        for subscription in subscriptions:
+            subscription.close(timeout)
+
+        try:
+            atexit.unregister(self.close)
+        except Exception:
+            pass
+        logger.info("Barramento de eventos encerrado")
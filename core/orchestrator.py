@@ -7,14 +7,21 @@ import os
 import logging
 import threading
 import time
-from typing import Dict, Any, Optional, List, Union, Callable
+from typing import Dict, Any, Optional, List, Union, Callable, Tuple, TYPE_CHECKING
 
 # Importar componentes do projeto usando caminhos absolutos
-from stt.stt_module import STTModule
-from llm.llm_module import LLMModule
-from tts.tts_module import TTSModule
 from profiles.profiles_manager import ProfilesManager
 from core.session_manager import SessionManager
+from core.speculative import SpeculativeGenerator
+from core.event_bus import EventBus, TRANSCRIPT, RESPONSE
+from core import tracing
+from core.startup import ComponentLoader, StartupProfiler
+from core.speech_gate import SpeechGate
+from memory.update_queue import PostResponseQueue
+from core.config import get_config, ROOT_DIR
+
+if TYPE_CHECKING:
+    from core.pipeline import VoicePipeline
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
@@ -29,14 +36,20 @@ class NinaOrchestrator:
     def __init__(self, 
                  data_dir: str = None,
                  profile_name: str = "default_profile",
-                 use_cuda: bool = True):
+                 use_cuda: bool = True,
+                 profiler: Optional[StartupProfiler] = None):
         """
         Inicializa o orquestrador.
         
+        STT, LLM e TTS são inicializados em paralelo em segundo plano; o
+        construtor retorna antes de os modelos carregarem e cada componente
+        bloqueia apenas quem o usa até ficar pronto (veja `wait_until_ready`).
+        
         Args:
             data_dir: Diretório para armazenar dados (None = usar padrão)
             profile_name: Nome do perfil a ser carregado
             use_cuda: Se deve usar GPU para aceleração
+            profiler: Registro dos tempos de partida (None = criar um novo)
         """
         self.data_dir = data_dir or os.path.join(
             os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
@@ -59,6 +72,27 @@ class NinaOrchestrator:
         self.is_speaking = False
         self.should_stop = False
         self.active_session_id = None
+        self.speculator = None
+        self.pipeline = None
+        self.memory_updates = None  # Gravações na memória depois da resposta (PostResponseQueue)
+        # A captura espera a fala terminar e descarta gravações com a voz da Nina (eco)
+        self.speech_gate = SpeechGate(guard_ms=get_config("pipeline.echo_guard_ms", 300))
+        
+        # Inicialização paralela dos componentes, com portões de prontidão
+        self.startup_profiler = profiler or StartupProfiler()
+        self.ready_timeout = get_config("startup.ready_timeout", 300.0)
+        self.components = ComponentLoader(
+            max_workers=get_config("startup.max_workers", 4),
+            parallel=get_config("startup.parallel", True),
+            profiler=self.startup_profiler
+        )
+        
+        # Barramento de eventos: transcrições e respostas são publicadas aqui; componentes
+        # externos (ex.: HUDStream, MinimapTracker, TeamCoach) podem receber `event_bus`
+        self.event_bus = EventBus(
+            block_timeout=get_config("events.block_timeout", 1.0),
+            topic_settings=get_config("events.topics", {})
+        )
         
         # Inicializar gerenciadores
         logger.info("Inicializando orquestrador Nina IA")
@@ -66,6 +100,7 @@ class NinaOrchestrator:
         
         # Inicializar componentes
         self._init_components()
+        self._init_memory()
         
         logger.info("Orquestrador Nina IA inicializado com sucesso")
     
@@ -99,46 +134,162 @@ class NinaOrchestrator:
     
     def _init_components(self) -> None:
         """
-        Inicializa os componentes STT, LLM e TTS com base no perfil.
+        Agenda a inicialização dos componentes STT, LLM e TTS com base no perfil.
+        
+        Os módulos pesados (Whisper, Coqui TTS, cliente do Ollama) são
+        importados apenas aqui, dentro das threads de inicialização.
         """
         try:
             # Obter configurações do perfil
             stt_settings = self.profile.get("stt", {})
             llm_settings = self.profile.get("llm", {})
             voice_settings = self.profile.get("voice", {})
+            profiler = self.startup_profiler
+            
+            def init_stt():
+                with profiler.measure("stt.stt_module", "import"):
+                    from stt.stt_module import STTModule
+                logger.info("Inicializando módulo STT")
+                return STTModule(
+                    model_size=stt_settings.get("model", "base"),
+                    device="cuda" if self.use_cuda else "cpu",
+                    compute_type="float16" if self.use_cuda else "float32",
+                    language=stt_settings.get("language", "pt")
+                )
+            
+            def init_llm():
+                with profiler.measure("llm.llm_module", "import"):
+                    from llm.llm_module import LLMModule
+                logger.info("Inicializando módulo LLM")
+                return LLMModule(
+                    model=llm_settings.get("model", "mistral"),
+                    personality_file=os.path.join(self.profiles_dir, f"{self.profile_name}.json"),
+                    conversation_dir=os.path.join(self.memory_dir, "conversations"),
+                    context_tokens=llm_settings.get("context_tokens", get_config("llm.context_tokens", 4096)),
+                    summarize_history=llm_settings.get("summarize_history", get_config("llm.summarize_history", True)),
+                    routing=llm_settings.get("routing", get_config("llm.routing"))
+                )
+            
+            def init_tts():
+                with profiler.measure("tts.tts_module", "import"):
+                    from tts.tts_module import TTSModule
+                logger.info("Inicializando módulo TTS")
+                return TTSModule(
+                    model_name=voice_settings.get("model", "tts_models/pt/cv/vits"),
+                    use_cuda=self.use_cuda,
+                    speaker=voice_settings.get("speaker"),
+                    language=voice_settings.get("language", "pt"),
+                    output_dir=os.path.join(self.memory_dir, "audio")
+                )
+            
+            self.components.submit("stt", init_stt)
+            self.components.submit("llm", init_llm)
+            self.components.submit("tts", init_tts)
+            
+            # Geração especulativa a partir de transcrições parciais (opcional)
+            if llm_settings.get("speculative_generation", get_config("llm.speculative_generation", False)):
+                self.speculator = SpeculativeGenerator(
+                    generate=self._generate_candidate,
+                    divergence_threshold=llm_settings.get(
+                        "speculative_divergence", get_config("llm.speculative_divergence", 0.2)
+                    )
+                )
+                logger.info("Geração especulativa habilitada")
+            else:
+                self.speculator = None
+            
+            logger.info("Inicialização dos componentes agendada")
             
-            # Inicializar STT
-            logger.info("Inicializando módulo STT")
-            self.stt = STTModule(
-                model_size=stt_settings.get("model", "base"),
-                device="cuda" if self.use_cuda else "cpu",
-                compute_type="float16" if self.use_cuda else "float32",
-                language=stt_settings.get("language", "pt")
-            )
-            
-            # Inicializar LLM
-            logger.info("Inicializando módulo LLM")
-            self.llm = LLMModule(
-                model=llm_settings.get("model", "mistral"),
-                personality_file=os.path.join(self.profiles_dir, f"{self.profile_name}.json"),
-                conversation_dir=os.path.join(self.memory_dir, "conversations")
+        except Exception as e:
+            logger.error(f"Erro ao inicializar componentes: {e}")
+            raise
+    
+    def _init_memory(self) -> None:
+        """
+        Agenda a inicialização do sistema de memória.
+        
+        A memória não depende do perfil e é criada uma única vez: trocar de
+        perfil não abre um segundo MemorySystem sobre o mesmo banco (com outra
+        fila de ingestão e outro índice gravando no mesmo arquivo de vetores).
+        """
+        if not get_config("memory.enabled", True):
+            return
+        profiler = self.startup_profiler
+        
+        # A gravação do turno roda depois da resposta, fora do caminho até o TTS
+        if get_config("memory.async_updates", True):
+            self.memory_updates = PostResponseQueue(
+                workers=1,
+                lag_warning_ms=get_config("memory.update_lag_warning_ms", 2000)
             )
-            
-            # Inicializar TTS
-            logger.info("Inicializando módulo TTS")
-            self.tts = TTSModule(
-                model_name=voice_settings.get("model", "tts_models/pt/cv/vits"),
-                use_cuda=self.use_cuda,
-                speaker=voice_settings.get("speaker"),
-                language=voice_settings.get("language", "pt"),
-                output_dir=os.path.join(self.memory_dir, "audio")
+        
+        def init_memory():
+            with profiler.measure("memory.memory_system", "import"):
+                from memory.memory_system import MemorySystem
+            logger.info("Inicializando sistema de memória")
+            return MemorySystem(
+                db_path=os.path.join(self.memory_dir, "memory.db"),
+                data_dir=os.path.join(self.memory_dir, "long_term"),
+                retention_days=get_config("memory.retention_days", None)
             )
+        
+        self.components.submit("memory", init_memory)
+    
+    @property
+    def stt(self):
+        """
+        Módulo STT (espera a inicialização terminar).
+        """
+        return self.components.get("stt", self.ready_timeout)
+    
+    @property
+    def llm(self):
+        """
+        Módulo LLM (espera a inicialização terminar).
+        """
+        return self.components.get("llm", self.ready_timeout)
+    
+    @property
+    def tts(self):
+        """
+        Módulo TTS (espera a inicialização terminar).
+        """
+        return self.components.get("tts", self.ready_timeout)
+    
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera todos os componentes terminarem de inicializar.
+        
+        Args:
+            timeout: Espera máxima em segundos (None = sem limite)
             
-            logger.info("Componentes inicializados com sucesso")
-            
+        Returns:
+            True se todos os componentes estão prontos
+        """
+        if not self.components.wait_all(timeout):
+            return False
+        return all(status["state"] == "ready" for status in self.components.get_status().values())
+    
+    def _stop_speaking(self) -> None:
+        """
+        Interrompe a fala, se o TTS já estiver pronto.
+        """
+        tts = self.components.peek("tts")
+        if tts is not None:
+            tts.stop_speaking()
+    
+    def _publish(self, topic: str, payload: Dict[str, Any]) -> None:
+        """
+        Publica um evento no barramento sem interromper a interação em caso de erro.
+        
+        Args:
+            topic: Tópico do evento
+            payload: Dados do evento
+        """
+        try:
+            self.event_bus.publish(topic, payload)
         except Exception as e:
-            logger.error(f"Erro ao inicializar componentes: {e}")
-            raise
+            logger.error(f"Erro ao publicar evento {topic}: {e}")
     
     def process_voice_input(self, 
                             max_duration: float = 30.0,
@@ -170,6 +321,7 @@ class NinaOrchestrator:
                 return None
             
             logger.info(f"Texto transcrito: '{text}'")
+            self._publish(TRANSCRIPT, {"text": text, "info": info, "session_id": self.active_session_id})
             
             # Adicionar mensagem à sessão
             self.session_manager.add_message(
@@ -186,6 +338,77 @@ class NinaOrchestrator:
             self.is_listening = False
             return None
     
+    def process_voice_interaction_speculative(self, 
+                                              max_duration: float = 30.0,
+                                              wait_timeout: float = 5.0) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Processa uma interação por voz iniciando a geração antes do fim da fala.
+        
+        A geração começa sobre uma transcrição parcial estável; se a transcrição
+        final divergir além do limiar, a resposta especulada é descartada e a
+        geração é refeita com o texto final.
+        
+        Args:
+            max_duration: Duração máxima da gravação em segundos
+            wait_timeout: Tempo máximo de espera por fala em segundos
+            
+        Returns:
+            Tuple contendo (texto transcrito, resposta gerada), com None em caso de falha
+        """
+        try:
+            self.speculator.reset()
+            self.is_listening = True
+            logger.info("Escutando entrada de voz (geração especulativa)...")
+            
+            text, info = self.stt.listen_and_transcribe_incremental(
+                on_partial=self.speculator.on_partial,
+                max_duration=max_duration,
+                wait_timeout=wait_timeout
+            )
+            
+            self.is_listening = False
+            
+            if not text:
+                logger.info("Nenhuma fala detectada ou erro na transcrição")
+                self.speculator.reset()
+                return None, None
+            
+            logger.info(f"Texto transcrito: '{text}'")
+            self._publish(TRANSCRIPT, {"text": text, "info": info, "session_id": self.active_session_id})
+            
+            self.is_processing = True
+            response = self.speculator.resolve(text)
+            self.is_processing = False
+            
+            if not response:
+                # Especulação descartada: gerar com a transcrição final
+                return text, self.process_text_input(text)
+            
+            self.llm.commit_response(text, response)
+            self._remember(text)
+            
+            self.session_manager.add_message(
+                session_id=self.active_session_id,
+                role="user",
+                content=text,
+                metadata=info
+            )
+            self.session_manager.add_message(
+                session_id=self.active_session_id,
+                role="assistant",
+                content=response
+            )
+            
+            logger.info(f"Resposta gerada: '{response[:100]}...'")
+            self._publish(RESPONSE, {"text": response, "input": text, "session_id": self.active_session_id})
+            return text, response
+            
+        except Exception as e:
+            logger.error(f"Erro ao processar entrada de voz: {e}")
+            self.is_listening = False
+            self.is_processing = False
+            return None, None
+    
     def process_text_input(self, text: str) -> Optional[str]:
         """
         Processa entrada de texto.
@@ -216,16 +439,23 @@ class NinaOrchestrator:
                 limit=10  # Limitar para as últimas 10 mensagens
             )
             
-            # Processar com LLM
-            response = self.llm.process_text(text)
+            # Processar com LLM, com o contexto de memória de longo prazo (tokens já estimados por bloco)
+            memory = self._memory_context(text)
+            response = self.llm.process_text(
+                text,
+                memory_context=memory["text"] if memory else None,
+                memory_tokens=memory["tokens"] if memory else None
+            )
             
             self.is_processing = False
+            self._remember(text)
             
             if not response:
                 logger.warning("Nenhuma resposta gerada")
                 return None
             
             logger.info(f"Resposta gerada: '{response[:100]}...'")
+            self._publish(RESPONSE, {"text": response, "input": text, "session_id": self.active_session_id})
             
             # Adicionar resposta à sessão
             self.session_manager.add_message(
@@ -241,6 +471,86 @@ class NinaOrchestrator:
             self.is_processing = False
             return None
     
+    def _generate_candidate(self, text: str, cancel_event: threading.Event) -> Optional[str]:
+        """
+        Gera a resposta especulativa de uma transcrição parcial, com o contexto de memória.
+        """
+        memory = self._memory_context(text)
+        return self.llm.generate_candidate(
+            text,
+            memory_context=memory["text"] if memory else None,
+            cancel_event=cancel_event,
+            memory_tokens=memory["tokens"] if memory else None
+        )
+    
+    def _memory_context(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Monta o contexto de memória do turno: perfil do usuário, canal e
+        memórias relacionadas ao texto (busca semântica).
+        
+        Args:
+            text: Texto do usuário no turno
+            
+        Returns:
+            Dicionário com "text" e "tokens" ou None se a memória está desativada, ainda carregando ou vazia
+        """
+        memory = self.components.peek("memory")
+        if memory is None:
+            return None
+        
+        # Ler depois das gravações pendentes do canal (turnos anteriores)
+        channel_id = get_config("memory.channel_id", "voz")
+        if self.memory_updates is not None and not self.memory_updates.wait_for_channel(
+                channel_id, get_config("memory.update_wait_timeout", 2.0)):
+            logger.warning("Gravações de memória ainda pendentes, seguindo sem esperar")
+        
+        try:
+            context = memory.get_prompt_context(
+                get_config("memory.user_id", "local"),
+                channel_id,
+                query=text,
+                related_limit=get_config("memory.related_limit", 3)
+            )
+            return context if context["text"] else None
+        except Exception as e:
+            logger.error(f"Erro ao obter contexto de memória: {e}")
+            return None
+    
+    def _remember(self, text: str) -> None:
+        """
+        Registra a fala do usuário na memória de longo prazo.
+        
+        A gravação vai para a fila pós-resposta (em ordem por canal) e só roda
+        de forma síncrona se a fila estiver desativada ou recusar a tarefa.
+        
+        Args:
+            text: Texto do usuário no turno
+        """
+        memory = self.components.peek("memory")
+        if memory is None:
+            return
+        
+        channel_id = get_config("memory.channel_id", "voz")
+        if self.memory_updates is not None:
+            if self.memory_updates.submit(channel_id, self._store_message, memory, channel_id, text):
+                return
+            logger.warning("Fila pós-resposta indisponível, gravando a memória de forma síncrona")
+        self._store_message(memory, channel_id, text)
+    
+    def _store_message(self, memory, channel_id: str, text: str) -> None:
+        """
+        Grava uma fala do usuário no sistema de memória.
+        """
+        memory.process_message(
+            user_id=get_config("memory.user_id", "local"),
+            username=get_config("memory.username", "Jogador"),
+            channel_id=channel_id,
+            guild_id="local",
+            channel_name=get_config("memory.channel_name", "conversa por voz"),
+            channel_type="voice",
+            content=text
+        )
+    
     def speak_response(self, text: str, blocking: bool = True) -> bool:
         """
         Sintetiza e reproduz uma resposta.
@@ -260,10 +570,12 @@ class NinaOrchestrator:
             logger.info(f"Falando resposta: '{text[:100]}...'")
             
             # Sintetizar e reproduzir
-            self.tts.speak(text, blocking=blocking)
-            
             if blocking:
+                with self.speech_gate.speaking():
+                    self.tts.speak(text, blocking=True)
                 self.is_speaking = False
+            else:
+                self.tts.speak(text, blocking=False)
             
             return True
             
@@ -287,16 +599,29 @@ class NinaOrchestrator:
         Returns:
             Resposta gerada ou None se falhou
         """
+        with tracing.trace_turn(), tracing.span("turn", voice=input_text is None):
+            return self._process_interaction(input_text, speak_response, blocking)
+    
+    def _process_interaction(self, 
+                             input_text: Optional[str],
+                             speak_response: bool,
+                             blocking: bool) -> Optional[str]:
+        """
+        Executa uma interação completa (veja `process_interaction`).
+        """
         try:
             # Obter entrada
-            if input_text is None:
-                input_text = self.process_voice_input()
+            if input_text is None and self.speculator:
+                input_text, response = self.process_voice_interaction_speculative()
+            else:
+                if input_text is None:
+                    input_text = self.process_voice_input()
+                    
+                    if not input_text:
+                        return None
                 
-                if not input_text:
-                    return None
-            
-            # Processar texto
-            response = self.process_text_input(input_text)
+                # Processar texto
+                response = self.process_text_input(input_text)
             
             if not response:
                 return None
@@ -311,6 +636,101 @@ class NinaOrchestrator:
             logger.error(f"Erro ao processar interação: {e}")
             return None
     
+    def _capture_utterance(self, max_duration: float = 30.0, wait_timeout: float = 5.0) -> Optional[str]:
+        """
+        Etapa de captura do pipeline: espera por fala e grava o trecho.
+        
+        Não grava enquanto a Nina fala (nem durante `pipeline.echo_guard_ms`
+        depois), e descarta a gravação se uma fala começou durante ela, para
+        que a própria voz da Nina não vire uma nova entrada.
+        
+        Args:
+            max_duration: Duração máxima da gravação em segundos
+            wait_timeout: Tempo máximo de espera por fala em segundos
+            
+        Returns:
+            Caminho do áudio gravado ou None se não houve fala (ou foi descartada)
+        """
+        if not self.speech_gate.wait_until_quiet(lambda: self.should_stop):
+            return None
+        
+        epoch = self.speech_gate.epoch
+        self.is_listening = True
+        try:
+            audio_file = self.stt.record_utterance(max_duration=max_duration, wait_timeout=wait_timeout)
+        finally:
+            self.is_listening = False
+        
+        if audio_file and self.speech_gate.overlapped(epoch):
+            logger.info("Gravação descartada: a Nina falou durante a captura")
+            try:
+                os.remove(audio_file)
+            except OSError:
+                pass
+            return None
+        return audio_file
+    
+    def _transcribe_utterance(self, audio_file: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Etapa de transcrição do pipeline: transcreve o áudio gravado e publica a transcrição.
+        
+        Args:
+            audio_file: Caminho do áudio gravado
+            
+        Returns:
+            Tuple contendo (texto transcrito, informações adicionais)
+        """
+        text, info = self.stt.transcribe_utterance(audio_file)
+        if text:
+            logger.info(f"Texto transcrito: '{text}'")
+            self._publish(TRANSCRIPT, {"text": text, "info": info, "session_id": self.active_session_id})
+        return text, info
+    
+    def create_pipeline(self, 
+                        callback: Optional[Callable[[str, str], None]] = None,
+                        speak: Optional[Callable[[str], Any]] = None) -> "VoicePipeline":
+        """
+        Cria o pipeline de voz assíncrono (captura → transcrição → LLM → TTS).
+        
+        O pipeline criado passa a ser o ativo: `stop_continuous_interaction` o
+        cancela, mesmo que `run_forever` ainda não tenha começado.
+        
+        Args:
+            callback: Função a ser chamada com (entrada, resposta) após cada interação
+            speak: Etapa de fala (None = `speak_response` bloqueante)
+            
+        Returns:
+            Pipeline pronto para `run_forever`
+        """
+        from core.pipeline import VoicePipeline  # asyncio só é carregado no modo contínuo
+        
+        self.should_stop = False
+        self.pipeline = VoicePipeline(
+            capture=self._capture_utterance,
+            transcribe=self._transcribe_utterance,
+            think=self.process_text_input,
+            speak=self._gated_speak(speak) if speak else (lambda text: self.speak_response(text, blocking=True)),
+            queue_size=get_config("pipeline.queue_size", 2),
+            on_turn=(lambda turn: callback(turn.text, turn.response)) if callback else None,
+            interrupt=self._stop_speaking
+        )
+        return self.pipeline
+    
+    def _gated_speak(self, speak: Callable[[str], Any]) -> Callable[[str], Any]:
+        """
+        Marca a fala de uma etapa de fala externa no controle de captura.
+        
+        Args:
+            speak: Função que fala o texto e bloqueia até o fim da reprodução
+            
+        Returns:
+            Função equivalente que pausa a captura enquanto fala
+        """
+        def gated(text: str) -> Any:
+            with self.speech_gate.speaking():
+                return speak(text)
+        return gated
+    
     def start_continuous_interaction(self, 
                                      callback: Optional[Callable[[str, str], None]] = None,
                                      use_wake_word: bool = False,
@@ -318,11 +738,21 @@ class NinaOrchestrator:
         """
         Inicia interação contínua em um thread separado.
         
+        Usa o pipeline assíncrono (a captura continua enquanto a Nina pensa ou
+        fala) se `pipeline.enabled` estiver ativo e a geração especulativa não,
+        que precisa da transcrição incremental no mesmo laço da captura.
+        
         Args:
             callback: Função a ser chamada com (entrada, resposta) após cada interação
             use_wake_word: Se deve aguardar palavra de ativação
             wake_word: Palavra de ativação
         """
+        if get_config("pipeline.enabled", False) and not self.speculator:
+            self.interaction_thread = threading.Thread(target=self.create_pipeline(callback).run_forever)
+            self.interaction_thread.daemon = True
+            self.interaction_thread.start()
+            return
+        
         def interaction_loop():
             logger.info("Iniciando loop de interação contínua")
             
@@ -333,14 +763,18 @@ class NinaOrchestrator:
                     # TODO: Implementar detecção de palavra de ativação
                     # Por enquanto, apenas escuta continuamente
                     
-                    # Processar entrada de voz
-                    input_text = self.process_voice_input()
-                    
-                    if not input_text:
-                        continue
-                    
-                    # Processar texto
-                    response = self.process_text_input(input_text)
+                    if self.speculator:
+                        # Entrada de voz com geração especulativa
+                        input_text, response = self.process_voice_interaction_speculative()
+                    else:
+                        # Processar entrada de voz
+                        input_text = self.process_voice_input()
+                        
+                        if not input_text:
+                            continue
+                        
+                        # Processar texto
+                        response = self.process_text_input(input_text)
                     
                     if not response:
                         continue
@@ -367,13 +801,17 @@ class NinaOrchestrator:
         """
         self.should_stop = True
         
+        # Cancelar todas as etapas do pipeline (também interrompe a fala)
+        if self.pipeline:
+            self.pipeline.stop()
+        
         # Parar componentes ativos
         if self.is_listening:
             # TODO: Implementar parada de escuta
             pass
         
         if self.is_speaking:
-            self.tts.stop_speaking()
+            self._stop_speaking()
     
     def change_profile(self, profile_name: str) -> bool:
         """
@@ -508,9 +946,32 @@ class NinaOrchestrator:
             "is_speaking": self.is_speaking,
             "active_session_id": self.active_session_id,
             "profile_name": self.profile_name,
-            "use_cuda": self.use_cuda
+            "use_cuda": self.use_cuda,
+            "speculation": self.speculator.get_stats() if self.speculator else None,
+            "llm_latency": self.llm.get_latency_stats() if self.components.is_ready("llm") else None,
+            "components": self.components.get_status(),
+            "events": self.event_bus.get_stats(),
+            "pipeline": self.pipeline.get_stats() if self.pipeline else None,
+            "memory": self._memory_status(),
+            "memory_updates": self.memory_updates.get_stats() if self.memory_updates else None
         }
     
+    def _memory_status(self) -> Optional[Dict[str, Any]]:
+        """
+        Métricas do sistema de memória (ingestão, cache de contexto e blocos de prompt).
+        
+        Returns:
+            Dicionário de `MemorySystem.get_status` ou None se a memória está desativada ou carregando
+        """
+        memory = self.components.peek("memory")
+        if memory is None:
+            return None
+        try:
+            return memory.get_status()
+        except Exception as e:
+            logger.error(f"Erro ao obter status da memória: {e}")
+            return None
+    
     def cleanup(self) -> None:
         """
         Limpa recursos e finaliza componentes.
@@ -521,21 +982,22 @@ class NinaOrchestrator:
             # Parar interação contínua
             self.stop_continuous_interaction()
             
-            # Finalizar componentes
-            if hasattr(self, 'stt'):
-                # Finalizar STT se tiver método específico
-                if hasattr(self.stt, 'cleanup'):
-                    self.stt.cleanup()
-                
-            if hasattr(self, 'llm'):
-                # Finalizar LLM se tiver método específico
-                if hasattr(self.llm, 'cleanup'):
-                    self.llm.cleanup()
-                
-            if hasattr(self, 'tts'):
-                # Finalizar TTS
-                if hasattr(self.tts, 'cleanup'):
-                    self.tts.cleanup()
+            # Finalizar componentes já inicializados (sem esperar os que ainda carregam)
+            self.components.shutdown()
+            for name in ("stt", "llm", "tts"):
+                component = self.components.peek(name)
+                if component is not None and hasattr(component, 'cleanup'):
+                    component.cleanup()
+            
+            # Gravar as interações pendentes e o índice semântico
+            if self.memory_updates is not None:
+                self.memory_updates.close(get_config("memory.update_close_timeout", 10.0))
+            memory = self.components.peek("memory")
+            if memory is not None:
+                memory.close()
+            
+            # Entregar os eventos pendentes e encerrar o barramento
+            self.event_bus.close()
             
             logger.info("Componentes finalizados com sucesso")
             
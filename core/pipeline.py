@@ -0,0 +1,363 @@
+"""
+Pipeline de voz assíncrono do projeto Nina IA.
+Executa captura, transcrição, geração e fala como etapas independentes ligadas
+por filas limitadas, para que a captura continue enquanto a Nina pensa ou fala.
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Callable, Optional
+
+from core import tracing
+from llm.model_router import LatencyHistogram
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Etapas na ordem do pipeline
+STAGES = ("capture", "transcribe", "think", "speak")
+
+
+class Turn:
+    """
+    Uma interação atravessando o pipeline, com os instantes de início e fim de cada etapa.
+    """
+
+    __slots__ = ("turn_id", "audio", "text", "info", "response", "timings")
+
+    def __init__(self, turn_id: int):
+        self.turn_id = turn_id
+        self.audio = None
+        self.text = None
+        self.info = {}
+        self.response = None
+        self.timings = {}  # etapa -> [início, fim] (perf_counter)
+
+    def duration_ms(self, stage: str) -> float:
+        """
+        Duração de uma etapa (ms).
+        """
+        start, end = self.timings[stage]
+        return (end - start) * 1000
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Resumo do turno com as latências (ms).
+
+        Returns:
+            Dicionário com texto, resposta e latências por etapa
+        """
+        result = {
+            "turn_id": self.turn_id,
+            "text": self.text,
+            "response": self.response,
+            "stages_ms": {stage: round(self.duration_ms(stage), 3) for stage in STAGES if stage in self.timings}
+        }
+        if "speak" in self.timings:
+            # Do fim da fala do usuário ao início da resposta falada
+            result["response_latency_ms"] = round((self.timings["speak"][0] - self.timings["capture"][1]) * 1000, 3)
+            result["end_to_end_ms"] = round((self.timings["speak"][1] - self.timings["capture"][0]) * 1000, 3)
+        return result
+
+
+class VoicePipeline:
+    """
+    Pipeline asyncio com uma tarefa por etapa e filas limitadas entre elas.
+
+    As funções das etapas são bloqueantes e rodam em um executor (uma thread
+    por etapa), então enquanto uma resposta é gerada ou falada a etapa de
+    captura já grava a próxima fala. Quando uma fila enche, a etapa anterior
+    espera (back-pressure) em vez de acumular turnos. Ao parar, o cancelamento
+    se propaga para todas as etapas e `interrupt` é chamado para liberar a
+    etapa bloqueada (ex.: interromper a fala).
+    """
+
+    def __init__(self,
+                 capture: Callable[[], Any],
+                 transcribe: Callable[[Any], Any],
+                 think: Callable[[str], Optional[str]],
+                 speak: Callable[[str], Any],
+                 queue_size: int = 2,
+                 on_turn: Optional[Callable[[Turn], None]] = None,
+                 interrupt: Optional[Callable[[], None]] = None,
+                 history_size: int = 50):
+        """
+        Inicializa o pipeline.
+
+        Args:
+            capture: Grava uma fala; retorna o áudio ou None se não houve fala
+            transcribe: Transcreve o áudio; retorna o texto ou (texto, info)
+            think: Gera a resposta para um texto; retorna None se falhou
+            speak: Fala a resposta, bloqueando até o fim
+            queue_size: Tamanho de cada fila entre etapas
+            on_turn: Função chamada com cada turno concluído
+            interrupt: Função chamada ao parar, para liberar etapas bloqueadas
+            history_size: Número de turnos recentes mantidos nas métricas
+        """
+        self.stage_functions = {
+            "capture": capture,
+            "transcribe": transcribe,
+            "think": think,
+            "speak": speak
+        }
+        self.queue_size = max(1, queue_size)
+        self.on_turn = on_turn
+        self.interrupt = interrupt
+
+        self._loop = None
+        self._main_task = None
+        self._executor = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._turn_counter = 0
+
+        # Métricas
+        self.completed = 0
+        self.discarded = 0
+        self.failed = 0
+        self.stage_latency = {stage: LatencyHistogram() for stage in STAGES}
+        self.queue_wait = {stage: LatencyHistogram() for stage in STAGES[1:]}
+        self.response_latency = LatencyHistogram()
+        self.end_to_end = LatencyHistogram()
+        self.recent_turns = deque(maxlen=history_size)
+        self._queues = {}
+
+    @property
+    def is_running(self) -> bool:
+        """
+        Indica se o pipeline está em execução.
+        """
+        return self._main_task is not None and not self._main_task.done()
+
+    async def _call(self, stage: str, turn: Turn, *args) -> Any:
+        """
+        Executa a função de uma etapa no executor, medindo a duração.
+        """
+        start = time.perf_counter()
+        try:
+            return await self._loop.run_in_executor(self._executor, self._run_stage, stage, turn.turn_id, args)
+        finally:
+            end = time.perf_counter()
+            turn.timings[stage] = [start, end]
+            with self._lock:
+                self.stage_latency[stage].observe((end - start) * 1000)
+
+    def _run_stage(self, stage: str, turn_id: int, args: tuple) -> Any:
+        """
+        Executa a função de uma etapa (na thread do executor) dentro do span do turno.
+        Todas as etapas de um turno usam o mesmo trace; a fala o conclui.
+        """
+        complete = stage == STAGES[-1]
+        with tracing.trace_turn(f"turn-{turn_id}", complete), tracing.span(f"pipeline.{stage}", turn=turn_id):
+            return self.stage_functions[stage](*args)
+    
+    async def _put(self, stage: str, turn: Turn) -> None:
+        """
+        Entrega um turno para a próxima etapa (espera se a fila estiver cheia).
+        """
+        await self._queues[stage].put((time.perf_counter(), turn))
+
+    async def _get(self, stage: str) -> Turn:
+        """
+        Obtém o próximo turno de uma etapa, registrando o tempo de espera na fila.
+        """
+        enqueued_at, turn = await self._queues[stage].get()
+        with self._lock:
+            self.queue_wait[stage].observe((time.perf_counter() - enqueued_at) * 1000)
+        return turn
+
+    def _drop(self, turn: Turn, stage: str, error: Optional[Exception] = None) -> None:
+        """
+        Descarta um turno que não segue para a próxima etapa.
+        """
+        with self._lock:
+            if error is not None:
+                self.failed += 1
+                logger.error(f"Erro na etapa {stage} do turno {turn.turn_id}: {error}")
+            else:
+                self.discarded += 1
+
+    async def _capture_stage(self) -> None:
+        """
+        Grava falas continuamente, inclusive enquanto as outras etapas trabalham.
+        """
+        while True:
+            with self._lock:
+                self._turn_counter += 1
+                turn = Turn(self._turn_counter)
+            try:
+                turn.audio = await self._call("capture", turn)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._drop(turn, "capture", e)
+                await asyncio.sleep(1)  # Evitar loop infinito em caso de erro
+                continue
+
+            if not turn.audio:
+                continue
+            await self._put("transcribe", turn)
+
+    async def _transcribe_stage(self) -> None:
+        """
+        Transcreve os áudios capturados.
+        """
+        while True:
+            turn = await self._get("transcribe")
+            try:
+                result = await self._call("transcribe", turn, turn.audio)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._drop(turn, "transcribe", e)
+                continue
+
+            turn.audio = None
+            turn.text, turn.info = result if isinstance(result, tuple) else (result, {})
+            if not turn.text:
+                self._drop(turn, "transcribe")
+                continue
+            await self._put("think", turn)
+
+    async def _think_stage(self) -> None:
+        """
+        Gera as respostas para as transcrições.
+        """
+        while True:
+            turn = await self._get("think")
+            try:
+                turn.response = await self._call("think", turn, turn.text)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._drop(turn, "think", e)
+                continue
+
+            if not turn.response:
+                self._drop(turn, "think")
+                continue
+            await self._put("speak", turn)
+
+    async def _speak_stage(self) -> None:
+        """
+        Fala as respostas na ordem em que foram geradas.
+        """
+        while True:
+            turn = await self._get("speak")
+            try:
+                await self._call("speak", turn, turn.response)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._drop(turn, "speak", e)
+                continue
+            self._record(turn)
+
+    def _record(self, turn: Turn) -> None:
+        """
+        Registra as latências de um turno concluído.
+        """
+        summary = turn.to_dict()
+        with self._lock:
+            self.completed += 1
+            self.response_latency.observe(summary["response_latency_ms"])
+            self.end_to_end.observe(summary["end_to_end_ms"])
+            self.recent_turns.append(summary)
+
+        logger.info(f"Turno {turn.turn_id} concluído: resposta em {summary['response_latency_ms']:.0f} ms "
+                    f"(etapas: {summary['stages_ms']})")
+
+        if self.on_turn:
+            try:
+                self.on_turn(turn)
+            except Exception as e:
+                logger.error(f"Erro no callback do turno {turn.turn_id}: {e}")
+
+    async def run(self) -> None:
+        """
+        Executa o pipeline até ser cancelado (ou até `stop`).
+        """
+        self._loop = asyncio.get_running_loop()
+        self._main_task = asyncio.current_task()
+        self._queues = {stage: asyncio.Queue(maxsize=self.queue_size) for stage in STAGES[1:]}
+        self._executor = ThreadPoolExecutor(max_workers=len(STAGES), thread_name_prefix="nina-pipeline")
+
+        tasks = [
+            asyncio.create_task(self._capture_stage(), name="pipeline-capture"),
+            asyncio.create_task(self._transcribe_stage(), name="pipeline-transcribe"),
+            asyncio.create_task(self._think_stage(), name="pipeline-think"),
+            asyncio.create_task(self._speak_stage(), name="pipeline-speak")
+        ]
+        logger.info("Pipeline de voz iniciado")
+
+        try:
+            if self._stopping.is_set():
+                return
+            await asyncio.gather(*tasks)
+        finally:
+            # Cancelamento (ou falha) de uma etapa encerra todas
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+            pending = sum(queue.qsize() for queue in self._queues.values())
+            with self._lock:
+                self.discarded += pending
+            # Etapas bloqueadas no executor terminam sozinhas; não esperar por elas
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            logger.info(f"Pipeline de voz encerrado ({pending} turnos pendentes descartados)")
+
+    def run_forever(self) -> None:
+        """
+        Executa o pipeline na thread atual, bloqueando até `stop`.
+        """
+        try:
+            asyncio.run(self.run())
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Erro no pipeline de voz: {e}")
+
+    def stop(self) -> None:
+        """
+        Para o pipeline a partir de qualquer thread, cancelando todas as etapas.
+        """
+        self._stopping.set()
+        loop, task = self._loop, self._main_task
+        if loop is not None and task is not None and not task.done():
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                pass  # Loop já encerrado
+
+        if self.interrupt:
+            try:
+                self.interrupt()
+            except Exception as e:
+                logger.error(f"Erro ao interromper etapa do pipeline: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtém as latências por etapa e de ponta a ponta, e o estado das filas.
+
+        Returns:
+            Dicionário com contadores, histogramas (p50/p95) e turnos recentes
+        """
+        with self._lock:
+            return {
+                "running": self.is_running,
+                "completed": self.completed,
+                "discarded": self.discarded,
+                "failed": self.failed,
+                "queues": {stage: queue.qsize() for stage, queue in self._queues.items()},
+                "stages": {stage: histogram.to_dict() for stage, histogram in self.stage_latency.items()},
+                "queue_wait": {stage: histogram.to_dict() for stage, histogram in self.queue_wait.items()},
+                "response_latency": self.response_latency.to_dict(),
+                "end_to_end": self.end_to_end.to_dict(),
+                "recent_turns": list(self.recent_turns)[-5:]
+            }
@@ -6,19 +6,113 @@ Parte do projeto Nina IA para gerenciamento de contexto de conversas.
 import os
 import json
 import logging
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Optional, Union, Iterator, Tuple
 from datetime import datetime
 
 from memory.memory_manager import MemoryManager
+from memory.session_store import SessionStore
 
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Mensagens gravadas por transação ao importar uma sessão
+IMPORT_BATCH_SIZE = 500
+
+# Tamanho dos blocos lidos do arquivo ao importar
+_READ_CHUNK = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+
+
+class _JsonObjectReader:
+    """
+    Lê um objeto JSON de primeiro nível chave a chave, entregando os itens
+    de uma lista (ex.: "messages") um de cada vez, sem carregar o arquivo inteiro.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        chunk = self.f.read(_READ_CHUNK)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _peek(self) -> str:
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                raise ValueError("Fim inesperado do arquivo JSON")
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise ValueError(f"JSON inválido: esperado '{char}' na posição {self.pos}")
+        self.pos += 1
+
+    def _value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # Um número no fim do bloco pode continuar no próximo
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def items(self, list_keys: Tuple[str, ...]) -> Iterator[Tuple[str, Any]]:
+        """
+        Percorre as chaves do objeto; para as chaves em `list_keys`, entrega
+        (chave, item) para cada item da lista em vez da lista inteira.
+        """
+        self._expect("{")
+        if self._peek() == "}":
+            return
+        while True:
+            key = self._value()
+            self._expect(":")
+            if key in list_keys and self._peek() == "[":
+                self.pos += 1
+                if self._peek() != "]":
+                    while True:
+                        yield key, self._value()
+                        if self._peek() == ",":
+                            self.pos += 1
+                            continue
+                        break
+                self._expect("]")
+            else:
+                yield key, self._value()
+            if self._peek() == ",":
+                self.pos += 1
+                continue
+            self._expect("}")
+            return
+
+
 class SessionManager:
     """
     Gerenciador de sessões de conversa.
+    
+    Sessões e mensagens são persistidas em SQLite (`SessionStore`, no mesmo
+    banco do MemoryManager); `active_sessions` guarda apenas os metadados
+    das sessões já consultadas.
     """
     
     def __init__(self, memory_dir: str = None):
@@ -29,10 +123,20 @@ class SessionManager:
             memory_dir: Diretório para armazenar dados de memória (None = usar padrão)
         """
         self.memory_manager = MemoryManager(memory_dir)
+        self.store = SessionStore(self.memory_manager.db_path)
         self.active_sessions = {}
         
         logger.info("Gerenciador de sessões inicializado")
     
+    def _new_session_id(self) -> str:
+        """
+        Gera um ID de sessão ainda não usado.
+        """
+        session_id = self.memory_manager.generate_session_id()
+        while self.store.get_session(session_id) is not None:
+            session_id = self.memory_manager.generate_session_id()
+        return session_id
+    
     def create_session(self, session_name: Optional[str] = None) -> str:
         """
         Cria uma nova sessão de conversa.
@@ -43,7 +147,7 @@ class SessionManager:
         Returns:
             ID da sessão criada
         """
-        session_id = self.memory_manager.generate_session_id()
+        session_id = self._new_session_id()
         
         # Armazenar metadados da sessão
         metadata = {
@@ -52,7 +156,7 @@ class SessionManager:
             "last_activity": datetime.now().isoformat()
         }
         
-       #self.memory_manager.store_user_info(f"session:{session_id}", metadata)
+        self.store.save_session(session_id, metadata)
         
         # Adicionar à lista de sessões ativas
         self.active_sessions[session_id] = metadata
@@ -75,7 +179,7 @@ class SessionManager:
             return self.active_sessions[session_id]
         
         # Buscar no armazenamento
-        metadata = self.memory_manager.get_user_info(f"session:{session_id}")
+        metadata = self.store.get_session(session_id)
         
         if metadata:
             # Adicionar ao cache
@@ -89,23 +193,9 @@ class SessionManager:
         Lista todas as sessões.
         
         Returns:
-            Lista de metadados de sessões
+            Lista de metadados de sessões (mais recente primeiro)
         """
-        all_info = self.memory_manager.get_all_user_info()
-        
-        sessions = []
-        for key, value in all_info.items():
-            if key.startswith("session:"):
-                session_id = key.split(":", 1)[1]
-                sessions.append({
-                    "id": session_id,
-                    **value
-                })
-        
-        # Ordenar por data de última atividade (mais recente primeiro)
-        sessions.sort(key=lambda s: s.get("last_activity", ""), reverse=True)
-        
-        return sessions
+        return self.store.list_sessions()
     
     def update_session_activity(self, session_id: str) -> bool:
         """
@@ -127,13 +217,7 @@ class SessionManager:
         metadata["last_activity"] = datetime.now().isoformat()
         
         # Atualizar no armazenamento
-        result = self.memory_manager.store_user_info(f"session:{session_id}", metadata)
-        
-        # Atualizar no cache
-        if result:
-            self.active_sessions[session_id] = metadata
-        
-        return result
+        return self.store.touch(session_id, metadata["last_activity"])
     
     def rename_session(self, session_id: str, new_name: str) -> bool:
         """
@@ -152,18 +236,16 @@ class SessionManager:
             logger.error(f"Sessão não encontrada: {session_id}")
             return False
         
-        # Atualizar nome
-        metadata["name"] = new_name
-        
-        # Atualizar no armazenamento
-        result = self.memory_manager.store_user_info(f"session:{session_id}", metadata)
-        
-        # Atualizar no cache
-        if result:
-            self.active_sessions[session_id] = metadata
+        try:
+            # Atualizar nome
+            metadata["name"] = new_name
+            self.store.save_session(session_id, metadata)
             logger.info(f"Sessão renomeada: {session_id} -> {new_name}")
-        
-        return result
+            return True
+            
+        except Exception as e:
+            logger.error(f"Erro ao renomear sessão: {e}")
+            return False
     
     def delete_session(self, session_id: str) -> bool:
         """
@@ -180,15 +262,11 @@ class SessionManager:
             logger.error(f"Sessão não encontrada: {session_id}")
             return False
         
-        # Limpar histórico de conversas
-        self.memory_manager.clear_conversation_history(session_id)
-        
-        # Remover metadados da sessão
-        result = self.memory_manager.delete_user_info(f"session:{session_id}")
+        # Remover mensagens e metadados da sessão
+        result = self.store.delete_session(session_id)
         
         # Remover do cache
-        if session_id in self.active_sessions:
-            del self.active_sessions[session_id]
+        self.active_sessions.pop(session_id, None)
         
         if result:
             logger.info(f"Sessão excluída: {session_id}")
@@ -213,20 +291,20 @@ class SessionManager:
             ID da mensagem adicionada
         """
         # Verificar se a sessão existe
-        if not self.get_session(session_id):
+        session = self.get_session(session_id)
+        if not session:
             logger.error(f"Sessão não encontrada: {session_id}")
             return -1
         
-        # Atualizar timestamp de atividade
-        self.update_session_activity(session_id)
-        
-        # Adicionar mensagem
-        return self.memory_manager.add_conversation_message(
-            session_id=session_id,
-            role=role,
-            content=content,
-            metadata=metadata
-        )
+        try:
+            # Adicionar mensagem (também atualiza a última atividade)
+            message_id = self.store.add_message(session_id, role, content, metadata)
+            session["last_activity"] = datetime.now().isoformat()
+            return message_id
+            
+        except Exception as e:
+            logger.error(f"Erro ao adicionar mensagem: {e}")
+            return -1
     
     def get_messages(self, 
                      session_id: str,
@@ -237,22 +315,18 @@ class SessionManager:
         
         Args:
             session_id: ID da sessão
-            limit: Número máximo de mensagens a retornar (None = sem limite)
+            limit: Número máximo de mensagens mais recentes a retornar (None = sem limite)
             roles: Lista de papéis a filtrar (None = todos)
             
         Returns:
-            Lista de mensagens
+            Lista de mensagens em ordem cronológica
         """
         # Verificar se a sessão existe
         if not self.get_session(session_id):
             logger.error(f"Sessão não encontrada: {session_id}")
             return []
         
-        return self.memory_manager.get_conversation_history(
-            session_id=session_id,
-            limit=limit,
-            roles=roles
-        )
+        return self.store.get_messages(session_id, limit=limit, roles=roles)
     
     def get_messages_for_llm(self, 
                              session_id: str,
@@ -260,6 +334,9 @@ class SessionManager:
         """
         Obtém mensagens formatadas para envio ao LLM.
         
+        Lê apenas as últimas `limit` mensagens pelo índice, sem carregar o
+        histórico completo.
+        
         Args:
             session_id: ID da sessão
             limit: Número máximo de mensagens a retornar (None = sem limite)
@@ -272,10 +349,10 @@ class SessionManager:
             logger.error(f"Sessão não encontrada: {session_id}")
             return []
         
-        return self.memory_manager.get_conversation_messages_for_llm(
-            session_id=session_id,
-            limit=limit
-        )
+        return [
+            {"role": message["role"], "content": message["content"]}
+            for message in self.store.get_messages(session_id, limit=limit)
+        ]
     
     def clear_session_history(self, session_id: str) -> bool:
         """
@@ -292,12 +369,20 @@ class SessionManager:
             logger.error(f"Sessão não encontrada: {session_id}")
             return False
         
-        return self.memory_manager.clear_conversation_history(session_id)
+        try:
+            self.store.clear_messages(session_id)
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao limpar histórico da sessão: {e}")
+            return False
     
     def export_session(self, session_id: str, output_file: str) -> bool:
         """
         Exporta uma sessão para um arquivo JSON.
         
+        As mensagens são lidas do banco em lotes e gravadas uma a uma (uma por
+        linha), então sessões grandes não são carregadas inteiras na memória.
+        
         Args:
             session_id: ID da sessão
             output_file: Caminho para o arquivo de saída
@@ -312,21 +397,21 @@ class SessionManager:
             return False
         
         try:
-            # Obter histórico de mensagens
-            messages = self.memory_manager.get_conversation_history(session_id)
-            
-            # Criar estrutura de exportação
-            export_data = {
-                "session_id": session_id,
-                "metadata": metadata,
-                "messages": messages
-            }
-            
-            # Salvar em arquivo
+            # Mesma estrutura de antes: {"session_id", "metadata", "messages": [...]}
             with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(export_data, f, ensure_ascii=False, indent=2)
+                f.write('{\n')
+                f.write(f'  "session_id": {json.dumps(session_id)},\n')
+                f.write(f'  "metadata": {json.dumps(metadata, ensure_ascii=False)},\n')
+                f.write('  "messages": [')
+                count = 0
+                for message in self.store.iter_messages(session_id):
+                    message.pop("id", None)
+                    f.write(',\n    ' if count else '\n    ')
+                    f.write(json.dumps(message, ensure_ascii=False))
+                    count += 1
+                f.write('\n  ]\n}\n' if count else ']\n}\n')
             
-            logger.info(f"Sessão exportada: {session_id} -> {output_file}")
+            logger.info(f"Sessão exportada: {session_id} -> {output_file} ({count} mensagens)")
             return True
             
         except Exception as e:
@@ -337,6 +422,10 @@ class SessionManager:
         """
         Importa uma sessão de um arquivo JSON.
         
+        O arquivo é lido de forma incremental e as mensagens são gravadas em
+        lotes de IMPORT_BATCH_SIZE; se a importação falhar, a sessão parcial
+        é removida.
+        
         Args:
             input_file: Caminho para o arquivo de entrada
             new_session_id: ID para a nova sessão (None = gerar novo)
@@ -344,43 +433,53 @@ class SessionManager:
         Returns:
             ID da sessão importada ou None se falhou
         """
+        # Gerar novo ID de sessão se não especificado
+        session_id = new_session_id or self._new_session_id()
+        if self.store.get_session(session_id) is not None:
+            logger.error(f"Sessão já existe: {session_id}")
+            return None
+        
+        now = datetime.now().isoformat()
+        metadata = {"name": f"Sessão importada {now[:16]}", "created_at": now}
+        source_id = None
+        count = 0
+        
         try:
-            # Carregar arquivo
-            with open(input_file, 'r', encoding='utf-8') as f:
-                import_data = json.load(f)
+            self.store.save_session(session_id, dict(metadata, last_activity=now))
             
-            # Extrair dados
-            metadata = import_data.get("metadata", {})
-            messages = import_data.get("messages", [])
-            
-            # Gerar novo ID de sessão se não especificado
-            session_id = new_session_id or self.memory_manager.generate_session_id()
+            with open(input_file, 'r', encoding='utf-8') as f:
+                batch = []
+                for key, value in _JsonObjectReader(f).items(("messages",)):
+                    if key == "messages":
+                        batch.append(value)
+                        if len(batch) >= IMPORT_BATCH_SIZE:
+                            count += self.store.add_messages(session_id, batch)
+                            batch = []
+                    elif key == "metadata" and isinstance(value, dict):
+                        metadata.update(value)
+                    elif key == "session_id":
+                        source_id = value
+                count += self.store.add_messages(session_id, batch)
             
             # Atualizar metadados
-            metadata["imported_from"] = import_data.get("session_id")
-            metadata["imported_at"] = datetime.now().isoformat()
+            metadata["imported_from"] = source_id
+            metadata["imported_at"] = now
             metadata["last_activity"] = datetime.now().isoformat()
-            
-            # Armazenar metadados
-            self.memory_manager.store_user_info(f"session:{session_id}", metadata)
+            self.store.save_session(session_id, metadata)
             
             # Adicionar ao cache
             self.active_sessions[session_id] = metadata
             
-            # Importar mensagens
-            for msg in messages:
-                self.memory_manager.add_conversation_message(
-                    session_id=session_id,
-                    role=msg.get("role", "user"),
-                    content=msg.get("content", ""),
-                    metadata=msg.get("metadata")
-                )
-            
-            logger.info(f"Sessão importada: {input_file} -> {session_id}")
+            logger.info(f"Sessão importada: {input_file} -> {session_id} ({count} mensagens)")
             return session_id
             
         except Exception as e:
             logger.error(f"Erro ao importar sessão: {e}")
+            try:
+                self.store.delete_session(session_id)
+            except Exception:
+                pass
+            self.active_sessions.pop(session_id, None)
             return None
 
 
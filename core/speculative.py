@@ -0,0 +1,249 @@
+"""
+Módulo de geração especulativa do projeto Nina IA.
+Inicia a geração do LLM a partir de transcrições parciais estáveis, antes do fim da fala.
+"""
+
+import re
+import time
+import logging
+import threading
+from difflib import SequenceMatcher
+from typing import Dict, Any, Optional, List, Callable
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_words(text: str) -> List[str]:
+    """
+    Normaliza um texto em uma lista de palavras minúsculas, sem pontuação.
+
+    Args:
+        text: Texto a ser normalizado
+
+    Returns:
+        Lista de palavras
+    """
+    return _WORD_PATTERN.findall((text or "").lower())
+
+
+def transcript_divergence(first: str, second: str) -> float:
+    """
+    Calcula a divergência entre duas transcrições, em nível de palavras.
+
+    Args:
+        first: Primeira transcrição
+        second: Segunda transcrição
+
+    Returns:
+        Valor entre 0.0 (iguais) e 1.0 (totalmente diferentes)
+    """
+    first_words = normalize_words(first)
+    second_words = normalize_words(second)
+
+    if not first_words and not second_words:
+        return 0.0
+
+    return 1.0 - SequenceMatcher(None, first_words, second_words, autojunk=False).ratio()
+
+
+class _Speculation:
+    """
+    Geração em andamento para uma transcrição parcial.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.cancel_event = threading.Event()
+        self.done = threading.Event()
+        self.result = None
+        self.started_at = time.monotonic()
+        self.finished_at = None
+        self.thread = None
+
+    def elapsed(self) -> float:
+        """
+        Tempo de geração consumido até agora (ou até o término).
+        """
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.started_at
+
+
+class SpeculativeGenerator:
+    """
+    Gera respostas a partir de transcrições parciais, cancelando e reiniciando
+    a geração quando a transcrição diverge além de um limiar.
+
+    Contabiliza o tempo de geração desperdiçado (especulações canceladas) e o
+    tempo economizado (geração sobreposta à fala do usuário) para ajuste fino.
+    """
+
+    def __init__(self,
+                 generate: Callable[[str, threading.Event], Optional[str]],
+                 divergence_threshold: float = 0.2,
+                 stable_partials: int = 2,
+                 min_words: int = 3):
+        """
+        Inicializa o gerador especulativo.
+
+        Args:
+            generate: Função (texto, evento_de_cancelamento) -> resposta ou None
+            divergence_threshold: Divergência máxima entre a transcrição especulada e a final
+            stable_partials: Número de parciais consecutivas iguais para considerar a transcrição estável
+            min_words: Número mínimo de palavras para iniciar uma especulação
+        """
+        self.generate = generate
+        self.divergence_threshold = divergence_threshold
+        self.stable_partials = max(1, stable_partials)
+        self.min_words = min_words
+
+        self._lock = threading.Lock()
+        self._current = None
+        self._recent_partials = []
+
+        self.stats = {
+            "started": 0,
+            "restarted": 0,
+            "hits": 0,
+            "misses": 0,
+            "wasted_seconds": 0.0,
+            "saved_seconds": 0.0
+        }
+
+    def reset(self) -> None:
+        """
+        Cancela qualquer especulação e prepara para uma nova fala.
+        """
+        with self._lock:
+            self._cancel_current()
+            self._recent_partials = []
+
+    def on_partial(self, text: str) -> None:
+        """
+        Recebe uma transcrição parcial e inicia ou reinicia a especulação se necessário.
+
+        Args:
+            text: Transcrição parcial
+        """
+        words = normalize_words(text)
+
+        with self._lock:
+            self._recent_partials.append(words)
+            self._recent_partials = self._recent_partials[-self.stable_partials:]
+
+            # A transcrição é estável quando não mudou nas últimas parciais
+            if len(self._recent_partials) < self.stable_partials or len(words) < self.min_words:
+                return
+            if any(partial != words for partial in self._recent_partials):
+                return
+
+            if self._current is not None:
+                if transcript_divergence(self._current.text, text) <= self.divergence_threshold:
+                    return
+                self.stats["restarted"] += 1
+                logger.info("Transcrição parcial divergiu; reiniciando geração especulativa")
+                self._cancel_current()
+
+            self._start(text)
+
+    def _start(self, text: str) -> None:
+        """
+        Inicia uma geração especulativa em segundo plano.
+
+        Args:
+            text: Transcrição parcial estável
+        """
+        speculation = _Speculation(text)
+
+        def run():
+            try:
+                speculation.result = self.generate(text, speculation.cancel_event)
+            except Exception as e:
+                logger.error(f"Erro na geração especulativa: {e}")
+                speculation.result = None
+            finally:
+                speculation.finished_at = time.monotonic()
+                speculation.done.set()
+
+        speculation.thread = threading.Thread(target=run)
+        speculation.thread.daemon = True
+        speculation.thread.start()
+
+        self._current = speculation
+        self.stats["started"] += 1
+        logger.debug(f"Geração especulativa iniciada: '{text}'")
+
+    def _cancel_current(self) -> None:
+        """
+        Cancela a especulação atual e contabiliza o tempo desperdiçado.
+        """
+        if self._current is None:
+            return
+
+        self._current.cancel_event.set()
+        self.stats["wasted_seconds"] += self._current.elapsed()
+        self._current = None
+
+    def resolve(self, final_text: str, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Decide se a especulação atual serve para a transcrição final.
+
+        Args:
+            final_text: Transcrição final da fala
+            timeout: Tempo máximo de espera pela geração especulativa (None = sem limite)
+
+        Returns:
+            Resposta especulada, ou None se não houver especulação aproveitável
+        """
+        final_at = time.monotonic()
+
+        with self._lock:
+            speculation = self._current
+            self._current = None
+            self._recent_partials = []
+
+        if speculation is None:
+            return None
+
+        if transcript_divergence(speculation.text, final_text) > self.divergence_threshold:
+            with self._lock:
+                speculation.cancel_event.set()
+                self.stats["misses"] += 1
+                self.stats["wasted_seconds"] += speculation.elapsed()
+            logger.info("Transcrição final divergiu da especulação; gerando novamente")
+            return None
+
+        speculation.done.wait(timeout)
+
+        with self._lock:
+            if not speculation.done.is_set() or not speculation.result:
+                speculation.cancel_event.set()
+                self.stats["misses"] += 1
+                self.stats["wasted_seconds"] += speculation.elapsed()
+                return None
+
+            # Economia: parte da geração que ocorreu enquanto o usuário ainda falava
+            self.stats["hits"] += 1
+            self.stats["saved_seconds"] += max(0.0, min(final_at, speculation.finished_at) - speculation.started_at)
+
+        logger.info("Resposta especulativa aproveitada")
+        return speculation.result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtém as estatísticas de especulação.
+
+        Returns:
+            Dicionário com contagens e tempos desperdiçado/economizado
+        """
+        with self._lock:
+            stats = dict(self.stats)
+
+        resolved = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / resolved if resolved else 0.0
+        stats["wasted_seconds"] = round(stats["wasted_seconds"], 3)
+        stats["saved_seconds"] = round(stats["saved_seconds"], 3)
+        return stats
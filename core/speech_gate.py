@@ -0,0 +1,121 @@
+"""
+Controle de captura durante a fala da Nina IA.
+Impede que o microfone grave a própria voz da Nina (eco): a captura espera a
+fala terminar (mais um intervalo de guarda) e gravações que se sobrepõem a
+uma fala são descartadas.
+"""
+
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+class SpeechGate:
+    """
+    Estado de fala compartilhado entre a etapa de fala e a de captura.
+    """
+
+    def __init__(self, guard_ms: float = 300.0):
+        """
+        Inicializa o controle.
+
+        Args:
+            guard_ms: Espera após o fim da fala antes de voltar a capturar (reverberação, buffers de áudio)
+        """
+        self.guard = guard_ms / 1000.0
+        self._lock = threading.Lock()
+        self._active = 0
+        self._epoch = 0  # Incrementado a cada fala iniciada
+        self._ended_at = 0.0
+        self._quiet = threading.Event()
+        self._quiet.set()
+        self.discarded = 0
+
+    @property
+    def is_speaking(self) -> bool:
+        """
+        Indica se alguma fala está em andamento.
+        """
+        return not self._quiet.is_set()
+
+    @property
+    def epoch(self) -> int:
+        """
+        Marca usada para detectar falas iniciadas durante uma gravação.
+        """
+        with self._lock:
+            return self._epoch
+
+    def begin(self) -> None:
+        """
+        Marca o início de uma fala.
+        """
+        with self._lock:
+            self._active += 1
+            self._epoch += 1
+            self._quiet.clear()
+
+    def end(self) -> None:
+        """
+        Marca o fim de uma fala.
+        """
+        with self._lock:
+            self._active = max(0, self._active - 1)
+            if self._active == 0:
+                self._ended_at = time.monotonic()
+                self._quiet.set()
+
+    @contextmanager
+    def speaking(self):
+        """
+        Contexto de uma fala (begin/end).
+        """
+        self.begin()
+        try:
+            yield
+        finally:
+            self.end()
+
+    def wait_until_quiet(self, should_stop: Optional[Callable[[], bool]] = None,
+                         poll: float = 0.1) -> bool:
+        """
+        Espera a fala terminar e o intervalo de guarda passar.
+
+        Args:
+            should_stop: Função que interrompe a espera quando retorna True
+            poll: Intervalo de verificação de `should_stop` (s)
+
+        Returns:
+            True se está em silêncio, False se a espera foi interrompida
+        """
+        while not (should_stop and should_stop()):
+            if not self._quiet.wait(poll):
+                continue
+            with self._lock:
+                remaining = self._ended_at + self.guard - time.monotonic() if self._active == 0 else poll
+            if remaining <= 0:
+                return True
+            time.sleep(min(remaining, poll))
+        return False
+
+    def overlapped(self, epoch: int) -> bool:
+        """
+        Indica se houve fala desde `epoch` (ou se ainda há fala em andamento).
+
+        Args:
+            epoch: Valor de `epoch` lido antes da gravação
+
+        Returns:
+            True se a gravação pode conter a voz da Nina e deve ser descartada
+        """
+        with self._lock:
+            overlapped = self._epoch != epoch or self._active > 0
+            if overlapped:
+                self.discarded += 1
+            return overlapped
@@ -0,0 +1,282 @@
+"""
+Inicialização rápida do projeto Nina IA.
+Carrega componentes independentes (STT, LLM, TTS, playback) em paralelo num
+pool de threads, com portões de prontidão por componente, e registra os
+tempos de importação e inicialização para o relatório de `--profile-startup`.
+"""
+
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Callable, Optional, Sequence
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Estados de um componente
+PENDING = "pending"
+READY = "ready"
+FAILED = "failed"
+
+
+class StartupProfiler:
+    """
+    Registra a duração das importações e inicializações da partida.
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.entries = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, name: str, category: str = "init"):
+        """
+        Mede um trecho da inicialização.
+
+        Args:
+            name: Nome do módulo ou componente
+            category: "import" ou "init"
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, category, start, time.perf_counter())
+
+    def record(self, name: str, category: str, start: float, end: float) -> None:
+        """
+        Registra um trecho já medido (instantes de perf_counter).
+        """
+        with self._lock:
+            self.entries.append({
+                "name": name,
+                "category": category,
+                "offset_ms": round((start - self.started_at) * 1000, 3),
+                "duration_ms": round((end - start) * 1000, 3),
+                "thread": threading.current_thread().name
+            })
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Obtém os trechos medidos e os totais por categoria.
+
+        Returns:
+            Dicionário com "entries", "totals_ms" e "elapsed_ms"
+        """
+        with self._lock:
+            entries = sorted(self.entries, key=lambda entry: (entry["offset_ms"], -entry["duration_ms"]))
+        totals = {}
+        for entry in entries:
+            totals[entry["category"]] = round(totals.get(entry["category"], 0.0) + entry["duration_ms"], 3)
+        elapsed = max((entry["offset_ms"] + entry["duration_ms"] for entry in entries), default=0.0)
+        return {"entries": entries, "totals_ms": totals, "elapsed_ms": round(elapsed, 3)}
+
+    def report(self) -> str:
+        """
+        Formata a linha do tempo da partida como tabela.
+
+        Returns:
+            Texto com início, duração, categoria e thread de cada trecho
+        """
+        summary = self.to_dict()
+        lines = [
+            f"{'início (ms)':>12} | {'duração (ms)':>12} | {'tipo':<6} | {'thread':<20} | nome",
+            "-" * 80
+        ]
+        for entry in summary["entries"]:
+            lines.append(f"{entry['offset_ms']:>12.1f} | {entry['duration_ms']:>12.1f} | {entry['category']:<6} | "
+                         f"{entry['thread'][:20]:<20} | {entry['name']}")
+        lines.append("-" * 80)
+        totals = ", ".join(f"{category} {total:.1f} ms" for category, total in summary["totals_ms"].items())
+        lines.append(f"Soma por tipo: {totals or '-'}")
+        lines.append(f"Tempo de parede até o último componente: {summary['elapsed_ms']:.1f} ms")
+        return "\n".join(lines)
+
+
+class _Component:
+    """
+    Estado de um componente submetido ao carregador.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = PENDING
+        self.value = None
+        self.error = None
+        self.init_ms = None
+        self.started = False
+        self.ready = threading.Event()
+
+
+class ComponentLoader:
+    """
+    Inicializa componentes independentes em paralelo.
+
+    Cada componente tem um portão de prontidão: `get` bloqueia até que ele
+    esteja pronto (ou propaga o erro da inicialização), então quem usa um
+    componente só espera por ele, e não pela partida inteira. Dependências
+    devem ser submetidas antes dos componentes que dependem delas.
+    """
+
+    def __init__(self, max_workers: int = 4, parallel: bool = True,
+                 profiler: Optional[StartupProfiler] = None):
+        """
+        Inicializa o carregador.
+
+        Args:
+            max_workers: Threads de inicialização
+            parallel: Se False, cada componente é inicializado na chamada de `submit`
+            profiler: Registro dos tempos de inicialização (opcional)
+        """
+        self.parallel = parallel
+        self.profiler = profiler
+        self._components = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers),
+                                            thread_name_prefix="nina-startup") if parallel else None
+
+    def submit(self, name: str, factory: Callable[[], Any], depends_on: Sequence[str] = ()) -> None:
+        """
+        Agenda a inicialização de um componente (substitui um anterior de mesmo nome).
+
+        Args:
+            name: Nome do componente
+            factory: Função que cria o componente
+            depends_on: Componentes que precisam estar prontos antes
+        """
+        component = _Component(name)
+        with self._lock:
+            self._components[name] = component
+
+        if self._executor is None:
+            self._load(component, factory, depends_on)
+        else:
+            self._executor.submit(self._load, component, factory, depends_on)
+
+    def _load(self, component: _Component, factory: Callable[[], Any], depends_on: Sequence[str]) -> None:
+        """
+        Inicializa um componente e abre seu portão de prontidão.
+        """
+        with self._lock:
+            if component.ready.is_set():
+                return  # Cancelado no encerramento
+            component.started = True
+
+        start = time.perf_counter()
+        try:
+            for dependency in depends_on:
+                self.get(dependency)
+            start = time.perf_counter()
+            component.value = factory()
+            component.state = READY
+        except Exception as e:
+            component.error = e
+            component.state = FAILED
+            logger.error(f"Erro ao inicializar componente {component.name}: {e}")
+        finally:
+            end = time.perf_counter()
+            component.init_ms = round((end - start) * 1000, 3)
+            if self.profiler is not None:
+                self.profiler.record(component.name, "init", start, end)
+            component.ready.set()
+
+    def _component(self, name: str) -> _Component:
+        with self._lock:
+            component = self._components.get(name)
+        if component is None:
+            raise KeyError(f"Componente não registrado: {name}")
+        return component
+
+    def get(self, name: str, timeout: Optional[float] = None) -> Any:
+        """
+        Obtém um componente, esperando que fique pronto.
+
+        Args:
+            name: Nome do componente
+            timeout: Espera máxima em segundos (None = sem limite)
+
+        Returns:
+            O componente inicializado
+
+        Raises:
+            TimeoutError: Se o componente não ficou pronto a tempo
+            RuntimeError: Se a inicialização do componente falhou
+        """
+        component = self._component(name)
+        if not component.ready.wait(timeout):
+            raise TimeoutError(f"Componente {name} não ficou pronto em {timeout} s")
+        if component.state == FAILED:
+            raise RuntimeError(f"Falha ao inicializar {name}: {component.error}") from component.error
+        return component.value
+
+    def peek(self, name: str) -> Any:
+        """
+        Obtém um componente sem esperar (None se não estiver pronto).
+        """
+        try:
+            component = self._component(name)
+        except KeyError:
+            return None
+        return component.value if component.state == READY else None
+
+    def is_ready(self, name: str) -> bool:
+        """
+        Indica se um componente está pronto para uso.
+        """
+        return self.peek(name) is not None
+
+    def wait_all(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera todos os componentes submetidos terminarem de inicializar.
+
+        Args:
+            timeout: Espera máxima total em segundos (None = sem limite)
+
+        Returns:
+            True se todos terminaram (com sucesso ou falha) dentro do prazo
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            components = list(self._components.values())
+        for component in components:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not component.ready.wait(remaining):
+                return False
+        return True
+
+    def get_status(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Obtém o estado de cada componente.
+
+        Returns:
+            Dicionário nome -> {"state", "init_ms", "error"}
+        """
+        with self._lock:
+            components = list(self._components.values())
+        return {
+            component.name: {
+                "state": component.state,
+                "init_ms": component.init_ms,
+                "error": str(component.error) if component.error else None
+            }
+            for component in components
+        }
+
+    def shutdown(self) -> None:
+        """
+        Encerra o pool sem esperar inicializações em andamento; componentes
+        que ainda não começaram são marcados como falhos.
+        """
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            for component in self._components.values():
+                if not component.started and not component.ready.is_set():
+                    component.error = RuntimeError("inicialização cancelada no encerramento")
+                    component.state = FAILED
+                    component.ready.set()
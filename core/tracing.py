@@ -0,0 +1,507 @@
+"""
+Rastreamento de latência do projeto Nina IA.
+Mede trechos (spans) de cada turno de voz — captura, transcrição, memória, LLM,
+síntese e reprodução — e grava-os em JSONL ou no formato de eventos do Chrome
+(chrome://tracing, Perfetto), com rotação por tamanho.
+"""
+
+import os
+import json
+import time
+import atexit
+import logging
+import threading
+import functools
+import contextvars
+from collections import OrderedDict, deque
+from typing import Dict, List, Any, Callable, Optional
+
+try:
+    from core.config import get_config
+except ImportError:
+    def get_config(key, default=None):
+        return default
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Formatos de saída
+FORMAT_JSONL = "jsonl"
+FORMAT_CHROME = "chrome"
+
+# Turno e span atuais (por thread e por tarefa asyncio)
+_current_trace = contextvars.ContextVar("nina_trace_id", default=None)
+_current_span = contextvars.ContextVar("nina_span_id", default=None)
+
+
+class _NoopSpan:
+    """
+    Span usado com o rastreamento desativado: não mede nem grava nada.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """
+    Trecho medido de um turno; use com `with`.
+    """
+
+    __slots__ = ("tracer", "name", "attrs", "trace_id", "span_id", "parent_id",
+                 "start", "_tokens")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.trace_id = None
+        self.span_id = None
+        self.parent_id = None
+        self.start = 0.0
+        self._tokens = None
+
+    def set(self, **attrs) -> None:
+        """
+        Adiciona atributos ao span (ex.: modelo, tamanho do texto).
+        """
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.span_id = self.tracer._next_id()
+        self.trace_id = _current_trace.get()
+        self.parent_id = _current_span.get()
+        self._tokens = _current_span.set(self.span_id)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        _current_span.reset(self._tokens)
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.tracer._finish(self, end)
+        return False
+
+
+class Tracer:
+    """
+    Coletor de spans com gravação em lote e resumo por nome.
+
+    Desativado, `span` devolve um objeto vazio compartilhado e o decorador
+    `traced` chama a função diretamente, então o custo é uma verificação de flag.
+    Ativado, os spans ficam em memória e são gravados em lotes de
+    `flush_every`, fora do caminho crítico na maior parte das chamadas.
+    """
+
+    def __init__(self,
+                 enabled: bool = False,
+                 path: Optional[str] = None,
+                 fmt: str = FORMAT_JSONL,
+                 max_bytes: int = 10 * 1024 * 1024,
+                 backup_count: int = 3,
+                 flush_every: int = 64,
+                 summary_window: int = 256):
+        """
+        Inicializa o coletor.
+
+        Args:
+            enabled: Se o rastreamento está ativo
+            path: Arquivo de saída (None = apenas o resumo em memória)
+            fmt: Formato do arquivo ("jsonl" ou "chrome")
+            max_bytes: Tamanho do arquivo antes da rotação
+            backup_count: Número de arquivos rotacionados mantidos
+            flush_every: Spans acumulados antes de gravar no arquivo
+            summary_window: Durações recentes mantidas por nome para os percentis
+        """
+        if fmt not in (FORMAT_JSONL, FORMAT_CHROME):
+            raise ValueError(f"Formato de rastreamento inválido: {fmt}")
+
+        self.enabled = enabled
+        self.path = path
+        self.fmt = fmt
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_every = max(1, flush_every)
+        self.summary_window = summary_window
+
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._buffer = []
+        self._durations = {}  # nome -> deque de durações (ms)
+        self._counts = {}  # nome -> [total, erros]
+        self._traces = OrderedDict()  # trace_id -> spans dos turnos recentes
+        self._last_trace_id = None  # Turno concluído mais recente
+        self._span_counter = 0
+        self._turn_counter = 0
+        self._pid = os.getpid()
+        # Converte perf_counter em tempo de parede para os timestamps gravados
+        self._clock_offset = time.time() - time.perf_counter()
+
+        # Métricas
+        self.written = 0
+        self.write_errors = 0
+        self.rotations = 0
+
+        if self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        atexit.register(self.flush)
+
+    def _next_id(self) -> int:
+        with self._lock:
+            self._span_counter += 1
+            return self._span_counter
+
+    def span(self, name: str, **attrs) -> Any:
+        """
+        Cria um span para medir um trecho com `with`.
+
+        Args:
+            name: Nome do trecho (ex.: "llm.chat")
+            **attrs: Atributos gravados com o span
+
+        Returns:
+            Span (ou o span vazio se o rastreamento estiver desativado)
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, attrs)
+
+    def mark(self, name: str, **attrs) -> None:
+        """
+        Registra um evento instantâneo (ex.: início da reprodução).
+
+        Args:
+            name: Nome do evento
+            **attrs: Atributos gravados com o evento
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._record({
+            "name": name,
+            "trace_id": _current_trace.get(),
+            "parent_id": _current_span.get(),
+            "start": now,
+            "dur_ms": None,
+            "thread": threading.get_ident(),
+            "attrs": attrs
+        })
+
+    def turn(self, trace_id: Optional[Any] = None, complete: bool = True) -> Any:
+        """
+        Define o turno ao qual os spans seguintes pertencem (na thread ou tarefa atual).
+
+        Um turno pode ser retomado em outras threads com o mesmo `trace_id`
+        (ex.: uma etapa do pipeline por thread); só o bloco com `complete`
+        conclui o turno e o torna o "last_turn" do resumo.
+
+        Args:
+            trace_id: Identificador do turno (None = gerar um novo)
+            complete: Se o turno termina ao sair do bloco
+
+        Returns:
+            Gerenciador de contexto
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        if trace_id is None:
+            with self._lock:
+                self._turn_counter += 1
+                trace_id = f"{self._pid}-{self._turn_counter}"
+        return _TraceScope(self, trace_id, complete)
+
+    def _complete(self, trace_id: Any) -> None:
+        with self._lock:
+            self._last_trace_id = trace_id
+
+    def _finish(self, span: Span, end: float) -> None:
+        self._record({
+            "name": span.name,
+            "trace_id": span.trace_id,
+            "span_id": span.span_id,
+            "parent_id": span.parent_id,
+            "start": span.start,
+            "dur_ms": (end - span.start) * 1000,
+            "thread": threading.get_ident(),
+            "attrs": span.attrs
+        })
+
+    def _record(self, record: Dict[str, Any]) -> None:
+        """
+        Guarda um span para o resumo e para a gravação em lote.
+        """
+        name = record["name"]
+        flush = False
+        with self._lock:
+            if record["dur_ms"] is not None:
+                durations = self._durations.get(name)
+                if durations is None:
+                    durations = self._durations[name] = deque(maxlen=self.summary_window)
+                    self._counts[name] = [0, 0]
+                durations.append(record["dur_ms"])
+                self._counts[name][0] += 1
+                self._counts[name][1] += int("error" in record["attrs"])
+
+            trace_id = record["trace_id"]
+            if trace_id is not None:
+                spans = self._traces.get(trace_id)
+                if spans is None:
+                    spans = self._traces[trace_id] = deque(maxlen=64)
+                    # Turnos em andamento ao mesmo tempo (pipeline) ficam separados
+                    while len(self._traces) > 16:
+                        self._traces.popitem(last=False)
+                spans.append(record)
+
+            if self.path:
+                self._buffer.append(record)
+                flush = len(self._buffer) >= self.flush_every
+
+        if flush:
+            self.flush()
+
+    def _serialize(self, record: Dict[str, Any]) -> str:
+        """
+        Converte um span na linha gravada no arquivo.
+        """
+        timestamp = record["start"] + self._clock_offset
+        if self.fmt == FORMAT_CHROME:
+            event = {
+                "name": record["name"],
+                "cat": record["name"].split(".")[0],
+                "ts": round(timestamp * 1e6, 1),
+                "pid": self._pid,
+                "tid": record["thread"],
+                "args": dict(record["attrs"], trace_id=record["trace_id"])
+            }
+            if record["dur_ms"] is None:
+                event.update(ph="i", s="t")
+            else:
+                event.update(ph="X", dur=round(record["dur_ms"] * 1000, 1))
+            # Formato de array sem o "]" final, aceito pelos visualizadores
+            return json.dumps(event, ensure_ascii=False, default=str) + ",\n"
+
+        line = {
+            "name": record["name"],
+            "trace_id": record["trace_id"],
+            "span_id": record.get("span_id"),
+            "parent_id": record["parent_id"],
+            "ts": round(timestamp, 6),
+            "dur_ms": round(record["dur_ms"], 3) if record["dur_ms"] is not None else None,
+            "thread": record["thread"],
+            "attrs": record["attrs"]
+        }
+        return json.dumps(line, ensure_ascii=False, default=str) + "\n"
+
+    def _rotate(self) -> None:
+        """
+        Renomeia os arquivos de saída (trace.jsonl -> trace.jsonl.1 -> ...).
+        """
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.rotations += 1
+
+    def flush(self) -> None:
+        """
+        Grava no arquivo os spans acumulados.
+        """
+        with self._lock:
+            records, self._buffer = self._buffer, []
+        if not records or not self.path:
+            return
+
+        data = "".join(self._serialize(record) for record in records)
+        with self._write_lock:
+            try:
+                if os.path.exists(self.path) and os.path.getsize(self.path) + len(data) > self.max_bytes:
+                    self._rotate()
+                is_new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+                with open(self.path, "a", encoding="utf-8") as f:
+                    if is_new and self.fmt == FORMAT_CHROME:
+                        f.write("[\n")
+                    f.write(data)
+                self.written += len(records)
+            except Exception as e:
+                self.write_errors += 1
+                logger.error(f"Erro ao gravar rastreamento em {self.path}: {e}")
+
+    def get_summary(self) -> Dict[str, Any]:
+        """
+        Resume as latências por nome de span e o turno mais recente.
+
+        Returns:
+            Dicionário com contagem, média, p50, p95 e máximo (ms) por span
+        """
+        with self._lock:
+            spans = {}
+            for name, durations in self._durations.items():
+                ordered = sorted(durations)
+                count, errors = self._counts[name]
+                spans[name] = {
+                    "count": count,
+                    "errors": errors,
+                    "avg_ms": round(sum(ordered) / len(ordered), 3),
+                    "p50_ms": round(ordered[len(ordered) // 2], 3),
+                    "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 3),
+                    "max_ms": round(ordered[-1], 3)
+                }
+            last_turn = [
+                {"name": record["name"],
+                 "dur_ms": round(record["dur_ms"], 3) if record["dur_ms"] is not None else None}
+                for record in self._traces.get(self._last_trace_id, ())
+            ]
+            return {
+                "enabled": self.enabled,
+                "path": self.path,
+                "format": self.fmt,
+                "written": self.written,
+                "write_errors": self.write_errors,
+                "spans": spans,
+                "last_turn": {"trace_id": self._last_trace_id, "spans": last_turn}
+            }
+
+    def close(self) -> None:
+        """
+        Grava os spans pendentes e desativa o rastreamento.
+        """
+        self.flush()
+        self.enabled = False
+        try:
+            atexit.unregister(self.flush)
+        except Exception:
+            pass
+
+
+class _TraceScope:
+    """
+    Define o turno atual enquanto o bloco `with` estiver ativo.
+    """
+
+    __slots__ = ("tracer", "trace_id", "complete", "_token")
+
+    def __init__(self, tracer: Tracer, trace_id: Any, complete: bool = True):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.complete = complete
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current_trace.set(self.trace_id)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_trace.reset(self._token)
+        if self.complete:
+            self.tracer._complete(self.trace_id)
+        return False
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """
+    Obtém o coletor global, configurado pela seção `tracing` do config.yaml.
+
+    Returns:
+        Coletor global
+    """
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer(
+                    enabled=bool(os.environ.get("NINA_TRACE")) or get_config("tracing.enabled", False),
+                    path=os.environ.get("NINA_TRACE_PATH") or get_config("tracing.path"),
+                    fmt=get_config("tracing.format", FORMAT_JSONL),
+                    max_bytes=get_config("tracing.max_bytes", 10 * 1024 * 1024),
+                    backup_count=get_config("tracing.backup_count", 3)
+                )
+    return _tracer
+
+
+def set_tracer(tracer: Tracer) -> Tracer:
+    """
+    Substitui o coletor global (ex.: para ativar o rastreamento em tempo de execução).
+
+    Args:
+        tracer: Novo coletor
+
+    Returns:
+        Coletor anterior
+    """
+    global _tracer
+    with _tracer_lock:
+        previous, _tracer = _tracer, tracer
+    return previous
+
+
+def span(name: str, **attrs) -> Any:
+    """
+    Cria um span no coletor global (veja `Tracer.span`).
+    """
+    return (_tracer or get_tracer()).span(name, **attrs)
+
+
+def mark(name: str, **attrs) -> None:
+    """
+    Registra um evento instantâneo no coletor global (veja `Tracer.mark`).
+    """
+    (_tracer or get_tracer()).mark(name, **attrs)
+
+
+def trace_turn(trace_id: Optional[Any] = None, complete: bool = True) -> Any:
+    """
+    Define o turno atual no coletor global (veja `Tracer.turn`).
+    """
+    return (_tracer or get_tracer()).turn(trace_id, complete)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """
+    Decorador que mede cada chamada no coletor global, resolvido a cada chamada.
+
+    Args:
+        name: Nome do span (None = módulo.função)
+
+    Returns:
+        Decorador
+    """
+    def decorator(func: Callable) -> Callable:
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer or get_tracer()
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with Span(tracer, span_name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_summary() -> Dict[str, Any]:
+    """
+    Resume as latências do coletor global (veja `Tracer.get_summary`).
+    """
+    return (_tracer or get_tracer()).get_summary()
@@ -0,0 +1,271 @@
+"""
+Módulo de diário (journal) append-only para o histórico de conversas do LLM.
+Parte do projeto Nina IA para persistir conversas com custo de escrita constante por mensagem.
+"""
+
+import os
+import json
+import time
+import logging
+from typing import Dict, List, Optional, Any, Tuple
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def replay_records(records: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    Reconstrói o estado da conversa a partir dos registros do diário.
+
+    Args:
+        records: Registros na ordem em que foram gravados
+
+    Returns:
+        Tuple contendo (histórico de mensagens, resumo acumulado)
+    """
+    history = []
+    summary = ""
+
+    for record in records:
+        op = record.get("op")
+
+        if op == "message":
+            message = record.get("message", {})
+            # Apenas a mensagem de sistema mais recente é mantida
+            if message.get("role") == "system":
+                history = [msg for msg in history if msg.get("role") != "system"]
+            history.append(message)
+
+        elif op == "trim":
+            # Remove as N mensagens de diálogo mais antigas
+            remaining = record.get("count", 0)
+            kept = []
+            for msg in history:
+                if remaining > 0 and msg.get("role") != "system":
+                    remaining -= 1
+                    continue
+                kept.append(msg)
+            history = kept
+
+        elif op == "summary":
+            summary = record.get("content", "")
+
+        elif op == "clear":
+            history = []
+            summary = ""
+
+    return history, summary
+
+
+class ConversationLog:
+    """
+    Diário append-only em JSONL com fsync em lote, compactação periódica
+    e recuperação de gravações interrompidas.
+    """
+
+    def __init__(self,
+                 path: str,
+                 fsync_every: int = 20,
+                 fsync_interval: float = 1.0,
+                 compact_every: int = 500):
+        """
+        Inicializa o diário de conversas.
+
+        Args:
+            path: Caminho do arquivo JSONL
+            fsync_every: Número de registros entre chamadas de fsync
+            fsync_interval: Tempo máximo em segundos entre chamadas de fsync
+            compact_every: Número de registros gravados que dispara a compactação
+        """
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self.records_since_compaction = 0
+
+    def _legacy_path(self) -> str:
+        """
+        Caminho do arquivo JSON do formato antigo (lista reescrita a cada mensagem).
+        """
+        return os.path.splitext(self.path)[0] + ".json"
+
+    def load(self) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Carrega o diário, recuperando-se de um último registro incompleto.
+
+        Returns:
+            Tuple contendo (histórico de mensagens, resumo acumulado)
+        """
+        # Restos de uma compactação interrompida: o diário original continua válido
+        temp_path = self.path + ".tmp"
+        if os.path.exists(temp_path):
+            try:
+                os.remove(temp_path)
+            except OSError as e:
+                logger.error(f"Erro ao remover arquivo temporário de compactação: {e}")
+
+        if not os.path.exists(self.path):
+            return self._migrate_legacy()
+
+        records = []
+        valid_offset = 0
+
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Gravação interrompida no meio de uma linha
+                    break
+                try:
+                    records.append(json.loads(line.decode('utf-8')))
+                except (ValueError, UnicodeDecodeError):
+                    break
+                valid_offset += len(line)
+
+            file_size = f.seek(0, os.SEEK_END)
+
+        if valid_offset < file_size:
+            logger.warning(f"Diário de conversa corrompido após {len(records)} registros; descartando {file_size - valid_offset} bytes")
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_offset)
+                f.flush()
+                os.fsync(f.fileno())
+
+        self.records_since_compaction = len(records)
+        return replay_records(records)
+
+    def _migrate_legacy(self) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Importa o histórico do formato JSON antigo, se existir.
+
+        Returns:
+            Tuple contendo (histórico de mensagens, resumo acumulado)
+        """
+        legacy_path = self._legacy_path()
+        if legacy_path == self.path or not os.path.exists(legacy_path):
+            return [], ""
+
+        try:
+            with open(legacy_path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+
+            history = [msg for msg in stored if msg.get("role") != "summary"]
+            summary = ""
+            for msg in stored:
+                if msg.get("role") == "summary":
+                    summary = msg.get("content", "")
+
+            self.compact(history, summary)
+            os.replace(legacy_path, legacy_path + ".migrated")
+
+            logger.info(f"Histórico migrado para o diário: {legacy_path} -> {self.path}")
+            return history, summary
+        except Exception as e:
+            logger.error(f"Erro ao migrar histórico antigo {legacy_path}: {e}")
+            return [], ""
+
+    def _open(self):
+        """
+        Abre o arquivo do diário para acréscimo, se necessário.
+        """
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        return self._file
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """
+        Acrescenta um registro ao diário.
+
+        O registro é enviado ao sistema operacional imediatamente; o fsync é
+        feito em lote, a cada `fsync_every` registros ou `fsync_interval` segundos.
+
+        Args:
+            record: Registro a ser gravado
+        """
+        f = self._open()
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        f.flush()
+
+        self._unsynced += 1
+        self.records_since_compaction += 1
+
+        if (self._unsynced >= self.fsync_every or
+                time.monotonic() - self._last_sync >= self.fsync_interval):
+            self.sync()
+
+    def sync(self) -> None:
+        """
+        Força a gravação em disco dos registros pendentes.
+        """
+        if self._file is not None and self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def needs_compaction(self) -> bool:
+        """
+        Verifica se o diário acumulou registros suficientes para ser compactado.
+
+        Returns:
+            True se a compactação deve ser feita
+        """
+        return self.compact_every > 0 and self.records_since_compaction >= self.compact_every
+
+    def compact(self, history: List[Dict[str, Any]], summary: str = "") -> None:
+        """
+        Reescreve o diário contendo apenas o estado atual da conversa.
+
+        A nova versão é gravada em um arquivo temporário e substitui o diário
+        de forma atômica, de modo que uma falha no meio preserva a versão anterior.
+
+        Args:
+            history: Histórico atual de mensagens
+            summary: Resumo acumulado atual
+        """
+        records = []
+        if summary:
+            records.append({"op": "summary", "content": summary})
+        records.extend({"op": "message", "message": msg} for msg in history)
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.close()
+        os.replace(temp_path, self.path)
+
+        self.records_since_compaction = len(records)
+        logger.debug(f"Diário de conversa compactado: {len(records)} registros")
+
+    def close(self) -> None:
+        """
+        Grava os registros pendentes e fecha o arquivo do diário.
+        """
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def remove(self) -> None:
+        """
+        Remove o diário do disco.
+        """
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.records_since_compaction = 0
@@ -6,10 +6,12 @@ Integra o processamento de linguagem natural com personalização.
 import os
 import json
 import logging
+import threading
 from typing import Dict, List, Optional, Any, Union
 
 from .ollama_client import OllamaClient
 from .llm_processor import LLMProcessor
+from .prompt_builder import SystemPromptBuilder
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -26,7 +28,10 @@ class LLMModule:
                  personality_file: Optional[str] = None,
                  conversation_dir: Optional[str] = None,
                  temperature: float = 0.7,
-                 max_tokens: int = 500):
+                 max_tokens: int = 500,
+                 context_tokens: int = 4096,
+                 summarize_history: bool = True,
+                 routing: Optional[Dict[str, Any]] = None):
         """
         Inicializa o módulo LLM.
         
@@ -37,6 +42,9 @@ class LLMModule:
             conversation_dir: Diretório para armazenar conversas
             temperature: Temperatura para geração (0.0 a 1.0)
             max_tokens: Número máximo de tokens a serem gerados
+            context_tokens: Tamanho da janela de contexto do modelo em tokens
+            summarize_history: Se deve resumir as mensagens que saem da janela
+            routing: Configuração do roteamento de modelos por classe de requisição (opcional)
         """
         self.model = model
         self.base_url = base_url
@@ -46,6 +54,10 @@ class LLMModule:
         self.max_tokens = max_tokens
         self.personality = {}
         
+        # Prompt de sistema memoizado pela versão da personalidade
+        self.personality_version = 0
+        self.prompt_builder = SystemPromptBuilder()
+        
         # Criar diretório de conversas se não existir
         if conversation_dir and not os.path.exists(conversation_dir):
             os.makedirs(conversation_dir)
@@ -54,7 +66,7 @@ class LLMModule:
         # Definir arquivo de conversas
         conversation_file = None
         if conversation_dir:
-            conversation_file = os.path.join(conversation_dir, f"conversation_{model}.json")
+            conversation_file = os.path.join(conversation_dir, f"conversation_{model}.jsonl")
         
         # Inicializar processador LLM
         self.processor = LLMProcessor(
@@ -62,7 +74,10 @@ class LLMModule:
             base_url=base_url,
             conversation_file=conversation_file,
             temperature=temperature,
-            max_tokens=max_tokens
+            max_tokens=max_tokens,
+            context_tokens=context_tokens,
+            summarize_history=summarize_history,
+            routing=routing
         )
         
         # Carregar personalidade se o arquivo existir
@@ -82,6 +97,7 @@ class LLMModule:
         try:
             with open(personality_file, 'r', encoding='utf-8') as f:
                 self.personality = json.load(f)
+            self.personality_version += 1
             
             # Aplicar personalidade ao processador
             self._apply_personality()
@@ -101,10 +117,10 @@ class LLMModule:
             return
         
         # Construir prompt de sistema com base na personalidade
-        system_prompt = self._build_system_prompt()
+        system_prompt, prompt_hash = self.prompt_builder.build(self.personality, self.personality_version)
         
         # Definir personalidade no processador
-        self.processor.set_personality(system_prompt)
+        self.processor.set_personality(system_prompt, prompt_hash=prompt_hash)
     
     def _build_system_prompt(self) -> str:
         """
@@ -113,49 +129,7 @@ class LLMModule:
         Returns:
             Prompt de sistema formatado
         """
-        name = self.personality.get("name", "Assistente")
-        speech_style = self.personality.get("speech_style", "formal")
-        preferences = self.personality.get("preferences", [])
-        mood = self.personality.get("mood", "neutro")
-        
-        # Construir descrição de preferências
-        prefs_text = ""
-        if preferences:
-            prefs_text = "Você gosta de falar sobre " + ", ".join(preferences) + ". "
-        
-        # Construir descrição de estilo de fala
-        style_text = ""
-        if speech_style == "formal":
-            style_text = "Você fala de maneira formal e educada. "
-        elif speech_style == "casual":
-            style_text = "Você fala de maneira casual e descontraída. "
-        elif speech_style == "amigável":
-            style_text = "Você fala de maneira amigável e calorosa. "
-        elif speech_style == "técnico":
-            style_text = "Você fala de maneira técnica e precisa. "
-        
-        # Construir descrição de humor
-        mood_text = ""
-        if mood == "alegre":
-            mood_text = "Seu humor atual é alegre e otimista. "
-        elif mood == "sério":
-            mood_text = "Seu humor atual é sério e focado. "
-        elif mood == "neutro":
-            mood_text = "Seu humor atual é neutro e equilibrado. "
-        elif mood == "reflexivo":
-            mood_text = "Seu humor atual é reflexivo e contemplativo. "
-        
-        # Montar prompt completo
-        system_prompt = (
-            f"Você é {name}, uma assistente de inteligência artificial. "
-            f"{style_text}"
-            f"{mood_text}"
-            f"{prefs_text}"
-            "Você responde de forma clara e concisa, mantendo seu estilo de fala e personalidade. "
-            "Você é útil, respeitosa e não julga as perguntas do usuário. "
-            "Você evita respostas muito longas e se concentra no que é mais relevante."
-        )
-        
+        system_prompt, _ = self.prompt_builder.build(self.personality, self.personality_version)
         return system_prompt
     
     def set_personality_attribute(self, attribute: str, value: Any) -> None:
@@ -166,7 +140,12 @@ class LLMModule:
             attribute: Nome do atributo ('name', 'speech_style', 'mood', etc.)
             value: Valor do atributo
         """
-        self.personality[attribute] = value
+        # Perfis completos guardam os atributos em 'personality'
+        if attribute != "name" and isinstance(self.personality.get("personality"), dict):
+            self.personality["personality"][attribute] = value
+        else:
+            self.personality[attribute] = value
+        self.personality_version += 1
         
         # Atualizar personalidade no processador
         self._apply_personality()
@@ -180,17 +159,98 @@ class LLMModule:
             except Exception as e:
                 logger.error(f"Erro ao salvar personalidade: {e}")
     
-    def process_text(self, text: str) -> str:
+    def process_text(self, 
+                     text: str, 
+                     memory_context: Optional[str] = None,
+                     request_class: str = "chat",
+                     memory_tokens: Optional[int] = None) -> str:
         """
         Processa um texto e gera uma resposta.
         
         Args:
             text: Texto de entrada
+            memory_context: Contexto de memória de longo prazo (opcional)
+            request_class: Classe da requisição ('callout', 'chat', 'report', 'reflection'),
+                           usada para escolher o modelo
+            memory_tokens: Tokens estimados do contexto de memória (None = estimar)
             
         Returns:
             Resposta gerada pelo modelo
         """
-        return self.processor.process_input(text, temperature=self.temperature, max_tokens=self.max_tokens)
+        return self.processor.process_input(
+            text,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            memory_context=memory_context,
+            request_class=request_class,
+            memory_tokens=memory_tokens
+        )
+    
+    def generate_candidate(self, 
+                           text: str,
+                           memory_context: Optional[str] = None,
+                           cancel_event: Optional[threading.Event] = None,
+                           request_class: str = "chat",
+                           memory_tokens: Optional[int] = None) -> Optional[str]:
+        """
+        Gera uma resposta candidata sem alterar o histórico (geração especulativa).
+        
+        Args:
+            text: Texto de entrada (possivelmente parcial)
+            memory_context: Contexto de memória de longo prazo (opcional)
+            cancel_event: Evento para cancelar a geração em andamento (opcional)
+            request_class: Classe da requisição, usada para escolher o modelo
+            memory_tokens: Tokens estimados do contexto de memória (None = estimar)
+            
+        Returns:
+            Resposta gerada ou None se a geração foi cancelada ou falhou
+        """
+        return self.processor.generate_candidate(
+            text,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            memory_context=memory_context,
+            cancel_event=cancel_event,
+            request_class=request_class,
+            memory_tokens=memory_tokens
+        )
+    
+    def commit_response(self, text: str, response: str) -> None:
+        """
+        Registra no histórico uma resposta gerada com `generate_candidate`.
+        
+        Args:
+            text: Texto de entrada final do usuário
+            response: Resposta confirmada
+        """
+        self.processor.commit_exchange(text, response)
+    
+    def get_system_prompt_hash(self) -> Optional[str]:
+        """
+        Obtém o hash estável do prompt de sistema atual.
+        
+        Returns:
+            Hash do prompt (chave para reuso de prefixo e cache de respostas) ou None
+        """
+        return self.processor.system_prompt_hash
+    
+    def get_latency_stats(self) -> Dict[str, Any]:
+        """
+        Obtém os histogramas de latência e os desvios de modelo por classe de requisição.
+        
+        Returns:
+            Estatísticas do roteador de modelos
+        """
+        return self.processor.get_latency_stats()
+    
+    def export_latency_metrics(self) -> str:
+        """
+        Exporta os histogramas de latência no formato de texto do Prometheus.
+        
+        Returns:
+            Métricas em formato de exposição do Prometheus
+        """
+        return self.processor.router.export_prometheus()
     
     def get_available_models(self) -> List[Dict[str, Any]]:
         """
@@ -217,8 +277,8 @@ class LLMModule:
             
             # Atualizar arquivo de conversas
             if self.conversation_dir:
-                conversation_file = os.path.join(self.conversation_dir, f"conversation_{new_model}.json")
-                self.processor.conversation.conversation_file = conversation_file
+                conversation_file = os.path.join(self.conversation_dir, f"conversation_{new_model}.jsonl")
+                self.processor.conversation.set_conversation_file(conversation_file)
             
             # Reaplicar personalidade
             self._apply_personality()
@@ -5,11 +5,17 @@ Parte do projeto Nina IA para processamento de linguagem natural.
 
 import os
 import json
+import time
+import queue
 import logging
-from typing import Dict, List, Optional, Any, Union
+import threading
+from typing import Dict, List, Optional, Any, Union, Callable
 from datetime import datetime
 
 from .ollama_client import OllamaClient
+from .model_router import ModelRouter
+from .conversation_log import ConversationLog
+from .token_budget import TokenBudget, estimate_tokens, estimate_message_tokens, truncate_to_tokens
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -18,36 +24,59 @@ logger = logging.getLogger(__name__)
 class ConversationManager:
     """
     Gerenciador de contexto e conversas para o LLM.
+    
+    Mantém uma janela de histórico limitada por tokens (e não por número de
+    mensagens). As mensagens que saem da janela são resumidas em segundo
+    plano em um resumo acumulado, enviado junto com o prompt de sistema.
     """
     
     def __init__(self, 
                  model: str = "mistral",
-                 max_history: int = 10,
-                 conversation_file: Optional[str] = None):
+                 max_history: Optional[int] = None,
+                 conversation_file: Optional[str] = None,
+                 token_budget: Optional[TokenBudget] = None,
+                 summarizer: Optional[Callable[[str, List[Dict[str, str]]], str]] = None):
         """
         Inicializa o gerenciador de conversas.
         
         Args:
             model: Nome do modelo a ser usado
-            max_history: Número máximo de mensagens no histórico
+            max_history: Limite adicional de mensagens no histórico (None = apenas por tokens)
             conversation_file: Arquivo para salvar o histórico de conversas
+            token_budget: Orçamento de tokens do contexto (None = orçamento padrão)
+            summarizer: Função (resumo_anterior, mensagens) -> novo resumo (None = descartar mensagens antigas)
         """
         self.model = model
         self.max_history = max_history
         self.conversation_file = conversation_file
+        self.token_budget = token_budget or TokenBudget()
+        self.summarizer = summarizer
         self.history = []
+        self.summary = ""
+        
+        # Estado do resumo em segundo plano
+        self._lock = threading.RLock()
+        self._summary_done = threading.Condition(self._lock)
+        self._summary_queue = queue.Queue()
+        self._summary_thread = None
+        self._pending_summaries = 0
+        self._generation = 0
         
         logger.info(f"Inicializando gerenciador de conversas para o modelo {model}")
         
-        # Carregar histórico se o arquivo existir
-        if conversation_file and os.path.exists(conversation_file):
+        # Diário append-only do histórico (None = sem persistência)
+        self._log = ConversationLog(conversation_file) if conversation_file else None
+        
+        # Carregar histórico do diário, se existir
+        if self._log:
             try:
-                with open(conversation_file, 'r', encoding='utf-8') as f:
-                    self.history = json.load(f)
-                logger.info(f"Histórico carregado com {len(self.history)} mensagens")
+                self.history, self.summary = self._log.load()
+                if self.history:
+                    logger.info(f"Histórico carregado com {len(self.history)} mensagens")
             except Exception as e:
                 logger.error(f"Erro ao carregar histórico: {e}")
                 self.history = []
+                self.summary = ""
     
     def add_message(self, role: str, content: str) -> None:
         """
@@ -63,19 +92,170 @@ class ConversationManager:
             "timestamp": datetime.now().isoformat()
         }
         
-        self.history.append(message)
+        with self._lock:
+            # Apenas a mensagem de sistema mais recente é usada
+            if role == "system":
+                self.history = [msg for msg in self.history if msg["role"] != "system"]
+            
+            self.history.append(message)
+            self._append_record({"op": "message", "message": message})
+            
+            # Limitar o histórico pelo orçamento de tokens
+            self._apply_window()
+    
+    def _apply_window(self) -> None:
+        """
+        Remove do histórico as mensagens que não cabem no orçamento de tokens
+        e as encaminha para o resumo acumulado.
+        """
+        system_messages = [msg for msg in self.history if msg["role"] == "system"]
+        dialog = [msg for msg in self.history if msg["role"] != "system"]
+        
+        start = self.token_budget.split_history(dialog)
+        if self.max_history:
+            start = max(start, len(dialog) - self.max_history)
+        
+        if start <= 0:
+            return
+        
+        evicted = dialog[:start]
+        self.history = system_messages + dialog[start:]
+        self._append_record({"op": "trim", "count": len(evicted)})
+        self._schedule_summary(evicted)
+    
+    def _schedule_summary(self, messages: List[Dict[str, str]]) -> None:
+        """
+        Agenda o resumo de mensagens que saíram da janela de histórico.
+        
+        Args:
+            messages: Mensagens removidas do histórico
+        """
+        if not self.summarizer:
+            logger.debug(f"{len(messages)} mensagens antigas descartadas (sem resumidor)")
+            return
+        
+        self._pending_summaries += 1
+        self._summary_queue.put((self._generation, messages))
+        
+        if self._summary_thread is None or not self._summary_thread.is_alive():
+            self._summary_thread = threading.Thread(target=self._summary_worker)
+            self._summary_thread.daemon = True
+            self._summary_thread.start()
+    
+    def _summary_worker(self) -> None:
+        """
+        Thread que incorpora as mensagens removidas ao resumo acumulado.
+        """
+        while True:
+            generation, messages = self._summary_queue.get()
+            batches = 1
+            
+            # Agrupar lotes pendentes em uma única chamada ao LLM
+            while True:
+                try:
+                    next_generation, next_messages = self._summary_queue.get_nowait()
+                except queue.Empty:
+                    break
+                batches += 1
+                if next_generation != generation:
+                    generation, messages = next_generation, list(next_messages)
+                else:
+                    messages = messages + next_messages
+            
+            with self._lock:
+                previous_summary = self.summary
+                current_generation = self._generation
+            
+            new_summary = None
+            if generation == current_generation:
+                try:
+                    new_summary = self.summarizer(previous_summary, messages)
+                except Exception as e:
+                    logger.error(f"Erro ao resumir histórico: {e}")
+            
+            with self._lock:
+                # Descartar o resultado se o histórico foi limpo nesse meio tempo
+                if new_summary and generation == self._generation:
+                    self.summary = truncate_to_tokens(new_summary.strip(), self.token_budget.summary_tokens)
+                    self._append_record({"op": "summary", "content": self.summary})
+                    logger.info(f"Resumo da conversa atualizado com {len(messages)} mensagens antigas")
+                
+                self._pending_summaries = max(0, self._pending_summaries - batches)
+                self._summary_done.notify_all()
+    
+    def wait_for_summary(self, timeout: Optional[float] = None) -> bool:
+        """
+        Aguarda a conclusão dos resumos pendentes.
         
-        # Limitar o tamanho do histórico
-        if len(self.history) > self.max_history:
-            self.history = self.history[-self.max_history:]
+        Args:
+            timeout: Tempo máximo de espera em segundos (None = sem limite)
+            
+        Returns:
+            True se não houver mais resumos pendentes
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
         
-        # Salvar histórico se o arquivo estiver definido
-        if self.conversation_file:
+        with self._summary_done:
+            while self._pending_summaries:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._summary_done.wait(remaining)
+        
+        return True
+    
+    def _append_record(self, record: Dict[str, Any]) -> None:
+        """
+        Acrescenta uma alteração ao diário de conversas, compactando-o quando necessário.
+        
+        Cada mensagem custa apenas uma linha no arquivo, independente do tamanho
+        do histórico; a reescrita completa ocorre só na compactação periódica.
+        
+        Args:
+            record: Registro da alteração ('message', 'trim' ou 'summary')
+        """
+        if not self._log:
+            return
+        
+        try:
+            self._log.append(record)
+            if self._log.needs_compaction():
+                self._log.compact(self.history, self.summary)
+        except Exception as e:
+            logger.error(f"Erro ao salvar histórico: {e}")
+    
+    def flush(self) -> None:
+        """
+        Grava em disco as alterações pendentes do diário de conversas.
+        """
+        with self._lock:
+            if self._log:
+                try:
+                    self._log.sync()
+                except Exception as e:
+                    logger.error(f"Erro ao sincronizar histórico: {e}")
+    
+    def set_conversation_file(self, conversation_file: Optional[str]) -> None:
+        """
+        Troca o arquivo de conversas, carregando o histórico nele salvo.
+        
+        Args:
+            conversation_file: Novo arquivo de conversas (None = sem persistência)
+        """
+        with self._lock:
+            if self._log:
+                self._log.close()
+            
+            self.conversation_file = conversation_file
+            self._log = ConversationLog(conversation_file) if conversation_file else None
+            self._generation += 1
+            
             try:
-                with open(self.conversation_file, 'w', encoding='utf-8') as f:
-                    json.dump(self.history, f, ensure_ascii=False, indent=2)
+                self.history, self.summary = self._log.load() if self._log else ([], "")
             except Exception as e:
-                logger.error(f"Erro ao salvar histórico: {e}")
+                logger.error(f"Erro ao carregar histórico: {e}")
+                self.history = []
+                self.summary = ""
     
     def get_conversation_messages(self) -> List[Dict[str, str]]:
         """
@@ -86,12 +266,13 @@ class ConversationManager:
         """
         # Converter formato interno para formato Ollama
         messages = []
-        for msg in self.history:
-            if msg["role"] != "system":  # Mensagens de sistema são tratadas separadamente
-                messages.append({
-                    "role": msg["role"],
-                    "content": msg["content"]
-                })
+        with self._lock:
+            for msg in self.history:
+                if msg["role"] != "system":  # Mensagens de sistema são tratadas separadamente
+                    messages.append({
+                        "role": msg["role"],
+                        "content": msg["content"]
+                    })
         return messages
     
     def get_system_message(self) -> Optional[str]:
@@ -101,24 +282,88 @@ class ConversationManager:
         Returns:
             Conteúdo da mensagem de sistema ou None
         """
-        for msg in reversed(self.history):
-            if msg["role"] == "system":
-                return msg["content"]
+        with self._lock:
+            for msg in reversed(self.history):
+                if msg["role"] == "system":
+                    return msg["content"]
         return None
     
+    def get_running_summary(self) -> str:
+        """
+        Obtém o resumo acumulado das mensagens que saíram da janela.
+        
+        Returns:
+            Resumo acumulado (vazio se ainda não houver)
+        """
+        with self._lock:
+            return self.summary
+    
+    def build_system_prompt(self, memory_context: Optional[str] = None,
+                            memory_tokens: Optional[int] = None) -> Optional[str]:
+        """
+        Monta o prompt de sistema respeitando o orçamento de tokens.
+        
+        Args:
+            memory_context: Contexto de memória de longo prazo (opcional)
+            memory_tokens: Tokens estimados do contexto de memória, se já conhecidos
+            
+        Returns:
+            Prompt de sistema com resumo e memória, ou None se estiver vazio
+        """
+        budget = self.token_budget
+        sections = []
+        
+        system_message = self.get_system_message()
+        if system_message:
+            sections.append(truncate_to_tokens(system_message, budget.system_tokens))
+        
+        summary = self.get_running_summary()
+        if summary:
+            sections.append("Resumo da conversa até agora:\n" + summary)
+        
+        if memory_context:
+            # Blocos pré-formatados trazem a estimativa: só recalcular se precisar cortar
+            if memory_tokens is not None and memory_tokens <= budget.memory_tokens:
+                sections.append(memory_context)
+            else:
+                sections.append(truncate_to_tokens(memory_context, budget.memory_tokens))
+        
+        return "\n\n".join(sections) if sections else None
+    
+    def get_token_usage(self) -> Dict[str, int]:
+        """
+        Obtém o uso estimado de tokens do contexto atual.
+        
+        Returns:
+            Dicionário com tokens usados pelo sistema, resumo e histórico
+        """
+        with self._lock:
+            return {
+                "system_tokens": estimate_tokens(self.get_system_message()),
+                "summary_tokens": estimate_tokens(self.summary),
+                "history_tokens": sum(
+                    estimate_message_tokens(msg) for msg in self.history if msg["role"] != "system"
+                ),
+                "history_messages": len([msg for msg in self.history if msg["role"] != "system"])
+            }
+    
     def clear_history(self) -> None:
         """
         Limpa o histórico de conversas.
         """
-        self.history = []
-        
-        # Remover arquivo de histórico se existir
-        if self.conversation_file and os.path.exists(self.conversation_file):
-            try:
-                os.remove(self.conversation_file)
-                logger.info("Histórico removido")
-            except Exception as e:
-                logger.error(f"Erro ao remover arquivo de histórico: {e}")
+        with self._lock:
+            self.history = []
+            self.summary = ""
+            # Invalida resumos em andamento
+            self._generation += 1
+            
+            # Remover diário de histórico se existir
+            if self._log:
+                try:
+                    self._log.remove()
+                    logger.info("Histórico removido")
+                except Exception as e:
+                    logger.error(f"Erro ao remover arquivo de histórico: {e}")
 
 
 class LLMProcessor:
@@ -129,49 +374,121 @@ class LLMProcessor:
     def __init__(self, 
                  model: str = "mistral",
                  base_url: str = "http://localhost:11434",
-                 max_history: int = 10,
+                 max_history: Optional[int] = None,
                  conversation_file: Optional[str] = None,
                  temperature: float = 0.7,
-                 max_tokens: int = 500):
+                 max_tokens: int = 500,
+                 context_tokens: int = 4096,
+                 summarize_history: bool = True,
+                 routing: Optional[Dict[str, Any]] = None):
         """
         Inicializa o processador LLM.
         
         Args:
             model: Nome do modelo a ser usado
             base_url: URL base da API Ollama
-            max_history: Número máximo de mensagens no histórico
+            max_history: Limite adicional de mensagens no histórico (None = apenas por tokens)
             conversation_file: Arquivo para salvar o histórico de conversas
             temperature: Temperatura para geração (0.0 a 1.0)
             max_tokens: Número máximo de tokens a serem gerados
+            context_tokens: Tamanho da janela de contexto do modelo em tokens
+            summarize_history: Se deve resumir as mensagens que saem da janela
+            routing: Configuração do roteamento de modelos por classe de requisição
+                     ({'fast_model', 'max_concurrent', 'classes'}; None = um único modelo)
         """
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
+        self.system_prompt_hash = None
         
         logger.info(f"Inicializando processador LLM com modelo {model}")
         
         # Inicializar componentes
         self.client = OllamaClient(base_url=base_url, model=model)
+        routing = routing or {}
+        self.router = ModelRouter(
+            self.client,
+            default_model=model,
+            fast_model=routing.get("fast_model"),
+            classes=routing.get("classes"),
+            max_concurrent=routing.get("max_concurrent", 2)
+        )
+        self.token_budget = TokenBudget(
+            context_tokens=context_tokens,
+            response_tokens=max_tokens
+        )
         self.conversation = ConversationManager(
             model=model,
             max_history=max_history,
-            conversation_file=conversation_file
+            conversation_file=conversation_file,
+            token_budget=self.token_budget,
+            summarizer=self._summarize_messages if summarize_history else None
+        )
+    
+    def _summarize_messages(self, previous_summary: str, messages: List[Dict[str, str]]) -> str:
+        """
+        Incorpora mensagens antigas ao resumo acumulado usando o LLM.
+        
+        Args:
+            previous_summary: Resumo acumulado até agora
+            messages: Mensagens que saíram da janela de histórico
+            
+        Returns:
+            Novo resumo acumulado
+        """
+        speakers = {"user": "Usuário", "assistant": "Assistente"}
+        transcript = "\n".join(
+            f"{speakers.get(msg['role'], msg['role'])}: {msg['content']}" for msg in messages
+        )
+        
+        prompt = (
+            f"Resumo anterior:\n{previous_summary or '(vazio)'}\n\n"
+            f"Novas mensagens:\n{transcript}\n\n"
+            "Escreva um novo resumo curto que combine o resumo anterior com as novas mensagens, "
+            "mantendo fatos, nomes, preferências e pedidos pendentes."
+        )
+        
+        summary = self.router.generate(
+            "report",
+            prompt=prompt,
+            system_prompt="Você resume conversas de forma objetiva, em português, sem inventar informações.",
+            temperature=0.2,
+            max_tokens=self.token_budget.summary_tokens
         )
+        
+        # O cliente devolve a mensagem de erro como texto; não usar como resumo
+        if not summary or summary.startswith("Erro na geração de texto"):
+            raise RuntimeError(summary or "resumo vazio")
+        
+        return summary
     
-    def set_personality(self, personality: str) -> None:
+    def set_personality(self, personality: str, prompt_hash: Optional[str] = None) -> None:
         """
         Define a personalidade do assistente através de uma mensagem de sistema.
         
+        Se o hash do prompt não mudou, a mensagem de sistema atual é mantida,
+        preservando o prefixo do contexto para reuso pelo modelo.
+        
         Args:
             personality: Descrição da personalidade
+            prompt_hash: Hash estável do prompt de sistema (opcional)
         """
+        if (prompt_hash and prompt_hash == self.system_prompt_hash and
+                self.conversation.get_system_message() == personality):
+            logger.debug("Personalidade inalterada; prompt de sistema mantido")
+            return
+        
         self.conversation.add_message("system", personality)
+        self.system_prompt_hash = prompt_hash
         logger.info("Personalidade definida")
     
     def process_input(self, 
                       user_input: str, 
                       temperature: Optional[float] = None,
-                      max_tokens: Optional[int] = None) -> str:
+                      max_tokens: Optional[int] = None,
+                      memory_context: Optional[str] = None,
+                      request_class: str = "chat",
+                      memory_tokens: Optional[int] = None) -> str:
         """
         Processa uma entrada do usuário e gera uma resposta.
         
@@ -179,6 +496,9 @@ class LLMProcessor:
             user_input: Texto de entrada do usuário
             temperature: Temperatura para geração (None = usar padrão)
             max_tokens: Número máximo de tokens (None = usar padrão)
+            memory_context: Contexto de memória de longo prazo (opcional)
+            request_class: Classe da requisição para o roteamento ('callout', 'chat', 'report', 'reflection')
+            memory_tokens: Tokens estimados do contexto de memória (None = estimar)
             
         Returns:
             Resposta gerada pelo modelo
@@ -186,9 +506,9 @@ class LLMProcessor:
         # Adicionar mensagem do usuário ao histórico
         self.conversation.add_message("user", user_input)
         
-        # Obter mensagens formatadas para o Ollama
+        # Obter mensagens formatadas para o Ollama (janela limitada por tokens)
         messages = self.conversation.get_conversation_messages()
-        system_message = self.conversation.get_system_message()
+        system_message = self.conversation.build_system_prompt(memory_context, memory_tokens)
         
         # Definir parâmetros
         temp = temperature if temperature is not None else self.temperature
@@ -196,7 +516,8 @@ class LLMProcessor:
         
         try:
             # Enviar para o modelo
-            response = self.client.chat(
+            response = self.router.chat(
+                request_class,
                 messages=messages,
                 system_prompt=system_message,
                 temperature=temp,
@@ -217,6 +538,70 @@ class LLMProcessor:
             self.conversation.add_message("assistant", error_message)
             return error_message
     
+    def generate_candidate(self, 
+                           user_input: str,
+                           temperature: Optional[float] = None,
+                           max_tokens: Optional[int] = None,
+                           memory_context: Optional[str] = None,
+                           cancel_event: Optional[threading.Event] = None,
+                           request_class: str = "chat",
+                           memory_tokens: Optional[int] = None) -> Optional[str]:
+        """
+        Gera uma resposta candidata sem alterar o histórico de conversas.
+        
+        Usado na geração especulativa: a resposta só entra no histórico
+        quando confirmada com `commit_exchange`.
+        
+        Args:
+            user_input: Texto de entrada do usuário (possivelmente parcial)
+            temperature: Temperatura para geração (None = usar padrão)
+            max_tokens: Número máximo de tokens (None = usar padrão)
+            memory_context: Contexto de memória de longo prazo (opcional)
+            cancel_event: Evento para cancelar a geração em andamento (opcional)
+            request_class: Classe da requisição para o roteamento
+            memory_tokens: Tokens estimados do contexto de memória (None = estimar)
+            
+        Returns:
+            Resposta gerada ou None se a geração foi cancelada ou falhou
+        """
+        messages = self.conversation.get_conversation_messages()
+        messages.append({"role": "user", "content": user_input})
+        system_message = self.conversation.build_system_prompt(memory_context, memory_tokens)
+        
+        response = self.router.chat(
+            request_class,
+            messages=messages,
+            system_prompt=system_message,
+            temperature=temperature if temperature is not None else self.temperature,
+            max_tokens=max_tokens if max_tokens is not None else self.max_tokens,
+            cancel_event=cancel_event
+        )
+        
+        if response.get("cancelled") or response.get("error"):
+            return None
+        
+        return response.get("message", {}).get("content", "") or None
+    
+    def commit_exchange(self, user_input: str, assistant_response: str) -> None:
+        """
+        Registra no histórico uma troca gerada fora de `process_input`.
+        
+        Args:
+            user_input: Texto de entrada do usuário
+            assistant_response: Resposta confirmada do assistente
+        """
+        self.conversation.add_message("user", user_input)
+        self.conversation.add_message("assistant", assistant_response)
+    
+    def get_latency_stats(self) -> Dict[str, Any]:
+        """
+        Obtém os histogramas de latência e os desvios de modelo por classe de requisição.
+        
+        Returns:
+            Estatísticas do roteador de modelos
+        """
+        return self.router.get_stats()
+    
     def get_available_models(self) -> List[Dict[str, Any]]:
         """
         Obtém a lista de modelos disponíveis.
@@ -239,6 +624,7 @@ class LLMProcessor:
         try:
             self.model = new_model
             self.client.model = new_model
+            self.router.set_default_model(new_model)
             logger.info(f"Modelo alterado para {new_model}")
             return True
         except Exception as e:
@@ -0,0 +1,411 @@
+"""
+Módulo de roteamento de modelos do LLM.
+Parte do projeto Nina IA para escolher o modelo de cada requisição conforme sua urgência.
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Any, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:  # Evita importar requests ao usar apenas LatencyHistogram (ex.: core.pipeline)
+    from .ollama_client import OllamaClient
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Classes de requisição suportadas
+REQUEST_CLASSES = ("callout", "chat", "report", "reflection")
+
+# Limites superiores (ms) dos buckets dos histogramas de latência
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+# SLOs padrão por classe (ms)
+DEFAULT_SLO_MS = {
+    "callout": 1000,
+    "chat": 5000,
+    "report": 30000,
+    "reflection": 15000
+}
+
+
+class LatencyHistogram:
+    """
+    Histograma de latências com buckets fixos.
+    """
+
+    def __init__(self, buckets_ms: Tuple[int, ...] = LATENCY_BUCKETS_MS):
+        """
+        Inicializa o histograma.
+
+        Args:
+            buckets_ms: Limites superiores dos buckets em milissegundos
+        """
+        self.buckets_ms = tuple(buckets_ms)
+        self.counts = [0] * (len(self.buckets_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def observe(self, latency_ms: float) -> None:
+        """
+        Registra uma latência.
+
+        Args:
+            latency_ms: Latência em milissegundos
+        """
+        index = len(self.buckets_ms)
+        for i, bound in enumerate(self.buckets_ms):
+            if latency_ms <= bound:
+                index = i
+                break
+
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ms += latency_ms
+
+    def quantile(self, q: float) -> float:
+        """
+        Estima um quantil pelo limite superior do bucket correspondente.
+
+        Args:
+            q: Quantil entre 0.0 e 1.0
+
+        Returns:
+            Latência estimada em milissegundos (0.0 se vazio)
+        """
+        if not self.count:
+            return 0.0
+
+        target = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return float(self.buckets_ms[i]) if i < len(self.buckets_ms) else float("inf")
+        return float("inf")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Retorna o histograma em formato serializável.
+
+        Returns:
+            Dicionário com buckets cumulativos, contagem, soma e quantis
+        """
+        buckets = {}
+        cumulative = 0
+        for bound, bucket_count in zip(list(self.buckets_ms) + ["+Inf"], self.counts):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+
+        return {
+            "buckets": buckets,
+            "count": self.count,
+            "sum_ms": round(self.total_ms, 1),
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95)
+        }
+
+
+class ModelRouter:
+    """
+    Escolhe o modelo de cada requisição pela sua classe (callout, chat, report,
+    reflection), respeitando SLOs de latência por classe.
+
+    Usa o modelo rápido quando o modelo da classe está sobrecarregado, quando
+    a latência recente estoura o SLO ou quando a requisição falha por timeout.
+    """
+
+    def __init__(self,
+                 client: "OllamaClient",
+                 default_model: str,
+                 fast_model: Optional[str] = None,
+                 classes: Optional[Dict[str, Dict[str, Any]]] = None,
+                 max_concurrent: int = 2,
+                 window: int = 20,
+                 min_samples: int = 3,
+                 cooldown: float = 30.0,
+                 availability_ttl: float = 60.0):
+        """
+        Inicializa o roteador de modelos.
+
+        Args:
+            client: Cliente Ollama usado nas requisições
+            default_model: Modelo usado por classes sem modelo configurado
+            fast_model: Modelo rápido de fallback (None = modelo padrão)
+            classes: Configuração por classe: {'model', 'slo_ms', 'timeout'}
+            max_concurrent: Requisições simultâneas por modelo antes de desviar para o rápido
+            window: Número de latências recentes usadas na verificação do SLO
+            min_samples: Número mínimo de latências antes de verificar o SLO
+            cooldown: Tempo em segundos que uma classe fica no modelo rápido após estourar o SLO
+            availability_ttl: Tempo em segundos entre consultas a /api/tags sobre o modelo rápido
+        """
+        self.client = client
+        self.default_model = default_model
+        self._fast_model = fast_model
+        # Cópia: set_default_model altera as classes sem tocar na configuração recebida
+        self.classes = {name: dict(settings) for name, settings in (classes or {}).items()}
+        self.max_concurrent = max_concurrent
+        self.window = window
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+        self.availability_ttl = availability_ttl
+
+        self._lock = threading.Lock()
+        self._availability_lock = threading.Lock()
+        self._fast_available = None
+        self._checked_at = 0.0
+        self._in_flight = {}
+        self._recent = {}
+        self._degraded_until = {}
+        self._histograms = {}
+        self._fallbacks = {}
+
+    @property
+    def fast_model(self) -> str:
+        """
+        Modelo rápido de fallback (o modelo padrão, se não configurado ou não
+        instalado no servidor).
+        """
+        if self._fast_model and self._fast_model != self.default_model and self._fast_model_available():
+            return self._fast_model
+        return self.default_model
+
+    def _fast_model_available(self) -> bool:
+        """
+        Verifica em /api/tags se o modelo rápido foi baixado (resultado mantido por `availability_ttl`).
+        """
+        with self._availability_lock:
+            if self._fast_available is not None and time.monotonic() - self._checked_at < self.availability_ttl:
+                return self._fast_available
+
+            # Modelos sem tag explícita aparecem como "<nome>:latest"
+            wanted = self._fast_model if ":" in self._fast_model else f"{self._fast_model}:latest"
+            names = {entry.get("name") or entry.get("model") for entry in self.client.list_models()}
+            available = wanted in names or self._fast_model in names
+            if not available and self._fast_available is not False:
+                logger.warning(f"Modelo rápido {self._fast_model} não encontrado no servidor; usando {self.default_model}")
+            self._fast_available = available
+            self._checked_at = time.monotonic()
+            return available
+
+    def set_default_model(self, model: str) -> None:
+        """
+        Troca o modelo padrão, levando junto as classes fixadas no modelo anterior.
+
+        Args:
+            model: Novo modelo padrão
+        """
+        with self._lock:
+            previous = self.default_model
+            for settings in self.classes.values():
+                if settings.get("model") == previous:
+                    settings["model"] = model
+            self.default_model = model
+
+    def _settings(self, request_class: str) -> Dict[str, Any]:
+        """
+        Obtém a configuração de uma classe de requisição.
+
+        Args:
+            request_class: Classe da requisição
+
+        Returns:
+            Dicionário com 'model', 'slo_ms' e 'timeout'
+        """
+        settings = self.classes.get(request_class, {})
+        model = settings.get("model") or self.default_model
+        if self._fast_model and model == self._fast_model:
+            model = self.fast_model  # Modelo padrão se o rápido não estiver instalado
+        return {
+            "model": model,
+            "slo_ms": settings.get("slo_ms", DEFAULT_SLO_MS.get(request_class, DEFAULT_SLO_MS["chat"])),
+            "timeout": settings.get("timeout")
+        }
+
+    def select_model(self, request_class: str) -> Tuple[str, str]:
+        """
+        Escolhe o modelo para uma requisição.
+
+        Args:
+            request_class: Classe da requisição
+
+        Returns:
+            Tuple contendo (modelo escolhido, motivo: 'configured', 'load' ou 'slo')
+        """
+        model = self._settings(request_class)["model"]
+        fast_model = self.fast_model
+        if model == fast_model:
+            return model, "configured"
+
+        with self._lock:
+            if self._in_flight.get(model, 0) >= self.max_concurrent:
+                return fast_model, "load"
+            if time.monotonic() < self._degraded_until.get(request_class, 0.0):
+                return fast_model, "slo"
+
+        return model, "configured"
+
+    def _record(self, request_class: str, model: str, latency_ms: float, slo_ms: float) -> None:
+        """
+        Registra a latência de uma requisição e verifica o SLO da classe.
+        """
+        fast_model = self.fast_model
+        with self._lock:
+            histogram = self._histograms.setdefault(request_class, LatencyHistogram())
+            histogram.observe(latency_ms)
+
+            if model == fast_model:
+                return
+
+            recent = self._recent.setdefault(request_class, deque(maxlen=self.window))
+            recent.append(latency_ms)
+            if len(recent) < self.min_samples:
+                return
+
+            # p95 das latências recentes do modelo da classe
+            ordered = sorted(recent)
+            p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+            if p95 > slo_ms:
+                logger.warning(f"SLO da classe '{request_class}' excedido (p95={p95:.0f}ms > {slo_ms}ms); usando modelo rápido por {self.cooldown:.0f}s")
+                self._degraded_until[request_class] = time.monotonic() + self.cooldown
+                recent.clear()
+
+    def _count_fallback(self, request_class: str, reason: str) -> None:
+        """
+        Contabiliza um desvio para o modelo rápido.
+        """
+        with self._lock:
+            per_class = self._fallbacks.setdefault(request_class, {})
+            per_class[reason] = per_class.get(reason, 0) + 1
+
+    def _call(self, request_class: str, model: str, call) -> Tuple[Any, bool]:
+        """
+        Executa uma chamada ao modelo registrando latência e concorrência.
+
+        Args:
+            request_class: Classe da requisição
+            model: Modelo usado
+            call: Função (modelo, timeout) -> (resultado, falhou)
+
+        Returns:
+            Tuple contendo (resultado, falhou)
+        """
+        settings = self._settings(request_class)
+
+        with self._lock:
+            self._in_flight[model] = self._in_flight.get(model, 0) + 1
+
+        start = time.perf_counter()
+        try:
+            result, failed = call(model, settings["timeout"])
+        finally:
+            with self._lock:
+                self._in_flight[model] -= 1
+
+        if not failed:
+            self._record(request_class, model, (time.perf_counter() - start) * 1000, settings["slo_ms"])
+
+        return result, failed
+
+    def _route(self, request_class: str, call) -> Any:
+        """
+        Executa uma chamada no modelo escolhido, refazendo no modelo rápido em caso de falha.
+        """
+        if request_class not in REQUEST_CLASSES:
+            logger.warning(f"Classe de requisição desconhecida: {request_class}; usando 'chat'")
+            request_class = "chat"
+
+        model, reason = self.select_model(request_class)
+        if reason != "configured":
+            self._count_fallback(request_class, reason)
+
+        result, failed = self._call(request_class, model, call)
+
+        fast_model = self.fast_model
+        if failed and model != fast_model:
+            logger.warning(f"Falha no modelo {model} para '{request_class}'; refazendo com {fast_model}")
+            self._count_fallback(request_class, "error")
+            result, failed = self._call(request_class, fast_model, call)
+
+        return result
+
+    def chat(self, request_class: str, messages: List[Dict[str, str]], **kwargs) -> Dict[str, Any]:
+        """
+        Realiza uma conversa roteada pela classe da requisição.
+
+        Args:
+            request_class: Classe da requisição ('callout', 'chat', 'report', 'reflection')
+            messages: Mensagens da conversa
+            **kwargs: Demais parâmetros de OllamaClient.chat
+
+        Returns:
+            Resposta do modelo com informações adicionais
+        """
+        def call(model, timeout):
+            response = self.client.chat(messages=messages, model=model, timeout=timeout, **kwargs)
+            return response, bool(response.get("error")) and not response.get("cancelled")
+
+        return self._route(request_class, call)
+
+    def generate(self, request_class: str, prompt: str, **kwargs) -> str:
+        """
+        Gera texto roteado pela classe da requisição.
+
+        Args:
+            request_class: Classe da requisição ('callout', 'chat', 'report', 'reflection')
+            prompt: Texto de entrada
+            **kwargs: Demais parâmetros de OllamaClient.generate
+
+        Returns:
+            Texto gerado pelo modelo
+        """
+        def call(model, timeout):
+            text = self.client.generate(prompt=prompt, model=model, timeout=timeout, **kwargs)
+            return text, text.startswith("Erro na geração de texto")
+
+        return self._route(request_class, call)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtém os histogramas de latência e os desvios por classe.
+
+        Returns:
+            Dicionário com modelos, SLOs, histogramas e contagem de desvios por classe
+        """
+        settings_by_class = {request_class: self._settings(request_class) for request_class in REQUEST_CLASSES}
+        with self._lock:
+            stats = {}
+            for request_class in REQUEST_CLASSES:
+                settings = settings_by_class[request_class]
+                histogram = self._histograms.get(request_class, LatencyHistogram())
+                stats[request_class] = {
+                    "model": settings["model"],
+                    "slo_ms": settings["slo_ms"],
+                    "latency": histogram.to_dict(),
+                    "fallbacks": dict(self._fallbacks.get(request_class, {})),
+                    "degraded": time.monotonic() < self._degraded_until.get(request_class, 0.0)
+                }
+            return stats
+
+    def export_prometheus(self) -> str:
+        """
+        Exporta os histogramas de latência no formato de texto do Prometheus.
+
+        Returns:
+            Métricas em formato de exposição do Prometheus
+        """
+        lines = [
+            "# HELP nina_llm_latency_ms Latência das requisições ao LLM por classe",
+            "# TYPE nina_llm_latency_ms histogram"
+        ]
+
+        for request_class, class_stats in self.get_stats().items():
+            latency = class_stats["latency"]
+            for bound, cumulative in latency["buckets"].items():
+                lines.append(f'nina_llm_latency_ms_bucket{{class="{request_class}",le="{bound}"}} {cumulative}')
+            lines.append(f'nina_llm_latency_ms_sum{{class="{request_class}"}} {latency["sum_ms"]}')
+            lines.append(f'nina_llm_latency_ms_count{{class="{request_class}"}} {latency["count"]}')
+
+        return "\n".join(lines) + "\n"
@@ -6,9 +6,12 @@ Parte do projeto Nina IA para processamento de texto e geração de respostas.
 import os
 import json
 import logging
+import threading
 import requests
 from typing import Dict, List, Optional, Any, Union
 
+from core import tracing
+
 # Configuração de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -84,7 +87,9 @@ class OllamaClient:
                  top_p: float = 0.9,
                  top_k: int = 40,
                  max_tokens: int = 500,
-                 stop_sequences: Optional[List[str]] = None) -> str:
+                 stop_sequences: Optional[List[str]] = None,
+                 model: Optional[str] = None,
+                 timeout: Optional[float] = None) -> str:
         """
         Gera texto a partir de um prompt usando o modelo.
         
@@ -96,12 +101,15 @@ class OllamaClient:
             top_k: Valor de top-k para amostragem
             max_tokens: Número máximo de tokens a serem gerados
             stop_sequences: Lista de sequências para parar a geração
+            model: Modelo a ser usado nesta requisição (None = usar o modelo atual)
+            timeout: Timeout desta requisição em segundos (None = usar o padrão)
             
         Returns:
             Texto gerado pelo modelo
         """
+        model = model or self.model
         payload = {
-            "model": self.model,
+            "model": model,
             "prompt": prompt,
             "temperature": temperature,
             "top_p": top_p,
@@ -117,8 +125,8 @@ class OllamaClient:
             payload["stop"] = stop_sequences
         
         try:
-            logger.info(f"Enviando prompt para o modelo {self.model}")
-            response = requests.post(self.api_generate, json=payload, timeout=self.timeout)
+            logger.info(f"Enviando prompt para o modelo {model}")
+            response = requests.post(self.api_generate, json=payload, timeout=timeout or self.timeout)
             response.raise_for_status()
             return response.json().get("response", "")
         except Exception as e:
@@ -132,10 +140,17 @@ class OllamaClient:
              top_p: float = 0.9,
              top_k: int = 40,
              max_tokens: int = 500,
-             stop_sequences: Optional[List[str]] = None) -> Dict[str, Any]:
+             stop_sequences: Optional[List[str]] = None,
+             cancel_event: Optional[threading.Event] = None,
+             model: Optional[str] = None,
+             timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         Realiza uma conversa com o modelo.
         
+        Quando `cancel_event` é fornecido, a resposta é recebida em streaming e a
+        conexão é fechada assim que o evento for sinalizado, o que interrompe a
+        geração no servidor.
+        
         Args:
             messages: Lista de mensagens no formato [{"role": "user", "content": "Olá"}, ...]
             system_prompt: Prompt de sistema para definir comportamento do modelo
@@ -144,12 +159,18 @@ class OllamaClient:
             top_k: Valor de top-k para amostragem
             max_tokens: Número máximo de tokens a serem gerados
             stop_sequences: Lista de sequências para parar a geração
+            cancel_event: Evento para cancelar a geração em andamento (opcional)
+            model: Modelo a ser usado nesta requisição (None = usar o modelo atual)
+            timeout: Timeout desta requisição em segundos (None = usar o padrão)
             
         Returns:
-            Resposta do modelo com informações adicionais
+            Resposta do modelo com informações adicionais ('cancelled' = True se cancelada,
+            'error' preenchido em caso de falha)
         """
+        model = model or self.model
+        timeout = timeout or self.timeout
         payload = {
-            "model": self.model,
+            "model": model,
             "messages": messages,
             "temperature": temperature,
             "top_p": top_p,
@@ -164,14 +185,69 @@ class OllamaClient:
         if stop_sequences:
             payload["stop"] = stop_sequences
         
+        with tracing.span("llm.chat", model=model, stream=cancel_event is not None) as span:
+            if cancel_event is not None:
+                result = self._chat_stream(payload, cancel_event, timeout)
+            else:
+                try:
+                    logger.info(f"Enviando conversa para o modelo {model}")
+                    response = requests.post(self.api_chat, json=payload, timeout=timeout)
+                    response.raise_for_status()
+                    result = response.json()
+                except Exception as e:
+                    logger.error(f"Erro na conversa: {e}")
+                    result = {"message": {"content": f"Erro na conversa: {e}"}, "error": str(e)}
+            
+            if result.get("error"):
+                span.set(error=result["error"])
+            if result.get("eval_count"):
+                span.set(tokens=result["eval_count"])
+            return result
+    
+    def _chat_stream(self, 
+                     payload: Dict[str, Any], 
+                     cancel_event: threading.Event,
+                     timeout: float) -> Dict[str, Any]:
+        """
+        Realiza uma conversa em streaming, permitindo cancelamento.
+        
+        Args:
+            payload: Corpo da requisição de conversa
+            cancel_event: Evento para cancelar a geração em andamento
+            timeout: Timeout da requisição em segundos
+            
+        Returns:
+            Resposta do modelo com informações adicionais
+        """
+        payload = dict(payload, stream=True)
+        parts = []
+        result = {}
+        
         try:
-            logger.info(f"Enviando conversa para o modelo {self.model}")
-            response = requests.post(self.api_chat, json=payload, timeout=self.timeout)
-            response.raise_for_status()
-            return response.json()
+            logger.info(f"Enviando conversa (streaming) para o modelo {payload['model']}")
+            with requests.post(self.api_chat, json=payload, timeout=timeout, stream=True) as response:
+                response.raise_for_status()
+                
+                for line in response.iter_lines():
+                    if cancel_event.is_set():
+                        logger.info("Geração cancelada")
+                        return {"message": {"role": "assistant", "content": "".join(parts)}, "cancelled": True}
+                    
+                    if not line:
+                        continue
+                    
+                    chunk = json.loads(line)
+                    parts.append(chunk.get("message", {}).get("content", ""))
+                    
+                    if chunk.get("done"):
+                        result = chunk
+                        break
+            
+            result["message"] = {"role": "assistant", "content": "".join(parts)}
+            return result
         except Exception as e:
             logger.error(f"Erro na conversa: {e}")
-            return {"message": {"content": f"Erro na conversa: {e}"}}
+            return {"message": {"content": f"Erro na conversa: {e}"}, "error": str(e)}
     
     def pull_model(self, model_name: Optional[str] = None) -> bool:
         """
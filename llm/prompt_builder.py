@@ -0,0 +1,128 @@
+"""
+Módulo para construção do prompt de sistema a partir da personalidade.
+Parte do projeto Nina IA; compartilhado por LLMModule, PersonalityManager e ProfilesManager.
+"""
+
+import hashlib
+import logging
+import threading
+from string import Template
+from typing import Dict, Any, Optional, Tuple
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Descrição de cada estilo de fala
+SPEECH_STYLE_TEXTS = {
+    "formal": "Você fala de maneira formal e educada. ",
+    "casual": "Você fala de maneira casual e descontraída. ",
+    "amigável": "Você fala de maneira amigável e calorosa. ",
+    "técnico": "Você fala de maneira técnica e precisa. "
+}
+
+# Descrição de cada humor
+MOOD_TEXTS = {
+    "alegre": "Seu humor atual é alegre e otimista. ",
+    "sério": "Seu humor atual é sério e focado. ",
+    "neutro": "Seu humor atual é neutro e equilibrado. ",
+    "reflexivo": "Seu humor atual é reflexivo e contemplativo. "
+}
+
+# Template compilado uma única vez; as seções opcionais já incluem o espaço final
+SYSTEM_PROMPT_TEMPLATE = Template(
+    "Você é ${name}, uma assistente de inteligência artificial. "
+    "${description}${style}${mood}${preferences}"
+    "Você responde de forma clara e concisa, mantendo seu estilo de fala e personalidade. "
+    "Você é útil, respeitosa e não julga as perguntas do usuário. "
+    "Você evita respostas muito longas e se concentra no que é mais relevante."
+)
+
+
+def render_system_prompt(profile: Dict[str, Any]) -> str:
+    """
+    Renderiza o prompt de sistema de um perfil.
+
+    Aceita tanto o formato de perfil (atributos em 'personality') quanto o
+    formato plano (atributos no nível superior).
+
+    Args:
+        profile: Perfil ou dicionário de personalidade
+
+    Returns:
+        Prompt de sistema formatado
+    """
+    attributes = profile.get("personality")
+    if not isinstance(attributes, dict):
+        attributes = profile
+
+    preferences = attributes.get("preferences") or []
+    description = (attributes.get("description") or "").strip().rstrip(".")
+
+    return SYSTEM_PROMPT_TEMPLATE.substitute(
+        name=profile.get("name") or "Nina",
+        description=f"{description}. " if description else "",
+        style=SPEECH_STYLE_TEXTS.get(attributes.get("speech_style", "amigável"), ""),
+        mood=MOOD_TEXTS.get(attributes.get("mood", "neutro"), ""),
+        preferences=("Você gosta de falar sobre " + ", ".join(preferences) + ". ") if preferences else ""
+    )
+
+
+def prompt_hash(prompt: str) -> str:
+    """
+    Calcula um hash estável do prompt, usado como chave de reuso e cache.
+
+    Args:
+        prompt: Prompt de sistema
+
+    Returns:
+        Hash hexadecimal (16 caracteres)
+    """
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+
+class SystemPromptBuilder:
+    """
+    Construtor de prompt de sistema memoizado pela versão do perfil.
+
+    O prompt só é renderizado novamente quando o contador de versão do
+    perfil muda, ou seja, quando a personalidade é alterada.
+    """
+
+    def __init__(self):
+        """
+        Inicializa o construtor de prompt.
+        """
+        self._lock = threading.Lock()
+        self._version = None
+        self._prompt = None
+        self._hash = None
+        self.renders = 0
+
+    def build(self, profile: Dict[str, Any], version: int) -> Tuple[str, str]:
+        """
+        Obtém o prompt de sistema do perfil, renderizando apenas se a versão mudou.
+
+        Args:
+            profile: Perfil ou dicionário de personalidade
+            version: Contador de versão do perfil
+
+        Returns:
+            Tuple contendo (prompt de sistema, hash do prompt)
+        """
+        with self._lock:
+            if self._version != version or self._prompt is None:
+                self._prompt = render_system_prompt(profile)
+                self._hash = prompt_hash(self._prompt)
+                self._version = version
+                self.renders += 1
+                logger.debug(f"Prompt de sistema renderizado (versão {version}, hash {self._hash})")
+
+            return self._prompt, self._hash
+
+    @property
+    def current_hash(self) -> Optional[str]:
+        """
+        Hash do último prompt renderizado (None se ainda não houver).
+        """
+        return self._hash
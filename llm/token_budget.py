@@ -0,0 +1,200 @@
+"""
+Módulo para estimativa de tokens e orçamento de contexto do LLM.
+Parte do projeto Nina IA para manter o tamanho do prompt (e a latência) limitado.
+"""
+
+import logging
+import re
+from typing import Dict, List, Optional
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Palavras, números e sinais de pontuação isolados
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+# Custo fixo por mensagem no formato de chat (papel + delimitadores)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """
+    Estima o número de tokens de um texto sem carregar um tokenizador.
+
+    Combina a contagem de palavras/pontuação com a regra de ~4 caracteres
+    por token e usa o maior dos dois valores, o que tende a superestimar
+    levemente (mais seguro para não estourar o contexto).
+
+    Args:
+        text: Texto a ser estimado
+
+    Returns:
+        Número estimado de tokens
+    """
+    if not text:
+        return 0
+    if not isinstance(text, str):
+        text = str(text)
+
+    pieces = _TOKEN_PATTERN.findall(text)
+    # Palavras longas costumam ser divididas em mais de um token
+    by_words = sum(1 + len(piece) // 8 for piece in pieces)
+    by_chars = (len(text) + 3) // 4
+
+    return max(by_words, by_chars)
+
+
+def estimate_message_tokens(message: Dict[str, str]) -> int:
+    """
+    Estima o número de tokens de uma mensagem no formato de chat.
+
+    Args:
+        message: Mensagem com 'role' e 'content'
+
+    Returns:
+        Número estimado de tokens, incluindo o custo fixo por mensagem
+    """
+    return estimate_tokens(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS
+
+
+def truncate_to_tokens(text: Optional[str], max_tokens: int) -> str:
+    """
+    Corta um texto para caber em um número máximo de tokens estimados.
+
+    Args:
+        text: Texto a ser cortado
+        max_tokens: Número máximo de tokens
+
+    Returns:
+        Texto cortado (o próprio texto se já couber)
+    """
+    if not text or max_tokens <= 0:
+        return ""
+
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    # Busca binária pelo maior prefixo que cabe no orçamento
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle]) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+
+    return text[:low].rstrip()
+
+
+class TokenBudget:
+    """
+    Divide a janela de contexto do modelo entre prompt de sistema, memória e histórico.
+    """
+
+    def __init__(self,
+                 context_tokens: int = 4096,
+                 response_tokens: int = 500,
+                 system_ratio: float = 0.2,
+                 memory_ratio: float = 0.2,
+                 history_ratio: float = 0.6,
+                 summary_ratio: float = 0.15):
+        """
+        Inicializa o orçamento de tokens.
+
+        Args:
+            context_tokens: Tamanho total da janela de contexto do modelo
+            response_tokens: Tokens reservados para a resposta gerada
+            system_ratio: Fração do orçamento para o prompt de sistema
+            memory_ratio: Fração do orçamento para o contexto de memória
+            history_ratio: Fração do orçamento para o histórico da conversa
+            summary_ratio: Fração do orçamento de histórico reservada ao resumo acumulado
+        """
+        total_ratio = system_ratio + memory_ratio + history_ratio
+        if total_ratio <= 0:
+            raise ValueError("A soma das frações do orçamento deve ser positiva")
+
+        self.context_tokens = context_tokens
+        self.response_tokens = response_tokens
+
+        # Normalizar frações para que somem 1.0
+        self.system_ratio = system_ratio / total_ratio
+        self.memory_ratio = memory_ratio / total_ratio
+        self.history_ratio = history_ratio / total_ratio
+        self.summary_ratio = max(0.0, min(1.0, summary_ratio))
+
+    @property
+    def available_tokens(self) -> int:
+        """
+        Tokens disponíveis para o prompt (contexto menos a reserva da resposta).
+        """
+        return max(0, self.context_tokens - self.response_tokens)
+
+    @property
+    def system_tokens(self) -> int:
+        """
+        Orçamento para o prompt de sistema.
+        """
+        return int(self.available_tokens * self.system_ratio)
+
+    @property
+    def memory_tokens(self) -> int:
+        """
+        Orçamento para o contexto de memória de longo prazo.
+        """
+        return int(self.available_tokens * self.memory_ratio)
+
+    @property
+    def summary_tokens(self) -> int:
+        """
+        Orçamento para o resumo acumulado das mensagens antigas.
+        """
+        return int(self.available_tokens * self.history_ratio * self.summary_ratio)
+
+    @property
+    def history_tokens(self) -> int:
+        """
+        Orçamento para as mensagens recentes (descontado o resumo).
+        """
+        return int(self.available_tokens * self.history_ratio) - self.summary_tokens
+
+    def split_history(self, messages: List[Dict[str, str]]) -> int:
+        """
+        Calcula quantas mensagens antigas ficam fora da janela de histórico.
+
+        A janela é preenchida da mensagem mais recente para a mais antiga; a
+        mensagem mais recente é sempre mantida, mesmo que sozinha exceda o orçamento.
+
+        Args:
+            messages: Mensagens em ordem cronológica
+
+        Returns:
+            Índice da primeira mensagem dentro da janela
+        """
+        used = 0
+        start = len(messages)
+
+        for index in range(len(messages) - 1, -1, -1):
+            cost = estimate_message_tokens(messages[index])
+            if used + cost > self.history_tokens and start < len(messages):
+                break
+            used += cost
+            start = index
+
+        return start
+
+    def to_dict(self) -> Dict[str, int]:
+        """
+        Retorna a divisão do orçamento em tokens.
+
+        Returns:
+            Dicionário com o orçamento de cada parte do prompt
+        """
+        return {
+            "context_tokens": self.context_tokens,
+            "response_tokens": self.response_tokens,
+            "system_tokens": self.system_tokens,
+            "memory_tokens": self.memory_tokens,
+            "history_tokens": self.history_tokens,
+            "summary_tokens": self.summary_tokens
+        }
@@ -0,0 +1,332 @@
+"""
+Pool de conexões SQLite para o sistema de memória da Nina IA.
+Mantém uma conexão por thread em modo WAL, com pragmas de desempenho e política de espera.
+"""
+
+import os
+import time
+import random
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional, Iterator, Sequence
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("ConnectionPool")
+
+# Pools compartilhados por caminho de banco de dados
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """
+    Pool de conexões SQLite com uma conexão por thread.
+
+    Cada thread reutiliza sempre a mesma conexão, o que mantém o cache de
+    instruções preparadas do sqlite3 e evita abrir o arquivo a cada operação.
+    O modo WAL permite que leitores (interface web) e escritores (loop de voz)
+    trabalhem em paralelo.
+    """
+
+    def __init__(self,
+                 db_path: str,
+                 busy_timeout_ms: int = 5000,
+                 cache_size_kb: int = 16384,
+                 mmap_size_mb: int = 64,
+                 cached_statements: int = 256,
+                 max_retries: int = 5):
+        """
+        Inicializa o pool de conexões.
+
+        Args:
+            db_path: Caminho para o arquivo do banco de dados SQLite
+            busy_timeout_ms: Tempo de espera do SQLite por um lock antes de falhar
+            cache_size_kb: Tamanho do cache de páginas por conexão (KiB)
+            mmap_size_mb: Tamanho da região mapeada em memória (MiB)
+            cached_statements: Número de instruções preparadas mantidas por conexão
+            max_retries: Tentativas extras quando o banco continua bloqueado após o busy timeout
+        """
+        self.db_path = db_path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size_mb = mmap_size_mb
+        self.cached_statements = cached_statements
+        self.max_retries = max_retries
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = {}
+        self.busy_retries = 0
+        self.lock_wait_seconds = 0.0  # Tempo total gasto aguardando o lock de escrita
+
+        if db_path != ":memory:":
+            directory = os.path.dirname(os.path.abspath(db_path))
+            os.makedirs(directory, exist_ok=True)
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Abre uma nova conexão e aplica os pragmas de desempenho.
+
+        Returns:
+            Conexão configurada
+        """
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000.0,
+            cached_statements=self.cached_statements,
+            check_same_thread=False,
+            isolation_level=None  # Transações controladas explicitamente pelo pool
+        )
+        conn.row_factory = sqlite3.Row
+
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size_mb) * 1024 * 1024}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        Obtém a conexão da thread atual, criando-a se necessário.
+
+        Ao criar uma conexão, fecha as de threads que já terminaram (o
+        identificador de uma thread encerrada pode ser reutilizado).
+
+        Returns:
+            Conexão da thread atual
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            alive = {thread.ident for thread in threading.enumerate()}
+            with self._lock:
+                stale = [self._connections.pop(ident) for ident in list(self._connections)
+                         if ident not in alive or ident == threading.get_ident()]
+                self._connections[threading.get_ident()] = conn
+            for old in stale:
+                try:
+                    old.close()
+                except Exception as e:
+                    logger.error(f"Erro ao fechar conexão de thread encerrada: {e}")
+            logger.debug(f"Nova conexão SQLite para a thread {threading.get_ident()}: {self.db_path}")
+        return conn
+
+    def _retry_busy(self, operation):
+        """
+        Executa uma operação repetindo-a com recuo exponencial se o banco estiver bloqueado.
+
+        O busy timeout do SQLite já espera pelo lock; as tentativas extras
+        cobrem os casos em que o SQLite desiste imediatamente (ex.: upgrade
+        de leitura para escrita em WAL).
+        """
+        delay = 0.01
+        for attempt in range(self.max_retries + 1):
+            try:
+                return operation()
+            except sqlite3.OperationalError as e:
+                message = str(e).lower()
+                if ("locked" not in message and "busy" not in message) or attempt == self.max_retries:
+                    raise
+                with self._lock:
+                    self.busy_retries += 1
+                time.sleep(delay + random.uniform(0, delay))
+                delay = min(delay * 2, 1.0)
+
+    @contextmanager
+    def transaction(self, immediate: bool = True) -> Iterator[sqlite3.Connection]:
+        """
+        Abre uma transação na conexão da thread atual.
+
+        Transações de escrita usam BEGIN IMMEDIATE para obter o lock de
+        escrita no início e evitar deadlocks de upgrade de lock.
+
+        Args:
+            immediate: Se True, reserva o lock de escrita no início da transação
+
+        Yields:
+            Conexão com a transação aberta
+        """
+        conn = self.connection()
+
+        # Transação aninhada: reutiliza a transação externa
+        if conn.in_transaction:
+            yield conn
+            return
+
+        start = time.perf_counter()
+        self._retry_busy(lambda: conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN"))
+        if immediate:
+            waited = time.perf_counter() - start
+            with self._lock:
+                self.lock_wait_seconds += waited
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        try:
+            self._retry_busy(conn.commit)
+        except BaseException:
+            # Sem rollback a conexão ficaria em transação e as próximas seriam tratadas como aninhadas
+            conn.rollback()
+            raise
+
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> sqlite3.Cursor:
+        """
+        Executa uma instrução de escrita em sua própria transação.
+
+        Args:
+            sql: Instrução SQL
+            params: Parâmetros da instrução
+
+        Returns:
+            Cursor resultante
+        """
+        with self.transaction() as conn:
+            return conn.execute(sql, params)
+
+    def executemany(self, sql: str, rows: Sequence[Sequence[Any]]) -> sqlite3.Cursor:
+        """
+        Executa uma instrução de escrita para várias linhas em uma única transação.
+
+        Args:
+            sql: Instrução SQL
+            rows: Parâmetros de cada linha
+
+        Returns:
+            Cursor resultante
+        """
+        with self.transaction() as conn:
+            return conn.executemany(sql, rows)
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> List[sqlite3.Row]:
+        """
+        Executa uma consulta de leitura.
+
+        Args:
+            sql: Consulta SQL
+            params: Parâmetros da consulta
+
+        Returns:
+            Linhas retornadas
+        """
+        conn = self.connection()
+        return self._retry_busy(lambda: conn.execute(sql, params).fetchall())
+
+    def query_one(self, sql: str, params: Sequence[Any] = ()) -> Optional[sqlite3.Row]:
+        """
+        Executa uma consulta de leitura que retorna no máximo uma linha.
+
+        Args:
+            sql: Consulta SQL
+            params: Parâmetros da consulta
+
+        Returns:
+            Linha retornada ou None
+        """
+        conn = self.connection()
+        return self._retry_busy(lambda: conn.execute(sql, params).fetchone())
+
+    def executescript(self, script: str) -> None:
+        """
+        Executa um script SQL (ex.: criação de tabelas).
+
+        Args:
+            script: Script SQL
+        """
+        conn = self.connection()
+        self._retry_busy(lambda: conn.executescript(script))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtém estatísticas do pool.
+
+        Returns:
+            Dicionário com número de conexões abertas, tentativas por bloqueio
+            e tempo total de espera pelo lock de escrita
+        """
+        with self._lock:
+            return {
+                "db_path": self.db_path,
+                "connections": len(self._connections),
+                "busy_retries": self.busy_retries,
+                "lock_wait_ms": round(self.lock_wait_seconds * 1000, 3)
+            }
+
+    def close_thread_connection(self) -> None:
+        """
+        Fecha a conexão da thread atual (ex.: ao final de uma thread de trabalho).
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            with self._lock:
+                self._connections.pop(threading.get_ident(), None)
+            self._local.conn = None
+            conn.close()
+
+    def close_all(self) -> None:
+        """
+        Fecha todas as conexões do pool.
+        """
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception as e:
+                logger.error(f"Erro ao fechar conexão: {e}")
+
+        # Força a criação de uma nova conexão na thread atual
+        self._local = threading.local()
+        logger.info(f"Conexões fechadas: {self.db_path}")
+
+
+def get_pool(db_path: str, **options) -> ConnectionPool:
+    """
+    Obtém o pool compartilhado de um banco de dados, criando-o se necessário.
+
+    Componentes que usam o mesmo arquivo (ex.: MemoryDatabase e MemoryManager)
+    compartilham o mesmo pool. Bancos ":memory:" recebem sempre um pool próprio.
+
+    Args:
+        db_path: Caminho para o arquivo do banco de dados SQLite
+        **options: Opções repassadas ao ConnectionPool na criação
+
+    Returns:
+        Pool de conexões do banco de dados
+    """
+    if db_path == ":memory:":
+        return ConnectionPool(db_path, **options)
+
+    key = os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is not None and pool._connections and not os.path.exists(key):
+            # Arquivo removido (ex.: diretório temporário recriado): descartar conexões antigas
+            pool.close_all()
+            pool = None
+        if pool is None:
+            pool = ConnectionPool(db_path, **options)
+            _pools[key] = pool
+        return pool
+
+
+def close_all_pools() -> None:
+    """
+    Fecha todos os pools compartilhados.
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+
+    for pool in pools:
+        pool.close_all()
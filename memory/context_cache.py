@@ -0,0 +1,193 @@
+"""
+Cache de contexto em memória para o sistema de memória da Nina IA.
+Guarda perfis e janelas de interações recentes, invalidados por versão e limitados por LRU.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Hashable, Optional
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("ContextCache")
+
+
+class ContextCache:
+    """
+    Cache LRU de contexto com invalidação por número de versão.
+
+    Cada item pertence a uma chave de versão (tipo, id), por exemplo
+    ("user", "123"). Toda escrita no banco incrementa a versão da chave
+    correspondente (`bump`), o que invalida todas as variantes guardadas dela
+    (ex.: janelas de interações de tamanhos diferentes). Uma leitura que
+    começou antes de uma escrita não é guardada, então o cache nunca devolve
+    um valor mais antigo que a última escrita.
+
+    As versões vêm de um contador global que só cresce, e o registro de
+    versões é limitado como o LRU: a chave escrita há mais tempo sai do
+    registro e passa a ter a versão "piso" (a maior já descartada). Como uma
+    versão nunca se repete, descartar o registro só pode invalidar itens
+    guardados, nunca validar um valor antigo.
+
+    Os valores são compartilhados entre chamadas e não devem ser alterados.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        Inicializa o cache.
+
+        Args:
+            max_entries: Número máximo de itens antes de descartar os menos usados
+        """
+        self.max_entries = max(1, max_entries)
+
+        self._entries = OrderedDict()  # (tipo, id, variante) -> (versão, valor)
+        self._versions = OrderedDict()  # (tipo, id) -> versão, da escrita mais antiga à mais recente
+        self._clock = 0  # Última versão atribuída
+        self._floor = 0  # Versão das chaves fora do registro (maior versão descartada)
+        self._epoch = 0  # Incrementado por clear(): invalida tudo
+        self._lock = threading.Lock()
+
+        # Métricas
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self.stale_loads = 0
+
+    def _current_version(self, kind: str, key: Hashable) -> tuple:
+        """
+        Obtém a versão atual de uma chave (com o lock adquirido).
+        """
+        return (self._epoch, self._versions.get((kind, key), self._floor))
+
+    def get_or_load(self, kind: str, key: Hashable, loader: Callable[[], Any],
+                    variant: Optional[Hashable] = None) -> Any:
+        """
+        Obtém um valor do cache ou carrega-o do banco.
+
+        Args:
+            kind: Tipo do item ("user", "channel", "recent", ...)
+            key: Identificador do item (ex.: ID do usuário)
+            loader: Função que lê o valor do banco em caso de falta
+            variant: Variante do item (ex.: tamanho da janela de interações)
+
+        Returns:
+            Valor em cache ou recém-carregado
+        """
+        entry_key = (kind, key, variant)
+
+        with self._lock:
+            version = self._current_version(kind, key)
+            entry = self._entries.get(entry_key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(entry_key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Leitura fora do lock: outras threads continuam sendo atendidas
+        value = loader()
+
+        with self._lock:
+            if self._current_version(kind, key) == version:
+                self._store(entry_key, version, value)
+            else:
+                # Houve uma escrita durante a leitura: não guardar o valor antigo
+                self.stale_loads += 1
+
+        return value
+
+    def put(self, kind: str, key: Hashable, value: Any, variant: Optional[Hashable] = None) -> None:
+        """
+        Grava um valor recém-escrito no banco (write-through), invalidando as outras variantes.
+
+        Args:
+            kind: Tipo do item
+            key: Identificador do item
+            value: Novo valor
+            variant: Variante do item
+        """
+        with self._lock:
+            self._bump(kind, key)
+            self._store((kind, key, variant), self._current_version(kind, key), value)
+
+    def get_version(self, kind: str, key: Hashable) -> tuple:
+        """
+        Obtém a versão atual de uma chave, para identificar o conteúdo derivado dela.
+
+        Args:
+            kind: Tipo do item
+            key: Identificador do item
+
+        Returns:
+            Versão da chave (muda a cada escrita e a cada clear())
+        """
+        with self._lock:
+            return self._current_version(kind, key)
+
+    def bump(self, kind: str, key: Hashable) -> None:
+        """
+        Incrementa a versão de uma chave após uma escrita no banco.
+
+        Args:
+            kind: Tipo do item
+            key: Identificador do item
+        """
+        with self._lock:
+            self._bump(kind, key)
+
+    def _bump(self, kind: str, key: Hashable) -> None:
+        """
+        Atribui uma nova versão a uma chave (com o lock adquirido), descartando
+        do registro as chaves escritas há mais tempo além do limite.
+        """
+        self._clock += 1
+        self._versions[(kind, key)] = self._clock
+        self._versions.move_to_end((kind, key))
+        while len(self._versions) > self.max_entries:
+            _, version = self._versions.popitem(last=False)
+            self._floor = max(self._floor, version)
+        self.invalidations += 1
+
+    def _store(self, entry_key: tuple, version: tuple, value: Any) -> None:
+        """
+        Guarda um valor e descarta os itens menos usados além do limite (com o lock adquirido).
+        """
+        self._entries[entry_key] = (version, value)
+        self._entries.move_to_end(entry_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Invalida todo o cache (ex.: após restaurar um backup).
+        """
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self._epoch += 1
+        logger.info("Cache de contexto limpo")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtém métricas do cache.
+
+        Returns:
+            Dicionário com tamanho, acertos, faltas, invalidações e descartes
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "versions": len(self._versions),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+                "stale_loads": self.stale_loads
+            }
@@ -4,11 +4,17 @@ Implementa a estrutura do banco de dados SQLite e funções para manipulação d
 """
 
 import os
+import re
 import json
+import base64
+import glob
 import sqlite3
 import logging
-from datetime import datetime
-from typing import Dict, List, Any, Optional, Union, Tuple
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Union, Tuple, Callable
+
+from memory.connection_pool import get_pool
+from memory.fulltext import FTS_TOKENIZER, SNIPPET_START, SNIPPET_END, SNIPPET_ELLIPSIS, build_fts_query
 
 # Configurar logging
 logging.basicConfig(
@@ -21,24 +27,71 @@ logging.basicConfig(
 )
 logger = logging.getLogger("MemoryDatabase")
 
+# Campos de metadados aceitos em atualizações parciais (ex.: "emotions.predominant")
+METADATA_FIELD_PATTERN = re.compile(r"^[A-Za-z0-9_]+(\.[A-Za-z0-9_]+)*$")
+
+
+def encode_cursor(timestamp: str, interaction_id: int) -> str:
+    """
+    Codifica a posição de uma interação em um cursor opaco para a API.
+    
+    Args:
+        timestamp: Timestamp da interação
+        interaction_id: ID da interação
+        
+    Returns:
+        Cursor em base64 seguro para URLs
+    """
+    raw = f"{timestamp}|{interaction_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """
+    Decodifica um cursor gerado por encode_cursor.
+    
+    Args:
+        cursor: Cursor recebido da API
+        
+    Returns:
+        Tuple contendo (timestamp, interaction_id)
+        
+    Raises:
+        ValueError: Se o cursor for inválido
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, interaction_id = base64.urlsafe_b64decode(padded).decode("utf-8").rsplit("|", 1)
+        return timestamp, int(interaction_id)
+    except Exception:
+        raise ValueError(f"Cursor inválido: {cursor}")
+
+
 class MemoryDatabase:
     """
     Classe para gerenciar o banco de dados do sistema de memória de longo prazo.
     """
     
-    def __init__(self, db_path: str = "memory.db", json_dir: str = "memory_data"):
+    def __init__(self, db_path: str = "memory.db", json_dir: str = "memory_data",
+                 pool_options: Optional[Dict[str, Any]] = None):
         """
         Inicializa o banco de dados.
         
         Args:
             db_path: Caminho para o arquivo do banco de dados SQLite
-            json_dir: Diretório para armazenar os arquivos JSON
+            json_dir: Diretório dos arquivos JSON legados (origem da migração de metadados)
+            pool_options: Opções do pool de conexões (busy_timeout_ms, cache_size_kb, mmap_size_mb)
         """
         self.db_path = db_path
         self.json_dir = json_dir
         
-        # Criar diretório para arquivos JSON se não existir
-        os.makedirs(self.json_dir, exist_ok=True)
+        # Pool compartilhado (uma conexão WAL por thread)
+        self.pool = get_pool(db_path, **(pool_options or {}))
+        
+        # Funções chamadas com (interaction_id, conteúdo) após cada gravação de interações
+        self._interaction_listeners = []
+        # Funções chamadas com os IDs das interações removidas (exclusão e retenção)
+        self._removal_listeners = []
         
         # Inicializar banco de dados
         self._init_database()
@@ -50,11 +103,12 @@ class MemoryDatabase:
         Inicializa a estrutura do banco de dados.
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            # Permite recuperar espaço aos poucos após a retenção (só tem efeito em bancos novos;
+            # bancos existentes são convertidos pela retenção com um VACUUM único)
+            self.pool.connection().execute("PRAGMA auto_vacuum = INCREMENTAL")
             
             # Criar tabelas
-            cursor.executescript("""
+            self.pool.executescript("""
                 -- Tabela de Usuários
                 CREATE TABLE IF NOT EXISTS users (
                     user_id TEXT PRIMARY KEY,
@@ -63,7 +117,8 @@ class MemoryDatabase:
                     last_seen TIMESTAMP,
                     interaction_count INTEGER DEFAULT 0,
                     voice_participation_count INTEGER DEFAULT 0,
-                    metadata_path TEXT  -- Caminho para o arquivo JSON com dados adicionais
+                    metadata_path TEXT,  -- Legado: caminho do arquivo JSON antes da migração
+                    metadata TEXT DEFAULT '{}'  -- Dados adicionais (JSON1)
                 );
 
                 -- Tabela de Canais
@@ -75,7 +130,8 @@ class MemoryDatabase:
                     first_activity TIMESTAMP,
                     last_activity TIMESTAMP,
                     message_count INTEGER DEFAULT 0,
-                    metadata_path TEXT,  -- Caminho para o arquivo JSON com dados adicionais
+                    metadata_path TEXT,  -- Legado: caminho do arquivo JSON antes da migração
+                    metadata TEXT DEFAULT '{}',  -- Dados adicionais (JSON1)
                     FOREIGN KEY (guild_id) REFERENCES guilds(guild_id)
                 );
 
@@ -144,56 +200,281 @@ class MemoryDatabase:
                     FOREIGN KEY (channel_id) REFERENCES channels(channel_id)
                 );
                 
+                -- Agregados diários das interações já removidas pela retenção
+                CREATE TABLE IF NOT EXISTS interaction_daily (
+                    day TEXT,
+                    user_id TEXT,
+                    channel_id TEXT,
+                    interaction_type TEXT,
+                    interaction_count INTEGER DEFAULT 0,
+                    sentiment_sum REAL DEFAULT 0.0,
+                    PRIMARY KEY (day, user_id, channel_id, interaction_type)
+                );
+                
+                CREATE TABLE IF NOT EXISTS interaction_daily_topics (
+                    day TEXT,
+                    channel_id TEXT,
+                    topic TEXT,
+                    count INTEGER DEFAULT 0,
+                    PRIMARY KEY (day, channel_id, topic)
+                );
+                
+                -- Partições mensais arquivadas (um arquivo SQLite por mês)
+                CREATE TABLE IF NOT EXISTS interaction_partitions (
+                    month TEXT PRIMARY KEY,
+                    path TEXT,
+                    row_count INTEGER DEFAULT 0,
+                    modified_at TIMESTAMP,
+                    compacted_at TIMESTAMP
+                );
+                
+                -- Progresso de tarefas de manutenção retomáveis (ex.: reanálise)
+                CREATE TABLE IF NOT EXISTS maintenance_jobs (
+                    name TEXT PRIMARY KEY,
+                    fingerprint TEXT,
+                    last_id INTEGER DEFAULT 0,
+                    processed INTEGER DEFAULT 0,
+                    changed INTEGER DEFAULT 0,
+                    started_at TIMESTAMP,
+                    updated_at TIMESTAMP,
+                    finished_at TIMESTAMP
+                );
+                
                 -- Criar índices para melhorar desempenho
                 CREATE INDEX IF NOT EXISTS idx_interactions_user_id ON interactions(user_id);
                 CREATE INDEX IF NOT EXISTS idx_interactions_channel_id ON interactions(channel_id);
                 CREATE INDEX IF NOT EXISTS idx_interactions_timestamp ON interactions(timestamp);
+                -- Paginação por chave (timestamp, interaction_id), global e por filtro
+                CREATE INDEX IF NOT EXISTS idx_interactions_feed ON interactions(timestamp, interaction_id);
+                CREATE INDEX IF NOT EXISTS idx_interactions_user_feed ON interactions(user_id, timestamp, interaction_id);
+                CREATE INDEX IF NOT EXISTS idx_interactions_channel_feed ON interactions(channel_id, timestamp, interaction_id);
                 CREATE INDEX IF NOT EXISTS idx_user_topics_topic ON user_topics(topic);
                 CREATE INDEX IF NOT EXISTS idx_channel_topics_topic ON channel_topics(topic);
             """)
             
-            conn.commit()
-            conn.close()
+            # Bancos criados antes da coluna de metadados JSON
+            self._ensure_column("users", "metadata", "TEXT DEFAULT '{}'")
+            self._ensure_column("channels", "metadata", "TEXT DEFAULT '{}'")
+            self._merge_null_daily_keys()
+            
+            self._init_fulltext()
+            self._init_statistics()
             
             logger.info("Estrutura do banco de dados criada com sucesso")
         except Exception as e:
             logger.error(f"Erro ao inicializar banco de dados: {e}")
             raise
     
+    def _init_fulltext(self) -> None:
+        """
+        Cria o índice FTS5 das interações e os gatilhos que o mantêm sincronizado.
+        
+        Se o índice for criado em um banco que já tem interações, ele é
+        reconstruído a partir da tabela.
+        """
+        existed = self.pool.query_one(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'interactions_fts'"
+        ) is not None
+        
+        self.pool.executescript(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS interactions_fts USING fts5(
+                content_summary,
+                content='interactions',
+                content_rowid='interaction_id',
+                tokenize='{FTS_TOKENIZER}'
+            );
+            
+            CREATE TRIGGER IF NOT EXISTS interactions_fts_insert AFTER INSERT ON interactions BEGIN
+                INSERT INTO interactions_fts(rowid, content_summary) VALUES (new.interaction_id, new.content_summary);
+            END;
+            
+            CREATE TRIGGER IF NOT EXISTS interactions_fts_delete AFTER DELETE ON interactions BEGIN
+                INSERT INTO interactions_fts(interactions_fts, rowid, content_summary)
+                VALUES ('delete', old.interaction_id, old.content_summary);
+            END;
+            
+            CREATE TRIGGER IF NOT EXISTS interactions_fts_update AFTER UPDATE OF content_summary ON interactions BEGIN
+                INSERT INTO interactions_fts(interactions_fts, rowid, content_summary)
+                VALUES ('delete', old.interaction_id, old.content_summary);
+                INSERT INTO interactions_fts(rowid, content_summary) VALUES (new.interaction_id, new.content_summary);
+            END;
+        """)
+        
+        if not existed:
+            self.pool.execute("INSERT INTO interactions_fts(interactions_fts) VALUES ('rebuild')")
+            logger.info("Índice de busca textual das interações criado")
+    
+    def _init_statistics(self) -> None:
+        """
+        Cria as tabelas de resumo de estatísticas e os gatilhos que as mantêm
+        atualizadas a cada escrita.
+        
+        Contagens globais, distribuição de tópicos e atividade por hora são
+        atualizadas incrementalmente; os rankings de usuários e canais usam os
+        contadores já mantidos nas próprias tabelas, com índices dedicados.
+        Se as tabelas forem criadas em um banco existente, são preenchidas a
+        partir dos dados atuais.
+        """
+        existed = self.pool.query_one(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'stats_counters'"
+        ) is not None
+        
+        self.pool.executescript("""
+            -- Marcadores de manutenção em andamento (ex.: retenção), lidos pelos gatilhos
+            CREATE TABLE IF NOT EXISTS maintenance_flags (
+                name TEXT PRIMARY KEY
+            );
+            
+            CREATE TABLE IF NOT EXISTS stats_counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL DEFAULT 0
+            );
+            
+            CREATE TABLE IF NOT EXISTS stats_topics (
+                topic TEXT PRIMARY KEY,
+                count INTEGER NOT NULL DEFAULT 0
+            );
+            
+            -- Atividade por hora (chave "AAAA-MM-DDTHH")
+            CREATE TABLE IF NOT EXISTS stats_hourly (
+                hour TEXT PRIMARY KEY,
+                count INTEGER NOT NULL DEFAULT 0
+            );
+            
+            CREATE INDEX IF NOT EXISTS idx_stats_topics_count ON stats_topics(count);
+            CREATE INDEX IF NOT EXISTS idx_users_ranking ON users(interaction_count, user_id);
+            CREATE INDEX IF NOT EXISTS idx_channels_ranking ON channels(message_count, channel_id);
+            
+            CREATE TRIGGER IF NOT EXISTS stats_users_insert AFTER INSERT ON users BEGIN
+                INSERT INTO stats_counters(name, value) VALUES ('users', 1)
+                ON CONFLICT(name) DO UPDATE SET value = value + 1;
+            END;
+            
+            CREATE TRIGGER IF NOT EXISTS stats_users_delete AFTER DELETE ON users BEGIN
+                UPDATE stats_counters SET value = value - 1 WHERE name = 'users';
+            END;
+            
+            CREATE TRIGGER IF NOT EXISTS stats_channels_insert AFTER INSERT ON channels BEGIN
+                INSERT INTO stats_counters(name, value) VALUES ('channels', 1)
+                ON CONFLICT(name) DO UPDATE SET value = value + 1;
+            END;
+            
+            CREATE TRIGGER IF NOT EXISTS stats_channels_delete AFTER DELETE ON channels BEGIN
+                UPDATE stats_counters SET value = value - 1 WHERE name = 'channels';
+            END;
+            
+            CREATE TRIGGER IF NOT EXISTS stats_interactions_insert AFTER INSERT ON interactions BEGIN
+                INSERT INTO stats_counters(name, value) VALUES ('interactions', 1)
+                ON CONFLICT(name) DO UPDATE SET value = value + 1;
+                
+                INSERT INTO stats_hourly(hour, count) VALUES (substr(new.timestamp, 1, 13), 1)
+                ON CONFLICT(hour) DO UPDATE SET count = count + 1;
+                
+                INSERT INTO stats_topics(topic, count)
+                SELECT value, 1 FROM json_each(CASE WHEN json_valid(new.topics) THEN new.topics ELSE '[]' END)
+                WHERE true
+                ON CONFLICT(topic) DO UPDATE SET count = count + 1;
+            END;
+            
+            -- Interações removidas pela retenção continuam contando no histórico
+            DROP TRIGGER IF EXISTS stats_interactions_delete;
+            CREATE TRIGGER stats_interactions_delete AFTER DELETE ON interactions
+            WHEN NOT EXISTS (SELECT 1 FROM maintenance_flags WHERE name = 'retention') BEGIN
+                UPDATE stats_counters SET value = value - 1 WHERE name = 'interactions';
+                UPDATE stats_hourly SET count = count - 1 WHERE hour = substr(old.timestamp, 1, 13);
+                UPDATE stats_topics SET count = count - 1
+                WHERE topic IN (
+                    SELECT value FROM json_each(CASE WHEN json_valid(old.topics) THEN old.topics ELSE '[]' END)
+                );
+            END;
+            
+            -- Reanálise de interações antigas troca os tópicos
+            CREATE TRIGGER IF NOT EXISTS stats_interactions_topics_update AFTER UPDATE OF topics ON interactions
+            WHEN old.topics IS NOT new.topics BEGIN
+                UPDATE stats_topics SET count = count - 1
+                WHERE topic IN (
+                    SELECT value FROM json_each(CASE WHEN json_valid(old.topics) THEN old.topics ELSE '[]' END)
+                );
+                
+                INSERT INTO stats_topics(topic, count)
+                SELECT value, 1 FROM json_each(CASE WHEN json_valid(new.topics) THEN new.topics ELSE '[]' END)
+                WHERE true
+                ON CONFLICT(topic) DO UPDATE SET count = count + 1;
+            END;
+        """)
+        
+        if not existed:
+            self.rebuild_statistics()
+    
     def _get_connection(self) -> sqlite3.Connection:
         """
-        Obtém uma conexão com o banco de dados.
+        Obtém a conexão da thread atual a partir do pool.
+        
+        A conexão é reutilizada entre chamadas e não deve ser fechada.
         
         Returns:
             Conexão com o banco de dados
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row  # Para acessar colunas pelo nome
-            return conn
+            return self.pool.connection()
         except Exception as e:
             logger.error(f"Erro ao conectar ao banco de dados: {e}")
             raise
     
-    def _save_json(self, data: Dict[str, Any], filename: str) -> str:
+    def _merge_null_daily_keys(self) -> None:
+        """
+        Junta os agregados diários gravados com usuário ou canal nulos às linhas com ''.
+        
+        Valores nulos são distintos na chave primária, então o upsert da
+        retenção nunca encontrava essas linhas e cada execução as duplicava.
         """
-        Salva dados em um arquivo JSON.
+        if self.pool.query_one("""
+            SELECT 1 FROM interaction_daily WHERE user_id IS NULL OR channel_id IS NULL
+            UNION ALL
+            SELECT 1 FROM interaction_daily_topics WHERE channel_id IS NULL
+            LIMIT 1
+        """) is None:
+            return
+        
+        with self.pool.transaction() as conn:
+            conn.execute("""
+                INSERT INTO interaction_daily
+                (day, user_id, channel_id, interaction_type, interaction_count, sentiment_sum)
+                SELECT day, COALESCE(user_id, ''), COALESCE(channel_id, ''), interaction_type,
+                       SUM(interaction_count), SUM(sentiment_sum)
+                FROM interaction_daily
+                WHERE user_id IS NULL OR channel_id IS NULL
+                GROUP BY 1, 2, 3, 4
+                ON CONFLICT(day, user_id, channel_id, interaction_type) DO UPDATE SET
+                    interaction_count = interaction_count + excluded.interaction_count,
+                    sentiment_sum = sentiment_sum + excluded.sentiment_sum
+            """)
+            conn.execute("DELETE FROM interaction_daily WHERE user_id IS NULL OR channel_id IS NULL")
+            conn.execute("""
+                INSERT INTO interaction_daily_topics (day, channel_id, topic, count)
+                SELECT day, '', topic, SUM(count)
+                FROM interaction_daily_topics
+                WHERE channel_id IS NULL
+                GROUP BY 1, 2, 3
+                ON CONFLICT(day, channel_id, topic) DO UPDATE SET
+                    count = count + excluded.count
+            """)
+            conn.execute("DELETE FROM interaction_daily_topics WHERE channel_id IS NULL")
+        logger.info("Agregados diários com usuário ou canal nulos consolidados")
+    
+    def _ensure_column(self, table: str, column: str, declaration: str) -> None:
+        """
+        Adiciona uma coluna a uma tabela existente, se ainda não existir.
         
         Args:
-            data: Dados a serem salvos
-            filename: Nome do arquivo
-            
-        Returns:
-            Caminho completo para o arquivo JSON
+            table: Nome da tabela
+            column: Nome da coluna
+            declaration: Tipo e valor padrão da coluna
         """
-        try:
-            filepath = os.path.join(self.json_dir, filename)
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            return filepath
-        except Exception as e:
-            logger.error(f"Erro ao salvar arquivo JSON {filename}: {e}")
-            raise
+        columns = [row["name"] for row in self.pool.query(f"PRAGMA table_info({table})")]
+        if column not in columns:
+            self.pool.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+            logger.info(f"Coluna {column} adicionada à tabela {table}")
     
     def _load_json(self, filepath: str) -> Dict[str, Any]:
         """
@@ -228,51 +509,61 @@ class MemoryDatabase:
             True se a operação foi bem-sucedida, False caso contrário
         """
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            # Verificar se o usuário já existe
-            cursor.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))
-            user = cursor.fetchone()
-            
-            current_time = datetime.now().isoformat()
+            with self.pool.transaction() as conn:
+                existed = self._upsert_user(conn.cursor(), user_id, username, datetime.now().isoformat())
             
-            if user:
-                # Atualizar usuário existente
-                cursor.execute("""
-                    UPDATE users 
-                    SET username = ?, last_seen = ?
-                    WHERE user_id = ?
-                """, (username, current_time, user_id))
-            else:
-                # Criar novo usuário
-                metadata_path = self._create_user_metadata(user_id, username)
-                
-                cursor.execute("""
-                    INSERT INTO users 
-                    (user_id, username, first_seen, last_seen, interaction_count, voice_participation_count, metadata_path)
-                    VALUES (?, ?, ?, ?, 0, 0, ?)
-                """, (user_id, username, current_time, current_time, metadata_path))
-            
-            conn.commit()
-            conn.close()
-            
-            logger.info(f"Usuário {username} ({user_id}) {'atualizado' if user else 'adicionado'}")
+            logger.info(f"Usuário {username} ({user_id}) {'atualizado' if existed else 'adicionado'}")
             return True
         except Exception as e:
             logger.error(f"Erro ao adicionar/atualizar usuário {user_id}: {e}")
             return False
     
-    def _create_user_metadata(self, user_id: str, username: str) -> str:
+    def _upsert_user(self, cursor: sqlite3.Cursor, user_id: str, username: str, current_time: str) -> bool:
         """
-        Cria o arquivo de metadados para um novo usuário.
+        Insere ou atualiza um usuário dentro de uma transação aberta.
         
         Args:
+            cursor: Cursor da transação
             user_id: ID do usuário
             username: Nome do usuário
+            current_time: Timestamp da operação
             
         Returns:
-            Caminho para o arquivo de metadados
+            True se o usuário já existia
+        """
+        # Verificar se o usuário já existe
+        cursor.execute("SELECT 1 FROM users WHERE user_id = ?", (user_id,))
+        user = cursor.fetchone()
+        
+        if user:
+            # Atualizar usuário existente
+            cursor.execute("""
+                UPDATE users 
+                SET username = ?, last_seen = ?
+                WHERE user_id = ?
+            """, (username, current_time, user_id))
+        else:
+            # Criar novo usuário
+            metadata = self._create_user_metadata(user_id, username)
+            
+            cursor.execute("""
+                INSERT INTO users 
+                (user_id, username, first_seen, last_seen, interaction_count, voice_participation_count, metadata)
+                VALUES (?, ?, ?, ?, 0, 0, ?)
+            """, (user_id, username, current_time, current_time, json.dumps(metadata, ensure_ascii=False)))
+        
+        return user is not None
+    
+    def _create_user_metadata(self, user_id: str, username: str) -> Dict[str, Any]:
+        """
+        Cria os metadados iniciais de um novo usuário.
+        
+        Args:
+            user_id: ID do usuário
+            username: Nome do usuário
+            
+        Returns:
+            Dicionário de metadados
         """
         current_time = datetime.now().isoformat()
         
@@ -305,10 +596,7 @@ class MemoryDatabase:
             }
         }
         
-        filename = f"user_{user_id}.json"
-        filepath = self._save_json(metadata, filename)
-        
-        return filepath
+        return metadata
     
     def add_or_update_channel(self, channel_id: str, guild_id: str, channel_name: str, channel_type: str) -> bool:
         """
@@ -324,55 +612,70 @@ class MemoryDatabase:
             True se a operação foi bem-sucedida, False caso contrário
         """
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
+            with self.pool.transaction() as conn:
+                existed = self._upsert_channel(conn.cursor(), channel_id, guild_id, channel_name,
+                                               channel_type, datetime.now().isoformat())
             
-            # Verificar se o canal já existe
-            cursor.execute("SELECT * FROM channels WHERE channel_id = ?", (channel_id,))
-            channel = cursor.fetchone()
+            logger.info(f"Canal {channel_name} ({channel_id}) {'atualizado' if existed else 'adicionado'}")
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao adicionar/atualizar canal {channel_id}: {e}")
+            return False
+    
+    def _upsert_channel(self, cursor: sqlite3.Cursor, channel_id: str, guild_id: str,
+                        channel_name: str, channel_type: str, current_time: str) -> bool:
+        """
+        Insere ou atualiza um canal (e seu servidor) dentro de uma transação aberta.
+        
+        Args:
+            cursor: Cursor da transação
+            channel_id: ID do canal
+            guild_id: ID do servidor
+            channel_name: Nome do canal
+            channel_type: Tipo do canal
+            current_time: Timestamp da operação
             
-            current_time = datetime.now().isoformat()
+        Returns:
+            True se o canal já existia
+        """
+        # Verificar se o canal já existe
+        cursor.execute("SELECT 1 FROM channels WHERE channel_id = ?", (channel_id,))
+        channel = cursor.fetchone()
+        
+        if channel:
+            # Atualizar canal existente
+            cursor.execute("""
+                UPDATE channels 
+                SET channel_name = ?, channel_type = ?, last_activity = ?
+                WHERE channel_id = ?
+            """, (channel_name, channel_type, current_time, channel_id))
+        else:
+            # Verificar se o servidor existe, se não, criar
+            cursor.execute("SELECT 1 FROM guilds WHERE guild_id = ?", (guild_id,))
+            guild = cursor.fetchone()
             
-            if channel:
-                # Atualizar canal existente
+            if not guild:
                 cursor.execute("""
-                    UPDATE channels 
-                    SET channel_name = ?, channel_type = ?, last_activity = ?
-                    WHERE channel_id = ?
-                """, (channel_name, channel_type, current_time, channel_id))
-            else:
-                # Verificar se o servidor existe, se não, criar
-                cursor.execute("SELECT * FROM guilds WHERE guild_id = ?", (guild_id,))
-                guild = cursor.fetchone()
-                
-                if not guild:
-                    cursor.execute("""
-                        INSERT INTO guilds 
-                        (guild_id, guild_name, first_activity, last_activity, metadata_path)
-                        VALUES (?, ?, ?, ?, ?)
-                    """, (guild_id, "Unknown Guild", current_time, current_time, ""))
-                
-                # Criar novo canal
-                metadata_path = self._create_channel_metadata(channel_id, guild_id, channel_name)
-                
-                cursor.execute("""
-                    INSERT INTO channels 
-                    (channel_id, guild_id, channel_name, channel_type, first_activity, last_activity, message_count, metadata_path)
-                    VALUES (?, ?, ?, ?, ?, ?, 0, ?)
-                """, (channel_id, guild_id, channel_name, channel_type, current_time, current_time, metadata_path))
+                    INSERT INTO guilds 
+                    (guild_id, guild_name, first_activity, last_activity, metadata_path)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (guild_id, "Unknown Guild", current_time, current_time, ""))
             
-            conn.commit()
-            conn.close()
+            # Criar novo canal
+            metadata = self._create_channel_metadata(channel_id, guild_id, channel_name)
             
-            logger.info(f"Canal {channel_name} ({channel_id}) {'atualizado' if channel else 'adicionado'}")
-            return True
-        except Exception as e:
-            logger.error(f"Erro ao adicionar/atualizar canal {channel_id}: {e}")
-            return False
+            cursor.execute("""
+                INSERT INTO channels 
+                (channel_id, guild_id, channel_name, channel_type, first_activity, last_activity, message_count, metadata)
+                VALUES (?, ?, ?, ?, ?, ?, 0, ?)
+            """, (channel_id, guild_id, channel_name, channel_type, current_time, current_time,
+                  json.dumps(metadata, ensure_ascii=False)))
+        
+        return channel is not None
     
-    def _create_channel_metadata(self, channel_id: str, guild_id: str, channel_name: str) -> str:
+    def _create_channel_metadata(self, channel_id: str, guild_id: str, channel_name: str) -> Dict[str, Any]:
         """
-        Cria o arquivo de metadados para um novo canal.
+        Cria os metadados iniciais de um novo canal.
         
         Args:
             channel_id: ID do canal
@@ -380,7 +683,7 @@ class MemoryDatabase:
             channel_name: Nome do canal
             
         Returns:
-            Caminho para o arquivo de metadados
+            Dicionário de metadados
         """
         current_time = datetime.now().isoformat()
         
@@ -415,10 +718,151 @@ class MemoryDatabase:
             "active_users": []
         }
         
-        filename = f"channel_{channel_id}.json"
-        filepath = self._save_json(metadata, filename)
+        return metadata
+    
+    def get_user_metadata(self, user_id: str) -> Dict[str, Any]:
+        """
+        Obtém os metadados de um usuário.
+        
+        Args:
+            user_id: ID do usuário
+            
+        Returns:
+            Dicionário de metadados (vazio se o usuário não existir)
+        """
+        return self._get_metadata("users", "user_id", user_id)
+    
+    def update_user_metadata(self, user_id: str, updates: Dict[str, Any]) -> bool:
+        """
+        Atualiza campos dos metadados de um usuário sem reescrever o documento.
+        
+        Args:
+            user_id: ID do usuário
+            updates: Campos a atualizar, com caminhos separados por ponto
+                     (ex.: {"emotions.predominant": "feliz"})
+            
+        Returns:
+            True se o usuário foi atualizado, False caso contrário
+        """
+        return self._update_metadata("users", "user_id", user_id, updates)
+    
+    def get_channel_metadata(self, channel_id: str) -> Dict[str, Any]:
+        """
+        Obtém os metadados de um canal.
         
-        return filepath
+        Args:
+            channel_id: ID do canal
+            
+        Returns:
+            Dicionário de metadados (vazio se o canal não existir)
+        """
+        return self._get_metadata("channels", "channel_id", channel_id)
+    
+    def update_channel_metadata(self, channel_id: str, updates: Dict[str, Any]) -> bool:
+        """
+        Atualiza campos dos metadados de um canal sem reescrever o documento.
+        
+        Args:
+            channel_id: ID do canal
+            updates: Campos a atualizar, com caminhos separados por ponto
+                     (ex.: {"nina_personality.humor_level": 70})
+            
+        Returns:
+            True se o canal foi atualizado, False caso contrário
+        """
+        return self._update_metadata("channels", "channel_id", channel_id, updates)
+    
+    def _get_metadata(self, table: str, key_column: str, key: str) -> Dict[str, Any]:
+        """
+        Lê a coluna de metadados JSON de uma entidade.
+        """
+        try:
+            row = self.pool.query_one(f"SELECT metadata FROM {table} WHERE {key_column} = ?", (key,))
+            if not row or not row["metadata"]:
+                return {}
+            return json.loads(row["metadata"])
+        except Exception as e:
+            logger.error(f"Erro ao obter metadados de {table} {key}: {e}")
+            return {}
+    
+    def _update_metadata(self, table: str, key_column: str, key: str, updates: Dict[str, Any]) -> bool:
+        """
+        Aplica atualizações parciais com json_set em uma única instrução.
+        """
+        if not updates:
+            return True
+        
+        try:
+            arguments = []
+            params = []
+            for field, value in updates.items():
+                if not METADATA_FIELD_PATTERN.match(field):
+                    raise ValueError(f"Campo de metadados inválido: {field}")
+                arguments.append("?, json(?)")
+                params.extend([f"$.{field}", json.dumps(value, ensure_ascii=False)])
+            
+            cursor = self.pool.execute(f"""
+                UPDATE {table}
+                SET metadata = json_set(COALESCE(metadata, '{{}}'), {', '.join(arguments)})
+                WHERE {key_column} = ?
+            """, (*params, key))
+            return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"Erro ao atualizar metadados de {table} {key}: {e}")
+            return False
+    
+    def migrate_json_metadata(self, remove_files: bool = False) -> Dict[str, int]:
+        """
+        Migra os arquivos de metadados legados (user_*.json e channel_*.json)
+        do diretório JSON para a coluna de metadados do banco.
+        
+        Os valores dos arquivos têm prioridade sobre os já existentes no banco.
+        Toda a migração ocorre em uma única transação.
+        
+        Args:
+            remove_files: Se True, remove os arquivos migrados
+            
+        Returns:
+            Dicionário com contagens (users, channels, orphans, errors)
+        """
+        result = {"users": 0, "channels": 0, "orphans": 0, "errors": 0}
+        migrated_files = []
+        
+        sources = (
+            ("user_", "users", "user_id", "users"),
+            ("channel_", "channels", "channel_id", "channels")
+        )
+        
+        with self.pool.transaction() as conn:
+            for prefix, table, key_column, counter in sources:
+                for filepath in sorted(glob.glob(os.path.join(self.json_dir, f"{prefix}*.json"))):
+                    key = os.path.basename(filepath)[len(prefix):-len(".json")]
+                    data = self._load_json(filepath)
+                    if not data:
+                        result["errors"] += 1
+                        continue
+                    
+                    cursor = conn.execute(f"""
+                        UPDATE {table}
+                        SET metadata = json_patch(COALESCE(metadata, '{{}}'), ?), metadata_path = NULL
+                        WHERE {key_column} = ?
+                    """, (json.dumps(data, ensure_ascii=False), key))
+                    
+                    if cursor.rowcount:
+                        result[counter] += 1
+                        migrated_files.append(filepath)
+                    else:
+                        result["orphans"] += 1
+        
+        if remove_files:
+            for filepath in migrated_files:
+                try:
+                    os.remove(filepath)
+                except OSError as e:
+                    logger.warning(f"Não foi possível remover {filepath}: {e}")
+        
+        logger.info(f"Migração de metadados concluída: {result}")
+        return result
     
     def add_interaction(self, user_id: str, channel_id: str, interaction_type: str, 
                        content_summary: str, sentiment_score: float, topics: List[str]) -> int:
@@ -428,5 +872,666 @@ class MemoryDatabase:
         Args:
             user_id: ID do usuário
             channel_id: ID do canal
-
-(Content truncated due to size limit. Use line ranges to read in chunks)
\ No newline at end of file
+            interaction_type: Tipo da interação (ex.: "text", "voice")
+            content_summary: Resumo do conteúdo
+            sentiment_score: Pontuação de sentimento (-1.0 a 1.0)
+            topics: Lista de tópicos da interação
+            
+        Returns:
+            ID da interação criada, ou -1 em caso de erro
+        """
+        try:
+            with self.pool.transaction() as conn:
+                interaction_id = self._insert_interaction(conn.cursor(), user_id, channel_id, interaction_type,
+                                                          content_summary, sentiment_score, topics,
+                                                          datetime.now().isoformat())
+            self._notify_interactions([(interaction_id, content_summary)])
+            return interaction_id
+        except Exception as e:
+            logger.error(f"Erro ao adicionar interação do usuário {user_id}: {e}")
+            return -1
+    
+    def _insert_interaction(self, cursor: sqlite3.Cursor, user_id: str, channel_id: str,
+                            interaction_type: str, content_summary: str, sentiment_score: float,
+                            topics: List[str], current_time: str) -> int:
+        """
+        Insere uma interação e atualiza os contadores dentro de uma transação aberta.
+        
+        Args:
+            cursor: Cursor da transação
+            user_id: ID do usuário
+            channel_id: ID do canal
+            interaction_type: Tipo da interação
+            content_summary: Resumo do conteúdo
+            sentiment_score: Pontuação de sentimento
+            topics: Lista de tópicos
+            current_time: Timestamp da interação
+            
+        Returns:
+            ID da interação criada
+        """
+        cursor.execute("""
+            INSERT INTO interactions 
+            (user_id, channel_id, timestamp, interaction_type, content_summary, sentiment_score, topics)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (user_id, channel_id, current_time, interaction_type, content_summary,
+              sentiment_score, json.dumps(topics or [], ensure_ascii=False)))
+        interaction_id = cursor.lastrowid
+        
+        # Atualizar contadores do usuário e do canal
+        cursor.execute("""
+            UPDATE users 
+            SET interaction_count = interaction_count + 1, last_seen = ?
+            WHERE user_id = ?
+        """, (current_time, user_id))
+        
+        cursor.execute("""
+            UPDATE channels 
+            SET message_count = message_count + 1, last_activity = ?
+            WHERE channel_id = ?
+        """, (current_time, channel_id))
+        
+        # Atualizar relação usuário-canal
+        cursor.execute("""
+            INSERT INTO user_channel_stats (user_id, channel_id, message_count, last_interaction)
+            VALUES (?, ?, 1, ?)
+            ON CONFLICT(user_id, channel_id) DO UPDATE SET
+                message_count = message_count + 1,
+                last_interaction = excluded.last_interaction
+        """, (user_id, channel_id, current_time))
+        
+        return interaction_id
+    
+    def add_user_expression(self, user_id: str, expression: str) -> bool:
+        """
+        Registra o uso de uma expressão por um usuário.
+        
+        Args:
+            user_id: ID do usuário
+            expression: Expressão detectada
+            
+        Returns:
+            True se a operação foi bem-sucedida, False caso contrário
+        """
+        try:
+            with self.pool.transaction() as conn:
+                self._upsert_expression(conn.cursor(), user_id, expression, datetime.now().isoformat())
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao registrar expressão do usuário {user_id}: {e}")
+            return False
+    
+    def _upsert_expression(self, cursor: sqlite3.Cursor, user_id: str, expression: str, current_time: str) -> None:
+        """
+        Incrementa o contador de uma expressão dentro de uma transação aberta.
+        """
+        cursor.execute("""
+            INSERT INTO user_frequent_words (user_id, word, count, last_used)
+            VALUES (?, ?, 1, ?)
+            ON CONFLICT(user_id, word) DO UPDATE SET
+                count = count + 1,
+                last_used = excluded.last_used
+        """, (user_id, expression, current_time))
+    
+    def _add_voice_activity(self, cursor: sqlite3.Cursor, user_id: str, channel_id: str, current_time: str) -> None:
+        """
+        Registra uma participação em canal de voz dentro de uma transação aberta.
+        """
+        cursor.execute("""
+            UPDATE users 
+            SET voice_participation_count = voice_participation_count + 1, last_seen = ?
+            WHERE user_id = ?
+        """, (current_time, user_id))
+        
+        cursor.execute("""
+            UPDATE channels SET last_activity = ? WHERE channel_id = ?
+        """, (current_time, channel_id))
+    
+    def apply_batch(self, items: List[Dict[str, Any]]) -> List[int]:
+        """
+        Aplica um lote de operações de ingestão em uma única transação.
+        
+        Cada item é um dicionário com a chave "kind" ("user", "channel",
+        "interaction", "expression" ou "voice") e os campos da operação
+        correspondente. Os itens são aplicados na ordem recebida.
+        
+        Args:
+            items: Lista de operações
+            
+        Returns:
+            IDs das interações criadas, na ordem dos itens "interaction"
+        """
+        interaction_ids = []
+        contents = []
+        
+        with self.pool.transaction() as conn:
+            cursor = conn.cursor()
+            
+            for item in items:
+                kind = item["kind"]
+                current_time = item.get("timestamp") or datetime.now().isoformat()
+                
+                if kind == "user":
+                    self._upsert_user(cursor, item["user_id"], item["username"], current_time)
+                elif kind == "channel":
+                    self._upsert_channel(cursor, item["channel_id"], item["guild_id"], item["channel_name"],
+                                         item["channel_type"], current_time)
+                elif kind == "interaction":
+                    interaction_ids.append(self._insert_interaction(
+                        cursor, item["user_id"], item["channel_id"], item.get("interaction_type", "text"),
+                        item.get("content_summary", ""), item.get("sentiment_score", 0.0),
+                        item.get("topics", []), current_time
+                    ))
+                    contents.append(item.get("content_summary", ""))
+                elif kind == "expression":
+                    self._upsert_expression(cursor, item["user_id"], item["expression"], current_time)
+                elif kind == "voice":
+                    self._add_voice_activity(cursor, item["user_id"], item["channel_id"], current_time)
+                else:
+                    logger.warning(f"Operação de ingestão desconhecida ignorada: {kind}")
+        
+        if interaction_ids:
+            self._notify_interactions(list(zip(interaction_ids, contents)))
+        
+        return interaction_ids
+    
+    def add_interaction_listener(self, listener: Callable[[List[Tuple[int, str]]], Any]) -> None:
+        """
+        Registra uma função chamada após cada gravação de interações (ex.: índice semântico).
+        
+        Args:
+            listener: Função que recebe a lista de (interaction_id, conteúdo) já gravados
+        """
+        self._interaction_listeners.append(listener)
+    
+    def add_removal_listener(self, listener: Callable[[List[int]], Any]) -> None:
+        """
+        Registra uma função chamada após a remoção de interações (ex.: índice semântico).
+        
+        Args:
+            listener: Função que recebe a lista de IDs das interações removidas
+        """
+        self._removal_listeners.append(listener)
+    
+    def notify_interactions_removed(self, interaction_ids: List[int]) -> None:
+        """
+        Entrega aos ouvintes os IDs de interações removidas (após o commit da remoção).
+        
+        Args:
+            interaction_ids: IDs das interações removidas
+        """
+        if not interaction_ids:
+            return
+        for listener in self._removal_listeners:
+            try:
+                listener(interaction_ids)
+            except Exception as e:
+                logger.error(f"Erro ao notificar remoção de interações: {e}")
+    
+    def _notify_interactions(self, interactions: List[Tuple[int, str]]) -> None:
+        """
+        Entrega as interações gravadas aos ouvintes; erros não desfazem a gravação.
+        
+        Args:
+            interactions: Lista de (interaction_id, conteúdo)
+        """
+        for listener in self._interaction_listeners:
+            try:
+                listener(interactions)
+            except Exception as e:
+                logger.error(f"Erro ao notificar gravação de interações: {e}")
+    
+    def _row_to_interaction(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """
+        Converte uma linha da tabela de interações em dicionário.
+        
+        Args:
+            row: Linha do banco de dados
+            
+        Returns:
+            Dicionário com a interação
+        """
+        interaction = dict(row)
+        try:
+            interaction["topics"] = json.loads(interaction["topics"]) if interaction["topics"] else []
+        except (TypeError, ValueError):
+            # Formato antigo: tópicos separados por vírgula
+            interaction["topics"] = [t.strip() for t in interaction["topics"].split(",") if t.strip()]
+        return interaction
+    
+    def get_user_interactions(self, user_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Obtém as interações mais recentes de um usuário.
+        
+        Args:
+            user_id: ID do usuário
+            limit: Número máximo de interações a retornar
+            
+        Returns:
+            Lista de interações (mais recentes primeiro)
+        """
+        return self.list_interactions(limit=limit, user_id=user_id)[0]
+    
+    def get_channel_interactions(self, channel_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Obtém as interações mais recentes de um canal.
+        
+        Args:
+            channel_id: ID do canal
+            limit: Número máximo de interações a retornar
+            
+        Returns:
+            Lista de interações (mais recentes primeiro)
+        """
+        return self.list_interactions(limit=limit, channel_id=channel_id)[0]
+    
+    def list_interactions(self, limit: int = 20, cursor: Optional[str] = None,
+                          user_id: Optional[str] = None, channel_id: Optional[str] = None,
+                          interaction_type: Optional[str] = None, since: Optional[str] = None,
+                          until: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Lista interações (mais recentes primeiro) com paginação por chave.
+        
+        A página seguinte começa logo após a última interação retornada,
+        identificada por (timestamp, interaction_id), de modo que inserções
+        novas não deslocam as páginas já lidas.
+        
+        Args:
+            limit: Número máximo de interações a retornar
+            cursor: Cursor retornado pela página anterior (None = primeira página)
+            user_id: Filtrar por usuário
+            channel_id: Filtrar por canal
+            interaction_type: Filtrar por tipo de interação
+            since: Timestamp ISO mínimo (inclusivo)
+            until: Timestamp ISO máximo (exclusivo)
+            
+        Returns:
+            Tuple contendo (lista de interações, cursor da próxima página ou None)
+            
+        Raises:
+            ValueError: Se o cursor for inválido
+        """
+        position = decode_cursor(cursor) if cursor else None
+        
+        try:
+            conditions = []
+            params = []
+            
+            for column, value in (("user_id", user_id), ("channel_id", channel_id),
+                                  ("interaction_type", interaction_type)):
+                if value is not None:
+                    conditions.append(f"{column} = ?")
+                    params.append(value)
+            if since is not None:
+                conditions.append("timestamp >= ?")
+                params.append(since)
+            if until is not None:
+                conditions.append("timestamp < ?")
+                params.append(until)
+            if position is not None:
+                conditions.append("(timestamp, interaction_id) < (?, ?)")
+                params.extend(position)
+            
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            rows = self.pool.query(f"""
+                SELECT * FROM interactions
+                {where}
+                ORDER BY timestamp DESC, interaction_id DESC
+                LIMIT ?
+            """, (*params, limit + 1))
+            
+            interactions = [self._row_to_interaction(row) for row in rows[:limit]]
+            next_cursor = None
+            if len(rows) > limit and interactions:
+                last = interactions[-1]
+                next_cursor = encode_cursor(last["timestamp"], last["interaction_id"])
+            
+            return interactions, next_cursor
+        except Exception as e:
+            logger.error(f"Erro ao listar interações: {e}")
+            return [], None
+    
+    def get_interaction(self, interaction_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Obtém uma interação pelo ID.
+        
+        Args:
+            interaction_id: ID da interação
+            
+        Returns:
+            Dicionário com a interação, ou None se não existir
+        """
+        try:
+            row = self.pool.query_one("SELECT * FROM interactions WHERE interaction_id = ?", (interaction_id,))
+            return self._row_to_interaction(row) if row else None
+        except Exception as e:
+            logger.error(f"Erro ao obter interação {interaction_id}: {e}")
+            return None
+    
+    def delete_interaction(self, interaction_id: int) -> bool:
+        """
+        Remove uma interação e desconta-a dos contadores do usuário e do canal.
+        
+        Args:
+            interaction_id: ID da interação
+            
+        Returns:
+            True se a interação foi removida, False caso contrário
+        """
+        try:
+            with self.pool.transaction() as conn:
+                row = conn.execute(
+                    "SELECT user_id, channel_id FROM interactions WHERE interaction_id = ?", (interaction_id,)
+                ).fetchone()
+                if not row:
+                    return False
+                
+                conn.execute("DELETE FROM interactions WHERE interaction_id = ?", (interaction_id,))
+                conn.execute("""
+                    UPDATE users SET interaction_count = MAX(interaction_count - 1, 0) WHERE user_id = ?
+                """, (row["user_id"],))
+                conn.execute("""
+                    UPDATE channels SET message_count = MAX(message_count - 1, 0) WHERE channel_id = ?
+                """, (row["channel_id"],))
+                conn.execute("""
+                    UPDATE user_channel_stats SET message_count = MAX(message_count - 1, 0)
+                    WHERE user_id = ? AND channel_id = ?
+                """, (row["user_id"], row["channel_id"]))
+            
+            self.notify_interactions_removed([interaction_id])
+            logger.info(f"Interação {interaction_id} removida")
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao remover interação {interaction_id}: {e}")
+            return False
+    
+    def search_interactions(self, query: str, limit: int = 20, offset: int = 0,
+                            user_id: Optional[str] = None, channel_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Busca interações pelo conteúdo usando o índice FTS5.
+        
+        Os resultados são ordenados por relevância (BM25) e incluem um trecho
+        com os termos encontrados destacados.
+        
+        Args:
+            query: Texto da busca
+            limit: Número máximo de resultados
+            offset: Número de resultados a pular
+            user_id: Restringir a um usuário (opcional)
+            channel_id: Restringir a um canal (opcional)
+            
+        Returns:
+            Lista de interações com os campos adicionais "rank" e "snippet"
+        """
+        fts_query = build_fts_query(query)
+        if not fts_query:
+            return []
+        
+        try:
+            conditions = ["interactions_fts MATCH ?"]
+            params = [fts_query]
+            if user_id is not None:
+                conditions.append("i.user_id = ?")
+                params.append(user_id)
+            if channel_id is not None:
+                conditions.append("i.channel_id = ?")
+                params.append(channel_id)
+            
+            rows = self.pool.query(f"""
+                SELECT i.*,
+                       bm25(interactions_fts) AS rank,
+                       snippet(interactions_fts, 0, ?, ?, ?, 12) AS snippet
+                FROM interactions_fts
+                JOIN interactions i ON i.interaction_id = interactions_fts.rowid
+                WHERE {' AND '.join(conditions)}
+                ORDER BY rank
+                LIMIT ? OFFSET ?
+            """, (SNIPPET_START, SNIPPET_END, SNIPPET_ELLIPSIS, *params, limit, offset))
+            return [self._row_to_interaction(row) for row in rows]
+        except Exception as e:
+            logger.error(f"Erro ao buscar interações por '{query}': {e}")
+            return []
+    
+    def rebuild_statistics(self) -> None:
+        """
+        Recalcula todas as tabelas de resumo a partir dos dados atuais.
+        
+        Usado na criação das tabelas em bancos existentes e como reparo; em
+        operação normal os gatilhos mantêm os resumos atualizados. Interações
+        já removidas pela retenção entram pelas contagens dos agregados
+        diários (a atividade por hora cobre apenas as interações brutas).
+        """
+        with self.pool.transaction() as conn:
+            conn.execute("DELETE FROM stats_counters")
+            conn.execute("DELETE FROM stats_topics")
+            conn.execute("DELETE FROM stats_hourly")
+            
+            conn.execute("""
+                INSERT INTO stats_counters(name, value)
+                SELECT 'users', COUNT(*) FROM users
+                UNION ALL SELECT 'channels', COUNT(*) FROM channels
+                UNION ALL SELECT 'interactions',
+                    (SELECT COUNT(*) FROM interactions) +
+                    (SELECT COALESCE(SUM(interaction_count), 0) FROM interaction_daily)
+            """)
+            conn.execute("""
+                INSERT INTO stats_hourly(hour, count)
+                SELECT substr(timestamp, 1, 13), COUNT(*) FROM interactions
+                WHERE timestamp IS NOT NULL
+                GROUP BY 1
+            """)
+            conn.execute("""
+                INSERT INTO stats_topics(topic, count)
+                SELECT topic, SUM(count) FROM (
+                    SELECT t.value AS topic, COUNT(*) AS count
+                    FROM interactions i,
+                         json_each(CASE WHEN json_valid(i.topics) THEN i.topics ELSE '[]' END) t
+                    GROUP BY t.value
+                    UNION ALL
+                    SELECT topic, SUM(count) FROM interaction_daily_topics GROUP BY topic
+                )
+                GROUP BY topic
+            """)
+        
+        logger.info("Estatísticas de resumo recalculadas")
+    
+    def rebuild_topic_aggregates(self) -> None:
+        """
+        Recalcula os tópicos por usuário e por canal a partir das interações.
+        
+        A relevância de um tópico é a fração das interações do usuário (ou do
+        canal) que o mencionam; last_discussed é a interação mais recente dele.
+        """
+        with self.pool.transaction() as conn:
+            for table, key in (("user_topics", "user_id"), ("channel_topics", "channel_id")):
+                conn.execute(f"DELETE FROM {table}")
+                conn.execute(f"""
+                    INSERT INTO {table} ({key}, topic, relevance_score, last_discussed)
+                    SELECT i.{key}, t.value, COUNT(*) * 1.0 / totals.total, MAX(i.timestamp)
+                    FROM interactions i
+                    JOIN json_each(CASE WHEN json_valid(i.topics) THEN i.topics ELSE '[]' END) t
+                    JOIN (
+                        SELECT {key}, COUNT(*) AS total FROM interactions
+                        WHERE {key} IS NOT NULL GROUP BY {key}
+                    ) totals ON totals.{key} = i.{key}
+                    GROUP BY i.{key}, t.value
+                """)
+        
+        logger.info("Tópicos por usuário e por canal recalculados")
+    
+    def get_statistics(self, top_n: int = 10) -> Dict[str, Any]:
+        """
+        Obtém estatísticas gerais a partir das tabelas de resumo.
+        
+        O custo depende apenas de `top_n`, não do volume de dados.
+        
+        Args:
+            top_n: Número de itens nos rankings de usuários, canais e tópicos
+            
+        Returns:
+            Dicionário com contagens e rankings
+        """
+        try:
+            counters = {row["name"]: row["value"] for row in self.pool.query("SELECT name, value FROM stats_counters")}
+            
+            top_users = self.pool.query("""
+                SELECT user_id, username, interaction_count, last_seen FROM users
+                ORDER BY interaction_count DESC, user_id DESC
+                LIMIT ?
+            """, (top_n,))
+            top_channels = self.pool.query("""
+                SELECT channel_id, channel_name, message_count, last_activity FROM channels
+                ORDER BY message_count DESC, channel_id DESC
+                LIMIT ?
+            """, (top_n,))
+            top_topics = self.pool.query("""
+                SELECT topic, count FROM stats_topics
+                WHERE count > 0
+                ORDER BY count DESC
+                LIMIT ?
+            """, (top_n,))
+            
+            return {
+                "user_count": counters.get("users", 0),
+                "channel_count": counters.get("channels", 0),
+                "interaction_count": counters.get("interactions", 0),
+                "top_users": [dict(row) for row in top_users],
+                "top_channels": [dict(row) for row in top_channels],
+                "top_topics": [dict(row) for row in top_topics]
+            }
+        except Exception as e:
+            logger.error(f"Erro ao obter estatísticas: {e}")
+            return {}
+    
+    def get_activity(self, days: int = 7) -> Dict[str, Any]:
+        """
+        Obtém a atividade por hora e por dia dos últimos dias.
+        
+        Args:
+            days: Número de dias a incluir
+            
+        Returns:
+            Dicionário com listas "hourly" e "daily"
+        """
+        try:
+            since = (datetime.now() - timedelta(days=days)).isoformat()[:13]
+            rows = self.pool.query("""
+                SELECT hour, count FROM stats_hourly
+                WHERE hour >= ? AND count > 0
+                ORDER BY hour
+            """, (since,))
+            
+            hourly = [dict(row) for row in rows]
+            daily = {}
+            for row in hourly:
+                day = row["hour"][:10]
+                daily[day] = daily.get(day, 0) + row["count"]
+            
+            return {
+                "days": days,
+                "hourly": hourly,
+                "daily": [{"day": day, "count": count} for day, count in daily.items()]
+            }
+        except Exception as e:
+            logger.error(f"Erro ao obter atividade: {e}")
+            return {"days": days, "hourly": [], "daily": []}
+    
+    def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtém um usuário com contadores e metadados.
+        
+        Args:
+            user_id: ID do usuário
+            
+        Returns:
+            Dicionário do usuário ou None se não existir
+        """
+        try:
+            row = self.pool.query_one("""
+                SELECT user_id, username, interaction_count, voice_participation_count, first_seen, last_seen, metadata
+                FROM users WHERE user_id = ?
+            """, (user_id,))
+            if not row:
+                return None
+            user = dict(row)
+            user["metadata"] = json.loads(user["metadata"]) if user["metadata"] else {}
+            return user
+        except Exception as e:
+            logger.error(f"Erro ao obter usuário {user_id}: {e}")
+            return None
+    
+    def get_channel(self, channel_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtém um canal com contadores e metadados.
+        
+        Args:
+            channel_id: ID do canal
+            
+        Returns:
+            Dicionário do canal ou None se não existir
+        """
+        try:
+            row = self.pool.query_one("""
+                SELECT channel_id, guild_id, channel_name, channel_type, message_count, first_activity, last_activity, metadata
+                FROM channels WHERE channel_id = ?
+            """, (channel_id,))
+            if not row:
+                return None
+            channel = dict(row)
+            channel["metadata"] = json.loads(channel["metadata"]) if channel["metadata"] else {}
+            return channel
+        except Exception as e:
+            logger.error(f"Erro ao obter canal {channel_id}: {e}")
+            return None
+    
+    def list_users(self, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Lista usuários ordenados pelo número de interações, em uma única consulta.
+        
+        Args:
+            limit: Número máximo de usuários a retornar
+            offset: Número de usuários a pular
+            
+        Returns:
+            Lista de usuários com contadores e última atividade
+        """
+        try:
+            rows = self.pool.query("""
+                SELECT user_id, username, interaction_count, voice_participation_count, first_seen, last_seen
+                FROM users
+                ORDER BY interaction_count DESC, user_id DESC
+                LIMIT ? OFFSET ?
+            """, (limit, offset))
+            return [dict(row) for row in rows]
+        except Exception as e:
+            logger.error(f"Erro ao listar usuários: {e}")
+            return []
+    
+    def list_channels(self, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Lista canais ordenados pelo número de mensagens, em uma única consulta.
+        
+        Args:
+            limit: Número máximo de canais a retornar
+            offset: Número de canais a pular
+            
+        Returns:
+            Lista de canais com contadores e última atividade
+        """
+        try:
+            rows = self.pool.query("""
+                SELECT channel_id, guild_id, channel_name, channel_type, message_count, first_activity, last_activity
+                FROM channels
+                ORDER BY message_count DESC, channel_id DESC
+                LIMIT ? OFFSET ?
+            """, (limit, offset))
+            return [dict(row) for row in rows]
+        except Exception as e:
+            logger.error(f"Erro ao listar canais: {e}")
+            return []
+    
+    def close(self) -> None:
+        """
+        Fecha as conexões do pool deste banco de dados.
+        """
+        self.pool.close_all()
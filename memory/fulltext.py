@@ -0,0 +1,37 @@
+"""
+Utilitários de busca textual (FTS5) para o sistema de memória da Nina IA.
+Define o tokenizador usado pelos índices e a conversão da busca do usuário em consulta FTS5.
+"""
+
+import re
+
+# Tokenizador sem distinção de acentos ("você" == "voce"), adequado ao português
+FTS_TOKENIZER = "unicode61 remove_diacritics 2"
+
+# Marcadores usados nos trechos destacados
+SNIPPET_START = "["
+SNIPPET_END = "]"
+SNIPPET_ELLIPSIS = "…"
+
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def build_fts_query(text: str, prefix: bool = True) -> str:
+    """
+    Converte o texto digitado pelo usuário em uma consulta FTS5 segura.
+
+    Cada palavra vira um termo entre aspas (sem operadores FTS5 vindos do
+    usuário) e todos os termos precisam estar presentes. Com `prefix`, cada
+    termo também casa com palavras que começam com ele ("prog" → "programação"),
+    mantendo o comportamento da antiga busca por LIKE.
+
+    Args:
+        text: Texto da busca
+        prefix: Se True, usa busca por prefixo em cada termo
+
+    Returns:
+        Consulta FTS5 (vazia se o texto não tiver palavras)
+    """
+    terms = _WORD_PATTERN.findall(text or "")
+    suffix = "*" if prefix else ""
+    return " ".join(f'"{term}"{suffix}' for term in terms)
@@ -0,0 +1,342 @@
+"""
+Fila de ingestão com escrita adiada (write-behind) para o sistema de memória da Nina IA.
+Agrupa interações e alterações de perfil e grava tudo em uma única transação.
+"""
+
+import time
+import atexit
+import sqlite3
+import logging
+import threading
+from collections import deque
+from typing import Dict, List, Any, Optional
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("IngestionQueue")
+
+
+class IngestionQueue:
+    """
+    Fila de ingestão que grava lotes de operações no MemoryDatabase.
+
+    Um lote é gravado a cada `flush_interval_ms` ou quando acumula
+    `max_batch` itens, o que ocorrer primeiro. Quando a fila atinge
+    `max_pending` itens, novos itens aguardam espaço (back-pressure).
+
+    Os itens de cada `put_many` (uma mensagem) formam um grupo que nunca é
+    dividido. Um lote que falha por banco ocupado é refeito com espera
+    crescente; se falha por outro motivo, é dividido ao meio até isolar o
+    grupo com problema, e só esse grupo é descartado.
+    """
+
+    def __init__(self,
+                 db,
+                 flush_interval_ms: int = 200,
+                 max_batch: int = 200,
+                 max_pending: int = 5000,
+                 put_timeout: float = 2.0,
+                 max_retries: int = 3,
+                 retry_backoff: float = 0.05):
+        """
+        Inicializa a fila e inicia a thread de gravação.
+
+        Args:
+            db: Instância de MemoryDatabase (precisa de apply_batch)
+            flush_interval_ms: Intervalo máximo entre gravações (ms)
+            max_batch: Número de itens que dispara uma gravação imediata
+            max_pending: Limite de itens pendentes antes de bloquear produtores
+            put_timeout: Tempo máximo que um produtor espera por espaço (s)
+            max_retries: Novas tentativas de um lote após erro transitório (banco ocupado)
+            retry_backoff: Espera antes da primeira nova tentativa, dobrada a cada tentativa (s)
+        """
+        self.db = db
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.put_timeout = put_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        self._items = deque()  # Grupos de itens (um por put_many)
+        self._depth = 0
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()  # Garante a ordem de aplicação dos lotes
+        self._pending_users = {}
+        self._pending_channels = {}
+        self._closed = False
+
+        # Métricas
+        self.enqueued = 0
+        self.written = 0
+        self.failed = 0
+        self.failed_groups = 0
+        self.retries = 0
+        self.rejected = 0
+        self.batches = 0
+        self.max_depth = 0
+        self.total_flush_seconds = 0.0
+        self.last_flush_ms = 0.0
+        self._started_at = time.time()
+
+        self._thread = threading.Thread(target=self._run, name="memory-ingestion", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+        logger.info(f"Fila de ingestão iniciada (intervalo {flush_interval_ms} ms, lote {max_batch})")
+
+    def put(self, item: Dict[str, Any]) -> bool:
+        """
+        Adiciona uma operação à fila.
+
+        Args:
+            item: Operação no formato aceito por MemoryDatabase.apply_batch
+
+        Returns:
+            True se o item foi enfileirado, False se a fila estava fechada ou cheia
+        """
+        return self.put_many([item])
+
+    def put_many(self, items: List[Dict[str, Any]]) -> bool:
+        """
+        Adiciona várias operações à fila de forma atômica (todas ou nenhuma).
+
+        Args:
+            items: Operações no formato aceito por MemoryDatabase.apply_batch
+
+        Returns:
+            True se os itens foram enfileirados, False se a fila estava fechada ou cheia
+        """
+        deadline = time.monotonic() + self.put_timeout
+
+        with self._condition:
+            # Back-pressure: aguardar a thread de gravação liberar espaço
+            while not self._closed and self._depth + len(items) > self.max_pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.rejected += len(items)
+                    logger.warning(f"Fila de ingestão cheia ({self._depth} itens), {len(items)} itens descartados")
+                    return False
+                self._condition.notify_all()
+                self._condition.wait(remaining)
+
+            if self._closed:
+                self.rejected += len(items)
+                logger.warning("Fila de ingestão fechada, itens descartados")
+                return False
+
+            if not items:
+                return True
+
+            self._items.append(list(items))
+            for item in items:
+                self._track(item, 1)
+
+            self._depth += len(items)
+            self.enqueued += len(items)
+            self.max_depth = max(self.max_depth, self._depth)
+
+            if self._depth >= self.max_batch:
+                self._condition.notify_all()
+
+        return True
+
+    def _track(self, item: Dict[str, Any], delta: int) -> None:
+        """
+        Atualiza os contadores de itens pendentes por usuário e canal (com o lock adquirido).
+        """
+        for key, pending in (("user_id", self._pending_users), ("channel_id", self._pending_channels)):
+            value = item.get(key)
+            if value is None:
+                continue
+            count = pending.get(value, 0) + delta
+            if count > 0:
+                pending[value] = count
+            else:
+                pending.pop(value, None)
+
+    def _run(self) -> None:
+        """
+        Loop da thread de gravação.
+        """
+        while True:
+            with self._condition:
+                if not self._items and not self._closed:
+                    self._condition.wait(self.flush_interval)
+                elif self._depth < self.max_batch and not self._closed:
+                    # Aguardar o lote encher ou o intervalo expirar
+                    self._condition.wait(self.flush_interval)
+
+                if self._closed and not self._items:
+                    return
+
+            self.flush()
+
+    def _take_batch(self) -> List[List[Dict[str, Any]]]:
+        """
+        Retira grupos da fila até somar max_batch itens (com o lock adquirido).
+        """
+        batch = []
+        size = 0
+        while self._items and size < self.max_batch:
+            group = self._items.popleft()
+            batch.append(group)
+            size += len(group)
+        self._depth -= size
+        return batch
+
+    @staticmethod
+    def _is_transient(error: Exception) -> bool:
+        """
+        Indica se um erro de gravação pode passar numa nova tentativa (banco ocupado/bloqueado).
+        """
+        message = str(error).lower()
+        return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+    def _apply(self, groups: List[List[Dict[str, Any]]]) -> int:
+        """
+        Grava grupos de itens, refazendo erros transitórios e isolando o grupo com erro.
+
+        Args:
+            groups: Grupos de itens, na ordem de chegada
+
+        Returns:
+            Número de itens gravados
+        """
+        items = [item for group in groups for item in group]
+        attempt = 0
+        while True:
+            try:
+                self.db.apply_batch(items)
+                return len(items)
+            except Exception as e:
+                error = e
+                if not self._is_transient(e) or attempt >= self.max_retries:
+                    break
+                self.retries += 1
+                time.sleep(self.retry_backoff * (2 ** attempt))
+                attempt += 1
+
+        # Erro transitório persistente ou grupo isolado: descartar
+        if len(groups) == 1 or self._is_transient(error):
+            self.failed += len(items)
+            self.failed_groups += len(groups)
+            logger.error(f"Erro ao gravar {len(groups)} grupo(s) de ingestão ({len(items)} itens), descartados: {error}")
+            return 0
+
+        # A transação foi desfeita: dividir o lote para gravar os grupos válidos
+        middle = len(groups) // 2
+        return self._apply(groups[:middle]) + self._apply(groups[middle:])
+
+    def flush(self) -> int:
+        """
+        Grava imediatamente todos os itens pendentes.
+
+        Returns:
+            Número de itens gravados
+        """
+        written = 0
+
+        with self._flush_lock:
+            while True:
+                with self._condition:
+                    batch = self._take_batch()
+                    # Libera produtores bloqueados pelo back-pressure
+                    self._condition.notify_all()
+
+                if not batch:
+                    break
+
+                start = time.perf_counter()
+                try:
+                    applied = self._apply(batch)
+                    written += applied
+                    self.written += applied
+                finally:
+                    elapsed = time.perf_counter() - start
+                    self.batches += 1
+                    self.total_flush_seconds += elapsed
+                    self.last_flush_ms = elapsed * 1000
+                    with self._condition:
+                        for group in batch:
+                            for item in group:
+                                self._track(item, -1)
+
+        return written
+
+    def has_pending(self, user_id: Optional[str] = None, channel_id: Optional[str] = None) -> bool:
+        """
+        Verifica se há itens ainda não gravados de um usuário ou canal.
+
+        Args:
+            user_id: ID do usuário
+            channel_id: ID do canal
+
+        Returns:
+            True se houver itens pendentes
+        """
+        with self._condition:
+            return bool((user_id is not None and user_id in self._pending_users) or
+                        (channel_id is not None and channel_id in self._pending_channels))
+
+    def ensure_written(self, user_id: Optional[str] = None, channel_id: Optional[str] = None) -> None:
+        """
+        Garante leitura das próprias escritas: grava a fila se houver itens
+        pendentes do usuário ou canal antes de uma consulta.
+
+        Args:
+            user_id: ID do usuário
+            channel_id: ID do canal
+        """
+        if self.has_pending(user_id, channel_id):
+            self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtém métricas de vazão da ingestão.
+
+        Returns:
+            Dicionário com contadores, profundidade da fila e vazão
+        """
+        with self._condition:
+            depth = self._depth
+
+        uptime = max(time.time() - self._started_at, 1e-9)
+        return {
+            "pending": depth,
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "failed": self.failed,
+            "failed_groups": self.failed_groups,
+            "retries": self.retries,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "avg_batch_size": round(self.written / self.batches, 2) if self.batches else 0.0,
+            "avg_flush_ms": round(self.total_flush_seconds * 1000 / self.batches, 3) if self.batches else 0.0,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "items_per_second": round(self.written / uptime, 2)
+        }
+
+    def close(self, timeout: float = 10.0) -> None:
+        """
+        Encerra a fila gravando todos os itens pendentes.
+
+        Args:
+            timeout: Tempo máximo de espera pela thread de gravação (s)
+        """
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+
+        self._thread.join(timeout)
+        self.flush()
+
+        try:
+            atexit.unregister(self.close)
+        except Exception:
+            pass
+
+        logger.info(f"Fila de ingestão encerrada: {self.written} itens gravados em {self.batches} lotes")
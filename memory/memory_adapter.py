@@ -4,6 +4,8 @@ import logging
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 
+from memory.update_queue import PostResponseQueue
+
 # Configuração de logging
 logging.basicConfig(
     level=logging.INFO,
@@ -48,6 +50,14 @@ class NinaMemoryAdapter:
             
         self.enabled = self.config.get('enabled', True)
         
+        # Atualizações pós-resposta em segundo plano (None = síncronas)
+        self.update_queue = None
+        if self.config.get('async_updates', True):
+            self.update_queue = PostResponseQueue(
+                workers=self.config.get('update_workers', 2),
+                lag_warning_ms=self.config.get('update_lag_warning_ms', 2000)
+            )
+        
     def _load_config(self, config_path: Optional[str] = None) -> Dict[str, Any]:
         """
         Carrega a configuração do adaptador.
@@ -65,7 +75,11 @@ class NinaMemoryAdapter:
             'max_context_interactions': 10,
             'backup_dir': 'backups',
             'auto_backup': True,
-            'auto_backup_interval': 24  # horas
+            'auto_backup_interval': 24,  # horas
+            'async_updates': True,  # atualizações pós-resposta fora do caminho da resposta
+            'update_workers': 2,
+            'update_lag_warning_ms': 2000,
+            'update_wait_timeout': 2.0  # espera máxima pelas atualizações do canal antes de ler (s)
         }
         
         if config_path and os.path.exists(config_path):
@@ -91,6 +105,18 @@ class NinaMemoryAdapter:
             True se o sistema estiver habilitado, False caso contrário
         """
         return self.enabled and self.memory_integrator is not None
+    
+    def _wait_for_updates(self, channel_id: str) -> None:
+        """
+        Espera as atualizações pendentes de um canal antes de ler ou gravar nele,
+        mantendo a ordem das interações e a leitura das próprias escritas.
+        
+        Args:
+            channel_id: ID do canal
+        """
+        if self.update_queue is not None:
+            if not self.update_queue.wait_for_channel(channel_id, self.config.get('update_wait_timeout', 2.0)):
+                logger.warning(f"Atualizações do canal {channel_id} ainda pendentes, seguindo sem esperar")
         
     def process_input(self, text: str, user_id: str, channel_id: str, 
                      metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -111,6 +137,8 @@ class NinaMemoryAdapter:
             return {}
             
         try:
+            self._wait_for_updates(channel_id)
+            
             timestamp = None
             if metadata and 'timestamp' in metadata:
                 if isinstance(metadata['timestamp'], str):
@@ -150,11 +178,13 @@ class NinaMemoryAdapter:
             
         try:
             max_interactions = self.config.get('max_context_interactions', 10)
+            self._wait_for_updates(channel_id)
             
             memory_context = self.memory_integrator.get_context_for_response(
                 user_id=user_id,
                 channel_id=channel_id,
-                max_interactions=max_interactions
+                max_interactions=max_interactions,
+                query=context.get('input')
             )
             
             # Mesclar contexto original com informações da memória
@@ -175,6 +205,9 @@ class NinaMemoryAdapter:
         """
         Atualiza a memória após uma resposta da Nina.
         
+        Com atualizações assíncronas, a tarefa é enfileirada (em ordem por
+        canal) e o método retorna imediatamente, sem atrasar o TTS.
+        
         Args:
             response_text: Texto da resposta da Nina
             user_id: ID do usuário para quem respondeu
@@ -183,7 +216,24 @@ class NinaMemoryAdapter:
         if not self.is_enabled():
             logger.warning("Sistema de memória desabilitado, ignorando atualização")
             return
-            
+        
+        if self.update_queue is not None:
+            if self.update_queue.submit(channel_id, self._apply_update_after_response,
+                                        response_text, user_id, channel_id):
+                return
+            logger.warning("Fila pós-resposta indisponível, atualizando de forma síncrona")
+        
+        self._apply_update_after_response(response_text, user_id, channel_id)
+    
+    def _apply_update_after_response(self, response_text: str, user_id: str, channel_id: str) -> None:
+        """
+        Grava a resposta da Nina na memória (na fila pós-resposta ou diretamente).
+        
+        Args:
+            response_text: Texto da resposta da Nina
+            user_id: ID do usuário para quem respondeu
+            channel_id: ID do canal onde respondeu
+        """
         try:
             self.memory_integrator.update_after_response(
                 response_text=response_text,
@@ -194,6 +244,39 @@ class NinaMemoryAdapter:
             logger.info(f"Memória atualizada após resposta para usuário {user_id}")
         except Exception as e:
             logger.error(f"Erro ao atualizar memória após resposta: {e}")
+    
+    def flush_updates(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera todas as atualizações pós-resposta pendentes.
+        
+        Args:
+            timeout: Tempo máximo de espera (s; None = sem limite)
+            
+        Returns:
+            True se não houver mais atualizações pendentes
+        """
+        return self.update_queue.drain(timeout) if self.update_queue is not None else True
+    
+    def get_update_stats(self) -> Dict[str, Any]:
+        """
+        Obtém as métricas da fila pós-resposta (pendências e atraso).
+        
+        Returns:
+            Dicionário com métricas (vazio se as atualizações forem síncronas)
+        """
+        return self.update_queue.get_stats() if self.update_queue is not None else {}
+    
+    def close(self, timeout: float = 10.0) -> bool:
+        """
+        Encerra o adaptador executando as atualizações pendentes.
+        
+        Args:
+            timeout: Tempo máximo de espera pelas atualizações (s)
+            
+        Returns:
+            True se todas as atualizações foram executadas
+        """
+        return self.update_queue.close(timeout) if self.update_queue is not None else True
             
     def adapt_personality(self, channel_id: str) -> Dict[str, Any]:
         """
@@ -210,6 +293,7 @@ class NinaMemoryAdapter:
             return {}
             
         try:
+            self._wait_for_updates(channel_id)
             personality = self.memory_integrator.adapt_personality(channel_id)
             logger.info(f"Personalidade adaptada para o canal {channel_id}")
             return personality
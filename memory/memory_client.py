@@ -5,7 +5,7 @@ Fornece métodos para acessar e manipular os dados do sistema de memória.
 
 import os
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, BinaryIO
 
 # Configurar logging
 logging.basicConfig(
@@ -43,7 +43,7 @@ class MemoryClient:
     
     def get_users(self, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
         """
-        Obtém a lista de usuários.
+        Obtém a lista de usuários (mais ativos primeiro).
         
         Args:
             limit: Número máximo de usuários a retornar
@@ -56,47 +56,12 @@ class MemoryClient:
             if self.memory_system is None:
                 return []
             
-            # Obter estatísticas para ter a lista de usuários
-            statistics = self.memory_system.get_statistics()
-            top_users = statistics.get("top_users", [])
-            
-            # Aplicar paginação
-            paginated_users = top_users[offset:offset+limit]
-            
-            # Para cada usuário na lista, obter detalhes completos
-            users = []
-            for user_info in paginated_users:
-                user_id = user_info.get("user_id")
-                if user_id:
-                    # Obter apenas informações básicas para a listagem
-                    users.append({
-                        "user_id": user_id,
-                        "username": user_info.get("username", "Unknown User"),
-                        "interaction_count": user_info.get("interaction_count", 0),
-                        "last_seen": self._get_user_last_seen(user_id)
-                    })
-            
-            return users
+            # Uma única consulta já traz contadores e última atividade
+            return self.memory_system.db.list_users(limit=limit, offset=offset)
         except Exception as e:
             logger.error(f"Erro ao obter usuários: {e}")
             return []
     
-    def _get_user_last_seen(self, user_id: str) -> str:
-        """
-        Obtém a data da última interação de um usuário.
-        
-        Args:
-            user_id: ID do usuário
-            
-        Returns:
-            Data da última interação
-        """
-        try:
-            user = self.memory_system.get_user_profile(user_id)
-            return user.get("last_seen", "")
-        except:
-            return ""
-    
     def get_user(self, user_id: str) -> Dict[str, Any]:
         """
         Obtém detalhes de um usuário.
@@ -179,14 +144,14 @@ class MemoryClient:
             if self.memory_system is None:
                 return []
             
-            return self.memory_system.memory_manager.db.get_user_interactions(user_id, limit)
+            return self.memory_system.db.get_user_interactions(user_id, limit)
         except Exception as e:
             logger.error(f"Erro ao obter interações do usuário {user_id}: {e}")
             return []
     
     def get_channels(self, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
         """
-        Obtém a lista de canais.
+        Obtém a lista de canais (mais ativos primeiro).
         
         Args:
             limit: Número máximo de canais a retornar
@@ -199,47 +164,12 @@ class MemoryClient:
             if self.memory_system is None:
                 return []
             
-            # Obter estatísticas para ter a lista de canais
-            statistics = self.memory_system.get_statistics()
-            top_channels = statistics.get("top_channels", [])
-            
-            # Aplicar paginação
-            paginated_channels = top_channels[offset:offset+limit]
-            
-            # Para cada canal na lista, obter detalhes básicos
-            channels = []
-            for channel_info in paginated_channels:
-                channel_id = channel_info.get("channel_id")
-                if channel_id:
-                    # Obter apenas informações básicas para a listagem
-                    channels.append({
-                        "channel_id": channel_id,
-                        "channel_name": channel_info.get("channel_name", "Unknown Channel"),
-                        "message_count": channel_info.get("message_count", 0),
-                        "last_activity": self._get_channel_last_activity(channel_id)
-                    })
-            
-            return channels
+            # Uma única consulta já traz contadores e última atividade
+            return self.memory_system.db.list_channels(limit=limit, offset=offset)
         except Exception as e:
             logger.error(f"Erro ao obter canais: {e}")
             return []
     
-    def _get_channel_last_activity(self, channel_id: str) -> str:
-        """
-        Obtém a data da última atividade em um canal.
-        
-        Args:
-            channel_id: ID do canal
-            
-        Returns:
-            Data da última atividade
-        """
-        try:
-            channel = self.memory_system.get_channel_profile(channel_id)
-            return channel.get("last_activity", "")
-        except:
-            return ""
-    
     def get_channel(self, channel_id: str) -> Dict[str, Any]:
         """
         Obtém detalhes de um canal.
@@ -303,7 +233,7 @@ class MemoryClient:
             if self.memory_system is None:
                 return []
             
-            return self.memory_system.memory_manager.db.get_channel_interactions(channel_id, limit)
+            return self.memory_system.db.get_channel_interactions(channel_id, limit)
         except Exception as e:
             logger.error(f"Erro ao obter interações do canal {channel_id}: {e}")
             return []
@@ -328,45 +258,41 @@ class MemoryClient:
             logger.error(f"Erro ao atualizar personalidade do canal {channel_id}: {e}")
             return False
     
-    def get_interactions(self, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+    def get_interactions(self, limit: int = 20, cursor: Optional[str] = None,
+                         user_id: Optional[str] = None, channel_id: Optional[str] = None,
+                         interaction_type: Optional[str] = None, since: Optional[str] = None,
+                         until: Optional[str] = None) -> Dict[str, Any]:
         """
-        Obtém a lista de interações recentes.
+        Obtém uma página de interações (mais recentes primeiro).
         
         Args:
             limit: Número máximo de interações a retornar
-            offset: Número de interações a pular
+            cursor: Cursor da página anterior (None = primeira página)
+            user_id: Filtrar por usuário
+            channel_id: Filtrar por canal
+            interaction_type: Filtrar por tipo de interação
+            since: Timestamp ISO mínimo (inclusivo)
+            until: Timestamp ISO máximo (exclusivo)
             
         Returns:
-            Lista de interações
-        """
-        try:
-            if self.memory_system is None:
-                return []
-            
-            # Obter interações de todos os canais
-            # Em uma implementação real, seria necessário um método específico para isso
-            # Aqui estamos simulando com base nas interações dos canais mais ativos
-            
-            statistics = self.memory_system.get_statistics()
-            top_channels = statistics.get("top_channels", [])
+            Dicionário com "items" (lista de interações) e "next_cursor"
             
-            all_interactions = []
-            for channel_info in top_channels[:5]:  # Limitar a 5 canais para não sobrecarregar
-                channel_id = channel_info.get("channel_id")
-                if channel_id:
-                    channel_interactions = self.memory_system.memory_manager.db.get_channel_interactions(channel_id, 10)
-                    all_interactions.extend(channel_interactions)
-            
-            # Ordenar por timestamp (mais recente primeiro)
-            all_interactions.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-            
-            # Aplicar paginação
-            paginated_interactions = all_interactions[offset:offset+limit]
-            
-            return paginated_interactions
-        except Exception as e:
-            logger.error(f"Erro ao obter interações: {e}")
-            return []
+        Raises:
+            ValueError: Se o cursor for inválido
+        """
+        if self.memory_system is None:
+            return {"items": [], "next_cursor": None}
+        
+        items, next_cursor = self.memory_system.db.list_interactions(
+            limit=limit,
+            cursor=cursor,
+            user_id=user_id,
+            channel_id=channel_id,
+            interaction_type=interaction_type,
+            since=since,
+            until=until
+        )
+        return {"items": items, "next_cursor": next_cursor}
     
     def get_interaction(self, interaction_id: int) -> Dict[str, Any]:
         """
@@ -382,15 +308,7 @@ class MemoryClient:
             if self.memory_system is None:
                 return {}
             
-            # Em uma implementação real, seria necessário um método específico para isso
-            # Aqui estamos simulando com uma busca nas interações recentes
-            
-            interactions = self.get_interactions(limit=100)
-            for interaction in interactions:
-                if interaction.get("interaction_id") == interaction_id:
-                    return interaction
-            
-            return {}
+            return self.memory_system.db.get_interaction(interaction_id) or {}
         except Exception as e:
             logger.error(f"Erro ao obter interação {interaction_id}: {e}")
             return {}
@@ -409,52 +327,39 @@ class MemoryClient:
             if self.memory_system is None:
                 return False
             
-            # Em uma implementação real, seria necessário um método específico para isso
-            # Aqui estamos retornando False pois não temos acesso direto à função de remoção
-            
-            logger.warning(f"Remoção de interação {interaction_id} não implementada")
-            return False
+            return self.memory_system.db.delete_interaction(interaction_id)
         except Exception as e:
             logger.error(f"Erro ao remover interação {interaction_id}: {e}")
             return False
     
-    def search_interactions(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+    def search_interactions(self, query: str, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
         """
-        Busca interações por conteúdo.
+        Busca interações por conteúdo no índice de busca textual.
         
         Args:
             query: Termo de busca
             limit: Número máximo de resultados
+            offset: Número de resultados a pular
             
         Returns:
-            Lista de interações
+            Lista de interações ordenadas por relevância, com trecho destacado
         """
         try:
             if self.memory_system is None:
                 return []
             
-            # Em uma implementação real, seria necessário um método específico para isso
-            # Aqui estamos simulando com uma busca simples nas interações recentes
-            
-            interactions = self.get_interactions(limit=100)
-            results = []
-            
-            for interaction in interactions:
-                content = interaction.get("content_summary", "").lower()
-                if query.lower() in content:
-                    results.append(interaction)
-                    if len(results) >= limit:
-                        break
-            
-            return results
+            return self.memory_system.db.search_interactions(query, limit=limit, offset=offset)
         except Exception as e:
             logger.error(f"Erro ao buscar interações: {e}")
             return []
     
-    def get_statistics(self) -> Dict[str, Any]:
+    def get_statistics(self, top_n: int = 10) -> Dict[str, Any]:
         """
         Obtém estatísticas gerais do sistema de memória.
         
+        Args:
+            top_n: Número de itens nos rankings de usuários, canais e tópicos
+            
         Returns:
             Dicionário com estatísticas
         """
@@ -462,7 +367,101 @@ class MemoryClient:
             if self.memory_system is None:
                 return {}
             
-            return self.memory_system.get_statistics()
+            return self.memory_system.get_statistics(top_n=top_n)
         except Exception as e:
             logger.error(f"Erro ao obter estatísticas: {e}")
             return {}
+    
+    def get_activity_statistics(self, days: int = 7) -> Dict[str, Any]:
+        """
+        Obtém a atividade por hora e por dia dos últimos dias.
+        
+        Args:
+            days: Número de dias a incluir
+            
+        Returns:
+            Dicionário com atividade por hora e por dia
+        """
+        try:
+            if self.memory_system is None:
+                return {}
+            
+            return self.memory_system.get_activity_statistics(days=days)
+        except Exception as e:
+            logger.error(f"Erro ao obter estatísticas de atividade: {e}")
+            return {}
+    
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Obtém o estado interno do sistema de memória (fila, conexões e cache de contexto).
+        
+        Returns:
+            Dicionário com métricas internas
+        """
+        try:
+            if self.memory_system is None:
+                return {}
+            
+            return self.memory_system.get_status()
+        except Exception as e:
+            logger.error(f"Erro ao obter estado do sistema de memória: {e}")
+            return {}
+    
+    def backup(self, backup_path: str, incremental: bool = False) -> Dict[str, Any]:
+        """
+        Cria um backup online do sistema de memória.
+        
+        Args:
+            backup_path: Caminho para o arquivo de backup
+            incremental: Se True, grava apenas as páginas alteradas desde o último backup
+            
+        Returns:
+            Estatísticas do backup (vazio em caso de erro)
+        """
+        try:
+            if self.memory_system is None:
+                return {}
+            
+            return self.memory_system.backup(backup_path, incremental=incremental)
+        except Exception as e:
+            logger.error(f"Erro ao criar backup: {e}")
+            return {}
+    
+    def restore_stream(self, fileobj: BinaryIO, backup_dir: str) -> Dict[str, Any]:
+        """
+        Restaura o sistema de memória a partir de um fluxo de backup (ex.: upload).
+        
+        Args:
+            fileobj: Fluxo binário com o backup
+            backup_dir: Diretório onde procurar as bases de um backup incremental
+            
+        Returns:
+            Estatísticas da restauração (vazio em caso de erro)
+        """
+        try:
+            if self.memory_system is None:
+                return {}
+            
+            return self.memory_system.restore_stream(fileobj, backup_dir)
+        except Exception as e:
+            logger.error(f"Erro ao restaurar backup: {e}")
+            return {}
+    
+    def list_backups(self, backup_dir: str) -> List[Dict[str, Any]]:
+        """
+        Lista os backups disponíveis.
+        
+        Args:
+            backup_dir: Diretório dos arquivos de backup
+            
+        Returns:
+            Lista de backups, do mais recente para o mais antigo
+        """
+        try:
+            if self.memory_system is None:
+                return []
+            
+            return self.memory_system.list_backups(backup_dir)
+        except Exception as e:
+            logger.error(f"Erro ao listar backups: {e}")
+            return []
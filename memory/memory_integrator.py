@@ -9,7 +9,11 @@ from typing import Dict, List, Any, Optional, Tuple
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from memory.memory_manager import MemoryManager
+from memory.backup import MemoryBackup
+from memory.context_cache import ContextCache
+from memory.vector_index import SemanticIndex
 from core.personality_manager import PersonalityManager
+from core.tracing import traced
 
 
 class NinaMemoryIntegrator:
@@ -18,19 +22,74 @@ class NinaMemoryIntegrator:
     Serve como ponte entre o sistema de memória e o orquestrador principal da Nina.
     """
     
-    def __init__(self, memory_db_path: str, profiles_dir: str):
+    def __init__(self, memory_db_path: str, profiles_dir: str,
+                 context_cache: Optional[ContextCache] = None, cache_size: int = 1024,
+                 semantic_index: Optional[SemanticIndex] = None, related_limit: int = 3,
+                 related_budget_ms: float = 10.0):
         """
         Inicializa o integrador de memória.
         
         Args:
             memory_db_path: Caminho para o banco de dados SQLite de memória
             profiles_dir: Diretório onde os perfis de personalidade são armazenados
+            context_cache: Cache de contexto compartilhado (opcional)
+            cache_size: Número máximo de itens do cache criado quando nenhum é fornecido
+            semantic_index: Índice vetorial para recuperar memórias relacionadas (opcional)
+            related_limit: Número máximo de memórias relacionadas no contexto
+            related_budget_ms: Limite de tempo da busca de memórias relacionadas (ms)
         """
         self.memory_manager = MemoryManager(db_path=memory_db_path)
         self.personality_manager = PersonalityManager(profiles_dir=profiles_dir)
         self.current_user_id = None
         self.current_channel_id = None
         
+        # Perfis, personalidades e janelas recentes servidos da memória no caminho de voz
+        self.context_cache = context_cache or ContextCache(cache_size)
+        
+        # Recuperação semântica de interações e conhecimentos antigos
+        self.semantic_index = semantic_index
+        self.related_limit = related_limit
+        self.related_budget_ms = related_budget_ms
+        
+    def _get_user_profile(self, user_id: str) -> Dict[str, Any]:
+        """
+        Obtém o perfil de um usuário (do cache, se estiver atualizado).
+        """
+        return self.context_cache.get_or_load(
+            "user", user_id, lambda: self.memory_manager.get_user_profile(user_id))
+        
+    def _get_channel_profile(self, channel_id: str) -> Dict[str, Any]:
+        """
+        Obtém o perfil de um canal (do cache, se estiver atualizado).
+        """
+        return self.context_cache.get_or_load(
+            "channel", channel_id, lambda: self.memory_manager.get_channel_profile(channel_id))
+        
+    def _get_channel_personality(self, channel_id: str) -> Dict[str, Any]:
+        """
+        Obtém a personalidade adaptada de um canal (do cache, se estiver atualizada).
+        """
+        return self.context_cache.get_or_load(
+            "personality", channel_id, lambda: self.personality_manager.get_channel_personality(channel_id))
+        
+    def _get_recent_interactions(self, channel_id: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Obtém a janela de interações recentes de um canal (do cache, se estiver atualizada).
+        """
+        return self.context_cache.get_or_load(
+            "recent", channel_id,
+            lambda: self.memory_manager.get_recent_interactions(channel_id=channel_id, limit=limit),
+            variant=limit)
+        
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Obtém as métricas do cache de contexto.
+        
+        Returns:
+            Dicionário com acertos, faltas, invalidações e tamanho do cache
+        """
+        return self.context_cache.get_stats()
+        
     def set_context(self, user_id: str, channel_id: str) -> None:
         """
         Define o contexto atual para interação (usuário e canal).
@@ -69,6 +128,7 @@ class NinaMemoryIntegrator:
             content=text,
             timestamp=timestamp
         )
+        self.context_cache.bump("recent", channel_id)
         
         # Analisar a mensagem para extrair informações
         analysis = self.memory_manager.analyze_interaction(text)
@@ -88,16 +148,22 @@ class NinaMemoryIntegrator:
             tone=analysis.get('tone', 'neutral')
         )
         
+        # Perfis alterados: a leitura abaixo recarrega uma vez e fica em cache para a resposta
+        self.context_cache.bump("user", user_id)
+        self.context_cache.bump("channel", channel_id)
+        
         # Retornar informações processadas
         return {
             'interaction_id': interaction_id,
             'analysis': analysis,
-            'user_profile': self.memory_manager.get_user_profile(user_id),
-            'channel_profile': self.memory_manager.get_channel_profile(channel_id)
+            'user_profile': self._get_user_profile(user_id),
+            'channel_profile': self._get_channel_profile(channel_id)
         }
         
+    @traced("memory.context")
     def get_context_for_response(self, user_id: str, channel_id: str, 
-                               max_interactions: int = 10) -> Dict[str, Any]:
+                               max_interactions: int = 10,
+                               query: Optional[str] = None) -> Dict[str, Any]:
         """
         Obtém o contexto necessário para gerar uma resposta personalizada.
         
@@ -105,6 +171,7 @@ class NinaMemoryIntegrator:
             user_id: ID do usuário para quem responder
             channel_id: ID do canal onde responder
             max_interactions: Número máximo de interações anteriores a incluir
+            query: Texto atual, usado para recuperar memórias relacionadas (opcional)
             
         Returns:
             Dicionário com contexto para resposta
@@ -112,20 +179,28 @@ class NinaMemoryIntegrator:
         # Definir contexto atual
         self.set_context(user_id, channel_id)
         
-        # Obter perfil do usuário
-        user_profile = self.memory_manager.get_user_profile(user_id)
-        
-        # Obter perfil do canal
-        channel_profile = self.memory_manager.get_channel_profile(channel_id)
-        
-        # Obter personalidade adaptada para o canal
-        personality = self.personality_manager.get_channel_personality(channel_id)
+        # Versões lidas antes dos perfis: uma escrita concorrente só causa uma nova formatação
+        versions = {
+            'user': self.context_cache.get_version("user", user_id),
+            'channel': self.context_cache.get_version("channel", channel_id),
+            'personality': self.context_cache.get_version("personality", channel_id)
+        }
         
-        # Obter interações recentes no canal
-        recent_interactions = self.memory_manager.get_recent_interactions(
-            channel_id=channel_id,
-            limit=max_interactions
-        )
+        # Perfis, personalidade e interações recentes vêm do cache enquanto não houver escritas
+        user_profile = self._get_user_profile(user_id)
+        channel_profile = self._get_channel_profile(channel_id)
+        personality = self._get_channel_personality(channel_id)
+        recent_interactions = self._get_recent_interactions(channel_id, max_interactions)
+        
+        # Memórias antigas parecidas com o texto atual (fora da janela recente)
+        related_memories = []
+        if query and self.semantic_index is not None:
+            recent_ids = {interaction.get('interaction_id') for interaction in recent_interactions}
+            related_memories = [
+                memory for memory in self.semantic_index.retrieve(
+                    query, self.related_limit + len(recent_ids), self.related_budget_ms)
+                if not (memory['source'] == 'interaction' and memory['id'] in recent_ids)
+            ][:self.related_limit]
         
         # Construir contexto para resposta
         context = {
@@ -133,6 +208,10 @@ class NinaMemoryIntegrator:
             'channel_profile': channel_profile,
             'personality': personality,
             'recent_interactions': recent_interactions,
+            'related_memories': related_memories,
+            'user_id': user_id,
+            'channel_id': channel_id,
+            'versions': versions,
             'timestamp': datetime.now().isoformat()
         }
         
@@ -149,7 +228,7 @@ class NinaMemoryIntegrator:
             Personalidade adaptada
         """
         # Obter perfil do canal
-        channel_profile = self.memory_manager.get_channel_profile(channel_id)
+        channel_profile = self._get_channel_profile(channel_id)
         
         # Obter personalidade base
         base_personality = self.personality_manager.get_default_personality()
@@ -165,6 +244,7 @@ class NinaMemoryIntegrator:
             channel_id=channel_id,
             personality=adapted_personality
         )
+        self.context_cache.put("personality", channel_id, adapted_personality)
         
         return adapted_personality
         
@@ -187,6 +267,7 @@ class NinaMemoryIntegrator:
             is_nina_response=True,
             target_user_id=user_id
         )
+        self.context_cache.bump("recent", channel_id)
         
     def get_user_memories(self, user_id: str) -> Dict[str, Any]:
         """
@@ -236,6 +317,7 @@ class NinaMemoryIntegrator:
         """
         try:
             self.memory_manager.clear_user_memory(user_id)
+            self.context_cache.bump("user", user_id)
             return True
         except Exception as e:
             print(f"Erro ao limpar memória do usuário: {e}")
@@ -253,6 +335,8 @@ class NinaMemoryIntegrator:
         """
         try:
             self.memory_manager.clear_channel_memory(channel_id)
+            for kind in ("channel", "personality", "recent"):
+                self.context_cache.bump(kind, channel_id)
             return True
         except Exception as e:
             print(f"Erro ao limpar memória do canal: {e}")
@@ -269,11 +353,11 @@ class NinaMemoryIntegrator:
             Caminho para o arquivo de backup
         """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_file = os.path.join(backup_dir, f"memory_backup_{timestamp}.db")
         
         try:
-            self.memory_manager.create_backup(backup_file)
-            return backup_file
+            # Cópia online em passos: a memória continua aceitando escritas
+            stats = MemoryBackup(self.memory_manager, backup_dir).create_backup(f"memory_backup_{timestamp}")
+            return stats["path"]
         except Exception as e:
             print(f"Erro ao criar backup: {e}")
             return ""
@@ -289,7 +373,8 @@ class NinaMemoryIntegrator:
             True se bem-sucedido, False caso contrário
         """
         try:
-            self.memory_manager.restore_from_backup(backup_file)
+            MemoryBackup(self.memory_manager, os.path.dirname(os.path.abspath(backup_file))).restore(backup_file)
+            self.context_cache.clear()
             return True
         except Exception as e:
             print(f"Erro ao restaurar backup: {e}")
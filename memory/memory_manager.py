@@ -8,6 +8,9 @@ import sqlite3
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 
+from memory.connection_pool import get_pool
+from memory.fulltext import FTS_TOKENIZER, SNIPPET_START, SNIPPET_END, SNIPPET_ELLIPSIS, build_fts_query
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
@@ -19,14 +22,16 @@ class MemoryManager:
         )
         os.makedirs(self.memory_dir, exist_ok=True)
         self.db_path = os.path.join(self.memory_dir, "memory.db")
+        # Pool compartilhado com MemoryDatabase quando usam o mesmo arquivo
+        self.pool = get_pool(self.db_path)
+        # Funções chamadas com (id, texto) após cada conhecimento gravado
+        self._knowledge_listeners = []
         self._init_database()
         logger.info(f"Gerenciador de memória inicializado: {self.db_path}")
 
     def _init_database(self):
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('''
+            self.pool.executescript('''
                 CREATE TABLE IF NOT EXISTS knowledge (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     topic TEXT NOT NULL,
@@ -35,46 +40,67 @@ class MemoryManager:
                     source TEXT,
                     confidence REAL,
                     metadata TEXT
-                )
+                );
+                CREATE INDEX IF NOT EXISTS idx_knowledge_topic ON knowledge(topic);
             ''')
-            conn.commit()
+            self._init_fulltext()
         except Exception as e:
             logger.error(f"Erro ao inicializar banco de dados: {e}")
-        finally:
-            conn.close()
+
+    def _init_fulltext(self):
+        """Cria o índice FTS5 de conhecimentos e os gatilhos de sincronização."""
+        existed = self.pool.query_one(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'knowledge_fts'"
+        ) is not None
+        self.pool.executescript(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS knowledge_fts USING fts5(
+                topic, fact, content='knowledge', content_rowid='id', tokenize='{FTS_TOKENIZER}'
+            );
+            CREATE TRIGGER IF NOT EXISTS knowledge_fts_insert AFTER INSERT ON knowledge BEGIN
+                INSERT INTO knowledge_fts(rowid, topic, fact) VALUES (new.id, new.topic, new.fact);
+            END;
+            CREATE TRIGGER IF NOT EXISTS knowledge_fts_delete AFTER DELETE ON knowledge BEGIN
+                INSERT INTO knowledge_fts(knowledge_fts, rowid, topic, fact) VALUES ('delete', old.id, old.topic, old.fact);
+            END;
+            CREATE TRIGGER IF NOT EXISTS knowledge_fts_update AFTER UPDATE OF topic, fact ON knowledge BEGIN
+                INSERT INTO knowledge_fts(knowledge_fts, rowid, topic, fact) VALUES ('delete', old.id, old.topic, old.fact);
+                INSERT INTO knowledge_fts(rowid, topic, fact) VALUES (new.id, new.topic, new.fact);
+            END;
+        ''')
+        if not existed:
+            self.pool.execute("INSERT INTO knowledge_fts(knowledge_fts) VALUES ('rebuild')")
 
     def add_knowledge(self, topic: str, fact: str,
                       source: Optional[str] = None,
                       confidence: Optional[float] = 1.0,
                       metadata: Optional[Dict[str, Any]] = None) -> int:
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
             timestamp = datetime.now().isoformat()
             metadata_json = json.dumps(metadata) if metadata else None
-            cursor.execute(
+            cursor = self.pool.execute(
                 "INSERT INTO knowledge (topic, fact, timestamp, source, confidence, metadata) VALUES (?, ?, ?, ?, ?, ?)",
                 (topic, fact, timestamp, source, confidence, metadata_json)
             )
-            knowledge_id = cursor.lastrowid
-            conn.commit()
-            return knowledge_id
+            for listener in self._knowledge_listeners:
+                try:
+                    listener([(cursor.lastrowid, f"{topic}: {fact}")])
+                except Exception as e:
+                    logger.error(f"Erro ao notificar conhecimento gravado: {e}")
+            return cursor.lastrowid
         except Exception as e:
             logger.error(f"Erro ao adicionar conhecimento: {e}")
             return -1
-        finally:
-            conn.close()
+
+    def add_knowledge_listener(self, listener):
+        """Registra uma função chamada com [(id, "tópico: fato")] após cada conhecimento gravado."""
+        self._knowledge_listeners.append(listener)
 
     def get_knowledge_by_topic(self, topic: str) -> List[Dict[str, Any]]:
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            cursor.execute(
+            rows = self.pool.query(
                 "SELECT * FROM knowledge WHERE topic = ? ORDER BY confidence DESC",
                 (topic,)
             )
-            rows = cursor.fetchall()
             knowledge_list = []
             for row in rows:
                 knowledge = dict(row)
@@ -88,21 +114,28 @@ class MemoryManager:
         except Exception as e:
             logger.error(f"Erro inesperado ao pesquisar conhecimento: {e}")
             return []
-        finally:
-            if 'conn' in locals() and conn:
-                conn.close()
 
-    def search_knowledge(self, query: str) -> List[Dict[str, Any]]:
+    def search_knowledge(self, query: str, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Busca conhecimentos por tópico e fato usando o índice FTS5 (BM25),
+        com trecho destacado e paginação.
+        """
+        fts_query = build_fts_query(query)
+        if not fts_query:
+            return []
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            search_term = f"%{query}%"
-            cursor.execute(
-                "SELECT * FROM knowledge WHERE topic LIKE ? OR fact LIKE ? ORDER BY confidence DESC",
-                (search_term, search_term)
+            rows = self.pool.query(
+                '''
+                SELECT k.*, bm25(knowledge_fts) AS rank,
+                       snippet(knowledge_fts, 1, ?, ?, ?, 12) AS snippet
+                FROM knowledge_fts
+                JOIN knowledge k ON k.id = knowledge_fts.rowid
+                WHERE knowledge_fts MATCH ?
+                ORDER BY rank, k.confidence DESC
+                LIMIT ? OFFSET ?
+                ''',
+                (SNIPPET_START, SNIPPET_END, SNIPPET_ELLIPSIS, fts_query, limit, offset)
             )
-            rows = cursor.fetchall()
             knowledge_list = []
             for row in rows:
                 knowledge = dict(row)
@@ -113,9 +146,10 @@ class MemoryManager:
         except Exception as e:
             logger.error(f"Erro ao pesquisar conhecimentos: {e}")
             return []
-        finally:
-            if 'conn' in locals() and conn:
-                conn.close()
+
+    def close(self):
+        """Fecha as conexões do pool do banco de memória."""
+        self.pool.close_all()
 
     def generate_session_id(self) -> str:
         """Gera um ID único de sessão com timestamp."""
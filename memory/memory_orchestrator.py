@@ -4,6 +4,8 @@ import json
 import logging
 from typing import Dict, List, Any, Optional
 
+from memory.prompt_blocks import PromptBlockCache, build_memory_prompt
+
 # Configuração de logging
 logging.basicConfig(
     level=logging.INFO,
@@ -26,6 +28,9 @@ class MemoryOrchestrator:
         """
         self.config = self._load_config(config_path)
         
+        # Blocos de prompt reaproveitados entre turnos enquanto os perfis não mudam
+        self.prompt_blocks = PromptBlockCache()
+        
         # Inicializar adaptador de memória
         try:
             from memory.memory_manager import MemoryManagerpter
@@ -191,6 +196,9 @@ class MemoryOrchestrator:
         """
         Atualiza a memória após uma resposta da Nina.
         
+        A atualização é enfileirada pelo adaptador e executada em segundo
+        plano, então a resposta pode seguir para o TTS imediatamente.
+        
         Args:
             response: Resposta gerada pela Nina
             message: Mensagem original que gerou a resposta
@@ -211,10 +219,23 @@ class MemoryOrchestrator:
                 channel_id=channel_id
             )
             
-            logger.info(f"Memória atualizada após resposta para usuário {user_id}")
+            logger.debug(f"Atualização da memória enviada após resposta para usuário {user_id}")
         except Exception as e:
             logger.error(f"Erro ao atualizar memória após resposta: {e}")
             
+    def build_memory_prompt(self, memory_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Monta o contexto de memória do prompt a partir de blocos pré-formatados
+        (veja `memory.prompt_blocks.build_memory_prompt`).
+        
+        Args:
+            memory_data: Dados de memória
+            
+        Returns:
+            Dicionário com o texto, os tokens estimados e os metadados de cada bloco
+        """
+        return build_memory_prompt(self.prompt_blocks, memory_data)
+        
     def format_memory_for_llm(self, memory_data: Dict[str, Any]) -> str:
         """
         Formata os dados de memória para inclusão no prompt do LLM.
@@ -228,106 +249,8 @@ class MemoryOrchestrator:
         try:
             if not memory_data:
                 return ""
-                
-            # Formatar perfil do usuário
-            user_profile = memory_data.get('user_profile', {})
-            user_info = []
-            
-            if user_profile:
-                user_info.append(f"Nome do usuário: {user_profile.get('username', 'Desconhecido')}")
-                
-                # Adicionar tópicos de interesse
-                topics = user_profile.get('topics', {})
-                if topics:
-                    top_topics = sorted(topics.items(), key=lambda x: x[1], reverse=True)[:3]
-                    topics_str = ", ".join([f"{topic}" for topic, _ in top_topics])
-                    user_info.append(f"Tópicos de interesse: {topics_str}")
-                    
-                # Adicionar emoções predominantes
-                emotions = user_profile.get('emotions', {})
-                if emotions:
-                    top_emotions = sorted(emotions.items(), key=lambda x: x[1], reverse=True)[:2]
-                    emotions_str = ", ".join([f"{emotion}" for emotion, _ in top_emotions])
-                    user_info.append(f"Emoções predominantes: {emotions_str}")
-                    
-                # Adicionar expressões frequentes
-                expressions = user_profile.get('expressions', [])
-                if expressions:
-                    expressions_str = ", ".join([f'"{expr}"' for expr in expressions[:3]])
-                    user_info.append(f"Expressões frequentes: {expressions_str}")
-                    
-            # Formatar perfil do canal
-            channel_profile = memory_data.get('channel_profile', {})
-            channel_info = []
-            
-            if channel_profile:
-                channel_info.append(f"Canal: {channel_profile.get('channel_name', 'Desconhecido')}")
-                
-                # Adicionar tópicos do canal
-                topics = channel_profile.get('topics', {})
-                if topics:
-                    top_topics = sorted(topics.items(), key=lambda x: x[1], reverse=True)[:3]
-                    topics_str = ", ".join([f"{topic}" for topic, _ in top_topics])
-                    channel_info.append(f"Tópicos do canal: {topics_str}")
-                    
-                # Adicionar tom do canal
-                tone = channel_profile.get('tone', 'neutro')
-                channel_info.append(f"Tom do canal: {tone}")
-                
-            # Formatar personalidade
-            personality = memory_data.get('personality', {})
-            personality_info = []
-            
-            if personality:
-                formality = personality.get('formality_level', 50)
-                if formality < 30:
-                    personality_info.append("Estilo: informal")
-                elif formality < 70:
-                    personality_info.append("Estilo: neutro")
-                else:
-                    personality_info.append("Estilo: formal")
-                    
-                humor = personality.get('humor_level', 50)
-                if humor > 70:
-                    personality_info.append("Humor: presente")
-                    
-                technicality = personality.get('technicality_level', 50)
-                if technicality < 30:
-                    personality_info.append("Explicações: simples")
-                elif technicality > 70:
-                    personality_info.append("Explicações: técnicas")
-                    
-                verbosity = personality.get('verbosity', 'médio')
-                if verbosity == 'conciso':
-                    personality_info.append("Respostas: concisas")
-                elif verbosity == 'detalhado':
-                    personality_info.append("Respostas: detalhadas")
-                
-            # Combinar todas as informações
-            memory_sections = []
-            
-            if user_info:
-                memory_sections.append("Informações do Usuário:\n" + "\n".join([f"- {info}" for info in user_info]))
-                
-            if channel_info:
-                memory_sections.append("Informações do Canal:\n" + "\n".join([f"- {info}" for info in channel_info]))
-                
-            if personality_info:
-                memory_sections.append("Personalidade:\n" + "\n".join([f"- {info}" for info in personality_info]))
-                
-            # Adicionar interações recentes se disponíveis
-            recent_interactions = memory_data.get('recent_interactions', [])
-            if recent_interactions:
-                interactions_str = []
-                for i, interaction in enumerate(recent_interactions[-3:]):  # Últimas 3 interações
-                    user = interaction.get('user_id', 'Desconhecido')
-                    content = interaction.get('content', '')
-                    interactions_str.append(f"{user}: {content}")
-                
-                if interactions_str:
-                    memory_sections.append("Contexto Recente:\n" + "\n".join(interactions_str))
-            
-            return "\n\n".join(memory_sections)
+            
+            return self.build_memory_prompt(memory_data)["text"]
         except Exception as e:
             logger.error(f"Erro ao formatar memória para LLM: {e}")
             return ""
@@ -348,3 +271,28 @@ class MemoryOrchestrator:
         except Exception as e:
             logger.error(f"Erro ao criar backup: {e}")
             return ""
+            
+    def get_update_stats(self) -> Dict[str, Any]:
+        """
+        Obtém as métricas da fila de atualizações pós-resposta.
+        
+        Returns:
+            Dicionário com pendências e atraso da fila (vazio se indisponível)
+        """
+        if self.memory_adapter is None:
+            return {}
+        return self.memory_adapter.get_update_stats()
+            
+    def shutdown(self, timeout: float = 10.0) -> bool:
+        """
+        Encerra a extensão executando as atualizações de memória pendentes.
+        
+        Args:
+            timeout: Tempo máximo de espera pelas atualizações (s)
+            
+        Returns:
+            True se todas as atualizações foram executadas
+        """
+        if self.memory_adapter is None:
+            return True
+        return self.memory_adapter.close(timeout)
@@ -5,16 +5,24 @@ Gerencia o armazenamento e recuperação de informações.
 
 import os
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, List, Any, Optional, BinaryIO
 
 from memory.database import MemoryDatabase
+from memory.ingestion_queue import IngestionQueue
+from memory.retention import MemoryRetention
+from memory.backup import MemoryBackup
+from memory.reanalysis import InteractionReanalysis
+from memory.context_cache import ContextCache
+from memory.vector_index import SemanticIndex, attach_interactions, attach_knowledge
 from memory.memory_manager import MemoryManager
+from memory.prompt_blocks import PromptBlockCache, build_memory_prompt
+from core.tracing import traced
 from social.pattern_analyzer import PatternAnalyzer
 
 # Configurar logging
 logging.basicConfig(
     level=logging.INFO,
-    format=\'%(asctime)s - %(name)s - %(levelname)s - %(message)s\',
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
         logging.FileHandler("memory_system.log"),
         logging.StreamHandler()
@@ -28,21 +36,60 @@ class MemorySystem:
     Fornece uma interface unificada para todos os componentes do sistema.
     """
     
-    def __init__(self, db_path: str = "memory.db", data_dir: str = "memory_data"):
+    def __init__(self, db_path: str = "memory.db", data_dir: str = "memory_data",
+                 write_behind: bool = True, flush_interval_ms: int = 200, max_batch: int = 200,
+                 retention_days: Optional[int] = None, archive_dir: Optional[str] = None,
+                 context_cache_size: int = 1024, semantic_index: bool = True,
+                 context_window: int = 10):
         """
         Inicializa o sistema de memória.
         
         Args:
             db_path: Caminho para o arquivo do banco de dados SQLite
             data_dir: Diretório para armazenar os arquivos de dados
+            write_behind: Se True, agrupa as escritas de ingestão em lotes
+            flush_interval_ms: Intervalo máximo entre gravações de lote (ms)
+            max_batch: Número de itens que dispara a gravação de um lote
+            retention_days: Dias de interações brutas mantidos (None = sem retenção)
+            archive_dir: Diretório das partições mensais arquivadas (None = data_dir/archive)
+            context_cache_size: Número máximo de contextos mantidos em memória
+            semantic_index: Se True, mantém o índice vetorial de interações e conhecimentos
+            context_window: Número de interações recentes incluídas nos contextos de usuário e canal
         """
         # Criar diretórios se não existirem
         os.makedirs(data_dir, exist_ok=True)
         
         # Inicializar componentes
-        self.memory_manager = MemoryManager(db_path, data_dir)
+        self.db = MemoryDatabase(db_path, data_dir)
+        self.memory_manager = MemoryManager(data_dir)
         self.pattern_analyzer = PatternAnalyzer()
         
+        # Fila de ingestão (None = escrita síncrona)
+        self.ingestion = IngestionQueue(self.db, flush_interval_ms, max_batch) if write_behind else None
+        
+        # Retenção em segundo plano (agregados diários + partições mensais)
+        self.retention = None
+        if retention_days:
+            self.retention = MemoryRetention(self.db, retention_days, archive_dir or os.path.join(data_dir, "archive"))
+            self.retention.start()
+        
+        # Contextos de usuário/canal servidos da memória até a próxima escrita
+        self.context_cache = ContextCache(context_cache_size)
+        self.context_window = context_window
+        # Blocos de prompt de usuário e canal, refeitos quando a versão do contexto muda
+        self.prompt_blocks = PromptBlockCache()
+        
+        # Índice vetorial salvo ao lado do banco; alcança as linhas gravadas após o último salvamento
+        self.semantic_index = None
+        if semantic_index:
+            self.semantic_index = SemanticIndex(f"{db_path}.vectors.npz")
+            attach_interactions(self.semantic_index, self.db)
+            attach_knowledge(self.semantic_index, self.memory_manager)
+            self.semantic_index.sync()
+        
+        # Motores de backup por diretório de destino
+        self._backup_engines = {}
+        
         logger.info(f"Sistema de memória inicializado: {db_path}, {data_dir}")
     
     def process_message(self, user_id: str, username: str, channel_id: str, 
@@ -61,31 +108,45 @@ class MemorySystem:
             content: Conteúdo da mensagem
             
         Returns:
-            Dicionário com resultados do processamento
+            Dicionário com resultados do processamento ("interaction_id", "analysis").
+            Com escrita adiada (`write_behind`), a interação só é gravada no
+            próximo lote: "interaction_id" é None e "queued" indica se a
+            mensagem entrou na fila. Quem precisa do ID deve usar
+            `write_behind=False`; leituras por usuário ou canal já gravam os
+            itens pendentes antes de consultar.
         """
         try:
-            # Registrar usuário e canal
-            self.memory_manager.register_user(user_id, username)
-            self.memory_manager.register_channel(channel_id, guild_id, channel_name, channel_type)
-            
             # Analisar mensagem
             analysis = self.pattern_analyzer.analyze_message(content)
             
-            # Processar mensagem
-            interaction_id = self.memory_manager.process_message(
-                user_id=user_id,
-                channel_id=channel_id,
-                content=content,
-                sentiment=analysis["sentiment"],
-                topics=analysis["topics"]
-            )
-            
-            # Registrar expressões detectadas
+            # Registrar usuário, canal, interação e expressões como um único lote
+            items = [
+                {"kind": "user", "user_id": user_id, "username": username},
+                {"kind": "channel", "channel_id": channel_id, "guild_id": guild_id,
+                 "channel_name": channel_name, "channel_type": channel_type},
+                {"kind": "interaction", "user_id": user_id, "channel_id": channel_id,
+                 "interaction_type": "text", "content_summary": content,
+                 "sentiment_score": analysis["sentiment"], "topics": analysis["topics"]}
+            ]
             for expression in analysis["expressions"]:
-                self.memory_manager.add_user_expression(user_id, expression)
+                items.append({"kind": "expression", "user_id": user_id, "expression": expression})
+            
+            # Invalidar antes de enfileirar: a próxima leitura grava o lote e recarrega
+            self._invalidate_context(user_id, channel_id)
+            
+            # Escrita adiada: o ID da interação só existe após a gravação do lote
+            if self.ingestion is not None:
+                queued = self.ingestion.put_many(items)
+                return {
+                    "interaction_id": None,
+                    "queued": queued,
+                    "analysis": analysis
+                }
+            
+            interaction_ids = self.db.apply_batch(items)
             
             return {
-                "interaction_id": interaction_id,
+                "interaction_id": interaction_ids[0],
                 "analysis": analysis
             }
         except Exception as e:
@@ -113,16 +174,69 @@ class MemorySystem:
             True se a operação foi bem-sucedida, False caso contrário
         """
         try:
-            # Registrar usuário e canal
-            self.memory_manager.register_user(user_id, username)
-            self.memory_manager.register_channel(channel_id, guild_id, channel_name, "voice")
+            # Registrar usuário, canal e participação de voz
+            items = [
+                {"kind": "user", "user_id": user_id, "username": username},
+                {"kind": "channel", "channel_id": channel_id, "guild_id": guild_id,
+                 "channel_name": channel_name, "channel_type": "voice"},
+                {"kind": "voice", "user_id": user_id, "channel_id": channel_id, "duration": duration}
+            ]
+            self._invalidate_context(user_id, channel_id)
             
-            # Processar atividade de voz
-            return self.memory_manager.process_voice_activity(user_id, channel_id, duration)
+            if self.ingestion is not None:
+                return self.ingestion.put_many(items)
+            
+            self.db.apply_batch(items)
+            return True
         except Exception as e:
             logger.error(f"Erro ao processar atividade de voz: {e}")
             return False
     
+    def _ensure_written(self, user_id: Optional[str] = None, channel_id: Optional[str] = None) -> None:
+        """
+        Grava os itens pendentes do usuário ou canal antes de uma leitura.
+        
+        Args:
+            user_id: ID do usuário
+            channel_id: ID do canal
+        """
+        if self.ingestion is not None:
+            self.ingestion.ensure_written(user_id=user_id, channel_id=channel_id)
+    
+    def _invalidate_context(self, user_id: Optional[str] = None, channel_id: Optional[str] = None) -> None:
+        """
+        Invalida os contextos em cache de um usuário e/ou canal após uma escrita.
+        
+        Args:
+            user_id: ID do usuário alterado
+            channel_id: ID do canal alterado
+        """
+        if user_id is not None:
+            self.context_cache.bump("user", user_id)
+        if channel_id is not None:
+            self.context_cache.bump("channel", channel_id)
+    
+    def get_ingestion_stats(self) -> Dict[str, Any]:
+        """
+        Obtém métricas de vazão da fila de ingestão.
+        
+        Returns:
+            Dicionário com métricas (vazio se a escrita for síncrona)
+        """
+        return self.ingestion.get_stats() if self.ingestion is not None else {}
+    
+    def close(self) -> None:
+        """
+        Encerra o sistema de memória, gravando os itens pendentes.
+        """
+        if self.retention is not None:
+            self.retention.stop()
+        if self.ingestion is not None:
+            self.ingestion.close()
+        if self.semantic_index is not None:
+            self.semantic_index.close()
+        self.db.close()
+    
     def get_user_context(self, user_id: str) -> Dict[str, Any]:
         """
         Obtém o contexto de um usuário para uso pelo sistema Nina IA.
@@ -131,9 +245,18 @@ class MemorySystem:
             user_id: ID do usuário
             
         Returns:
-            Dicionário com o contexto do usuário
+            Dicionário com o usuário, seus metadados e as interações recentes
+            (vazio se o usuário não existir)
         """
-        return self.memory_manager.get_user_context(user_id)
+        def load():
+            self._ensure_written(user_id=user_id)
+            user = self.db.get_user(user_id)
+            if user is None:
+                return {}
+            user["recent_interactions"] = self.db.get_user_interactions(user_id, limit=self.context_window)
+            return user
+        
+        return self.context_cache.get_or_load("user", user_id, load)
     
     def get_channel_context(self, channel_id: str) -> Dict[str, Any]:
         """
@@ -143,17 +266,28 @@ class MemorySystem:
             channel_id: ID do canal
             
         Returns:
-            Dicionário com o contexto do canal
+            Dicionário com o canal, seus metadados e as interações recentes
+            (vazio se o canal não existir)
         """
-        return self.memory_manager.get_channel_context(channel_id)
+        def load():
+            self._ensure_written(channel_id=channel_id)
+            channel = self.db.get_channel(channel_id)
+            if channel is None:
+                return {}
+            channel["recent_interactions"] = self.db.get_channel_interactions(channel_id, limit=self.context_window)
+            return channel
+        
+        return self.context_cache.get_or_load("channel", channel_id, load)
     
-    def get_combined_context(self, user_id: str, channel_id: str) -> Dict[str, Any]:
+    def get_combined_context(self, user_id: str, channel_id: str,
+                             query: Optional[str] = None) -> Dict[str, Any]:
         """
         Obtém um contexto combinado de usuário e canal para uso pelo sistema Nina IA.
         
         Args:
             user_id: ID do usuário
             channel_id: ID do canal
+            query: Texto atual, usado para recuperar memórias relacionadas (opcional)
             
         Returns:
             Dicionário com o contexto combinado
@@ -167,8 +301,74 @@ class MemorySystem:
             "channel": channel_context
         }
         
+        if query:
+            combined_context["related"] = self.search_related(query)
+        
         return combined_context
     
+    @traced("memory.context")
+    def get_prompt_context(self, user_id: str, channel_id: str, query: Optional[str] = None,
+                           related_limit: int = 3) -> Dict[str, Any]:
+        """
+        Formata o contexto de memória para o prompt do LLM: perfil do usuário,
+        canal e memórias relacionadas ao texto atual.
+        
+        Os blocos de usuário e canal são reaproveitados enquanto a versão do
+        contexto no cache não muda; os tokens são somados por bloco, para que
+        o LLM não precise estimar o texto de novo (`memory_tokens`).
+        
+        Args:
+            user_id: ID do usuário
+            channel_id: ID do canal
+            query: Texto atual, usado para recuperar memórias relacionadas (opcional)
+            related_limit: Número máximo de memórias relacionadas
+            
+        Returns:
+            Dicionário com "text" (vazio se não houver memória), "tokens" e "blocks"
+        """
+        # Versões lidas antes dos contextos: uma escrita no meio refaz o bloco no próximo turno
+        versions = {
+            "user": self.context_cache.get_version("user", user_id),
+            "channel": self.context_cache.get_version("channel", channel_id)
+        }
+        context = self.get_combined_context(user_id, channel_id)
+        return build_memory_prompt(self.prompt_blocks, {
+            "user_id": user_id,
+            "channel_id": channel_id,
+            "user_profile": context["user"],
+            "channel_profile": context["channel"],
+            "related_memories": self.search_related(query, limit=related_limit) if query else [],
+            "versions": versions
+        })
+    
+    @traced("memory.search_related")
+    def search_related(self, query: str, limit: int = 5, budget_ms: float = 10.0,
+                       sources: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Recupera interações e conhecimentos semanticamente parecidos com um texto.
+        
+        Busca apenas o que já está indexado: a fila de ingestão não é gravada
+        aqui, para não pôr uma transação de escrita no caminho do turno de voz.
+        `get_prompt_context` carrega antes os contextos do usuário e do canal,
+        que gravam os itens pendentes deles.
+        
+        Args:
+            query: Texto da consulta
+            limit: Número máximo de resultados
+            budget_ms: Limite de tempo da busca vetorial (ms)
+            sources: Fontes consideradas ("interaction", "knowledge"; None = todas)
+            
+        Returns:
+            Itens encontrados com a similaridade, do mais parecido ao menos
+        """
+        try:
+            if self.semantic_index is None:
+                return []
+            return self.semantic_index.retrieve(query, limit, budget_ms, sources)
+        except Exception as e:
+            logger.error(f"Erro ao buscar memórias relacionadas: {e}")
+            return []
+    
     def update_nina_personality(self, channel_id: str, personality: Dict[str, Any]) -> bool:
         """
         Atualiza a personalidade da Nina para um canal específico.
@@ -180,6 +380,7 @@ class MemorySystem:
         Returns:
             True se a operação foi bem-sucedida, False caso contrário
         """
+        self._invalidate_context(channel_id=channel_id)
         return self.memory_manager.update_nina_personality(channel_id, personality)
     
     def suggest_nina_personality(self, channel_id: str) -> Dict[str, Any]:
@@ -194,7 +395,8 @@ class MemorySystem:
         """
         try:
             # Obter mensagens recentes do canal
-            channel_interactions = self.memory_manager.db.get_channel_interactions(channel_id, limit=100)
+            self._ensure_written(channel_id=channel_id)
+            channel_interactions = self.db.get_channel_interactions(channel_id, limit=100)
             
             if not channel_interactions:
                 return {
@@ -253,30 +455,114 @@ class MemorySystem:
         Returns:
             True se a operação foi bem-sucedida, False caso contrário
         """
+        self._invalidate_context(user_id=user_id)
         return self.memory_manager.delete_user_memory(user_id)
     
-    def get_statistics(self) -> Dict[str, Any]:
+    def get_statistics(self, top_n: int = 10) -> Dict[str, Any]:
         """
         Obtém estatísticas gerais do sistema de memória.
         
+        As estatísticas vêm das tabelas de resumo mantidas a cada escrita.
+        
+        Args:
+            top_n: Número de itens nos rankings de usuários, canais e tópicos
+            
         Returns:
             Dicionário com estatísticas
         """
-        return self.memory_manager.get_statistics()
+        return self.db.get_statistics(top_n=top_n)
+    
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Obtém o estado interno do sistema de memória (fila, conexões e cache).
+        
+        Returns:
+            Dicionário com métricas da ingestão, do pool de conexões, do cache de
+            contexto e dos blocos de prompt
+        """
+        return {
+            "ingestion": self.get_ingestion_stats(),
+            "pool": self.db.pool.get_stats(),
+            "context_cache": self.context_cache.get_stats(),
+            "prompt_blocks": self.prompt_blocks.get_stats(),
+            "semantic_index": self.semantic_index.get_stats() if self.semantic_index is not None else {}
+        }
     
-    def backup(self, backup_path: str) -> bool:
+    def get_activity_statistics(self, days: int = 7) -> Dict[str, Any]:
         """
-        Cria um backup do sistema de memória.
+        Obtém a atividade por hora e por dia dos últimos dias.
         
         Args:
-            backup_path: Caminho para o arquivo de backup
+            days: Número de dias a incluir
             
         Returns:
-            True se a operação foi bem-sucedida, False caso contrário
+            Dicionário com atividade por hora e por dia
+        """
+        return self.db.get_activity(days=days)
+    
+    def reanalyze_interactions(self, dry_run: bool = False, restart: bool = False,
+                               workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Reanalisa as interações gravadas com as regras atuais do analisador de padrões.
+        
+        Args:
+            dry_run: Se True, apenas devolve as diferenças, sem gravar
+            restart: Se True, recomeça do início em vez de retomar
+            workers: Processos de análise (None = número de CPUs)
+            
+        Returns:
+            Resultado da reanálise (vazio em caso de erro)
+        """
+        try:
+            if self.ingestion is not None:
+                self.ingestion.flush()
+            
+            job = InteractionReanalysis(self.db, self.pattern_analyzer, workers=workers)
+            result = job.run(dry_run=dry_run, restart=restart)
+            if not dry_run:
+                self.context_cache.clear()
+            return result
+        except Exception as e:
+            logger.error(f"Erro ao reanalisar interações: {e}")
+            return {}
+    
+    def _backup_engine(self, backup_dir: str) -> MemoryBackup:
+        """
+        Obtém o motor de backup de um diretório, criando-o se necessário.
+        
+        Args:
+            backup_dir: Diretório dos arquivos de backup
+            
+        Returns:
+            Motor de backup do diretório
+        """
+        key = os.path.abspath(backup_dir)
+        if key not in self._backup_engines:
+            self._backup_engines[key] = MemoryBackup(self.db, key)
+        return self._backup_engines[key]
+    
+    def backup(self, backup_path: str, incremental: bool = False) -> Dict[str, Any]:
+        """
+        Cria um backup online do sistema de memória (sem bloquear as escritas).
+        
+        Args:
+            backup_path: Caminho para o arquivo de backup (a extensão é definida pela compressão)
+            incremental: Se True, grava apenas as páginas alteradas desde o último backup do diretório
+            
+        Returns:
+            Estatísticas do backup (vazio em caso de erro)
         """
-        return self.memory_manager.backup(backup_path)
+        try:
+            if self.ingestion is not None:
+                self.ingestion.flush()
+            
+            backup_dir, name = os.path.split(os.path.abspath(backup_path))
+            return self._backup_engine(backup_dir).create_backup(name, incremental=incremental)
+        except Exception as e:
+            logger.error(f"Erro ao criar backup: {e}")
+            return {}
     
-    def restore(self, backup_path: str) -> bool:
+    def restore(self, backup_path: str) -> Dict[str, Any]:
         """
         Restaura o sistema de memória a partir de um backup.
         
@@ -284,8 +570,48 @@ class MemorySystem:
             backup_path: Caminho para o arquivo de backup
             
         Returns:
-            True se a operação foi bem-sucedida, False caso contrário
+            Estatísticas da restauração (vazio em caso de erro)
         """
-        return self.memory_manager.restore(backup_path)
-
-
+        try:
+            with open(backup_path, "rb") as f:
+                return self.restore_stream(f, os.path.dirname(os.path.abspath(backup_path)))
+        except Exception as e:
+            logger.error(f"Erro ao restaurar backup: {e}")
+            return {}
+    
+    def restore_stream(self, fileobj: BinaryIO, backup_dir: str) -> Dict[str, Any]:
+        """
+        Restaura o sistema de memória a partir de um fluxo (ex.: upload), lido em blocos.
+        
+        Args:
+            fileobj: Fluxo binário com o backup
+            backup_dir: Diretório onde procurar as bases de um backup incremental
+            
+        Returns:
+            Estatísticas da restauração (vazio em caso de erro)
+        """
+        try:
+            # Itens pendentes seriam gravados sobre o banco restaurado
+            if self.ingestion is not None:
+                self.ingestion.flush()
+            
+            result = self._backup_engine(backup_dir).restore_stream(fileobj)
+            self.context_cache.clear()
+            if self.semantic_index is not None:
+                self.semantic_index.rebuild()
+            return result
+        except Exception as e:
+            logger.error(f"Erro ao restaurar backup: {e}")
+            return {}
+    
+    def list_backups(self, backup_dir: str) -> List[Dict[str, Any]]:
+        """
+        Lista os backups de um diretório.
+        
+        Args:
+            backup_dir: Diretório dos arquivos de backup
+            
+        Returns:
+            Lista de backups, do mais recente para o mais antigo
+        """
+        return self._backup_engine(backup_dir).list_backups()
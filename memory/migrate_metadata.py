@@ -0,0 +1,35 @@
+"""
+Ferramenta de migração dos metadados JSON legados para o banco de memória.
+Move os arquivos user_*.json e channel_*.json para a coluna de metadados (JSON1).
+
+Uso:
+    python -m memory.migrate_metadata --db data/memory/memory.db --json-dir memory_data [--remove]
+"""
+
+import argparse
+import logging
+
+from memory.database import MemoryDatabase
+
+logger = logging.getLogger("MemoryMigration")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migra metadados JSON legados para o SQLite")
+    parser.add_argument("--db", default="memory.db", help="Caminho do banco de dados SQLite")
+    parser.add_argument("--json-dir", default="memory_data", help="Diretório com os arquivos JSON legados")
+    parser.add_argument("--remove", action="store_true", help="Remover os arquivos após a migração")
+    args = parser.parse_args()
+
+    db = MemoryDatabase(args.db, args.json_dir)
+    result = db.migrate_json_metadata(remove_files=args.remove)
+    db.close()
+
+    print(f"Usuários migrados: {result['users']}")
+    print(f"Canais migrados: {result['channels']}")
+    print(f"Arquivos sem registro no banco: {result['orphans']}")
+    print(f"Arquivos inválidos: {result['errors']}")
+
+
+if __name__ == "__main__":
+    main()
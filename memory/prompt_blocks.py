@@ -0,0 +1,362 @@
+"""
+Blocos de memória pré-formatados para o prompt do LLM.
+Os textos de usuário, canal e personalidade são guardados com a versão do
+conteúdo e só são refeitos quando o perfil correspondente muda.
+"""
+
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Hashable, Optional
+
+from llm.token_budget import estimate_tokens
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("PromptBlocks")
+
+# Custo estimado do separador entre blocos ("\n\n")
+SEPARATOR_TOKENS = 1
+
+
+class PromptBlock:
+    """
+    Bloco de texto do prompt com a versão do conteúdo de origem e o tamanho estimado.
+    """
+
+    __slots__ = ("text", "version", "tokens", "digest")
+
+    def __init__(self, text: str, version: Any, digest: Optional[str]):
+        self.text = text
+        self.version = version
+        self.tokens = estimate_tokens(text)
+        # Hash do perfil de origem, comparado quando não há versão
+        self.digest = digest
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Retorna os metadados do bloco (sem o hash do perfil de origem).
+
+        Returns:
+            Dicionário com texto, versão e tokens estimados
+        """
+        return {"text": self.text, "version": self.version, "tokens": self.tokens}
+
+
+def content_digest(source: Any) -> str:
+    """
+    Calcula o hash do conteúdo de um perfil (independe da ordem das chaves).
+
+    Args:
+        source: Perfil (dicionário serializável em JSON)
+
+    Returns:
+        Hash hexadecimal do conteúdo
+    """
+    data = json.dumps(source, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _top_keys(values: Dict[str, Any], count: int) -> str:
+    """
+    Lista as chaves de maior valor, separadas por vírgula.
+    """
+    top = sorted(values.items(), key=lambda x: x[1], reverse=True)[:count]
+    return ", ".join([f"{key}" for key, _ in top])
+
+
+def render_user_block(user_profile: Dict[str, Any]) -> str:
+    """
+    Formata o perfil de um usuário para o prompt.
+
+    Args:
+        user_profile: Perfil do usuário
+
+    Returns:
+        Bloco "Informações do Usuário" (vazio se não houver perfil)
+    """
+    if not user_profile:
+        return ""
+
+    user_info = [f"Nome do usuário: {user_profile.get('username', 'Desconhecido')}"]
+
+    # Adicionar tópicos de interesse
+    topics = user_profile.get('topics', {})
+    if topics:
+        user_info.append(f"Tópicos de interesse: {_top_keys(topics, 3)}")
+
+    # Adicionar emoções predominantes
+    emotions = user_profile.get('emotions', {})
+    if emotions:
+        user_info.append(f"Emoções predominantes: {_top_keys(emotions, 2)}")
+
+    # Adicionar expressões frequentes
+    expressions = user_profile.get('expressions', [])
+    if expressions:
+        expressions_str = ", ".join([f'"{expr}"' for expr in expressions[:3]])
+        user_info.append(f"Expressões frequentes: {expressions_str}")
+
+    return "Informações do Usuário:\n" + "\n".join([f"- {info}" for info in user_info])
+
+
+def render_channel_block(channel_profile: Dict[str, Any]) -> str:
+    """
+    Formata o perfil de um canal para o prompt.
+
+    Args:
+        channel_profile: Perfil do canal
+
+    Returns:
+        Bloco "Informações do Canal" (vazio se não houver perfil)
+    """
+    if not channel_profile:
+        return ""
+
+    channel_info = [f"Canal: {channel_profile.get('channel_name', 'Desconhecido')}"]
+
+    # Adicionar tópicos do canal
+    topics = channel_profile.get('topics', {})
+    if topics:
+        channel_info.append(f"Tópicos do canal: {_top_keys(topics, 3)}")
+
+    # Adicionar tom do canal
+    channel_info.append(f"Tom do canal: {channel_profile.get('tone', 'neutro')}")
+
+    return "Informações do Canal:\n" + "\n".join([f"- {info}" for info in channel_info])
+
+
+def render_personality_block(personality: Dict[str, Any]) -> str:
+    """
+    Formata a personalidade adaptada para o prompt.
+
+    Args:
+        personality: Configurações de personalidade
+
+    Returns:
+        Bloco "Personalidade" (vazio se não houver personalidade ou traços a descrever)
+    """
+    if not personality:
+        return ""
+
+    personality_info = []
+
+    formality = personality.get('formality_level', 50)
+    if formality < 30:
+        personality_info.append("Estilo: informal")
+    elif formality < 70:
+        personality_info.append("Estilo: neutro")
+    else:
+        personality_info.append("Estilo: formal")
+
+    humor = personality.get('humor_level', 50)
+    if humor > 70:
+        personality_info.append("Humor: presente")
+
+    technicality = personality.get('technicality_level', 50)
+    if technicality < 30:
+        personality_info.append("Explicações: simples")
+    elif technicality > 70:
+        personality_info.append("Explicações: técnicas")
+
+    verbosity = personality.get('verbosity', 'médio')
+    if verbosity == 'conciso':
+        personality_info.append("Respostas: concisas")
+    elif verbosity == 'detalhado':
+        personality_info.append("Respostas: detalhadas")
+
+    return "Personalidade:\n" + "\n".join([f"- {info}" for info in personality_info])
+
+
+def render_recent_block(recent_interactions: List[Dict[str, Any]], count: int = 3) -> str:
+    """
+    Formata as últimas interações para o prompt (muda a cada turno, não é guardado).
+
+    Args:
+        recent_interactions: Interações recentes em ordem cronológica
+        count: Número de interações incluídas
+
+    Returns:
+        Bloco "Contexto Recente" (vazio se não houver interações)
+    """
+    interactions_str = []
+    for interaction in recent_interactions[-count:]:
+        user = interaction.get('user_id', 'Desconhecido')
+        content = interaction.get('content', '')
+        interactions_str.append(f"{user}: {content}")
+
+    if not interactions_str:
+        return ""
+    return "Contexto Recente:\n" + "\n".join(interactions_str)
+
+
+def render_related_block(related_memories: List[Dict[str, Any]]) -> str:
+    """
+    Formata as memórias antigas recuperadas pela busca semântica (muda a cada turno).
+
+    Args:
+        related_memories: Itens retornados pelo índice semântico
+
+    Returns:
+        Bloco "Memórias Relacionadas" (vazio se não houver itens)
+    """
+    lines = []
+    for memory in related_memories:
+        if memory.get('source') == 'interaction':
+            lines.append(f"- {memory.get('user_id', 'Desconhecido')}: {memory.get('text', '')}")
+        else:
+            lines.append(f"- {memory.get('text', '')}")
+
+    if not lines:
+        return ""
+    return "Memórias Relacionadas:\n" + "\n".join(lines)
+
+
+RENDERERS = {
+    "user": render_user_block,
+    "channel": render_channel_block,
+    "personality": render_personality_block
+}
+
+
+class PromptBlockCache:
+    """
+    Cache LRU de blocos de prompt, por tipo e identificador.
+
+    Um bloco é reaproveitado enquanto a versão informada pelo chamador for a
+    mesma (ex.: a versão do cache de contexto). Sem versão, o bloco é
+    reaproveitado apenas se o hash do conteúdo do perfil não mudou, então um
+    perfil alterado no próprio objeto também refaz o bloco.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        """
+        Inicializa o cache de blocos.
+
+        Args:
+            max_entries: Número máximo de blocos guardados
+        """
+        self.max_entries = max(1, max_entries)
+        self._blocks = OrderedDict()  # (tipo, id) -> PromptBlock
+        self._lock = threading.Lock()
+
+        # Métricas
+        self.hits = 0
+        self.rebuilds = 0
+
+    def get_block(self, kind: str, key: Hashable, source: Dict[str, Any],
+                  version: Optional[Any] = None) -> PromptBlock:
+        """
+        Obtém o bloco formatado de um perfil, refazendo-o apenas se o perfil mudou.
+
+        Args:
+            kind: Tipo do bloco ("user", "channel" ou "personality")
+            key: Identificador do perfil
+            source: Perfil a ser formatado
+            version: Versão do conteúdo do perfil (None = comparar o hash do conteúdo)
+
+        Returns:
+            Bloco formatado
+        """
+        cache_key = (kind, key)
+        digest = content_digest(source) if version is None else None
+
+        with self._lock:
+            block = self._blocks.get(cache_key)
+            if block is not None and (block.version == version if version is not None else block.digest == digest):
+                self._blocks.move_to_end(cache_key)
+                self.hits += 1
+                return block
+
+        block = PromptBlock(RENDERERS[kind](source), version, digest)
+
+        with self._lock:
+            self.rebuilds += 1
+            self._blocks[cache_key] = block
+            self._blocks.move_to_end(cache_key)
+            while len(self._blocks) > self.max_entries:
+                self._blocks.popitem(last=False)
+
+        return block
+
+    def clear(self) -> None:
+        """
+        Descarta todos os blocos guardados.
+        """
+        with self._lock:
+            self._blocks.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtém métricas do cache de blocos.
+
+        Returns:
+            Dicionário com número de blocos, reaproveitamentos e reconstruções
+        """
+        with self._lock:
+            return {
+                "blocks": len(self._blocks),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "rebuilds": self.rebuilds
+            }
+
+
+def build_memory_prompt(cache: PromptBlockCache, memory_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Monta o contexto de memória do prompt a partir de blocos pré-formatados.
+
+    Os blocos de usuário, canal e personalidade vêm do cache (refeitos quando
+    a versão em memory_data['versions'] ou o conteúdo do perfil muda); as
+    memórias relacionadas e as interações recentes são formatadas a cada turno.
+
+    Args:
+        cache: Cache de blocos
+        memory_data: Dados de memória ("user_profile", "channel_profile", "personality",
+            "related_memories", "recent_interactions" e "versions", todos opcionais)
+
+    Returns:
+        Dicionário com o texto, os tokens estimados e os metadados de cada bloco
+    """
+    versions = memory_data.get('versions', {})
+    sources = (
+        ("user", memory_data.get('user_profile', {}), 'user_id'),
+        ("channel", memory_data.get('channel_profile', {}), 'channel_id'),
+        ("personality", memory_data.get('personality', {}), 'channel_id')
+    )
+
+    sections = []
+    blocks = {}
+    tokens = 0
+
+    for kind, source, id_field in sources:
+        if not source:
+            continue
+        key = source.get(id_field) or memory_data.get(id_field, "")
+        block = cache.get_block(kind, key, source, versions.get(kind))
+        if block.text:
+            sections.append(block.text)
+            blocks[kind] = {"version": block.version, "tokens": block.tokens}
+            tokens += block.tokens
+
+    # Memórias relacionadas e interações recentes mudam a cada turno
+    per_turn = (
+        ("related", render_related_block(memory_data.get('related_memories', []))),
+        ("recent", render_recent_block(memory_data.get('recent_interactions', [])))
+    )
+    for kind, text in per_turn:
+        if text:
+            text_tokens = estimate_tokens(text)
+            sections.append(text)
+            blocks[kind] = {"version": None, "tokens": text_tokens}
+            tokens += text_tokens
+
+    # Soma dos blocos mais os separadores: nunca abaixo da estimativa do texto completo
+    tokens += SEPARATOR_TOKENS * max(0, len(sections) - 1)
+
+    return {
+        "text": "\n\n".join(sections),
+        "tokens": tokens,
+        "blocks": blocks
+    }
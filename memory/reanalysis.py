@@ -0,0 +1,341 @@
+"""
+Reanálise em massa das interações históricas da Nina IA.
+Recalcula sentimento e tópicos com as regras atuais do PatternAnalyzer, em paralelo e de forma retomável.
+
+Uso:
+    python -m memory.reanalysis --db data/memory/memory.db [--workers 4] [--chunk-size 2000] [--dry-run] [--restart]
+"""
+
+import os
+import json
+import time
+import logging
+import argparse
+import threading
+from collections import deque
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+from social.pattern_analyzer import PatternAnalyzer
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("MemoryReanalysis")
+
+JOB_NAME = "pattern_reanalysis"
+
+# Diferença mínima de sentimento considerada uma alteração
+SENTIMENT_TOLERANCE = 1e-9
+
+# Analisador de cada processo de trabalho (criado pelo inicializador do pool)
+_worker_analyzer = None
+
+
+def _init_worker(rules: Dict[str, Any]) -> None:
+    """
+    Cria o analisador do processo de trabalho com as regras do processo principal.
+    """
+    global _worker_analyzer
+    logging.getLogger("PatternAnalyzer").setLevel(logging.WARNING)
+    _worker_analyzer = PatternAnalyzer()
+    _worker_analyzer.set_rules(rules)
+
+
+def _analyze_chunk(rows: List[Tuple[int, str]]) -> List[Tuple[int, float, List[str]]]:
+    """
+    Analisa um bloco de interações no processo de trabalho.
+
+    Args:
+        rows: Pares (interaction_id, conteúdo)
+
+    Returns:
+        Triplas (interaction_id, sentimento, tópicos)
+    """
+    analyses = _worker_analyzer.analyze_messages([content for _, content in rows])
+    return [(row[0], analysis["sentiment"], analysis["topics"]) for row, analysis in zip(rows, analyses)]
+
+
+def _parse_topics(value: Optional[str]) -> Optional[List[str]]:
+    """
+    Lê a coluna de tópicos (None se o valor não for uma lista JSON).
+    """
+    try:
+        topics = json.loads(value) if value else []
+    except (TypeError, ValueError):
+        return None
+    return topics if isinstance(topics, list) else None
+
+
+class InteractionReanalysis:
+    """
+    Tarefa de reanálise das interações já gravadas.
+
+    As interações são lidas em blocos pela chave primária, analisadas em um
+    pool de processos e as que mudaram são regravadas em uma transação por
+    bloco, junto com o ponto de retomada (maintenance_jobs). Se a tarefa for
+    interrompida, a próxima execução continua do último bloco gravado,
+    desde que as regras do analisador não tenham mudado. Ao terminar, os
+    tópicos por usuário e por canal são recalculados. Interações já movidas
+    para as partições arquivadas pela retenção não são reanalisadas.
+    """
+
+    def __init__(self,
+                 db,
+                 analyzer: Optional[PatternAnalyzer] = None,
+                 workers: Optional[int] = None,
+                 chunk_size: int = 2000,
+                 diff_limit: int = 100):
+        """
+        Inicializa a tarefa de reanálise.
+
+        Args:
+            db: Instância de MemoryDatabase
+            analyzer: Analisador com as regras a aplicar (None = regras padrão)
+            workers: Processos de análise (None = número de CPUs, 0 = no processo atual)
+            chunk_size: Interações por bloco (leitura, análise e gravação)
+            diff_limit: Número máximo de diferenças guardadas em uma simulação
+        """
+        self.db = db
+        self.analyzer = analyzer or PatternAnalyzer()
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.chunk_size = max(1, chunk_size)
+        self.diff_limit = diff_limit
+
+        self._stop_event = threading.Event()
+
+    def get_progress(self) -> Dict[str, Any]:
+        """
+        Obtém o ponto de retomada gravado da tarefa.
+
+        Returns:
+            Dicionário com o progresso (vazio se a tarefa nunca foi executada)
+        """
+        row = self.db.pool.query_one("SELECT * FROM maintenance_jobs WHERE name = ?", (JOB_NAME,))
+        return dict(row) if row else {}
+
+    def stop(self) -> None:
+        """
+        Pede a interrupção da tarefa ao final do bloco atual (pode ser retomada depois).
+        """
+        self._stop_event.set()
+
+    def _read_chunks(self, start_id: int):
+        """
+        Lê as interações com conteúdo em blocos pela chave primária.
+        """
+        last_id = start_id
+        while not self._stop_event.is_set():
+            rows = self.db.pool.query("""
+                SELECT interaction_id, content_summary, sentiment_score, topics
+                FROM interactions
+                WHERE interaction_id > ? AND content_summary IS NOT NULL AND content_summary != ''
+                ORDER BY interaction_id
+                LIMIT ?
+            """, (last_id, self.chunk_size))
+            if not rows:
+                return
+            last_id = rows[-1]["interaction_id"]
+            yield rows
+
+    def _changes(self, rows, results) -> List[Dict[str, Any]]:
+        """
+        Compara os valores gravados com os recalculados e devolve apenas as alterações.
+        """
+        changes = []
+        for row, (interaction_id, sentiment, topics) in zip(rows, results):
+            old_sentiment = row["sentiment_score"]
+            old_topics = _parse_topics(row["topics"])
+            sentiment_changed = old_sentiment is None or abs(old_sentiment - sentiment) > SENTIMENT_TOLERANCE
+            if sentiment_changed or old_topics != topics:
+                changes.append({
+                    "interaction_id": interaction_id,
+                    "old_sentiment": old_sentiment,
+                    "new_sentiment": sentiment,
+                    "old_topics": old_topics,
+                    "new_topics": topics
+                })
+        return changes
+
+    def _write_chunk(self, changes: List[Dict[str, Any]], last_id: int, processed: int, changed: int,
+                     fingerprint: str) -> None:
+        """
+        Grava as alterações de um bloco e o ponto de retomada na mesma transação.
+        """
+        now = datetime.now().isoformat()
+        with self.db.pool.transaction() as conn:
+            conn.executemany(
+                "UPDATE interactions SET sentiment_score = ?, topics = ? WHERE interaction_id = ?",
+                [(c["new_sentiment"], json.dumps(c["new_topics"], ensure_ascii=False), c["interaction_id"])
+                 for c in changes]
+            )
+            conn.execute("""
+                UPDATE maintenance_jobs SET last_id = ?, processed = ?, changed = ?, updated_at = ?
+                WHERE name = ? AND fingerprint = ?
+            """, (last_id, processed, changed, now, JOB_NAME, fingerprint))
+
+    def run(self, dry_run: bool = False, restart: bool = False, max_rows: Optional[int] = None,
+            progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Executa (ou retoma) a reanálise.
+
+        Args:
+            dry_run: Se True, apenas compara e devolve as diferenças, sem gravar nada
+            restart: Se True, ignora o ponto de retomada e recomeça do início
+            max_rows: Para após processar aproximadamente este número de interações
+            progress: Função chamada a cada bloco com o progresso atual
+
+        Returns:
+            Dicionário com interações processadas e alteradas, vazão e, na
+            simulação, uma amostra das diferenças
+        """
+        self._stop_event.clear()
+        fingerprint = self.analyzer.fingerprint()
+        job = self.get_progress()
+
+        start_id = 0
+        processed = changed = 0
+        if not restart and job.get("fingerprint") == fingerprint:
+            if job.get("finished_at") and not dry_run:
+                logger.info("Reanálise já concluída com as regras atuais")
+                return {"processed": 0, "changed": 0, "last_id": job["last_id"], "finished": True,
+                        "dry_run": False, "resumed_from": job["last_id"], "elapsed_s": 0.0, "rows_per_second": 0.0}
+            if not job.get("finished_at"):
+                start_id = job["last_id"]
+                processed, changed = job["processed"], job["changed"]
+
+        if not dry_run and start_id == 0:
+            self.db.pool.execute("""
+                INSERT INTO maintenance_jobs (name, fingerprint, last_id, processed, changed, started_at, updated_at, finished_at)
+                VALUES (?, ?, 0, 0, 0, ?, ?, NULL)
+                ON CONFLICT(name) DO UPDATE SET
+                    fingerprint = excluded.fingerprint, last_id = 0, processed = 0, changed = 0,
+                    started_at = excluded.started_at, updated_at = excluded.updated_at, finished_at = NULL
+            """, (JOB_NAME, fingerprint, datetime.now().isoformat(), datetime.now().isoformat()))
+
+        total = self.db.pool.query_one("""
+            SELECT COUNT(*) FROM interactions
+            WHERE interaction_id > ? AND content_summary IS NOT NULL AND content_summary != ''
+        """, (start_id,))[0]
+
+        logger.info(f"Reanálise {'simulada ' if dry_run else ''}iniciada: {total} interações a partir do ID {start_id}")
+
+        diffs = []
+        run_processed = run_changed = 0
+        last_id = start_id
+        start = time.perf_counter()
+        executor = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                       initargs=(self.analyzer.get_rules(),)) if self.workers > 0 else None
+        try:
+            # Mantém alguns blocos em análise enquanto o primeiro é gravado (ordem preservada)
+            pending = deque()
+            chunks = self._read_chunks(start_id)
+            window = max(1, self.workers * 2)
+
+            def submit_next() -> bool:
+                if max_rows is not None and run_processed + sum(len(r) for r, _ in pending) >= max_rows:
+                    return False
+                rows = next(chunks, None)
+                if rows is None:
+                    return False
+                payload = [(row["interaction_id"], row["content_summary"]) for row in rows]
+                if executor is not None:
+                    pending.append((rows, executor.submit(_analyze_chunk, payload)))
+                else:
+                    pending.append((rows, payload))
+                return True
+
+            while len(pending) < window and submit_next():
+                pass
+
+            while pending:
+                rows, work = pending.popleft()
+                if executor is not None:
+                    results = work.result()
+                else:
+                    analyses = self.analyzer.analyze_messages([content for _, content in work])
+                    results = [(row[0], a["sentiment"], a["topics"]) for row, a in zip(work, analyses)]
+
+                changes = self._changes(rows, results)
+                last_id = rows[-1]["interaction_id"]
+                run_processed += len(rows)
+                run_changed += len(changes)
+
+                if dry_run:
+                    diffs.extend(changes[:max(0, self.diff_limit - len(diffs))])
+                else:
+                    self._write_chunk(changes, last_id, processed + run_processed, changed + run_changed, fingerprint)
+
+                elapsed = time.perf_counter() - start
+                status = {
+                    "processed": run_processed,
+                    "changed": run_changed,
+                    "total": total,
+                    "last_id": last_id,
+                    "rows_per_second": round(run_processed / elapsed, 1) if elapsed > 0 else 0.0,
+                    "eta_s": round((total - run_processed) * elapsed / run_processed, 1) if run_processed else None
+                }
+                logger.info(f"Reanálise: {run_processed}/{total} interações, {run_changed} alteradas, "
+                            f"{status['rows_per_second']} interações/s")
+                if progress is not None:
+                    progress(status)
+
+                if not self._stop_event.is_set():
+                    submit_next()
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        finished = not dry_run and run_processed >= total and not self._stop_event.is_set()
+        if finished:
+            self.db.rebuild_topic_aggregates()
+            self.db.pool.execute(
+                "UPDATE maintenance_jobs SET finished_at = ? WHERE name = ? AND fingerprint = ?",
+                (datetime.now().isoformat(), JOB_NAME, fingerprint)
+            )
+
+        elapsed = time.perf_counter() - start
+        result = {
+            "processed": run_processed,
+            "changed": run_changed,
+            "last_id": last_id,
+            "finished": finished,
+            "dry_run": dry_run,
+            "resumed_from": start_id,
+            "elapsed_s": round(elapsed, 3),
+            "rows_per_second": round(run_processed / elapsed, 1) if elapsed > 0 else 0.0
+        }
+        if dry_run:
+            result["diffs"] = diffs
+
+        logger.info(f"Reanálise {'simulada ' if dry_run else ''}encerrada: {run_processed} interações, "
+                    f"{run_changed} alteradas em {result['elapsed_s']} s")
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reanalisa as interações gravadas com as regras atuais")
+    parser.add_argument("--db", default="memory.db", help="Caminho do banco de dados SQLite")
+    parser.add_argument("--workers", type=int, default=None, help="Processos de análise (0 = sem pool)")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="Interações por bloco")
+    parser.add_argument("--dry-run", action="store_true", help="Apenas mostrar as diferenças")
+    parser.add_argument("--restart", action="store_true", help="Recomeçar do início")
+    args = parser.parse_args()
+
+    from memory.database import MemoryDatabase
+
+    db = MemoryDatabase(args.db)
+    job = InteractionReanalysis(db, workers=args.workers, chunk_size=args.chunk_size)
+    result = job.run(dry_run=args.dry_run, restart=args.restart)
+    db.close()
+
+    print(f"Interações processadas: {result['processed']}")
+    print(f"Interações alteradas: {result['changed']}")
+    print(f"Vazão: {result['rows_per_second']} interações/s")
+    for diff in result.get("diffs", [])[:20]:
+        print(f"  #{diff['interaction_id']}: sentimento {diff['old_sentiment']} -> {diff['new_sentiment']}, "
+              f"tópicos {diff['old_topics']} -> {diff['new_topics']}")
+
+
+if __name__ == "__main__":
+    main()
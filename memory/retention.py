@@ -0,0 +1,429 @@
+"""
+Retenção e compactação do histórico de interações da Nina IA.
+Move interações antigas para arquivos mensais, mantém agregados diários e compacta partições.
+"""
+
+import os
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("MemoryRetention")
+
+# Colunas copiadas para as partições arquivadas
+ARCHIVE_COLUMNS = "interaction_id, user_id, channel_id, timestamp, interaction_type, content_summary, sentiment_score, topics"
+
+ARCHIVE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS archive.interactions (
+        interaction_id INTEGER PRIMARY KEY,
+        user_id TEXT,
+        channel_id TEXT,
+        timestamp TIMESTAMP,
+        interaction_type TEXT,
+        content_summary TEXT,
+        sentiment_score REAL,
+        topics TEXT
+    )
+"""
+
+
+def _month_bounds(month: str) -> tuple:
+    """
+    Obtém o início do mês e o início do mês seguinte ("AAAA-MM").
+    """
+    year, number = int(month[:4]), int(month[5:7])
+    following = f"{year + 1:04d}-01" if number == 12 else f"{year:04d}-{number + 1:02d}"
+    return month, following
+
+
+class MemoryRetention:
+    """
+    Política de retenção das interações brutas.
+
+    Interações mais antigas que `retention_days` são resumidas em agregados
+    diários (interaction_daily / interaction_daily_topics), copiadas para um
+    arquivo SQLite por mês em `archive_dir` (opcional) e removidas da tabela
+    principal. A tabela quente fica com tamanho limitado, de modo que consultas
+    e backups do banco principal não crescem com a idade da memória.
+    """
+
+    def __init__(self,
+                 db,
+                 retention_days: int = 90,
+                 archive_dir: Optional[str] = None,
+                 interval_hours: float = 6.0,
+                 vacuum_pages: int = 2000):
+        """
+        Inicializa a política de retenção.
+
+        Args:
+            db: Instância de MemoryDatabase
+            retention_days: Dias de interações brutas mantidos no banco principal
+            archive_dir: Diretório das partições mensais (None = descartar as linhas brutas)
+            interval_hours: Intervalo entre execuções do job em segundo plano
+            vacuum_pages: Páginas liberadas por incremental_vacuum a cada execução
+        """
+        self.db = db
+        self.retention_days = retention_days
+        self.archive_dir = archive_dir
+        self.interval_hours = interval_hours
+        self.vacuum_pages = vacuum_pages
+
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._run_lock = threading.Lock()
+        self._vacuum_ready = False
+        self.last_run = None
+
+        if self.archive_dir:
+            os.makedirs(self.archive_dir, exist_ok=True)
+
+    def partition_path(self, month: str) -> str:
+        """
+        Obtém o caminho do arquivo de uma partição mensal.
+
+        Args:
+            month: Mês no formato "AAAA-MM"
+
+        Returns:
+            Caminho do arquivo da partição
+        """
+        return os.path.join(self.archive_dir, f"interactions_{month.replace('-', '_')}.db")
+
+    def apply_retention(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Resume, arquiva e remove as interações mais antigas que o limite.
+
+        Cada mês é processado separadamente: a cópia para a partição é
+        confirmada antes, e os agregados e a remoção das linhas já copiadas
+        são feitos depois, numa transação só do banco principal.
+
+        Args:
+            now: Data de referência (None = agora)
+
+        Returns:
+            Dicionário com o limite usado e o número de linhas por mês
+        """
+        cutoff = ((now or datetime.now()) - timedelta(days=self.retention_days)).isoformat()
+        result = {"cutoff": cutoff, "months": {}}
+
+        with self._run_lock:
+            months = [row["month"] for row in self.db.pool.query("""
+                SELECT DISTINCT substr(timestamp, 1, 7) AS month FROM interactions
+                WHERE timestamp < ?
+                ORDER BY month
+            """, (cutoff,))]
+
+            for month in months:
+                try:
+                    result["months"][month] = self._roll_month(month, cutoff)
+                except Exception as e:
+                    logger.error(f"Erro ao aplicar retenção no mês {month}: {e}")
+
+            # Devolver ao sistema as páginas liberadas; executescript roda o pragma até o fim
+            # (pelo cursor, o sqlite3 executa um único passo e libera só uma página)
+            if result["months"]:
+                self._ensure_incremental_vacuum()
+                self.db.pool.executescript(f"PRAGMA incremental_vacuum({int(self.vacuum_pages)})")
+
+        if result["months"]:
+            logger.info(f"Retenção aplicada até {cutoff}: {result['months']}")
+        return result
+
+    def _ensure_incremental_vacuum(self) -> None:
+        """
+        Converte uma única vez para auto_vacuum incremental um banco criado sem ele.
+
+        O pragma só vale para bancos novos; em um banco existente ele precisa
+        de um VACUUM completo para ter efeito. Sem a conversão o banco
+        principal nunca encolhe depois da retenção.
+        """
+        if self._vacuum_ready:
+            return
+        pool = self.db.pool
+        if pool.query_one("PRAGMA auto_vacuum")[0] != 2:  # 2 = INCREMENTAL
+            logger.info("Convertendo o banco de memória para auto_vacuum incremental (VACUUM único)")
+            pool.connection().execute("PRAGMA auto_vacuum = INCREMENTAL")
+            pool.executescript("VACUUM")
+        self._vacuum_ready = True
+
+    def _roll_month(self, month: str, cutoff: str) -> int:
+        """
+        Resume, arquiva e remove as interações antigas de um mês.
+
+        O SQLite não confirma de forma atômica uma transação que grava em dois
+        bancos em modo WAL, então a cópia para a partição e a remoção no banco
+        principal são transações separadas: primeiro a cópia é confirmada,
+        depois só as linhas presentes na partição são resumidas e removidas.
+        Uma falha entre as duas deixa as linhas nos dois bancos, e a próxima
+        execução termina o trabalho (a cópia ignora as já arquivadas).
+
+        Args:
+            month: Mês no formato "AAAA-MM"
+            cutoff: Timestamp limite (exclusivo)
+
+        Returns:
+            Número de interações removidas
+        """
+        start, end = _month_bounds(month)
+        end = min(end, cutoff)
+        window = "timestamp >= ? AND timestamp < ?"
+        conn = self.db.pool.connection()
+
+        attached = False
+        if self.archive_dir:
+            conn.execute("ATTACH DATABASE ? AS archive", (self.partition_path(month),))
+            conn.execute(ARCHIVE_SCHEMA)
+            attached = True
+
+        try:
+            if attached:
+                with self.db.pool.transaction() as conn:
+                    conn.execute(f"""
+                        INSERT OR IGNORE INTO archive.interactions ({ARCHIVE_COLUMNS})
+                        SELECT {ARCHIVE_COLUMNS} FROM main.interactions WHERE {window}
+                    """, (start, end))
+
+                # Remover apenas o que chegou à partição
+                window += " AND interaction_id IN (SELECT interaction_id FROM archive.interactions)"
+                expected = conn.execute(
+                    "SELECT COUNT(*) FROM main.interactions WHERE timestamp >= ? AND timestamp < ?", (start, end)
+                ).fetchone()[0]
+                copied = conn.execute(f"SELECT COUNT(*) FROM main.interactions WHERE {window}", (start, end)).fetchone()[0]
+                if copied != expected:
+                    logger.warning(f"Partição {month}: {copied} de {expected} interações copiadas; "
+                                   f"as restantes ficam para a próxima execução")
+
+            with self.db.pool.transaction() as conn:
+                # Os gatilhos de estatísticas ignoram remoções feitas pela retenção
+                conn.execute("INSERT OR IGNORE INTO maintenance_flags(name) VALUES ('retention')")
+
+                conn.execute(f"""
+                    INSERT INTO interaction_daily
+                    (day, user_id, channel_id, interaction_type, interaction_count, sentiment_sum)
+                    SELECT substr(timestamp, 1, 10), COALESCE(user_id, ''), COALESCE(channel_id, ''),
+                           COALESCE(interaction_type, ''), COUNT(*), SUM(COALESCE(sentiment_score, 0))
+                    FROM interactions
+                    WHERE {window}
+                    GROUP BY 1, 2, 3, 4
+                    ON CONFLICT(day, user_id, channel_id, interaction_type) DO UPDATE SET
+                        interaction_count = interaction_count + excluded.interaction_count,
+                        sentiment_sum = sentiment_sum + excluded.sentiment_sum
+                """, (start, end))
+
+                conn.execute(f"""
+                    INSERT INTO interaction_daily_topics (day, channel_id, topic, count)
+                    SELECT substr(i.timestamp, 1, 10), COALESCE(i.channel_id, ''), t.value, COUNT(*)
+                    FROM (SELECT timestamp, channel_id, topics FROM interactions WHERE {window}) i,
+                         json_each(CASE WHEN json_valid(i.topics) THEN i.topics ELSE '[]' END) t
+                    GROUP BY 1, 2, 3
+                    ON CONFLICT(day, channel_id, topic) DO UPDATE SET
+                        count = count + excluded.count
+                """, (start, end))
+
+                removed_ids = [row[0] for row in conn.execute(
+                    f"SELECT interaction_id FROM interactions WHERE {window}", (start, end)
+                )]
+                removed = conn.execute(f"DELETE FROM interactions WHERE {window}", (start, end)).rowcount
+                conn.execute("DELETE FROM maintenance_flags WHERE name = 'retention'")
+
+                if attached:
+                    conn.execute("""
+                        INSERT INTO interaction_partitions (month, path, row_count, modified_at)
+                        VALUES (?, ?, ?, ?)
+                        ON CONFLICT(month) DO UPDATE SET
+                            row_count = row_count + excluded.row_count,
+                            modified_at = excluded.modified_at
+                    """, (month, self.partition_path(month), removed, datetime.now().isoformat()))
+        finally:
+            if attached:
+                conn.execute("DETACH DATABASE archive")
+
+        # Após o commit: ouvintes (ex.: índice semântico) descartam as linhas removidas
+        self.db.notify_interactions_removed(removed_ids)
+        return removed
+
+    def compact_partitions(self) -> List[str]:
+        """
+        Compacta com VACUUM INTO as partições alteradas desde a última compactação.
+
+        A cópia compactada é gravada em um arquivo temporário e substitui a
+        partição de forma atômica; partições não ficam anexadas fora da
+        retenção, então não há conexões abertas durante a troca.
+
+        Returns:
+            Lista dos meses compactados
+        """
+        compacted = []
+
+        with self._run_lock:
+            rows = self.db.pool.query("""
+                SELECT month, path FROM interaction_partitions
+                WHERE compacted_at IS NULL OR compacted_at < modified_at
+                ORDER BY month
+            """)
+
+            for row in rows:
+                path = row["path"]
+                if not os.path.exists(path):
+                    continue
+
+                temp_path = path + ".compact"
+                try:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+
+                    conn = sqlite3.connect(path)
+                    try:
+                        conn.execute("VACUUM INTO ?", (temp_path,))
+                    finally:
+                        conn.close()
+                    os.replace(temp_path, path)
+
+                    self.db.pool.execute(
+                        "UPDATE interaction_partitions SET compacted_at = ? WHERE month = ?",
+                        (datetime.now().isoformat(), row["month"])
+                    )
+                    compacted.append(row["month"])
+                except Exception as e:
+                    logger.error(f"Erro ao compactar partição {row['month']}: {e}")
+
+        if compacted:
+            logger.info(f"Partições compactadas: {compacted}")
+        return compacted
+
+    def list_partitions(self) -> List[Dict[str, Any]]:
+        """
+        Lista as partições mensais arquivadas.
+
+        Returns:
+            Lista de partições com mês, caminho e número de linhas
+        """
+        return [dict(row) for row in self.db.pool.query("SELECT * FROM interaction_partitions ORDER BY month")]
+
+    def get_archived_interactions(self, month: str, user_id: Optional[str] = None,
+                                  channel_id: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Lê interações de uma partição arquivada (somente leitura).
+
+        Args:
+            month: Mês no formato "AAAA-MM"
+            user_id: Filtrar por usuário
+            channel_id: Filtrar por canal
+            limit: Número máximo de interações
+
+        Returns:
+            Lista de interações (mais recentes primeiro)
+        """
+        if not self.archive_dir or not os.path.exists(self.partition_path(month)):
+            return []
+
+        conditions, params = [], []
+        if user_id is not None:
+            conditions.append("user_id = ?")
+            params.append(user_id)
+        if channel_id is not None:
+            conditions.append("channel_id = ?")
+            params.append(channel_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        try:
+            conn = sqlite3.connect(f"file:{self.partition_path(month)}?mode=ro", uri=True)
+            conn.row_factory = sqlite3.Row
+            try:
+                rows = conn.execute(f"""
+                    SELECT * FROM interactions {where}
+                    ORDER BY timestamp DESC, interaction_id DESC
+                    LIMIT ?
+                """, (*params, limit)).fetchall()
+            finally:
+                conn.close()
+            return [self.db._row_to_interaction(row) for row in rows]
+        except Exception as e:
+            logger.error(f"Erro ao ler partição {month}: {e}")
+            return []
+
+    def get_daily_summary(self, since: str, until: str, user_id: Optional[str] = None,
+                          channel_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Obtém os agregados diários das interações removidas pela retenção.
+
+        Args:
+            since: Dia inicial ("AAAA-MM-DD", inclusivo)
+            until: Dia final ("AAAA-MM-DD", exclusivo)
+            user_id: Filtrar por usuário
+            channel_id: Filtrar por canal
+
+        Returns:
+            Lista com dia, número de interações e sentimento médio
+        """
+        conditions, params = ["day >= ?", "day < ?"], [since, until]
+        if user_id is not None:
+            conditions.append("user_id = ?")
+            params.append(user_id)
+        if channel_id is not None:
+            conditions.append("channel_id = ?")
+            params.append(channel_id)
+
+        rows = self.db.pool.query(f"""
+            SELECT day, SUM(interaction_count) AS interaction_count,
+                   SUM(sentiment_sum) / SUM(interaction_count) AS average_sentiment
+            FROM interaction_daily
+            WHERE {' AND '.join(conditions)}
+            GROUP BY day
+            ORDER BY day
+        """, params)
+        return [dict(row) for row in rows]
+
+    def run_once(self) -> Dict[str, Any]:
+        """
+        Executa uma rodada completa: retenção seguida de compactação.
+
+        Returns:
+            Dicionário com os resultados da retenção e da compactação
+        """
+        retention = self.apply_retention()
+        compacted = self.compact_partitions() if self.archive_dir else []
+        self.last_run = datetime.now().isoformat()
+        return {"retention": retention, "compacted": compacted}
+
+    def _run(self) -> None:
+        """
+        Loop do job em segundo plano.
+        """
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Erro no job de retenção: {e}")
+            finally:
+                # O banco é acessado por uma conexão desta thread
+                self.db.pool.close_thread_connection()
+            self._stop_event.wait(self.interval_hours * 3600)
+
+    def start(self) -> None:
+        """
+        Inicia o job de retenção em segundo plano.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="memory-retention", daemon=True)
+        self._thread.start()
+        logger.info(f"Job de retenção iniciado ({self.retention_days} dias, a cada {self.interval_hours} h)")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Interrompe o job de retenção.
+
+        Args:
+            timeout: Tempo máximo de espera pela thread (s)
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -0,0 +1,300 @@
+"""
+Armazenamento de sessões de conversa da Nina IA em SQLite.
+Guarda os metadados das sessões e o histórico de mensagens com índice por
+(session_id, ts), para ler apenas o fim do histórico e percorrer sessões
+grandes em lotes sem carregá-las inteiras na memória.
+"""
+
+import json
+import time
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Iterator, Iterable
+
+from memory.connection_pool import get_pool
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("SessionStore")
+
+# Campos próprios da tabela de sessões (o restante dos metadados vai em JSON)
+SESSION_COLUMNS = ("name", "created_at", "last_activity")
+
+MESSAGE_COLUMNS = "id, session_id, ts, role, content, metadata"
+
+
+def _to_ts(timestamp: Any) -> Optional[float]:
+    """
+    Converte um timestamp (epoch ou ISO 8601) para segundos desde a época.
+    """
+    if timestamp is None:
+        return None
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    try:
+        return datetime.fromisoformat(str(timestamp)).timestamp()
+    except ValueError:
+        return None
+
+
+class SessionStore:
+    """
+    Sessões e mensagens persistidas em SQLite.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Inicializa o armazenamento de sessões.
+
+        Args:
+            db_path: Caminho para o arquivo do banco de dados SQLite
+        """
+        self.db_path = db_path
+        # Pool compartilhado com MemoryManager quando usam o mesmo arquivo
+        self.pool = get_pool(db_path)
+        self._init_database()
+
+    def _init_database(self) -> None:
+        """
+        Cria as tabelas e índices de sessões e mensagens.
+        """
+        self.pool.executescript('''
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                name TEXT,
+                created_at TEXT NOT NULL,
+                last_activity TEXT NOT NULL,
+                metadata TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_sessions_last_activity ON sessions(last_activity);
+
+            CREATE TABLE IF NOT EXISTS session_messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                ts REAL NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                metadata TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_session_messages_session_ts ON session_messages(session_id, ts);
+        ''')
+
+    @staticmethod
+    def _session_from_row(row) -> Dict[str, Any]:
+        metadata = json.loads(row["metadata"]) if row["metadata"] else {}
+        metadata.update({column: row[column] for column in SESSION_COLUMNS})
+        return metadata
+
+    @staticmethod
+    def _message_from_row(row) -> Dict[str, Any]:
+        return {
+            "id": row["id"],
+            "role": row["role"],
+            "content": row["content"],
+            "timestamp": datetime.fromtimestamp(row["ts"]).isoformat(),
+            "metadata": json.loads(row["metadata"]) if row["metadata"] else None
+        }
+
+    def save_session(self, session_id: str, metadata: Dict[str, Any]) -> None:
+        """
+        Cria ou substitui os metadados de uma sessão.
+
+        Args:
+            session_id: ID da sessão
+            metadata: Metadados ("name", "created_at", "last_activity" e campos livres)
+        """
+        now = datetime.now().isoformat()
+        extra = {key: value for key, value in metadata.items() if key not in SESSION_COLUMNS}
+        self.pool.execute(
+            """
+            INSERT INTO sessions (session_id, name, created_at, last_activity, metadata)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(session_id) DO UPDATE SET
+                name = excluded.name, created_at = excluded.created_at,
+                last_activity = excluded.last_activity, metadata = excluded.metadata
+            """,
+            (session_id, metadata.get("name"), metadata.get("created_at") or now,
+             metadata.get("last_activity") or now, json.dumps(extra, ensure_ascii=False) if extra else None)
+        )
+
+    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtém os metadados de uma sessão.
+
+        Args:
+            session_id: ID da sessão
+
+        Returns:
+            Metadados da sessão ou None se não encontrada
+        """
+        row = self.pool.query_one("SELECT * FROM sessions WHERE session_id = ?", (session_id,))
+        return self._session_from_row(row) if row else None
+
+    def list_sessions(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Lista as sessões, da atividade mais recente para a mais antiga.
+
+        Args:
+            limit: Número máximo de sessões (None = todas)
+
+        Returns:
+            Lista de metadados com o campo "id"
+        """
+        rows = self.pool.query(
+            "SELECT * FROM sessions ORDER BY last_activity DESC LIMIT ?",
+            (limit if limit is not None else -1,)
+        )
+        return [{"id": row["session_id"], **self._session_from_row(row)} for row in rows]
+
+    def touch(self, session_id: str, last_activity: Optional[str] = None) -> bool:
+        """
+        Atualiza a última atividade de uma sessão.
+
+        Returns:
+            True se a sessão existe
+        """
+        cursor = self.pool.execute(
+            "UPDATE sessions SET last_activity = ? WHERE session_id = ?",
+            (last_activity or datetime.now().isoformat(), session_id)
+        )
+        return cursor.rowcount > 0
+
+    def delete_session(self, session_id: str) -> bool:
+        """
+        Exclui uma sessão e todas as suas mensagens.
+
+        Returns:
+            True se a sessão existia
+        """
+        with self.pool.transaction() as conn:
+            conn.execute("DELETE FROM session_messages WHERE session_id = ?", (session_id,))
+            cursor = conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            return cursor.rowcount > 0
+
+    def add_message(self,
+                    session_id: str,
+                    role: str,
+                    content: str,
+                    metadata: Optional[Dict[str, Any]] = None,
+                    ts: Optional[float] = None) -> int:
+        """
+        Adiciona uma mensagem e atualiza a última atividade da sessão.
+
+        Args:
+            session_id: ID da sessão
+            role: Papel do emissor ('user', 'assistant', 'system')
+            content: Conteúdo da mensagem
+            metadata: Metadados adicionais (opcional)
+            ts: Instante da mensagem em segundos desde a época (None = agora)
+
+        Returns:
+            ID da mensagem adicionada
+        """
+        ts = ts if ts is not None else time.time()
+        with self.pool.transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO session_messages (session_id, ts, role, content, metadata) VALUES (?, ?, ?, ?, ?)",
+                (session_id, ts, role, content, json.dumps(metadata, ensure_ascii=False) if metadata else None)
+            )
+            conn.execute("UPDATE sessions SET last_activity = ? WHERE session_id = ?",
+                         (datetime.fromtimestamp(ts).isoformat(), session_id))
+            return cursor.lastrowid
+
+    def add_messages(self, session_id: str, messages: Iterable[Dict[str, Any]]) -> int:
+        """
+        Adiciona várias mensagens numa única transação (ex.: importação em lotes).
+
+        Args:
+            session_id: ID da sessão
+            messages: Mensagens com "role", "content" e opcionalmente "timestamp" e "metadata"
+
+        Returns:
+            Número de mensagens adicionadas
+        """
+        now = time.time()
+        rows = []
+        for message in messages:
+            metadata = message.get("metadata")
+            ts = _to_ts(message.get("timestamp"))
+            rows.append((session_id, ts if ts is not None else now, message.get("role", "user"),
+                         message.get("content", ""), json.dumps(metadata, ensure_ascii=False) if metadata else None))
+        if rows:
+            self.pool.executemany(
+                "INSERT INTO session_messages (session_id, ts, role, content, metadata) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+    def get_messages(self,
+                     session_id: str,
+                     limit: Optional[int] = None,
+                     roles: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Obtém as mensagens de uma sessão em ordem cronológica.
+
+        Com `limit`, lê apenas as últimas mensagens pelo índice (session_id, ts),
+        sem percorrer o restante do histórico.
+
+        Args:
+            session_id: ID da sessão
+            limit: Número de mensagens mais recentes (None = todas)
+            roles: Lista de papéis a filtrar (None = todos)
+
+        Returns:
+            Lista de mensagens ({"id", "role", "content", "timestamp", "metadata"})
+        """
+        sql = f"SELECT {MESSAGE_COLUMNS} FROM session_messages WHERE session_id = ?"
+        params = [session_id]
+        if roles:
+            sql += f" AND role IN ({', '.join('?' for _ in roles)})"
+            params.extend(roles)
+
+        if limit is None:
+            rows = self.pool.query(sql + " ORDER BY ts, id", params)
+        else:
+            rows = self.pool.query(sql + " ORDER BY ts DESC, id DESC LIMIT ?", params + [limit])
+            rows.reverse()
+        return [self._message_from_row(row) for row in rows]
+
+    def iter_messages(self, session_id: str, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """
+        Percorre as mensagens de uma sessão em lotes, em ordem cronológica.
+
+        Args:
+            session_id: ID da sessão
+            batch_size: Mensagens lidas por consulta
+
+        Yields:
+            Mensagens da sessão
+        """
+        last_ts, last_id = float("-inf"), -1
+        while True:
+            rows = self.pool.query(
+                f"""
+                SELECT {MESSAGE_COLUMNS} FROM session_messages
+                WHERE session_id = ? AND ts >= ? AND (ts > ? OR id > ?)
+                ORDER BY ts, id LIMIT ?
+                """,
+                (session_id, last_ts, last_ts, last_id, batch_size)
+            )
+            for row in rows:
+                yield self._message_from_row(row)
+            if len(rows) < batch_size:
+                return
+            last_ts, last_id = rows[-1]["ts"], rows[-1]["id"]
+
+    def count_messages(self, session_id: str) -> int:
+        """
+        Conta as mensagens de uma sessão.
+        """
+        row = self.pool.query_one("SELECT COUNT(*) FROM session_messages WHERE session_id = ?", (session_id,))
+        return row[0]
+
+    def clear_messages(self, session_id: str) -> int:
+        """
+        Remove todas as mensagens de uma sessão.
+
+        Returns:
+            Número de mensagens removidas
+        """
+        return self.pool.execute("DELETE FROM session_messages WHERE session_id = ?", (session_id,)).rowcount
@@ -0,0 +1,247 @@
+"""
+Fila de atualizações pós-resposta para o sistema de memória da Nina IA.
+Executa em segundo plano o trabalho feito depois de uma resposta (gravação,
+análise e perfis), em ordem por canal, para que a resposta siga direto para o TTS.
+"""
+
+import time
+import atexit
+import logging
+import threading
+from collections import deque
+from typing import Dict, Any, Callable, Hashable, Optional
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("PostResponseQueue")
+
+
+class PostResponseQueue:
+    """
+    Fila de tarefas com ordem garantida por canal.
+
+    Cada canal tem sua própria fila; um canal é atendido por no máximo uma
+    thread por vez, então as tarefas de um canal rodam na ordem de envio,
+    enquanto canais diferentes avançam em paralelo. `close` espera todas as
+    tarefas pendentes terminarem antes de encerrar as threads.
+    """
+
+    def __init__(self,
+                 workers: int = 2,
+                 max_pending: int = 1000,
+                 put_timeout: float = 2.0,
+                 lag_warning_ms: float = 2000.0):
+        """
+        Inicializa a fila e inicia as threads de trabalho.
+
+        Args:
+            workers: Número de threads de trabalho
+            max_pending: Limite de tarefas pendentes antes de bloquear quem envia
+            put_timeout: Tempo máximo que um envio espera por espaço (s)
+            lag_warning_ms: Atraso entre envio e início de uma tarefa que gera um aviso (ms)
+        """
+        self.max_pending = max_pending
+        self.put_timeout = put_timeout
+        self.lag_warning_ms = lag_warning_ms
+
+        self._queues = {}  # canal -> deque de (enviado_em, função, args, kwargs)
+        self._ready = deque()  # canais com tarefas e sem thread atendendo
+        self._active = set()  # canais sendo atendidos
+        self._pending = 0
+        self._condition = threading.Condition()
+        self._closed = False
+
+        # Métricas
+        self.submitted = 0
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.lag_warnings = 0
+        self.max_depth = 0
+        self.max_lag_ms = 0.0
+        self.last_lag_ms = 0.0
+        self.total_lag_ms = 0.0
+        self.total_run_ms = 0.0
+
+        self._threads = [
+            threading.Thread(target=self._run, name=f"memory-post-response-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for thread in self._threads:
+            thread.start()
+        atexit.register(self.close)
+
+        logger.info(f"Fila pós-resposta iniciada ({len(self._threads)} threads)")
+
+    def submit(self, channel_id: Hashable, task: Callable[..., Any], *args, **kwargs) -> bool:
+        """
+        Envia uma tarefa para execução em segundo plano, após as anteriores do mesmo canal.
+
+        Args:
+            channel_id: Canal que define a ordem de execução
+            task: Função a executar
+            *args: Argumentos posicionais da função
+            **kwargs: Argumentos nomeados da função
+
+        Returns:
+            True se a tarefa foi aceita, False se a fila estiver encerrada ou cheia
+        """
+        with self._condition:
+            if self._closed:
+                self.rejected += 1
+                return False
+
+            # Back-pressure: aguardar espaço em vez de crescer sem limite
+            if not self._condition.wait_for(lambda: self._pending < self.max_pending or self._closed,
+                                            self.put_timeout) or self._closed:
+                self.rejected += 1
+                logger.warning(f"Fila pós-resposta cheia, tarefa do canal {channel_id} descartada")
+                return False
+
+            queue = self._queues.setdefault(channel_id, deque())
+            queue.append((time.perf_counter(), task, args, kwargs))
+            if len(queue) == 1 and channel_id not in self._active:
+                self._ready.append(channel_id)
+
+            self._pending += 1
+            self.submitted += 1
+            self.max_depth = max(self.max_depth, self._pending)
+            self._condition.notify_all()
+            return True
+
+    def _run(self) -> None:
+        """
+        Loop das threads de trabalho.
+        """
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._ready or (self._closed and not self._pending))
+                if not self._ready:
+                    return
+
+                channel_id = self._ready.popleft()
+                self._active.add(channel_id)
+                enqueued_at, task, args, kwargs = self._queues[channel_id].popleft()
+
+            start = time.perf_counter()
+            lag_ms = (start - enqueued_at) * 1000
+            try:
+                task(*args, **kwargs)
+                failed = False
+            except Exception as e:
+                failed = True
+                logger.error(f"Erro em tarefa pós-resposta do canal {channel_id}: {e}")
+            run_ms = (time.perf_counter() - start) * 1000
+
+            if lag_ms > self.lag_warning_ms:
+                logger.warning(f"Atraso da fila pós-resposta: {lag_ms:.0f} ms (canal {channel_id})")
+
+            with self._condition:
+                self._active.discard(channel_id)
+                if self._queues[channel_id]:
+                    # Próxima tarefa do canal vai para o fim: canais ocupados não monopolizam as threads
+                    self._ready.append(channel_id)
+                else:
+                    del self._queues[channel_id]
+
+                self._pending -= 1
+                self.processed += 1
+                self.failed += int(failed)
+                self.lag_warnings += int(lag_ms > self.lag_warning_ms)
+                self.last_lag_ms = lag_ms
+                self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+                self.total_lag_ms += lag_ms
+                self.total_run_ms += run_ms
+                self._condition.notify_all()
+
+    def _channel_pending(self, channel_id: Hashable) -> bool:
+        """
+        Verifica se um canal tem tarefas na fila ou em execução (com o lock adquirido).
+        """
+        return channel_id in self._queues
+
+    def wait_for_channel(self, channel_id: Hashable, timeout: Optional[float] = None) -> bool:
+        """
+        Espera as tarefas de um canal terminarem (leitura das próprias escritas).
+
+        Args:
+            channel_id: ID do canal
+            timeout: Tempo máximo de espera (s; None = sem limite)
+
+        Returns:
+            True se o canal não tem mais tarefas pendentes
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._channel_pending(channel_id), timeout)
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera todas as tarefas pendentes terminarem.
+
+        Args:
+            timeout: Tempo máximo de espera (s; None = sem limite)
+
+        Returns:
+            True se a fila ficou vazia
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending == 0, timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtém métricas da fila, incluindo o atraso das tarefas.
+
+        Returns:
+            Dicionário com contadores, profundidade e atrasos (ms)
+        """
+        now = time.perf_counter()
+        with self._condition:
+            oldest = min((queue[0][0] for queue in self._queues.values() if queue), default=None)
+            return {
+                "pending": self._pending,
+                "channels": len(self._queues),
+                "max_depth": self.max_depth,
+                "submitted": self.submitted,
+                "processed": self.processed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "lag_warnings": self.lag_warnings,
+                "oldest_pending_ms": round((now - oldest) * 1000, 3) if oldest is not None else 0.0,
+                "last_lag_ms": round(self.last_lag_ms, 3),
+                "max_lag_ms": round(self.max_lag_ms, 3),
+                "avg_lag_ms": round(self.total_lag_ms / self.processed, 3) if self.processed else 0.0,
+                "avg_run_ms": round(self.total_run_ms / self.processed, 3) if self.processed else 0.0
+            }
+
+    def close(self, timeout: float = 10.0) -> bool:
+        """
+        Encerra a fila: recusa novas tarefas, executa todas as pendentes e encerra as threads.
+
+        Args:
+            timeout: Tempo máximo de espera pelas tarefas pendentes (s)
+
+        Returns:
+            True se todas as tarefas pendentes foram executadas
+        """
+        with self._condition:
+            if self._closed:
+                return self._pending == 0
+            self._closed = True
+            self._condition.notify_all()
+
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+        try:
+            atexit.unregister(self.close)
+        except Exception:
+            pass
+
+        with self._condition:
+            remaining = self._pending
+        if remaining:
+            logger.warning(f"Fila pós-resposta encerrada com {remaining} tarefas não executadas")
+        else:
+            logger.info(f"Fila pós-resposta encerrada: {self.processed} tarefas executadas")
+        return remaining == 0
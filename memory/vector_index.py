@@ -0,0 +1,597 @@
+"""
+Índice vetorial local para recuperação semântica da memória de longo prazo da Nina IA.
+Representa interações e conhecimentos com vetores de n-gramas de caracteres
+(hashing, sem modelo externo) e busca os mais parecidos com NumPy, dentro de
+um limite de tempo. O índice é persistido ao lado do banco de dados.
+"""
+
+import os
+import re
+import json
+import time
+import zlib
+import logging
+import threading
+import unicodedata
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("SemanticIndex")
+
+# Versão do formato dos vetores: mudar invalida índices salvos
+EMBEDDER_VERSION = 1
+
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def _normalize(text: str) -> str:
+    """
+    Converte para minúsculas e remove acentos ("você" e "voce" viram o mesmo termo).
+    """
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+# Consultas das fontes padrão: interações (MemoryDatabase) e conhecimentos (MemoryManager)
+INTERACTION_NEW_ROWS_SQL = """
+    SELECT interaction_id, content_summary FROM interactions
+    WHERE interaction_id > ? ORDER BY interaction_id LIMIT ?
+"""
+INTERACTION_FETCH_SQL = """
+    SELECT interaction_id AS id, user_id, channel_id, timestamp, content_summary AS text
+    FROM interactions WHERE interaction_id IN ({placeholders})
+"""
+KNOWLEDGE_NEW_ROWS_SQL = """
+    SELECT id, topic || ': ' || fact FROM knowledge
+    WHERE id > ? ORDER BY id LIMIT ?
+"""
+KNOWLEDGE_FETCH_SQL = """
+    SELECT id, topic, fact, confidence, topic || ': ' || fact AS text
+    FROM knowledge WHERE id IN ({placeholders})
+"""
+
+
+class HashedNgramEmbedder:
+    """
+    Gera vetores normalizados a partir de palavras e n-gramas de caracteres.
+
+    Cada termo é espalhado em `dim` posições com crc32 (estável entre
+    processos) e um sinal, o que tolera erros de transcrição e variações de
+    palavras sem depender de vocabulário ou de um modelo treinado.
+    """
+
+    def __init__(self, dim: int = 256, min_n: int = 3, max_n: int = 4):
+        """
+        Inicializa o gerador de vetores.
+
+        Args:
+            dim: Dimensão dos vetores
+            min_n: Menor tamanho de n-grama de caracteres
+            max_n: Maior tamanho de n-grama de caracteres
+        """
+        self.dim = dim
+        self.min_n = min_n
+        self.max_n = max_n
+
+    @property
+    def signature(self) -> Dict[str, int]:
+        """
+        Parâmetros que determinam os vetores (gravados junto do índice).
+        """
+        return {"version": EMBEDDER_VERSION, "dim": self.dim, "min_n": self.min_n, "max_n": self.max_n}
+
+    def embed(self, text: Optional[str]) -> np.ndarray:
+        """
+        Gera o vetor de um texto.
+
+        Args:
+            text: Texto a ser representado
+
+        Returns:
+            Vetor float32 de norma 1 (ou zero se o texto não tiver palavras)
+        """
+        hashes = []
+        for word in _WORD_PATTERN.findall(_normalize(text or "")):
+            # A palavra inteira pesa tanto quanto seus n-gramas juntos
+            hashes.append(zlib.crc32(word.encode("utf-8")))
+            padded = f" {word} "
+            for n in range(self.min_n, self.max_n + 1):
+                for start in range(len(padded) - n + 1):
+                    hashes.append(zlib.crc32(padded[start:start + n].encode("utf-8")))
+
+        vector = np.zeros(self.dim, dtype=np.float32)
+        if not hashes:
+            return vector
+
+        values = np.array(hashes, dtype=np.uint32)
+        signs = np.where(values & 0x80000000, -1.0, 1.0)
+        vector += np.bincount(values % self.dim, weights=signs, minlength=self.dim).astype(np.float32)
+
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def embed_many(self, texts: Sequence[Optional[str]]) -> np.ndarray:
+        """
+        Gera os vetores de vários textos.
+
+        Args:
+            texts: Textos a serem representados
+
+        Returns:
+            Matriz float32 com um vetor por linha
+        """
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            matrix[row] = self.embed(text)
+        return matrix
+
+
+class SemanticIndex:
+    """
+    Índice vetorial em memória (NumPy) com persistência em arquivo.
+
+    Cada fonte ("interaction", "knowledge", ...) é uma tabela do SQLite com
+    IDs crescentes. O índice é atualizado incrementalmente pelo caminho de
+    ingestão (`add`) e, ao abrir, alcança as linhas gravadas depois do último
+    salvamento (`sync`). Linhas removidas do banco saem do índice pelo aviso
+    de remoção (`remove`) ou, se removidas por outro caminho, na primeira busca
+    que as encontra, que então é refeita para completar os resultados. Os
+    vetores removidos são compactados ao salvar.
+
+    A busca percorre os vetores do mais recente para o mais antigo, em
+    blocos, e para quando o limite de tempo se esgota.
+    """
+
+    def __init__(self, index_path: str, dim: int = 256, chunk_rows: int = 8192,
+                 save_every: int = 1000, min_score: float = 0.15):
+        """
+        Inicializa o índice, carregando o arquivo salvo se existir.
+
+        Args:
+            index_path: Arquivo do índice (ex.: ao lado do memory.db)
+            dim: Dimensão dos vetores
+            chunk_rows: Vetores comparados por bloco (o tempo é verificado entre blocos)
+            save_every: Número de vetores novos que dispara um salvamento
+            min_score: Similaridade mínima de um resultado
+        """
+        self.index_path = index_path
+        self.embedder = HashedNgramEmbedder(dim)
+        self.chunk_rows = max(1, chunk_rows)
+        self.save_every = save_every
+        self.min_score = min_score
+
+        self._lock = threading.RLock()
+        self._vectors = np.zeros((1024, dim), dtype=np.float32)
+        self._ids = np.zeros(1024, dtype=np.int64)
+        self._source_codes = np.zeros(1024, dtype=np.int8)
+        self._count = 0
+        self._rows = {}  # (código da fonte, id) -> linha
+        self._codes = {}  # nome da fonte -> código
+        self._last_ids = {}  # nome da fonte -> maior ID indexado
+        self._sources = {}  # nome da fonte -> configuração de leitura
+        self._unsaved = 0
+
+        # Métricas
+        self.searches = 0
+        self.truncated_searches = 0
+        self.last_search_ms = 0.0
+        self.max_search_ms = 0.0
+
+        self._load()
+
+    def add_source(self, name: str, pool: Any, new_rows_sql: str, fetch_sql: str) -> None:
+        """
+        Registra uma tabela do banco como fonte de vetores.
+
+        Args:
+            name: Nome da fonte
+            pool: Pool de conexões do banco da fonte
+            new_rows_sql: Consulta (id, text) das linhas com ID maior que ?, em ordem, limitada a ? linhas
+            fetch_sql: Consulta das linhas com IDs em {placeholders}, com as colunas id e text
+        """
+        with self._lock:
+            self._code(name)
+            self._last_ids.setdefault(name, 0)
+            self._sources[name] = {"pool": pool, "new_rows_sql": new_rows_sql, "fetch_sql": fetch_sql}
+
+    def _code(self, name: str) -> int:
+        """
+        Obtém o código numérico de uma fonte, criando-o se necessário (com o lock adquirido).
+        """
+        if name not in self._codes:
+            self._codes[name] = len(self._codes) + 1
+        return self._codes[name]
+
+    def _grow(self, needed: int) -> None:
+        """
+        Aumenta a capacidade dos arrays (com o lock adquirido).
+
+        Os arrays antigos não são alterados, então buscas em andamento continuam válidas.
+        """
+        capacity = len(self._ids)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+
+        vectors = np.zeros((capacity, self.embedder.dim), dtype=np.float32)
+        vectors[:self._count] = self._vectors[:self._count]
+        ids = np.zeros(capacity, dtype=np.int64)
+        ids[:self._count] = self._ids[:self._count]
+        codes = np.zeros(capacity, dtype=np.int8)
+        codes[:self._count] = self._source_codes[:self._count]
+        self._vectors, self._ids, self._source_codes = vectors, ids, codes
+
+    def add(self, source: str, items: Sequence[Tuple[int, Optional[str]]]) -> int:
+        """
+        Adiciona (ou substitui) vetores de uma fonte.
+
+        Args:
+            source: Nome da fonte
+            items: Pares (id, texto)
+
+        Returns:
+            Número de vetores adicionados
+        """
+        items = [(int(item_id), text) for item_id, text in items if text]
+        if not items:
+            return 0
+
+        # Vetores calculados fora do lock: a busca não espera pela ingestão
+        matrix = self.embedder.embed_many([text for _, text in items])
+
+        with self._lock:
+            code = self._code(source)
+            self._grow(self._count + len(items))
+            for (item_id, _), vector in zip(items, matrix):
+                row = self._rows.get((code, item_id))
+                if row is None:
+                    row = self._count
+                    self._count += 1
+                    self._ids[row] = item_id
+                    self._source_codes[row] = code
+                    self._rows[(code, item_id)] = row
+                self._vectors[row] = vector
+            self._last_ids[source] = max(self._last_ids.get(source, 0), max(item_id for item_id, _ in items))
+            self._unsaved += len(items)
+            should_save = self.save_every and self._unsaved >= self.save_every
+
+        if should_save:
+            self.save()
+        return len(items)
+
+    def remove(self, source: str, item_ids: Sequence[int]) -> None:
+        """
+        Remove vetores de uma fonte (a linha fica zerada e nunca é retornada).
+
+        Args:
+            source: Nome da fonte
+            item_ids: IDs removidos
+        """
+        with self._lock:
+            code = self._codes.get(source)
+            for item_id in item_ids:
+                row = self._rows.pop((code, int(item_id)), None)
+                if row is not None:
+                    self._vectors[row] = 0.0
+                    self._source_codes[row] = 0
+                    self._unsaved += 1
+
+    def sync(self, batch_size: int = 2000) -> int:
+        """
+        Indexa as linhas gravadas nas fontes depois do último vetor conhecido.
+
+        Args:
+            batch_size: Linhas lidas por consulta
+
+        Returns:
+            Número de vetores adicionados
+        """
+        added = 0
+        for name, config in list(self._sources.items()):
+            try:
+                while True:
+                    rows = config["pool"].query(config["new_rows_sql"], (self._last_ids.get(name, 0), batch_size))
+                    if not rows:
+                        break
+                    added += self.add(name, [(row[0], row[1]) for row in rows])
+                    # Linhas sem texto também avançam a posição
+                    with self._lock:
+                        self._last_ids[name] = max(self._last_ids.get(name, 0), rows[-1][0])
+                    if len(rows) < batch_size:
+                        break
+            except Exception as e:
+                logger.error(f"Erro ao sincronizar índice semântico ({name}): {e}")
+        if added:
+            logger.info(f"Índice semântico sincronizado: {added} vetores novos")
+        return added
+
+    def search(self, query: str, k: int = 5, budget_ms: float = 10.0,
+               sources: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Busca os vetores mais parecidos com uma consulta.
+
+        Args:
+            query: Texto da consulta
+            k: Número máximo de resultados
+            budget_ms: Limite de tempo da busca; os blocos mais recentes são comparados primeiro
+            sources: Fontes consideradas (None = todas)
+
+        Returns:
+            Lista de {"source", "id", "score"} em ordem decrescente de similaridade
+        """
+        start = time.perf_counter()
+        deadline = start + budget_ms / 1000.0
+
+        vector = self.embedder.embed(query)
+        with self._lock:
+            count = self._count
+            vectors, ids, codes = self._vectors, self._ids, self._source_codes
+            names = {code: name for name, code in self._codes.items()}
+            wanted = [self._codes[name] for name in sources if name in self._codes] if sources is not None else None
+
+        best_scores = np.empty(0, dtype=np.float32)
+        best_rows = np.empty(0, dtype=np.int64)
+        truncated = False
+        end = count
+
+        if k > 0 and np.any(vector):
+            while end > 0:
+                begin = max(0, end - self.chunk_rows)
+                scores = vectors[begin:end] @ vector
+                if wanted is not None:
+                    scores[~np.isin(codes[begin:end], wanted)] = -1.0
+
+                candidates = np.flatnonzero(scores >= self.min_score)
+                if len(candidates) > k:
+                    candidates = candidates[np.argpartition(scores[candidates], -k)[-k:]]
+                best_scores = np.concatenate([best_scores, scores[candidates]])
+                best_rows = np.concatenate([best_rows, candidates + begin])
+                if len(best_rows) > k:
+                    keep = np.argpartition(best_scores, -k)[-k:]
+                    best_scores, best_rows = best_scores[keep], best_rows[keep]
+
+                end = begin
+                if end > 0 and time.perf_counter() >= deadline:
+                    truncated = True
+                    break
+
+        order = np.argsort(-best_scores, kind="stable")
+        results = [
+            {"source": names.get(int(codes[row])), "id": int(ids[row]), "score": round(float(best_scores[i]), 4)}
+            for i, row in ((i, best_rows[i]) for i in order)
+            if codes[row]
+        ]
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.searches += 1
+            self.truncated_searches += int(truncated)
+            self.last_search_ms = elapsed_ms
+            self.max_search_ms = max(self.max_search_ms, elapsed_ms)
+
+        return results
+
+    def retrieve(self, query: str, k: int = 5, budget_ms: float = 10.0,
+                 sources: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Busca e carrega do banco os itens mais parecidos com uma consulta.
+
+        Args:
+            query: Texto da consulta
+            k: Número máximo de resultados
+            budget_ms: Limite de tempo da busca vetorial
+            sources: Fontes consideradas (None = todas)
+
+        Returns:
+            Itens encontrados (linhas da fonte com "source" e "score"), do mais parecido ao menos
+        """
+        results = []
+        # Uma segunda busca completa os resultados se a primeira encontrou itens apagados do banco
+        for _ in range(2):
+            hits = self.search(query, k, budget_ms, sources)
+            loaded, removed = self._fetch(hits)
+            results = []
+            for hit in hits:
+                item = loaded.get((hit["source"], hit["id"]))
+                if item is not None:
+                    results.append({**item, "source": hit["source"], "score": hit["score"]})
+            if not removed or len(results) >= k:
+                break
+        return results
+
+    def _fetch(self, hits: List[Dict[str, Any]]) -> Tuple[Dict[Tuple[str, int], Dict[str, Any]], int]:
+        """
+        Carrega do banco as linhas dos resultados de uma busca, removendo do índice as que não existem mais.
+
+        Returns:
+            Tuple contendo ((fonte, id) -> linha, número de itens removidos do índice)
+        """
+        by_source = {}
+        for hit in hits:
+            by_source.setdefault(hit["source"], []).append(hit["id"])
+
+        loaded = {}
+        removed = 0
+        for name, item_ids in by_source.items():
+            config = self._sources.get(name)
+            if config is None:
+                continue
+            try:
+                sql = config["fetch_sql"].format(placeholders=",".join("?" * len(item_ids)))
+                for row in config["pool"].query(sql, item_ids):
+                    loaded[(name, row["id"])] = dict(row)
+                # Itens apagados do banco deixam de ser retornados
+                missing = [item_id for item_id in item_ids if (name, item_id) not in loaded]
+                if missing:
+                    self.remove(name, missing)
+                    removed += len(missing)
+            except Exception as e:
+                logger.error(f"Erro ao carregar itens do índice semântico ({name}): {e}")
+        return loaded, removed
+
+    def _load(self) -> None:
+        """
+        Carrega o índice salvo, descartando-o se os vetores tiverem outro formato.
+        """
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with np.load(self.index_path, allow_pickle=False) as data:
+                meta = json.loads(str(data["meta"]))
+                if meta.get("embedder") != self.embedder.signature:
+                    logger.warning(f"Índice semântico com outro formato, será reconstruído: {self.index_path}")
+                    return
+                count = int(meta["count"])
+                self._grow(count)
+                self._vectors[:count] = data["vectors"][:count]
+                self._ids[:count] = data["ids"][:count]
+                self._source_codes[:count] = data["sources"][:count]
+
+            self._count = count
+            self._codes = {name: int(code) for name, code in meta["codes"].items()}
+            self._last_ids = {name: int(last_id) for name, last_id in meta["last_ids"].items()}
+            self._rows = {
+                (int(code), int(item_id)): row
+                for row, (code, item_id) in enumerate(zip(self._source_codes[:count], self._ids[:count]))
+                if code
+            }
+            logger.info(f"Índice semântico carregado: {len(self._rows)} vetores de {self.index_path}")
+        except Exception as e:
+            logger.error(f"Erro ao carregar índice semântico, será reconstruído: {e}")
+            self.reset()
+
+    def save(self) -> bool:
+        """
+        Salva o índice em disco (escrita atômica).
+
+        Returns:
+            True se a operação foi bem-sucedida, False caso contrário
+        """
+        try:
+            with self._lock:
+                self._compact()
+                count = self._count
+                meta = {
+                    "embedder": self.embedder.signature,
+                    "count": count,
+                    "codes": self._codes,
+                    "last_ids": self._last_ids
+                }
+                vectors = self._vectors[:count].copy()
+                ids = self._ids[:count].copy()
+                codes = self._source_codes[:count].copy()
+                self._unsaved = 0
+
+            directory = os.path.dirname(os.path.abspath(self.index_path))
+            os.makedirs(directory, exist_ok=True)
+            temp_path = self.index_path + ".tmp"
+            with open(temp_path, "wb") as f:
+                np.savez(f, vectors=vectors, ids=ids, sources=codes, meta=np.array(json.dumps(meta)))
+            os.replace(temp_path, self.index_path)
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao salvar índice semântico: {e}")
+            return False
+
+    def _compact(self) -> None:
+        """
+        Descarta as linhas zeradas por `remove` (com o lock adquirido).
+
+        Cria arrays novos, então buscas em andamento continuam válidas.
+        """
+        if len(self._rows) == self._count:
+            return
+        keep = np.flatnonzero(self._source_codes[:self._count] != 0)
+        capacity = max(1024, len(self._ids))
+        vectors = np.zeros((capacity, self.embedder.dim), dtype=np.float32)
+        ids = np.zeros(capacity, dtype=np.int64)
+        codes = np.zeros(capacity, dtype=np.int8)
+        vectors[:len(keep)] = self._vectors[keep]
+        ids[:len(keep)] = self._ids[keep]
+        codes[:len(keep)] = self._source_codes[keep]
+        self._vectors, self._ids, self._source_codes = vectors, ids, codes
+        self._count = len(keep)
+        self._rows = {
+            (int(code), int(item_id)): row
+            for row, (code, item_id) in enumerate(zip(codes[:len(keep)], ids[:len(keep)]))
+        }
+
+    def reset(self) -> None:
+        """
+        Esvazia o índice (as fontes registradas são mantidas e reindexadas por `sync`).
+        """
+        with self._lock:
+            self._vectors = np.zeros((1024, self.embedder.dim), dtype=np.float32)
+            self._ids = np.zeros(1024, dtype=np.int64)
+            self._source_codes = np.zeros(1024, dtype=np.int8)
+            self._count = 0
+            self._rows = {}
+            self._last_ids = {name: 0 for name in self._last_ids}
+            self._unsaved = 0
+
+    def rebuild(self) -> int:
+        """
+        Reconstrói o índice a partir das fontes (ex.: após restaurar um backup).
+
+        Returns:
+            Número de vetores indexados
+        """
+        self.reset()
+        added = self.sync()
+        self.save()
+        return added
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtém métricas do índice.
+
+        Returns:
+            Dicionário com número de vetores, posição por fonte e tempos de busca
+        """
+        with self._lock:
+            return {
+                "vectors": len(self._rows),
+                "rows": self._count,
+                "dim": self.embedder.dim,
+                "last_ids": dict(self._last_ids),
+                "searches": self.searches,
+                "truncated_searches": self.truncated_searches,
+                "last_search_ms": round(self.last_search_ms, 3),
+                "max_search_ms": round(self.max_search_ms, 3)
+            }
+
+    def close(self) -> None:
+        """
+        Salva o índice se houver vetores não salvos.
+        """
+        if self._unsaved:
+            self.save()
+
+
+def attach_interactions(index: SemanticIndex, db: Any) -> None:
+    """
+    Indexa as interações de um MemoryDatabase, atualizando o índice a cada gravação e remoção.
+
+    Args:
+        index: Índice semântico
+        db: Banco de dados de memória (MemoryDatabase)
+    """
+    index.add_source("interaction", db.pool, INTERACTION_NEW_ROWS_SQL, INTERACTION_FETCH_SQL)
+    db.add_interaction_listener(lambda items: index.add("interaction", items))
+    db.add_removal_listener(lambda item_ids: index.remove("interaction", item_ids))
+
+
+def attach_knowledge(index: SemanticIndex, manager: Any) -> None:
+    """
+    Indexa os conhecimentos de um MemoryManager, atualizando o índice a cada gravação.
+
+    Args:
+        index: Índice semântico
+        manager: Gerenciador de memória (MemoryManager)
+    """
+    index.add_source("knowledge", manager.pool, KNOWLEDGE_NEW_ROWS_SQL, KNOWLEDGE_FETCH_SQL)
+    manager.add_knowledge_listener(lambda items: index.add("knowledge", items))
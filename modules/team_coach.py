@@ -14,23 +14,34 @@ except ImportError:
             return True
         return default
 
+try:
+    from core.event_bus import MAP_UPDATE, CALLOUT
+except ImportError:
+    MAP_UPDATE, CALLOUT = "map_update", "callout"
+
 logger = logging.getLogger(__name__)
 
 class TeamCoach:
     """Provides coaching insights and coordination for a team (Placeholder)."""
 
-    def __init__(self, communication_interface=None, profile_manager=None):
+    def __init__(self, communication_interface=None, profile_manager=None, event_bus=None):
         """
         Initializes the Team Coach.
         Args:
             communication_interface: Object to handle voice input/output (e.g., Discord bot).
             profile_manager: Object to manage team and individual player profiles.
+            event_bus: Optional EventBus to receive "map_update" events and publish "callout" events.
         """
         self.enabled = get_config("v2_4.enable_team_mode", True)
         self.comms = communication_interface # Needs integration with Discord or similar
         self.profiles = profile_manager # Needs profile management
         self.team_state = {} # Store recognized players and their status
         self.last_team_callout = time.time()
+        self.last_map_data = {} # Latest minimap state received from the event bus
+        self.event_bus = None
+        
+        if event_bus is not None:
+            self.attach(event_bus)
         
         if self.enabled:
             logger.info("Team Coach initialized (Placeholder). Requires communication interface and profile integration.")
@@ -41,6 +52,20 @@ class TeamCoach:
         """Checks if team coaching is enabled."""
         return self.enabled
 
+    def attach(self, event_bus):
+        """
+        Subscribes to minimap updates on the event bus; callouts are then generated as the map changes
+        and published as "callout" events, instead of the caller polling the tracker.
+        """
+        self.event_bus = event_bus
+        if self.enabled:
+            event_bus.subscribe(MAP_UPDATE, self._on_map_update, name="team_coach")
+
+    def _on_map_update(self, event):
+        """Keeps the latest map data and tries a callout from it (runs on the subscription thread)."""
+        self.last_map_data = event.payload
+        self.provide_team_callout(event.payload)
+
     def update_team_member_state(self, user_id: str, voice_data=None, game_state=None):
         """
         Updates the state of a team member based on voice or game data.
@@ -61,12 +86,12 @@ class TeamCoach:
         # Placeholder: Analyze voice data for calls or emotional state (link to EmotionalFeedbackEngine?)
         # Placeholder: Update game state based on linked player data
 
-    def provide_team_callout(self, tactical_map_data: dict, game_events: list) -> Optional[str]:
+    def provide_team_callout(self, tactical_map_data: Optional[dict] = None, game_events: Optional[list] = None) -> Optional[str]:
         """
         Generates a tactical callout relevant to the team based on current map and events.
         
         Args:
-            tactical_map_data (dict): Data from MinimapTracker.
+            tactical_map_data (dict): Data from MinimapTracker (None = latest map received from the event bus).
             game_events (list): Recent significant game events.
             
         Returns:
@@ -75,6 +100,9 @@ class TeamCoach:
         if not self.enabled or (time.time() - self.last_team_callout < 15): # Cooldown on callouts
             return None
 
+        tactical_map_data = tactical_map_data if tactical_map_data is not None else self.last_map_data
+        game_events = game_events or []
+
         # --- Placeholder Callout Logic --- 
         callout = None
         
@@ -105,6 +133,11 @@ class TeamCoach:
         if callout:
             logger.info(f"Generated team callout: {callout}")
             self.last_team_callout = time.time()
+            if self.event_bus is not None:
+                try:
+                    self.event_bus.publish(CALLOUT, {"text": callout, "source": "team_coach", "timestamp": self.last_team_callout})
+                except Exception as e:
+                    logger.error(f"Failed to publish callout event: {e}")
             # In a real system, this callout would be sent via self.comms
             # Potentially with text-to-speech using a generic voice or Nina's voice
             return callout
@@ -19,9 +19,14 @@ if SCRIPT_DIR not in sys.path:
     sys.path.append(SCRIPT_DIR)
 # --- Adicionar diretório raiz ao sys.path --- END
 
+# Registro dos tempos de importação e inicialização (--profile-startup)
+from core.startup import StartupProfiler
+STARTUP_PROFILER = StartupProfiler()
+
 # Importar configuração primeiro para definir caminhos e sys.path
 try:
-    from core.config import get_config, ROOT_DIR
+    with STARTUP_PROFILER.measure("core.config", "import"):
+        from core.config import get_config, ROOT_DIR
 except ImportError as e:
     print(f"ERRO CRÍTICO: Não foi possível importar a configuração de core.config. Verifique a estrutura de pastas e __init__.py. Detalhes: {e}")
     # Tentar importar de forma diferente se o sys.path falhou
@@ -35,7 +40,9 @@ except ImportError as e:
         sys.exit(1)
 
 # Importar componentes do projeto usando caminhos absolutos
-from core.orchestrator import NinaOrchestrator
+# (orquestrador e playback são importados sob demanda em NinaIA._init_components)
+with STARTUP_PROFILER.measure("core.tracing", "import"):
+    from core import tracing
 
 # --- Configuração de logging --- 
 LOG_DIR = get_config("paths.logs", os.path.join(ROOT_DIR, "logs"))
@@ -52,11 +59,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# --- Verificação de arquivos movidos --- 
-# Os arquivos AudioPlaybackManager e AudioPlayer foram movidos para tts/
-from tts.audio_playback import AudioPlaybackManager
-from tts.audio_player import AudioPlayer
-
 class NinaIA:
     """
     Classe principal do projeto Nina IA.
@@ -66,14 +68,20 @@ class NinaIA:
     def __init__(self,
                  profile_name: str = "default_profile",
                  use_cuda: bool = True,
-                 debug: bool = False):
+                 debug: bool = False,
+                 profiler: Optional[StartupProfiler] = None):
         """
         Inicializa o assistente Nina IA.
 
+        Retorna antes de os modelos terminarem de carregar: STT, LLM, TTS e
+        playback são inicializados em paralelo e cada um é aguardado apenas
+        quando usado (veja `wait_until_ready`).
+
         Args:
             profile_name: Nome do perfil a ser carregado
             use_cuda: Se deve usar GPU para aceleração
             debug: Se deve ativar modo de depuração
+            profiler: Registro dos tempos de partida (None = o do módulo)
         """
         # Configurar logging
         if debug:
@@ -85,6 +93,7 @@ class NinaIA:
         self.profiles_dir = get_config("paths.profiles", os.path.join(ROOT_DIR, "profiles"))
         self.profile_name = profile_name
         self.use_cuda = use_cuda
+        self.startup_profiler = profiler or STARTUP_PROFILER
 
         # Criar diretórios se não existirem
         os.makedirs(self.data_dir, exist_ok=True)
@@ -106,23 +115,34 @@ class NinaIA:
         Inicializa todos os componentes do sistema.
         """
         try:
-            # Inicializar orquestrador principal
+            # Inicializar orquestrador principal (STT, LLM e TTS carregam em segundo plano)
+            with self.startup_profiler.measure("core.orchestrator", "import"):
+                from core.orchestrator import NinaOrchestrator
+
             logger.info("Inicializando orquestrador")
             self.orchestrator = NinaOrchestrator(
                 data_dir=self.data_dir,
                 profile_name=self.profile_name,
-                use_cuda=self.use_cuda
+                use_cuda=self.use_cuda,
+                profiler=self.startup_profiler
             )
 
-            # Inicializar gerenciador de playback avançado
-            logger.info("Inicializando gerenciador de playback")
-            self.playback_manager = AudioPlaybackManager(
-                audio_dir=os.path.join(self.data_dir, "audio")
-            )
+            # Inicializar gerenciador de playback avançado (pygame) junto com os modelos
+            def init_playback():
+                with self.startup_profiler.measure("tts.audio_playback", "import"):
+                    from tts.audio_playback import AudioPlaybackManager
+
+                logger.info("Inicializando gerenciador de playback")
+                playback_manager = AudioPlaybackManager(
+                    audio_dir=os.path.join(self.data_dir, "audio")
+                )
 
-            # Configurar callbacks de playback
-            self.playback_manager.set_on_start_callback(self._on_playback_start)
-            self.playback_manager.set_on_complete_callback(self._on_playback_complete)
+                # Configurar callbacks de playback
+                playback_manager.set_on_start_callback(self._on_playback_start)
+                playback_manager.set_on_complete_callback(self._on_playback_complete)
+                return playback_manager
+
+            self.orchestrator.components.submit("playback", init_playback)
 
             logger.info("Componentes inicializados com sucesso")
 
@@ -130,6 +150,25 @@ class NinaIA:
             logger.exception(f"Erro CRÍTICO ao inicializar componentes: {e}")
             raise
 
+    @property
+    def playback_manager(self):
+        """
+        Gerenciador de playback (espera a inicialização terminar).
+        """
+        return self.orchestrator.components.get("playback", self.orchestrator.ready_timeout)
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera todos os componentes terminarem de inicializar.
+
+        Args:
+            timeout: Espera máxima em segundos (None = sem limite)
+
+        Returns:
+            True se todos os componentes estão prontos
+        """
+        return self.orchestrator.wait_until_ready(timeout)
+
     def _on_playback_start(self, audio_path: str) -> None:
         """
         Callback chamado quando um áudio começa a ser reproduzido.
@@ -146,6 +185,13 @@ class NinaIA:
         """
         Processa um comando de voz: escuta, transcreve, processa e responde.
         """
+        with tracing.trace_turn(), tracing.span("turn", voice=True):
+            return self._process_voice_command()
+
+    def _process_voice_command(self) -> Optional[str]:
+        """
+        Executa um comando de voz (veja `process_voice_command`).
+        """
         try:
             # Capturar e transcrever áudio
             text = self.orchestrator.process_voice_input()
@@ -180,12 +226,7 @@ class NinaIA:
                 logger.warning("Nenhuma resposta gerada")
                 return None
 
-            # Sintetizar resposta em áudio
-            audio_file = self.orchestrator.tts.speak(response, blocking=False, save_file=True)
-
-            # Reproduzir com o gerenciador de playback avançado
-            if audio_file:
-                self.playback_manager.play(audio_file)
+            self._speak_response(response)
 
             return response
 
@@ -196,6 +237,24 @@ class NinaIA:
             logger.exception(f"Erro ao processar comando de texto: {e}")
             return None
 
+    def _speak_response(self, response: str, wait: bool = False) -> None:
+        """
+        Sintetiza a resposta e a reproduz pelo gerenciador de playback.
+
+        Args:
+            response: Texto a ser falado
+            wait: Se deve aguardar o fim da reprodução (etapa de fala do pipeline)
+        """
+        # Sintetizar resposta em áudio
+        audio_file = self.orchestrator.tts.speak(response, blocking=False, save_file=True)
+
+        # Reproduzir com o gerenciador de playback avançado
+        if audio_file:
+            self.playback_manager.play(audio_file)
+
+        while wait and self.playback_manager.is_busy() and self.continuous_mode:
+            time.sleep(0.05)
+
     def start_continuous_mode(self) -> None:
         """
         Inicia o modo contínuo de escuta e resposta.
@@ -210,6 +269,13 @@ class NinaIA:
 
             logger.info("Iniciando modo contínuo")
 
+            # Pipeline assíncrono: a captura continua enquanto a Nina pensa ou fala
+            pipeline = None
+            if get_config("pipeline.enabled", False) and not self.orchestrator.speculator:
+                pipeline = self.orchestrator.create_pipeline(
+                    speak=lambda response: self._speak_response(response, wait=True)
+                )
+
             # Iniciar thread de interação contínua
             def interaction_loop():
                 logger.info("Loop de interação contínua iniciado")
@@ -221,6 +287,11 @@ class NinaIA:
                 except AttributeError as e:
                     logger.error(f"Não foi possível falar a mensagem de boas-vindas: {e}")
 
+                if pipeline is not None:
+                    pipeline.run_forever()
+                    logger.info("Loop de interação contínua encerrado")
+                    return
+
                 while self.running and self.continuous_mode:
                     try:
                         # Processar comando de voz
@@ -260,7 +331,9 @@ class NinaIA:
             # Parar componentes ativos
             if hasattr(self.orchestrator, "stop_continuous_interaction"):
                  self.orchestrator.stop_continuous_interaction()
-            self.playback_manager.stop()
+            playback_manager = self.orchestrator.components.peek("playback")
+            if playback_manager is not None:
+                playback_manager.stop()
 
             # Aguardar thread terminar
             if hasattr(self, 'interaction_thread') and self.interaction_thread.is_alive():
@@ -289,7 +362,9 @@ class NinaIA:
             self.running = False
 
             # Encerrar componentes
-            self.playback_manager.shutdown()
+            playback_manager = self.orchestrator.components.peek("playback")
+            if playback_manager is not None:
+                playback_manager.shutdown()
             if hasattr(self.orchestrator, "cleanup"):
                 self.orchestrator.cleanup()
 
@@ -326,12 +401,14 @@ class NinaIA:
                 orchestrator_status = self.orchestrator.get_status()
 
             # Adicionar informações adicionais
+            playback_manager = self.orchestrator.components.peek("playback")
             status = {
                 **orchestrator_status,
                 "continuous_mode": self.continuous_mode,
                 "running": self.running,
-                "playback_busy": self.playback_manager.is_busy(),
-                "playback_volume": self.playback_manager.get_volume()
+                "playback_busy": playback_manager.is_busy() if playback_manager else False,
+                "playback_volume": playback_manager.get_volume() if playback_manager else None,
+                "tracing": tracing.get_summary()
             }
 
             return status
@@ -366,16 +443,28 @@ def main():
     parser.add_argument('--debug', action='store_true', help='Ativar modo de depuração (logging mais detalhado)')
     parser.add_argument('--continuous', action='store_true', help='Iniciar em modo contínuo (escuta ativa)')
     parser.add_argument('--text', type=str, help='Processar um único comando de texto e sair')
+    parser.add_argument('--profile-startup', action='store_true', help='Exibir os tempos de importação e inicialização dos componentes')
 
     args = parser.parse_args()
 
     try:
-        # Inicializar Nina IA
-        nina = NinaIA(
-            profile_name=args.profile,
-            use_cuda=not args.no_cuda,
-            debug=args.debug
-        )
+        # Inicializar Nina IA (os modelos continuam carregando em segundo plano)
+        with STARTUP_PROFILER.measure("NinaIA (prompt disponível)", "init"):
+            nina = NinaIA(
+                profile_name=args.profile,
+                use_cuda=not args.no_cuda,
+                debug=args.debug
+            )
+
+        if args.profile_startup:
+            ready = nina.wait_until_ready()
+            print("\nTempos de partida da Nina IA:")
+            print(STARTUP_PROFILER.report())
+            for name, status in nina.orchestrator.components.get_status().items():
+                if status["error"]:
+                    print(f"  {name}: falhou ({status['error']})")
+            if not ready:
+                print("Aviso: nem todos os componentes foram inicializados")
 
         # Processar comando de texto se fornecido
         if args.text:
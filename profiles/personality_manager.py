@@ -9,6 +9,8 @@ import logging
 from typing import Dict, Any, Optional, List, Union
 from datetime import datetime
 
+from llm.prompt_builder import SystemPromptBuilder
+
 # Configuração de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -31,6 +33,10 @@ class PersonalityManager:
         )
         self.profile = {}
         
+        # Contador de versão do perfil; o prompt de sistema é memoizado por ele
+        self.version = 0
+        self.prompt_builder = SystemPromptBuilder()
+        
         # Criar diretório de perfis se não existir
         os.makedirs(os.path.dirname(self.profile_path), exist_ok=True)
         
@@ -78,6 +84,7 @@ class PersonalityManager:
                 "response_format": "voice_and_text"
             }
         }
+        self.version += 1
         
         logger.info("Perfil padrão criado")
     
@@ -91,6 +98,7 @@ class PersonalityManager:
         try:
             with open(self.profile_path, 'r', encoding='utf-8') as f:
                 self.profile = json.load(f)
+            self.version += 1
             
             logger.info(f"Perfil carregado: {self.profile.get('name', 'Sem nome')}")
             return True
@@ -109,6 +117,7 @@ class PersonalityManager:
         try:
             # Atualizar timestamp
             self.profile["updated_at"] = datetime.now().isoformat()
+            self.version += 1
             
             with open(self.profile_path, 'w', encoding='utf-8') as f:
                 json.dump(self.profile, f, ensure_ascii=False, indent=2)
@@ -440,52 +449,21 @@ class PersonalityManager:
         """
         Constrói o prompt de sistema com base na personalidade.
         
+        O prompt é memoizado pela versão do perfil e só é reconstruído
+        quando o perfil é alterado.
+        
         Returns:
             Prompt de sistema formatado
         """
-        name = self.profile.get("name", "Nina")
-        personality = self.get_personality()
-        
-        speech_style = personality.get("speech_style", "amigável")
-        preferences = personality.get("preferences", [])
-        mood = personality.get("mood", "neutro")
-        description = personality.get("description", "Assistente de IA amigável e prestativa")
-        
-        # Construir descrição de preferências
-        prefs_text = ""
-        if preferences:
-            prefs_text = "Você gosta de falar sobre " + ", ".join(preferences) + ". "
-        
-        # Construir descrição de estilo de fala
-        style_text = ""
-        if speech_style == "formal":
-            style_text = "Você fala de maneira formal e educada. "
-        elif speech_style == "casual":
-            style_text = "Você fala de maneira casual e descontraída. "
-        elif speech_style == "amigável":
-            style_text = "Você fala de maneira amigável e calorosa. "
-        elif speech_style == "técnico":
-            style_text = "Você fala de maneira técnica e precisa. "
-        
-        # Construir descrição de humor
-        mood_text = ""
-        if mood == "alegre":
-            mood_text = "Seu humor atual é alegre e otimista. "
-        elif mood == "sério":
-            mood_text = "Seu humor atual é sério e focado. "
-        elif mood == "neutro":
-            mood_text = "Seu humor atual é neutro e equilibrado. "
-        elif mood == "reflexivo":
-            mood_text = "Seu humor atual é reflexivo e contemplativo. "
+        prompt, _ = self.prompt_builder.build(self.profile, self.version)
+        return prompt
+    
+    def get_system_prompt_hash(self) -> str:
+        """
+        Obtém o hash estável do prompt de sistema atual.
         
-        # Montar prompt completo
-        system_prompt = (
-            f"Você é {name}, uma assistente de inteligência artificial. " +
-            f"{description}. " +
-            f"{style_text}" +
-            f"{mood_text}" +
-            f"{prefs_text}" +
-            "Você responde de forma clara e concisa, " +
-            "evitando repetições e usando linguagem simples."
-        )
-        return system_prompt
\ No newline at end of file
+        Returns:
+            Hash do prompt, usado para reuso de prefixo e cache de respostas
+        """
+        _, prompt_hash = self.prompt_builder.build(self.profile, self.version)
+        return prompt_hash
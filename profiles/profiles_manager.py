@@ -245,6 +245,15 @@ class ProfilesManager:
             Prompt de sistema formatado
         """
         return self.personality_manager.build_system_prompt()
+    
+    def get_system_prompt_hash(self) -> str:
+        """
+        Obtém o hash estável do prompt de sistema do perfil ativo.
+        
+        Returns:
+            Hash do prompt de sistema
+        """
+        return self.personality_manager.get_system_prompt_hash()
 
 
 if __name__ == "__main__":
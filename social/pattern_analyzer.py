@@ -4,7 +4,10 @@ Implementa funcionalidades para análise de sentimentos, extração de tópicos
 """
 
 import re
+import json
+import hashlib
 import logging
+from bisect import bisect_right
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 
@@ -19,6 +22,39 @@ logging.basicConfig(
 )
 logger = logging.getLogger("PatternAnalyzer")
 
+
+def _trie_pattern(terms: List[str]) -> str:
+    """
+    Gera uma expressão regular em forma de árvore de prefixos para uma lista de termos.
+    
+    Termos com prefixo comum compartilham o mesmo ramo ("jog(?:o|ar)"), então em
+    cada posição do texto o motor de regex testa poucos caracteres em vez de
+    tentar todas as alternativas. Em cada posição casa o termo mais longo.
+    
+    Args:
+        terms: Termos literais
+        
+    Returns:
+        Padrão de expressão regular (sem grupo externo)
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Termo que termina aqui: o restante é opcional (guloso, prefere o termo mais longo)
+        return f"(?:{body})?" if "" in node else body
+    
+    return build(trie)
+
+
 class PatternAnalyzer:
     """
     Classe para análise de padrões em mensagens e interações.
@@ -70,8 +106,163 @@ class PatternAnalyzer:
             r"basicamente"
         ]
         
+        # Pesos de cada emoção no cálculo do sentimento
+        self.emotion_weights = {"feliz": 0.5, "triste": -0.3, "bravo": -0.5, "neutro": 0.0}
+        
+        # Compilar o reconhecedor único de palavras-chave
+        self.rebuild_matcher()
+        
         logger.info("Analisador de padrões inicializado")
     
+    def get_rules(self) -> Dict[str, Any]:
+        """
+        Obtém as palavras-chave e pesos usados na análise.
+        
+        Returns:
+            Dicionário serializável com as regras (aceito por set_rules)
+        """
+        return {
+            "topic_keywords": self.topic_keywords,
+            "emotion_keywords": self.emotion_keywords,
+            "emotion_weights": self.emotion_weights,
+            "common_expressions": self.common_expressions
+        }
+    
+    def set_rules(self, rules: Dict[str, Any]) -> None:
+        """
+        Substitui as palavras-chave e pesos e recompila o reconhecedor.
+        
+        Args:
+            rules: Regras no formato de get_rules (chaves ausentes são mantidas)
+        """
+        for name in ("topic_keywords", "emotion_keywords", "emotion_weights", "common_expressions"):
+            if name in rules:
+                setattr(self, name, rules[name])
+        self.rebuild_matcher()
+    
+    def fingerprint(self) -> str:
+        """
+        Calcula uma assinatura das regras atuais (muda quando as palavras-chave mudam).
+        
+        Returns:
+            Hash hexadecimal das regras
+        """
+        data = json.dumps(self.get_rules(), sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(data.encode("utf-8")).hexdigest()
+    
+    def rebuild_matcher(self) -> None:
+        """
+        Compila todas as palavras-chave de tópicos, emoções e expressões em uma
+        única expressão regular, percorrida uma só vez por mensagem.
+        
+        Deve ser chamado novamente se as listas de palavras-chave forem alteradas.
+        """
+        # Termo -> categorias em que aparece (um termo pode estar em várias)
+        self._term_categories = {}
+        for kind, groups in (("topic", self.topic_keywords), ("emotion", self.emotion_keywords)):
+            for label, keywords in groups.items():
+                for keyword in keywords:
+                    self._term_categories.setdefault(keyword, []).append((kind, label))
+        for expression in self.common_expressions:
+            self._term_categories.setdefault(expression, []).append(("expression", expression))
+        
+        terms = list(self._term_categories)
+        
+        # O lookahead encontra ocorrências sobrepostas (ex.: "feliz" dentro de "infeliz"),
+        # como as buscas por substring feitas termo a termo. Em cada posição vence o
+        # termo mais longo; os termos que são prefixo dele também ocorrem ali.
+        self._matcher = re.compile("(?=(" + _trie_pattern(terms) + "))")
+        self._term_prefixes = {
+            term: [other for other in terms if term.startswith(other)]
+            for term in terms
+        }
+        
+        # Termo -> (posição na ordem de emotion_keywords, peso), para somar na ordem original
+        self._emotion_entries = {}
+        position = 0
+        for emotion, keywords in self.emotion_keywords.items():
+            for keyword in keywords:
+                self._emotion_entries.setdefault(keyword, []).append((position, self.emotion_weights.get(emotion, 0.0)))
+                position += 1
+        self._topic_order = {topic: i for i, topic in enumerate(self.topic_keywords)}
+        self._expression_order = {expression: i for i, expression in enumerate(self.common_expressions)}
+    
+    def _count_terms(self, text: str) -> Dict[str, int]:
+        """
+        Conta as ocorrências de cada palavra-chave em um único passe pelo texto.
+        
+        Ocorrências sobrepostas do mesmo termo contam uma vez, como em str.count.
+        
+        Args:
+            text: Texto a ser analisado
+            
+        Returns:
+            Dicionário termo -> número de ocorrências
+        """
+        counts = {}
+        last_end = {}
+        term_prefixes = self._term_prefixes
+        
+        for match in self._matcher.finditer(text):
+            position = match.start()
+            for term in term_prefixes[match.group(1)]:
+                if last_end.get(term, -1) > position:
+                    continue
+                last_end[term] = position + len(term)
+                counts[term] = counts.get(term, 0) + 1
+        
+        return counts
+    
+    def _sentiment_from_counts(self, counts: Dict[str, int]) -> float:
+        """
+        Calcula a pontuação de sentimento a partir das contagens de termos.
+        """
+        score = 0.0
+        word_count = 0
+        
+        entries = []
+        for term, count in counts.items():
+            for position, weight in self._emotion_entries.get(term, ()):
+                entries.append((position, count, weight))
+        
+        # Mesma ordem de soma da contagem termo a termo (resultado idêntico)
+        entries.sort()
+        for _, count, weight in entries:
+            score += count * weight
+            word_count += count
+        
+        # Normalizar score
+        if word_count > 0:
+            score = max(-1.0, min(1.0, score / word_count))
+        
+        return score
+    
+    def _topics_from_counts(self, counts: Dict[str, int]) -> List[str]:
+        """
+        Obtém os tópicos (na ordem de topic_keywords) a partir das contagens de termos.
+        """
+        topics = {label for term in counts for kind, label in self._term_categories[term] if kind == "topic"}
+        return sorted(topics, key=self._topic_order.__getitem__)
+    
+    def _expressions_from_counts(self, counts: Dict[str, int]) -> List[str]:
+        """
+        Obtém as expressões (na ordem de common_expressions) a partir das contagens de termos.
+        """
+        expressions = {label for term in counts for kind, label in self._term_categories[term] if kind == "expression"}
+        return sorted(expressions, key=self._expression_order.__getitem__)
+    
+    def _analysis_from_counts(self, text: str, counts: Dict[str, int]) -> Dict[str, Any]:
+        """
+        Monta o resultado de analyze_message a partir das contagens de termos.
+        """
+        return {
+            "sentiment": self._sentiment_from_counts(counts),
+            "topics": self._topics_from_counts(counts),
+            "expressions": self._expressions_from_counts(counts),
+            "word_count": len(text.split()),
+            "char_count": len(text)
+        }
+    
     def analyze_message(self, content: str) -> Dict[str, Any]:
         """
         Analisa uma mensagem para extrair informações relevantes.
@@ -86,26 +277,8 @@ class PatternAnalyzer:
             # Converter para minúsculas
             text = content.lower()
             
-            # Analisar sentimento
-            sentiment = self.analyze_sentiment(text)
-            
-            # Extrair tópicos
-            topics = self.extract_topics(text)
-            
-            # Detectar expressões
-            expressions = self.detect_expressions(text)
-            
-            # Calcular estatísticas básicas
-            word_count = len(text.split())
-            char_count = len(text)
-            
-            return {
-                "sentiment": sentiment,
-                "topics": topics,
-                "expressions": expressions,
-                "word_count": word_count,
-                "char_count": char_count
-            }
+            # Sentimento, tópicos e expressões saem de um único passe pelo texto
+            return self._analysis_from_counts(text, self._count_terms(text))
         except Exception as e:
             logger.error(f"Erro ao analisar mensagem: {e}")
             return {
@@ -116,6 +289,52 @@ class PatternAnalyzer:
                 "char_count": 0
             }
     
+    def analyze_messages(self, messages: List[str]) -> List[Dict[str, Any]]:
+        """
+        Analisa várias mensagens de uma vez.
+        
+        As mensagens são unidas em um único texto e percorridas por uma única
+        busca; cada ocorrência é atribuída à sua mensagem pela posição.
+        
+        Args:
+            messages: Lista de conteúdos de mensagens
+            
+        Returns:
+            Lista de resultados, na mesma ordem e formato de analyze_message
+        """
+        try:
+            texts = [(content or "").lower() for content in messages]
+            if not texts:
+                return []
+            
+            # Quebras de linha separam as mensagens (nenhuma palavra-chave as contém)
+            starts = []
+            position = 0
+            for text in texts:
+                starts.append(position)
+                position += len(text) + 1
+            joined = "\n".join(texts)
+            
+            counts = [{} for _ in texts]
+            last_end = [{} for _ in texts]
+            term_prefixes = self._term_prefixes
+            
+            for match in self._matcher.finditer(joined):
+                position = match.start()
+                index = bisect_right(starts, position) - 1
+                message_counts = counts[index]
+                message_last_end = last_end[index]
+                for term in term_prefixes[match.group(1)]:
+                    if message_last_end.get(term, -1) > position:
+                        continue
+                    message_last_end[term] = position + len(term)
+                    message_counts[term] = message_counts.get(term, 0) + 1
+            
+            return [self._analysis_from_counts(text, message_counts) for text, message_counts in zip(texts, counts)]
+        except Exception as e:
+            logger.error(f"Erro ao analisar mensagens: {e}")
+            return [self.analyze_message(content or "") for content in messages]
+    
     def analyze_sentiment(self, text: str) -> float:
         """
         Analisa o sentimento de um texto.
@@ -129,28 +348,7 @@ class PatternAnalyzer:
         try:
             # Implementação simples baseada em palavras-chave
             # Em uma implementação real, usaríamos um modelo de ML
-            
-            score = 0.0
-            word_count = 0
-            
-            # Contar ocorrências de palavras-chave de emoções
-            for emotion, keywords in self.emotion_keywords.items():
-                for keyword in keywords:
-                    count = text.count(keyword)
-                    if count > 0:
-                        if emotion == "feliz":
-                            score += count * 0.5
-                        elif emotion == "triste":
-                            score -= count * 0.3
-                        elif emotion == "bravo":
-                            score -= count * 0.5
-                        word_count += count
-            
-            # Normalizar score
-            if word_count > 0:
-                score = max(-1.0, min(1.0, score / word_count))
-            
-            return score
+            return self._sentiment_from_counts(self._count_terms(text))
         except Exception as e:
             logger.error(f"Erro ao analisar sentimento: {e}")
             return 0.0
@@ -166,17 +364,7 @@ class PatternAnalyzer:
             Lista de tópicos identificados
         """
         try:
-            topics = []
-            
-            # Verificar ocorrências de palavras-chave de tópicos
-            for topic, keywords in self.topic_keywords.items():
-                for keyword in keywords:
-                    if keyword in text:
-                        if topic not in topics:
-                            topics.append(topic)
-                        break
-            
-            return topics
+            return self._topics_from_counts(self._count_terms(text))
         except Exception as e:
             logger.error(f"Erro ao extrair tópicos: {e}")
             return []
@@ -192,17 +380,7 @@ class PatternAnalyzer:
             Lista de expressões identificadas
         """
         try:
-            expressions = []
-            
-            # Verificar ocorrências de expressões comuns
-            for expression_pattern in self.common_expressions:
-                matches = re.findall(expression_pattern, text)
-                if matches:
-                    for match in matches:
-                        if match not in expressions:
-                            expressions.append(match)
-            
-            return expressions
+            return self._expressions_from_counts(self._count_terms(text))
         except Exception as e:
             logger.error(f"Erro ao detectar expressões: {e}")
             return []
@@ -221,8 +399,8 @@ class PatternAnalyzer:
             if not messages:
                 return {}
             
-            # Analisar cada mensagem
-            analyses = [self.analyze_message(msg) for msg in messages]
+            # Analisar todas as mensagens em um único passe
+            analyses = self.analyze_messages(messages)
             
             # Calcular média de sentimento
             sentiment_scores = [a["sentiment"] for a in analyses]
@@ -295,8 +473,8 @@ class PatternAnalyzer:
             if not messages:
                 return {}
             
-            # Analisar cada mensagem
-            analyses = [self.analyze_message(msg["content"]) for msg in messages]
+            # Analisar todas as mensagens em um único passe
+            analyses = self.analyze_messages([msg["content"] for msg in messages])
             
             # Calcular média de sentimento
             sentiment_scores = [a["sentiment"] for a in analyses]
@@ -427,5 +605,65 @@ class PatternAnalyzer:
                 "humor_level": 50,
                 "technicality_level": 50
             } # Adicionado fechamento da chave
-
-(Content truncated due to size limit. Use line ranges to read in chunks)
\ No newline at end of file
+    
+    def suggest_nina_personality(self, channel_pattern: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Sugere configurações de personalidade para a Nina com base no padrão de um canal.
+        
+        Args:
+            channel_pattern: Resultado de analyze_channel_pattern
+            
+        Returns:
+            Dicionário com configurações de personalidade sugeridas
+        """
+        try:
+            if not channel_pattern:
+                return {
+                    "formality_level": 50,
+                    "humor_level": 50,
+                    "technicality_level": 50,
+                    "response_speed": "médio",
+                    "verbosity": "médio"
+                }
+            
+            avg_sentiment = channel_pattern.get("average_sentiment", 0.0)
+            avg_word_count = channel_pattern.get("average_word_count", 0)
+            
+            # Formalidade acompanha o tom predominante do canal
+            tone = channel_pattern.get("predominant_tone", "neutro")
+            formality = {"formal": 70, "informal": 30}.get(tone, 50)
+            
+            # Humor acompanha o sentimento médio
+            humor = 50 + (avg_sentiment * 50)
+            
+            # Tecnicidade baseada nos tópicos do canal
+            technicality = 50
+            technical_topics = ["tecnologia", "educação", "política", "trabalho"]
+            for topic in channel_pattern.get("top_topics", []):
+                if topic in technical_topics:
+                    technicality += 10
+            
+            # Canais de mensagens curtas pedem respostas rápidas e curtas
+            if avg_word_count < 8:
+                response_speed, verbosity = "rápido", "baixo"
+            elif avg_word_count > 20:
+                response_speed, verbosity = "lento", "alto"
+            else:
+                response_speed, verbosity = "médio", "médio"
+            
+            return {
+                "formality_level": int(max(0, min(100, formality))),
+                "humor_level": int(max(0, min(100, humor))),
+                "technicality_level": int(max(0, min(100, technicality))),
+                "response_speed": response_speed,
+                "verbosity": verbosity
+            }
+        except Exception as e:
+            logger.error(f"Erro ao sugerir personalidade da Nina: {e}")
+            return {
+                "formality_level": 50,
+                "humor_level": 50,
+                "technicality_level": 50,
+                "response_speed": "médio",
+                "verbosity": "médio"
+            }
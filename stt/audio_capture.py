@@ -5,11 +5,15 @@ Parte do projeto Nina IA para captura de entrada de voz.
 
 import os
 import wave
+import queue
 import tempfile
+from contextlib import contextmanager
 import sounddevice as sd
 import soundfile as sf
 import numpy as np
-from typing import Optional, Tuple, Union
+from typing import Optional, Tuple, Union, Iterator
+
+from core.tracing import traced
 
 class AudioCapture:
     """
@@ -76,6 +80,7 @@ class AudioCapture:
             return self.audio_data
         return None
     
+    @traced("stt.record")
     def record_to_file(self, 
                        file_path: str, 
                        duration: float,
@@ -104,11 +109,41 @@ class AudioCapture:
         print(f"Áudio gravado em: {file_path}")
         return file_path
     
+    @contextmanager
+    def stream_chunks(self, chunk_duration: float) -> Iterator["queue.Queue"]:
+        """
+        Captura o microfone continuamente, entregando trechos numa fila.
+        
+        A gravação é feita pelo callback do InputStream, então o áudio não se
+        perde enquanto quem consome a fila está ocupado.
+        
+        Args:
+            chunk_duration: Duração de cada trecho em segundos
+            
+        Yields:
+            Fila com os trechos gravados (arrays numpy), em ordem
+        """
+        chunks = queue.Queue()
+        
+        def callback(indata, frames, time_info, status):
+            chunks.put(indata.copy())
+        
+        with sd.InputStream(samplerate=self.sample_rate,
+                            channels=self.channels,
+                            device=self.device,
+                            blocksize=int(chunk_duration * self.sample_rate),
+                            callback=callback):
+            yield chunks
+    
     def record_temp_file(self, 
                          duration: float,
                          format: str = 'wav') -> str:
         """
-        Grava áudio para um arquivo temporário.
+        Grava áudio para um arquivo temporário novo a cada chamada.
+        
+        Cada gravação tem o próprio arquivo, então uma captura não sobrescreve
+        o áudio de um turno que ainda espera a transcrição; quem consome o
+        arquivo é responsável por removê-lo.
         
         Args:
             duration: Duração da gravação em segundos
@@ -117,9 +152,13 @@ class AudioCapture:
         Returns:
             Caminho do arquivo temporário
         """
-        temp_dir = tempfile.gettempdir()
-        temp_file = os.path.join(temp_dir, f"nina_recording_{os.getpid()}.{format}")
-        return self.record_to_file(temp_file, duration, format)
+        fd, temp_file = tempfile.mkstemp(prefix=f"nina_recording_{os.getpid()}_", suffix=f".{format}")
+        os.close(fd)
+        try:
+            return self.record_to_file(temp_file, duration, format)
+        except BaseException:
+            os.unlink(temp_file)
+            raise
     
     def is_silent(self, 
                   audio_data: np.ndarray, 
@@ -136,6 +175,7 @@ class AudioCapture:
         """
         return np.max(np.abs(audio_data)) < threshold
     
+    @traced("stt.wait_for_speech")
     def wait_for_speech(self, 
                         timeout: float = 10.0, 
                         silence_threshold: float = 0.03,
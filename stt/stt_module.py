@@ -6,7 +6,8 @@ Integra a captura de áudio e transcrição.
 import os
 import time
 import logging
-from typing import Optional, Dict, Any, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Tuple, Union, Callable
 import numpy as np
 
 from .audio_capture import AudioCapture
@@ -79,6 +80,26 @@ class STTModule:
         Returns:
             Tuple contendo (texto transcrito, informações adicionais)
         """
+        audio_file = self.record_utterance(max_duration=max_duration, wait_timeout=wait_timeout)
+        
+        if not audio_file:
+            return "", {"error": "no_speech_detected"}
+        
+        return self.transcribe_utterance(audio_file)
+    
+    def record_utterance(self, 
+                         max_duration: float = 30.0,
+                         wait_timeout: float = 5.0) -> Optional[str]:
+        """
+        Espera por fala e grava o trecho em um arquivo temporário (etapa de captura).
+        
+        Args:
+            max_duration: Duração máxima da gravação em segundos
+            wait_timeout: Tempo máximo de espera por fala em segundos
+            
+        Returns:
+            Caminho do arquivo gravado ou None se nenhuma fala foi detectada
+        """
         logger.info("Aguardando fala...")
         
         # Esperar por atividade de voz
@@ -89,27 +110,128 @@ class STTModule:
         
         if not speech_detected:
             logger.info("Nenhuma fala detectada no timeout")
-            return "", {"error": "no_speech_detected"}
+            return None
         
         # Gravar áudio em arquivo temporário
         logger.info(f"Fala detectada, gravando por até {max_duration} segundos...")
-        temp_file = self.audio_capture.record_temp_file(max_duration)
+        return self.audio_capture.record_temp_file(max_duration)
+    
+    def transcribe_utterance(self, audio_file: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Transcreve um trecho gravado por `record_utterance` e remove o arquivo (etapa de transcrição).
         
-        # Transcrever o áudio
+        Args:
+            audio_file: Caminho do arquivo temporário
+            
+        Returns:
+            Tuple contendo (texto transcrito, informações adicionais)
+        """
         try:
-            text, info = self.transcriber.transcribe_file(temp_file)
+            text, info = self.transcriber.transcribe_file(audio_file)
             return text, info
         except Exception as e:
             logger.error(f"Erro na transcrição: {e}")
             return "", {"error": str(e)}
         finally:
-            # Limpar arquivo temporário
-            if os.path.exists(temp_file):
+            # Remover apenas o arquivo deste turno (cada gravação tem o seu)
+            if os.path.exists(audio_file):
                 try:
-                    os.unlink(temp_file)
+                    os.unlink(audio_file)
                 except:
                     pass
     
+    def listen_and_transcribe_incremental(self, 
+                                          on_partial: Optional[Callable[[str], None]] = None,
+                                          max_duration: float = 30.0,
+                                          wait_timeout: float = 5.0,
+                                          partial_interval: float = 1.0,
+                                          partial_window: float = 8.0,
+                                          chunk_duration: float = 0.1) -> Tuple[str, Dict[str, Any]]:
+        """
+        Escuta o microfone continuamente, publicando transcrições parciais.
+        
+        O áudio é capturado pelo callback do stream de entrada e as parciais
+        são decodificadas numa thread separada, então a gravação não para
+        durante a decodificação. Cada parcial decodifica no máximo
+        `partial_window` segundos: o áudio que sai da janela é transcrito uma
+        única vez e seu texto é mantido como prefixo das parciais seguintes.
+        Uma parcial só é iniciada quando a anterior terminou.
+        
+        A gravação termina após `silence_duration` segundos de silêncio ou ao
+        atingir `max_duration`; a transcrição final usa o áudio completo.
+        
+        Args:
+            on_partial: Função chamada com cada transcrição parcial (opcional, na thread da captura)
+            max_duration: Duração máxima da gravação em segundos
+            wait_timeout: Tempo máximo de espera por fala em segundos
+            partial_interval: Intervalo mínimo entre transcrições parciais em segundos
+            partial_window: Áudio máximo decodificado por transcrição parcial em segundos
+            chunk_duration: Duração de cada trecho lido do microfone em segundos
+            
+        Returns:
+            Tuple contendo (texto transcrito final, informações adicionais)
+        """
+        logger.info("Aguardando fala...")
+        
+        chunks = []
+        recorded = 0.0
+        silence = 0.0
+        since_partial = 0.0
+        partials = _PartialDecoder(self, max(1, int(round(partial_window / chunk_duration))))
+        # Trechos anteriores à detecção de fala, para não cortar o início da fala
+        pre_roll = max(1, int(round(0.3 / chunk_duration)))
+        
+        try:
+            with self.audio_capture.stream_chunks(chunk_duration) as stream:
+                # Esperar por atividade de voz no mesmo stream (sem lacuna até a gravação)
+                waited = 0.0
+                while True:
+                    chunk = stream.get(timeout=max(1.0, 10 * chunk_duration))
+                    chunks = (chunks + [chunk])[-pre_roll:]
+                    if not self.audio_capture.is_silent(chunk, self.vad_threshold):
+                        break
+                    waited += chunk_duration
+                    if waited >= wait_timeout:
+                        logger.info("Nenhuma fala detectada no timeout")
+                        return "", {"error": "no_speech_detected"}
+                
+                logger.info(f"Fala detectada, gravando por até {max_duration} segundos...")
+                recorded = len(chunks) * chunk_duration
+                
+                while recorded < max_duration:
+                    chunk = stream.get(timeout=max(1.0, 10 * chunk_duration))
+                    chunks.append(chunk)
+                    recorded += chunk_duration
+                    since_partial += chunk_duration
+                    
+                    if self.audio_capture.is_silent(chunk, self.vad_threshold):
+                        silence += chunk_duration
+                        if silence >= self.silence_duration:
+                            break
+                    else:
+                        silence = 0.0
+                    
+                    if on_partial:
+                        partial_text = partials.poll()
+                        if partial_text:
+                            on_partial(partial_text)
+                        if since_partial >= partial_interval and partials.submit(chunks):
+                            since_partial = 0.0
+            
+            partials.close()
+            text, info = self.transcriber.transcribe_array(
+                np.concatenate(chunks),
+                sample_rate=self.sample_rate,
+                language=self.language
+            )
+            info["recorded_duration"] = recorded
+            return text, info
+        except Exception as e:
+            logger.error(f"Erro na transcrição: {e}")
+            return "", {"error": str(e)}
+        finally:
+            partials.close()
+    
     def transcribe_file(self, 
                         audio_path: str,
                         language: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
@@ -161,6 +283,85 @@ class STTModule:
             logger.info("Escuta contínua finalizada")
 
 
+class _PartialDecoder:
+    """
+    Decodifica transcrições parciais numa thread, sobre uma janela limitada.
+    
+    O estado (prefixo já transcrito e início da janela) só é usado pela thread
+    de decodificação, que executa uma parcial por vez.
+    """
+    
+    def __init__(self, stt: STTModule, window_chunks: int):
+        """
+        Args:
+            stt: Módulo STT (transcritor, taxa de amostragem e idioma)
+            window_chunks: Trechos decodificados no máximo por parcial
+        """
+        self.stt = stt
+        self.window_chunks = window_chunks
+        self.prefix = ""
+        self.anchor = 0  # Primeiro trecho ainda não incluído no prefixo
+        self._executor = None
+        self._future = None
+    
+    def submit(self, chunks: list) -> bool:
+        """
+        Agenda uma parcial sobre os trechos atuais, se nenhuma estiver em andamento.
+        
+        Returns:
+            True se a parcial foi agendada
+        """
+        if self._future is not None:
+            return False
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="nina-stt-partial")
+        # Cópia rasa: a lista continua crescendo na thread da captura
+        self._future = self._executor.submit(self._decode, list(chunks))
+        return True
+    
+    def poll(self) -> Optional[str]:
+        """
+        Obtém o resultado da parcial em andamento, se já terminou.
+        
+        Returns:
+            Texto parcial ou None se não há resultado novo
+        """
+        if self._future is None or not self._future.done():
+            return None
+        future, self._future = self._future, None
+        try:
+            return future.result()
+        except Exception as e:
+            logger.error(f"Erro na transcrição parcial: {e}")
+            return None
+    
+    def _decode(self, chunks: list) -> str:
+        # Quando a janela enche, a metade mais antiga é transcrita uma vez e vira prefixo
+        if len(chunks) - self.anchor > self.window_chunks:
+            new_anchor = len(chunks) - self.window_chunks // 2
+            self.prefix = " ".join(filter(None, [self.prefix, self._transcribe(chunks[self.anchor:new_anchor])]))
+            self.anchor = new_anchor
+        tail = self._transcribe(chunks[self.anchor:])
+        return " ".join(filter(None, [self.prefix, tail]))
+    
+    def _transcribe(self, chunks: list) -> str:
+        text, _ = self.stt.transcriber.transcribe_array(
+            np.concatenate(chunks),
+            sample_rate=self.stt.sample_rate,
+            language=self.stt.language
+        )
+        return text.strip()
+    
+    def close(self) -> None:
+        """
+        Descarta a parcial em andamento e libera a thread.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._future = None
+
+
 if __name__ == "__main__":
     # Exemplo de uso
     def print_transcription(text, info):
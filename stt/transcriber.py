@@ -8,6 +8,8 @@ import logging
 from typing import Optional, Dict, Any, List, Tuple, Union
 import numpy as np
 
+from core.tracing import traced
+
 # Configuração de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -78,6 +80,7 @@ class WhisperTranscriber:
             logger.error(f"Erro ao inicializar modelo Whisper: {e}")
             raise
     
+    @traced("stt.transcribe_file")
     def transcribe_file(self, 
                         audio_path: str, 
                         language: Optional[str] = None,
@@ -141,6 +144,7 @@ class WhisperTranscriber:
             logger.error(f"Erro ao transcrever áudio: {e}")
             raise
     
+    @traced("stt.transcribe_array")
     def transcribe_array(self, 
                          audio_array: np.ndarray,
                          sample_rate: int = 16000,
@@ -137,6 +137,253 @@ class TestLLMModule(unittest.TestCase):
         self.assertEqual(response, "Resposta gerada pelo modelo")
 
 
+class TestConversationManager(unittest.TestCase):
+    """
+    Testes para a janela de histórico limitada por tokens.
+    """
+    
+    def test_token_window_keeps_recent_messages(self):
+        """
+        Testa se mensagens longas saem da janela pelo orçamento de tokens.
+        """
+        from llm.llm_processor import ConversationManager
+        from llm.token_budget import TokenBudget, estimate_message_tokens
+        
+        budget = TokenBudget(context_tokens=400, response_tokens=100, summary_ratio=0.0)
+        manager = ConversationManager(token_budget=budget)
+        
+        manager.add_message("system", "Você é a Nina.")
+        for i in range(20):
+            manager.add_message("user", f"mensagem {i} " + "palavra " * 30)
+        
+        messages = manager.get_conversation_messages()
+        
+        # A janela respeita o orçamento e mantém a mensagem mais recente
+        used = sum(estimate_message_tokens(msg) for msg in messages)
+        self.assertLessEqual(used, budget.history_tokens)
+        self.assertTrue(messages[-1]["content"].startswith("mensagem 19"))
+        self.assertLess(len(messages), 20)
+        
+        # A mensagem de sistema não é removida pela janela
+        self.assertEqual(manager.get_system_message(), "Você é a Nina.")
+    
+    def test_evicted_messages_are_summarized(self):
+        """
+        Testa o resumo em segundo plano das mensagens removidas.
+        """
+        from llm.llm_processor import ConversationManager
+        from llm.token_budget import TokenBudget
+        
+        summarized = []
+        
+        def summarizer(previous_summary, messages):
+            summarized.extend(messages)
+            return (previous_summary + " " + " ".join(m["content"].split()[0] for m in messages)).strip()
+        
+        budget = TokenBudget(context_tokens=300, response_tokens=100)
+        manager = ConversationManager(token_budget=budget, summarizer=summarizer)
+        
+        for i in range(10):
+            manager.add_message("user", "olá " * 40)
+        
+        self.assertTrue(manager.wait_for_summary(timeout=5.0))
+        
+        # Todas as mensagens removidas foram resumidas e o resumo entra no prompt
+        kept = len(manager.get_conversation_messages())
+        self.assertEqual(len(summarized) + kept, 10)
+        self.assertTrue(manager.get_running_summary())
+        self.assertIn(manager.get_running_summary(), manager.build_system_prompt())
+    
+    def test_conversation_log_is_append_only(self):
+        """
+        Testa o diário append-only: persistência, recuperação e compactação.
+        """
+        import tempfile
+        from llm.llm_processor import ConversationManager
+        from llm.conversation_log import ConversationLog
+        from llm.token_budget import TokenBudget
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "conversation.jsonl")
+            budget = TokenBudget(context_tokens=300, response_tokens=100, summary_ratio=0.0)
+            
+            manager = ConversationManager(conversation_file=path, token_budget=budget)
+            manager.add_message("system", "Você é a Nina.")
+            for i in range(30):
+                manager.add_message("user", f"mensagem {i} " + "palavra " * 10)
+            manager.flush()
+            
+            # Cada alteração acrescenta uma linha, sem reescrever o arquivo
+            with open(path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+            self.assertGreater(len(lines), 31)
+            
+            # Uma gravação interrompida no fim do arquivo é descartada na carga
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write('{"op": "message", "message": {"role": "us')
+            
+            reloaded = ConversationManager(conversation_file=path, token_budget=budget)
+            self.assertEqual(reloaded.get_conversation_messages(), manager.get_conversation_messages())
+            self.assertEqual(reloaded.get_system_message(), "Você é a Nina.")
+            
+            # A compactação mantém apenas o estado atual
+            log = ConversationLog(path)
+            history, summary = log.load()
+            log.compact(history, summary)
+            with open(path, 'r', encoding='utf-8') as f:
+                self.assertEqual(len(f.readlines()), len(history))
+
+
+class TestSpeculativeGenerator(unittest.TestCase):
+    """
+    Testes para a geração especulativa sobre transcrições parciais.
+    """
+    
+    def test_stable_partial_is_reused(self):
+        """
+        Testa se a resposta especulada é aproveitada quando a transcrição final confere.
+        """
+        from core.speculative import SpeculativeGenerator
+        
+        calls = []
+        
+        def generate(text, cancel_event):
+            calls.append(text)
+            return f"resposta para: {text}"
+        
+        speculator = SpeculativeGenerator(generate, divergence_threshold=0.2)
+        speculator.on_partial("qual build eu faço")
+        speculator.on_partial("qual build eu faço")
+        
+        response = speculator.resolve("qual build eu faço agora", timeout=5.0)
+        
+        self.assertEqual(response, "resposta para: qual build eu faço")
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(speculator.get_stats()["hits"], 1)
+    
+    def test_divergent_transcript_is_discarded(self):
+        """
+        Testa o cancelamento e a contabilização do tempo desperdiçado na divergência.
+        """
+        import time
+        import threading
+        from core.speculative import SpeculativeGenerator
+        
+        started = threading.Event()
+        
+        def generate(text, cancel_event):
+            started.set()
+            cancel_event.wait(5.0)
+            return None
+        
+        speculator = SpeculativeGenerator(generate, divergence_threshold=0.2)
+        speculator.on_partial("vamos para o dragão")
+        speculator.on_partial("vamos para o dragão")
+        self.assertTrue(started.wait(5.0))
+        time.sleep(0.01)
+        
+        response = speculator.resolve("não vamos para o barão agora, recua")
+        stats = speculator.get_stats()
+        
+        self.assertIsNone(response)
+        self.assertEqual(stats["misses"], 1)
+        self.assertGreater(stats["wasted_seconds"], 0.0)
+
+
+class TestModelRouter(unittest.TestCase):
+    """
+    Testes para o roteamento de modelos por classe de requisição.
+    """
+    
+    def _make_router(self, client):
+        from llm.model_router import ModelRouter
+        
+        client.list_models.return_value = [{"name": "mistral:latest"}, {"name": "rapido:latest"}]
+        return ModelRouter(
+            client,
+            default_model="mistral",
+            fast_model="rapido",
+            classes={
+                "callout": {"model": "rapido", "slo_ms": 1000},
+                "report": {"model": "grande", "slo_ms": 1}
+            },
+            min_samples=1
+        )
+    
+    def test_routes_by_class_and_records_latency(self):
+        """
+        Testa a escolha do modelo por classe e os histogramas de latência.
+        """
+        client = MagicMock()
+        client.chat.return_value = {"message": {"content": "ok"}}
+        router = self._make_router(client)
+        
+        router.chat("callout", messages=[])
+        router.chat("chat", messages=[])
+        
+        models = [call.kwargs["model"] for call in client.chat.call_args_list]
+        self.assertEqual(models, ["rapido", "mistral"])
+        
+        stats = router.get_stats()
+        self.assertEqual(stats["callout"]["latency"]["count"], 1)
+        self.assertEqual(stats["chat"]["latency"]["count"], 1)
+        self.assertIn('nina_llm_latency_ms_count{class="chat"} 1', router.export_prometheus())
+    
+    def test_falls_back_to_fast_model(self):
+        """
+        Testa o desvio para o modelo rápido em caso de erro e de SLO estourado.
+        """
+        import time
+        
+        client = MagicMock()
+        
+        def chat(messages, model, timeout, **kwargs):
+            if model == "mistral":
+                return {"message": {"content": "Erro na conversa: timeout"}, "error": "timeout"}
+            time.sleep(0.005)
+            return {"message": {"content": f"resposta de {model}"}}
+        
+        client.chat.side_effect = chat
+        router = self._make_router(client)
+        
+        # Erro no modelo da classe: refeito no modelo rápido
+        response = router.chat("chat", messages=[])
+        self.assertEqual(response["message"]["content"], "resposta de rapido")
+        self.assertEqual(router.get_stats()["chat"]["fallbacks"], {"error": 1})
+        
+        # Latência acima do SLO: próximas requisições da classe vão para o modelo rápido
+        router.chat("report", messages=[])
+        self.assertEqual(router.select_model("report"), ("rapido", "slo"))
+        self.assertTrue(router.get_stats()["report"]["degraded"])
+    
+    def test_default_model_and_missing_fast_model(self):
+        """
+        Testa a troca do modelo padrão (com as classes fixadas nele) e o modelo rápido ausente do servidor.
+        """
+        from llm.model_router import ModelRouter
+        
+        client = MagicMock()
+        client.list_models.return_value = [{"name": "mistral:latest"}]
+        classes = {"callout": {"model": "llama3.2:3b"}, "reflection": {"model": "mistral"}}
+        router = ModelRouter(client, default_model="mistral", fast_model="llama3.2:3b", classes=classes)
+        
+        # Modelo rápido não baixado: classes e desvios usam o modelo padrão
+        self.assertEqual(router.fast_model, "mistral")
+        self.assertEqual(router.select_model("callout"), ("mistral", "configured"))
+        
+        # Trocar o modelo leva junto as classes sem modelo e as fixadas no anterior
+        router.set_default_model("llama3")
+        self.assertEqual(router.select_model("chat")[0], "llama3")
+        self.assertEqual(router.select_model("reflection")[0], "llama3")
+        self.assertEqual(classes["reflection"]["model"], "mistral")
+        
+        # Modelo baixado depois da última consulta: usado quando a consulta expira
+        client.list_models.return_value = [{"name": "llama3.2:3b"}]
+        router._fast_available = None
+        self.assertEqual(router.select_model("callout"), ("llama3.2:3b", "configured"))
+        self.assertEqual(client.list_models.call_count, 2)
+
+
 class TestTTSModule(unittest.TestCase):
     """
     Testes para o módulo TTS (Text to Speech).
@@ -286,6 +533,33 @@ class TestPersonalityManager(unittest.TestCase):
         self.assertIn("formal", prompt.lower())
         self.assertIn("sério", prompt.lower())
 
+    def test_system_prompt_is_memoized(self):
+        """
+        Testa a memoização do prompt pela versão do perfil e o hash estável.
+        """
+        from profiles.personality_manager import PersonalityManager
+        from llm.prompt_builder import render_system_prompt
+        
+        manager = PersonalityManager(self.profile_path)
+        
+        prompt = manager.build_system_prompt()
+        prompt_hash = manager.get_system_prompt_hash()
+        renders = manager.prompt_builder.renders
+        
+        # Sem alterações no perfil, o prompt não é reconstruído
+        self.assertEqual(manager.build_system_prompt(), prompt)
+        self.assertEqual(manager.prompt_builder.renders, renders)
+        
+        # O mesmo perfil gera o mesmo prompt e hash em qualquer componente
+        reloaded = PersonalityManager(self.profile_path)
+        self.assertEqual(reloaded.get_system_prompt_hash(), prompt_hash)
+        self.assertEqual(render_system_prompt(manager.get_profile()), prompt)
+        
+        # Alterar a personalidade gera um novo prompt
+        manager.set_mood("alegre")
+        self.assertIn("alegre", manager.build_system_prompt())
+        self.assertNotEqual(manager.get_system_prompt_hash(), prompt_hash)
+
 
 class TestMemoryManager(unittest.TestCase):
     """
@@ -372,6 +646,1498 @@ class TestMemoryManager(unittest.TestCase):
         self.assertEqual(preferencias, ["música", "tecnologia"])
 
 
+class TestMemoryDatabase(unittest.TestCase):
+    """
+    Testes para o banco de dados de memória e o pool de conexões.
+    """
+    
+    def setUp(self):
+        """
+        Configuração para cada teste individual.
+        """
+        import tempfile
+        self.test_dir = tempfile.mkdtemp(prefix="nina_memory_db_test_")
+        self.db_path = os.path.join(self.test_dir, "memory.db")
+    
+    def tearDown(self):
+        """
+        Limpeza após cada teste.
+        """
+        import shutil
+        from memory.connection_pool import close_all_pools
+        close_all_pools()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+    
+    def test_pool_reuses_connection_in_wal_mode(self):
+        """
+        Testa se cada thread reutiliza sua conexão e se o banco usa WAL.
+        """
+        import threading
+        from memory.connection_pool import get_pool
+        
+        pool = get_pool(self.db_path)
+        self.assertIs(pool, get_pool(self.db_path))
+        self.assertIs(pool.connection(), pool.connection())
+        self.assertEqual(pool.query_one("PRAGMA journal_mode")[0], "wal")
+        
+        other = []
+        thread = threading.Thread(target=lambda: other.append(pool.connection()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], pool.connection())
+        self.assertEqual(pool.get_stats()["connections"], 2)
+    
+    def test_pool_prunes_connections_of_finished_threads(self):
+        """
+        Testa se conexões de threads encerradas são fechadas ao abrir novas.
+        """
+        import sqlite3
+        import threading
+        from memory.connection_pool import get_pool
+        
+        pool = get_pool(self.db_path)
+        pool.connection()
+        finished = []
+        for _ in range(5):
+            thread = threading.Thread(target=lambda: finished.append(pool.connection()))
+            thread.start()
+            thread.join()
+        self.assertLessEqual(pool.get_stats()["connections"], 2)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            finished[0].execute("SELECT 1")
+    
+    def test_failed_commit_rolls_back(self):
+        """
+        Testa se uma falha no COMMIT desfaz a transação, sem prender a conexão nela.
+        """
+        import sqlite3
+        from memory.connection_pool import get_pool
+        
+        pool = get_pool(self.db_path)
+        pool.executescript("""
+            PRAGMA foreign_keys = ON;
+            CREATE TABLE parent (id INTEGER PRIMARY KEY);
+            CREATE TABLE child (parent_id INTEGER REFERENCES parent(id) DEFERRABLE INITIALLY DEFERRED);
+        """)
+        # A chave estrangeira adiada só é verificada no COMMIT
+        with self.assertRaises(sqlite3.IntegrityError):
+            pool.execute("INSERT INTO child VALUES (1)")
+        self.assertFalse(pool.connection().in_transaction)
+        
+        pool.execute("INSERT INTO parent VALUES (1)")
+        pool.close_thread_connection()
+        self.assertEqual(pool.query_one("SELECT COUNT(*) FROM parent")[0], 1)
+        self.assertEqual(pool.query_one("SELECT COUNT(*) FROM child")[0], 0)
+    
+    def test_concurrent_interactions(self):
+        """
+        Testa escritas concorrentes de interações com leituras simultâneas.
+        """
+        import threading
+        from memory.database import MemoryDatabase
+        from memory.memory_manager import MemoryManager
+        
+        db = MemoryDatabase(self.db_path, os.path.join(self.test_dir, "json"))
+        db.add_or_update_user("u1", "Ana")
+        db.add_or_update_channel("c1", "g1", "geral", "text")
+        
+        # MemoryManager no mesmo diretório compartilha o pool
+        manager = MemoryManager(self.test_dir)
+        self.assertIs(manager.pool, db.pool)
+        
+        errors = []
+        
+        def writer():
+            for i in range(25):
+                if db.add_interaction("u1", "c1", "text", f"mensagem {i}", 0.1, ["jogos"]) < 0:
+                    errors.append(i)
+        
+        def reader():
+            for _ in range(25):
+                db.get_channel_interactions("c1", 5)
+        
+        threads = [threading.Thread(target=writer) for _ in range(3)]
+        threads += [threading.Thread(target=reader) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(errors, [])
+        interactions = db.get_user_interactions("u1", limit=100)
+        self.assertEqual(len(interactions), 75)
+        self.assertEqual(interactions[0]["topics"], ["jogos"])
+        
+        stats = db.pool.query_one("SELECT message_count FROM user_channel_stats WHERE user_id = ?", ("u1",))
+        self.assertEqual(stats["message_count"], 75)
+    
+    def test_metadata_stored_in_database(self):
+        """
+        Testa os metadados em JSON1 e a migração dos arquivos legados.
+        """
+        import json
+        from memory.database import MemoryDatabase
+        
+        json_dir = os.path.join(self.test_dir, "json")
+        os.makedirs(json_dir)
+        db = MemoryDatabase(self.db_path, json_dir)
+        db.add_or_update_user("u1", "Ana")
+        db.add_or_update_user("u2", "Bia")
+        
+        # Nenhum arquivo por entidade é criado
+        self.assertEqual(os.listdir(json_dir), [])
+        self.assertEqual(db.get_user_metadata("u1")["emotions"]["predominant"], "neutro")
+        
+        self.assertTrue(db.update_user_metadata("u1", {"emotions.predominant": "feliz", "topics": ["jogos"]}))
+        metadata = db.get_user_metadata("u1")
+        self.assertEqual(metadata["emotions"]["predominant"], "feliz")
+        self.assertEqual(metadata["emotions"]["distribution"]["neutro"], 1.0)
+        self.assertEqual(metadata["topics"], ["jogos"])
+        self.assertFalse(db.update_user_metadata("u1", {"$.invalido": 1}))
+        
+        # Arquivos legados
+        with open(os.path.join(json_dir, "user_u2.json"), "w", encoding="utf-8") as f:
+            json.dump({"frequent_expressions": ["tipo assim"]}, f)
+        with open(os.path.join(json_dir, "user_u9.json"), "w", encoding="utf-8") as f:
+            json.dump({"frequent_expressions": []}, f)
+        
+        result = db.migrate_json_metadata(remove_files=True)
+        self.assertEqual(result["users"], 1)
+        self.assertEqual(result["orphans"], 1)
+        self.assertEqual(db.get_user_metadata("u2")["frequent_expressions"], ["tipo assim"])
+        self.assertIn("emotions", db.get_user_metadata("u2"))
+        self.assertEqual(os.listdir(json_dir), ["user_u9.json"])
+    
+    def test_full_text_search(self):
+        """
+        Testa a busca textual de interações e conhecimentos (FTS5).
+        """
+        from memory.database import MemoryDatabase
+        from memory.memory_manager import MemoryManager
+        
+        db = MemoryDatabase(self.db_path, os.path.join(self.test_dir, "json"))
+        db.add_or_update_user("u1", "Ana")
+        db.add_or_update_channel("c1", "g1", "geral", "text")
+        db.add_interaction("u1", "c1", "text", "Você viu a nova programação do servidor?", 0.0, [])
+        db.add_interaction("u1", "c1", "text", "Vamos jogar mais tarde", 0.0, [])
+        db.add_interaction("u1", "c1", "text", "A programação de hoje foi ótima, programação boa", 0.5, [])
+        
+        # Sem acentos e por prefixo
+        results = db.search_interactions("programacao")
+        self.assertEqual(len(results), 2)
+        self.assertIn("[programação]", results[0]["snippet"])
+        self.assertTrue(results[0]["rank"] <= results[1]["rank"])
+        self.assertEqual(len(db.search_interactions("voce prog")), 1)
+        self.assertEqual(len(db.search_interactions("programação", limit=1, offset=1)), 1)
+        self.assertEqual(db.search_interactions("\"*("), [])
+        
+        manager = MemoryManager(self.test_dir)
+        manager.add_knowledge("música", "Ana gosta de música eletrônica")
+        manager.add_knowledge("jogos", "Ana joga xadrez")
+        results = manager.search_knowledge("musica")
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]["topic"], "música")
+    
+    def test_keyset_pagination_and_lookup(self):
+        """
+        Testa a listagem paginada por cursor, a busca por ID e a remoção de interações.
+        """
+        from memory.database import MemoryDatabase
+        
+        db = MemoryDatabase(self.db_path, os.path.join(self.test_dir, "json"))
+        items = []
+        for i in range(7):
+            items.append({"kind": "interaction", "user_id": f"u{i % 2}", "channel_id": "c1",
+                          "content_summary": f"mensagem {i}", "timestamp": f"2026-01-01T00:00:0{i}"})
+        ids = db.apply_batch(items)
+        
+        seen = []
+        page, cursor = db.list_interactions(limit=3)
+        seen.extend(page)
+        
+        # Uma inserção nova não desloca as páginas seguintes
+        db.apply_batch([{"kind": "interaction", "user_id": "u0", "channel_id": "c1",
+                         "content_summary": "nova", "timestamp": "2026-01-02T00:00:00"}])
+        while cursor:
+            page, cursor = db.list_interactions(limit=3, cursor=cursor)
+            seen.extend(page)
+        self.assertEqual([i["interaction_id"] for i in seen], list(reversed(ids)))
+        
+        page, _ = db.list_interactions(limit=10, user_id="u1", until="2026-01-01T00:00:05")
+        self.assertEqual([i["content_summary"] for i in page], ["mensagem 3", "mensagem 1"])
+        self.assertRaises(ValueError, db.list_interactions, 3, "cursor-invalido")
+        
+        self.assertEqual(db.get_interaction(ids[2])["content_summary"], "mensagem 2")
+        self.assertTrue(db.delete_interaction(ids[2]))
+        self.assertIsNone(db.get_interaction(ids[2]))
+        self.assertFalse(db.delete_interaction(ids[2]))
+        self.assertEqual(db.search_interactions("mensagem 2"), [])
+    
+    def test_statistics_maintained_on_write(self):
+        """
+        Testa as tabelas de resumo mantidas pelos gatilhos e a reconstrução.
+        """
+        from memory.database import MemoryDatabase
+        
+        db = MemoryDatabase(self.db_path, os.path.join(self.test_dir, "json"))
+        db.add_or_update_user("u1", "Ana")
+        db.add_or_update_user("u2", "Bia")
+        db.add_or_update_channel("c1", "g1", "geral", "text")
+        ids = db.apply_batch([
+            {"kind": "interaction", "user_id": "u1", "channel_id": "c1", "topics": ["jogos"]},
+            {"kind": "interaction", "user_id": "u1", "channel_id": "c1", "topics": ["jogos", "música"]},
+            {"kind": "interaction", "user_id": "u2", "channel_id": "c1", "topics": []}
+        ])
+        
+        stats = db.get_statistics(top_n=1)
+        self.assertEqual((stats["user_count"], stats["channel_count"], stats["interaction_count"]), (2, 1, 3))
+        self.assertEqual(stats["top_users"][0]["user_id"], "u1")
+        self.assertEqual(stats["top_topics"], [{"topic": "jogos", "count": 2}])
+        self.assertEqual(sum(day["count"] for day in db.get_activity(days=1)["daily"]), 3)
+        
+        db.delete_interaction(ids[1])
+        stats = db.get_statistics()
+        self.assertEqual(stats["interaction_count"], 2)
+        self.assertEqual({t["topic"]: t["count"] for t in stats["top_topics"]}, {"jogos": 1})
+        
+        users = db.list_users(limit=10)
+        # Empate em uma interação cada: desempate estável pelo ID
+        self.assertEqual([u["user_id"] for u in users], ["u2", "u1"])
+        self.assertIn("last_seen", users[0])
+        
+        # A reconstrução produz os mesmos resumos
+        db.rebuild_statistics()
+        self.assertEqual(db.get_statistics(), stats)
+    
+    def test_retention_rolls_old_interactions(self):
+        """
+        Testa a retenção: agregados diários, partição mensal e compactação.
+        """
+        from datetime import datetime
+        from memory.database import MemoryDatabase
+        from memory.retention import MemoryRetention
+        
+        db = MemoryDatabase(self.db_path, os.path.join(self.test_dir, "json"))
+        db.add_or_update_user("u1", "Ana")
+        db.add_or_update_channel("c1", "g1", "geral", "text")
+        db.apply_batch([
+            {"kind": "interaction", "user_id": "u1", "channel_id": "c1", "content_summary": "antiga 1",
+             "sentiment_score": 0.5, "topics": ["jogos"], "timestamp": "2026-01-10T10:00:00"},
+            {"kind": "interaction", "user_id": "u1", "channel_id": "c1", "content_summary": "antiga 2",
+             "sentiment_score": -0.5, "topics": ["jogos"], "timestamp": "2026-01-10T11:00:00"},
+            {"kind": "interaction", "user_id": "u1", "channel_id": "c1", "content_summary": "recente",
+             "topics": [], "timestamp": "2026-03-30T09:00:00"}
+        ])
+        before = db.get_statistics()
+        
+        retention = MemoryRetention(db, retention_days=30, archive_dir=os.path.join(self.test_dir, "archive"))
+        result = retention.apply_retention(now=datetime(2026, 4, 1))
+        self.assertEqual(result["months"], {"2026-01": 2})
+        
+        # Apenas a interação recente continua na tabela principal
+        self.assertEqual([i["content_summary"] for i in db.list_interactions()[0]], ["recente"])
+        self.assertEqual(db.search_interactions("antiga"), [])
+        
+        # Estatísticas preservadas e agregados diários criados
+        self.assertEqual(db.get_statistics(), before)
+        summary = retention.get_daily_summary("2026-01-01", "2026-02-01")
+        self.assertEqual(summary, [{"day": "2026-01-10", "interaction_count": 2, "average_sentiment": 0.0}])
+        db.rebuild_statistics()
+        self.assertEqual(db.get_statistics()["interaction_count"], 3)
+        
+        # Linhas brutas arquivadas na partição do mês
+        archived = retention.get_archived_interactions("2026-01")
+        self.assertEqual([i["content_summary"] for i in archived], ["antiga 2", "antiga 1"])
+        self.assertEqual(retention.compact_partitions(), ["2026-01"])
+        self.assertEqual(retention.compact_partitions(), [])
+        self.assertEqual(len(retention.get_archived_interactions("2026-01")), 2)
+    
+    def test_retention_resumes_after_partial_archive(self):
+        """
+        Testa a retenção depois de uma cópia para a partição sem a remoção correspondente.
+        """
+        import sqlite3
+        from datetime import datetime
+        from memory.database import MemoryDatabase
+        from memory.retention import MemoryRetention, ARCHIVE_COLUMNS, ARCHIVE_SCHEMA
+        
+        db = MemoryDatabase(self.db_path, os.path.join(self.test_dir, "json"))
+        db.apply_batch([
+            {"kind": "interaction", "user_id": "u1", "channel_id": "c1", "content_summary": f"antiga {i}",
+             "topics": [], "timestamp": f"2026-01-1{i}T10:00:00"}
+            for i in range(3)
+        ])
+        retention = MemoryRetention(db, retention_days=30, archive_dir=os.path.join(self.test_dir, "archive"))
+        
+        # Execução interrompida: uma linha já confirmada na partição, nada removido do banco principal
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("ATTACH DATABASE ? AS archive", (retention.partition_path("2026-01"),))
+        conn.execute(ARCHIVE_SCHEMA)
+        conn.execute(f"INSERT INTO archive.interactions ({ARCHIVE_COLUMNS}) "
+                     f"SELECT {ARCHIVE_COLUMNS} FROM interactions WHERE content_summary = 'antiga 0'")
+        conn.commit()
+        conn.close()
+        
+        self.assertEqual(retention.apply_retention(now=datetime(2026, 4, 1))["months"], {"2026-01": 3})
+        self.assertEqual(db.list_interactions()[0], [])
+        self.assertEqual(len(retention.get_archived_interactions("2026-01")), 3)
+        summary = retention.get_daily_summary("2026-01-01", "2026-02-01")
+        self.assertEqual(sum(day["interaction_count"] for day in summary), 3)
+    
+    def test_retention_converts_existing_database_to_incremental_vacuum(self):
+        """
+        Testa se a retenção converte um banco antigo (sem auto_vacuum) e devolve as páginas liberadas.
+        """
+        import sqlite3
+        from datetime import datetime
+        from memory.database import MemoryDatabase
+        from memory.retention import MemoryRetention
+        
+        # Banco criado antes do auto_vacuum incremental
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE legacy (x)")
+        conn.commit()
+        conn.close()
+        
+        db = MemoryDatabase(self.db_path, os.path.join(self.test_dir, "json"))
+        self.assertEqual(db.pool.query_one("PRAGMA auto_vacuum")[0], 0)
+        db.apply_batch([
+            {"kind": "interaction", "user_id": "u1", "channel_id": "c1", "content_summary": "x" * 2000,
+             "topics": [], "timestamp": "2026-01-10T10:00:00"}
+            for _ in range(200)
+        ])
+        pages = db.pool.query_one("PRAGMA page_count")[0]
+        
+        MemoryRetention(db, retention_days=30).apply_retention(now=datetime(2026, 4, 1))
+        self.assertEqual(db.pool.query_one("PRAGMA auto_vacuum")[0], 2)
+        self.assertLess(db.pool.query_one("PRAGMA page_count")[0], pages // 2)
+        self.assertEqual(db.pool.query_one("PRAGMA freelist_count")[0], 0)
+    
+    def test_daily_aggregates_without_user_or_channel(self):
+        """
+        Testa se interações sem usuário ou canal somam no mesmo agregado diário a cada execução.
+        """
+        from datetime import datetime
+        from memory.database import MemoryDatabase
+        from memory.retention import MemoryRetention
+        
+        db = MemoryDatabase(self.db_path, os.path.join(self.test_dir, "json"))
+        retention = MemoryRetention(db, retention_days=30)
+        for hour in ("10", "11"):
+            db.pool.execute(
+                "INSERT INTO interactions (user_id, channel_id, timestamp, interaction_type, content_summary, topics) "
+                "VALUES (NULL, NULL, ?, 'voice', 'sem dono', '[\"jogos\"]')", (f"2026-01-10T{hour}:00:00",)
+            )
+            retention.apply_retention(now=datetime(2026, 4, 1))
+        self.assertEqual(tuple(db.pool.query_one("SELECT COUNT(*), SUM(interaction_count) FROM interaction_daily")), (1, 2))
+        self.assertEqual(tuple(db.pool.query_one("SELECT COUNT(*), SUM(count) FROM interaction_daily_topics")), (1, 2))
+        
+        # Linhas duplicadas de versões anteriores são consolidadas ao abrir o banco
+        db.pool.execute("INSERT INTO interaction_daily VALUES ('2026-01-10', NULL, NULL, 'voice', 3, 0.0)")
+        db = MemoryDatabase(self.db_path, os.path.join(self.test_dir, "json"))
+        self.assertEqual(tuple(db.pool.query_one("SELECT COUNT(*), SUM(interaction_count) FROM interaction_daily")), (1, 5))
+    
+    def test_online_backup_incremental_and_restore(self):
+        """
+        Testa o backup online completo, o incremental e a restauração por fluxo.
+        """
+        from memory.database import MemoryDatabase
+        from memory.backup import MemoryBackup
+        
+        db = MemoryDatabase(self.db_path, os.path.join(self.test_dir, "json"))
+        for i in range(50):
+            db.add_interaction("u1", "c1", "message", f"mensagem número {i} " * 10, 0.0, [])
+        
+        backup = MemoryBackup(db, os.path.join(self.test_dir, "backups"), pages_per_step=4)
+        full = backup.create_backup("base")
+        self.assertEqual(full["kind"], "full")
+        self.assertGreater(full["steps"], 1)
+        self.assertEqual(full["pages_written"], full["pages_total"])
+        for key in ("snapshot_ms", "lock_held_ms", "pool_lock_wait_ms"):
+            self.assertIn(key, full)
+        
+        db.add_interaction("u2", "c1", "message", "depois do completo", 0.0, [])
+        incremental = backup.create_backup("delta", incremental=True)
+        self.assertEqual(incremental["kind"], "incremental")
+        self.assertEqual(incremental["base"], full["name"])
+        self.assertLess(incremental["pages_written"], incremental["pages_total"])
+        
+        db.add_interaction("u3", "c1", "message", "depois do incremental", 0.0, [])
+        
+        # Incremental reconstrói a base e aplica as páginas alteradas
+        with open(incremental["path"], "rb") as f:
+            backup.restore_stream(f)
+        self.assertEqual([i["content_summary"] for i in db.search_interactions("depois")], ["depois do completo"])
+        self.assertEqual(db.pool.query_one("SELECT COUNT(*) FROM interactions")[0], 51)
+        
+        backup.restore(full["path"])
+        self.assertEqual(db.pool.query_one("SELECT COUNT(*) FROM interactions")[0], 50)
+        self.assertEqual([b["name"] for b in backup.list_backups()], [incremental["name"], full["name"]])
+        
+        # Arquivo inválido não altera o banco em uso
+        import io
+        with self.assertRaises(ValueError):
+            backup.restore_stream(io.BytesIO(b"nao e um backup" * 10))
+        self.assertEqual(db.pool.query_one("SELECT COUNT(*) FROM interactions")[0], 50)
+    
+    def test_reanalysis_backfill_resumes(self):
+        """
+        Testa a reanálise em massa: simulação, retomada e agregados de tópicos.
+        """
+        from memory.database import MemoryDatabase
+        from memory.reanalysis import InteractionReanalysis
+        from social.pattern_analyzer import PatternAnalyzer
+        
+        db = MemoryDatabase(self.db_path, os.path.join(self.test_dir, "json"))
+        db.apply_batch([
+            {"kind": "interaction", "user_id": "u1", "channel_id": "c1", "content_summary": f"novo roguelike {i}",
+             "sentiment_score": 0.0, "topics": []}
+            for i in range(10)
+        ] + [
+            {"kind": "interaction", "user_id": "u2", "channel_id": "c1", "content_summary": "que filme feliz",
+             "sentiment_score": 0.5, "topics": ["filmes"]}
+        ])
+        
+        # Regras novas: "roguelike" passa a indicar o tópico jogos
+        analyzer = PatternAnalyzer()
+        analyzer.topic_keywords["jogos"].append("roguelike")
+        analyzer.rebuild_matcher()
+        job = InteractionReanalysis(db, analyzer, workers=2, chunk_size=3)
+        
+        preview = job.run(dry_run=True)
+        self.assertEqual((preview["processed"], preview["changed"]), (11, 10))
+        self.assertEqual(preview["diffs"][0]["new_topics"], ["jogos"])
+        self.assertEqual(db.get_statistics()["top_topics"], [{"topic": "filmes", "count": 1}])
+        
+        # Execução interrompida e retomada do último bloco gravado
+        partial = job.run(max_rows=6)
+        self.assertFalse(partial["finished"])
+        self.assertEqual(job.get_progress()["last_id"], 6)
+        rest = job.run()
+        self.assertTrue(rest["finished"])
+        self.assertEqual((rest["resumed_from"], rest["processed"]), (6, 5))
+        self.assertEqual(job.run()["processed"], 0)
+        
+        self.assertEqual(db.get_interaction(1)["topics"], ["jogos"])
+        self.assertEqual(db.get_statistics()["top_topics"][0], {"topic": "jogos", "count": 10})
+        user_topics = db.pool.query("SELECT topic, relevance_score FROM user_topics WHERE user_id = 'u1'")
+        self.assertEqual([tuple(row) for row in user_topics], [("jogos", 1.0)])
+    
+    def test_semantic_index_incremental_and_persisted(self):
+        """
+        Testa o índice semântico: atualização na ingestão, busca, persistência e remoção.
+        """
+        from memory.database import MemoryDatabase
+        from memory.memory_manager import MemoryManager
+        from memory.vector_index import (SemanticIndex, attach_interactions, attach_knowledge,
+                                         INTERACTION_NEW_ROWS_SQL, INTERACTION_FETCH_SQL)
+        
+        db = MemoryDatabase(self.db_path, os.path.join(self.test_dir, "json"))
+        manager = MemoryManager(os.path.join(self.test_dir, "manager"))
+        index_path = self.db_path + ".vectors.npz"
+        index = SemanticIndex(index_path)
+        attach_interactions(index, db)
+        attach_knowledge(index, manager)
+        
+        db.apply_batch([
+            {"kind": "interaction", "user_id": "u1", "channel_id": "c1", "content_summary": text,
+             "sentiment_score": 0.0, "topics": []}
+            for text in ("vamos jogar minecraft hoje à noite", "a pizza de ontem estava ótima",
+                         "meu cachorro fugiu de casa")
+        ])
+        manager.add_knowledge("programação", "Ana está aprendendo Python")
+        self.assertEqual(index.get_stats()["vectors"], 4)
+        
+        # Sem acentos e com erro de digitação continua encontrando
+        related = index.retrieve("alguém quer jogar minecraft?", k=1)
+        self.assertEqual((related[0]["source"], related[0]["id"]), ("interaction", 1))
+        self.assertEqual(related[0]["text"], "vamos jogar minecraft hoje à noite")
+        related = index.retrieve("aprendendo pyton", k=1, sources=["knowledge"])
+        self.assertEqual(related[0]["fact"], "Ana está aprendendo Python")
+        self.assertEqual(index.search("minecraft", budget_ms=0.0, k=0), [])
+        
+        # Reabrir: o arquivo salvo é carregado e as linhas gravadas depois são alcançadas
+        self.assertTrue(index.save())
+        db.pool.execute("INSERT INTO interactions (user_id, channel_id, content_summary) VALUES ('u2', 'c1', 'pizza de calabresa')")
+        db.delete_interaction(1)
+        reopened = SemanticIndex(index_path)
+        reopened.add_source("interaction", db.pool, INTERACTION_NEW_ROWS_SQL, INTERACTION_FETCH_SQL)
+        self.assertEqual(reopened.sync(), 1)
+        self.assertEqual([r["id"] for r in reopened.retrieve("pizza", k=2, sources=["interaction"])], [4, 2])
+        
+        # Interações apagadas do banco saem do índice na primeira busca que as encontra
+        self.assertEqual(reopened.retrieve("jogar minecraft", k=1), [])
+        self.assertEqual(reopened.get_stats()["vectors"], 4)
+    
+    def test_semantic_index_follows_retention(self):
+        """
+        Testa a saída imediata dos vetores removidos pela retenção, o preenchimento da busca e a compactação.
+        """
+        from datetime import datetime
+        from memory.database import MemoryDatabase
+        from memory.retention import MemoryRetention
+        from memory.vector_index import SemanticIndex, attach_interactions
+        
+        db = MemoryDatabase(self.db_path, os.path.join(self.test_dir, "json"))
+        index = SemanticIndex(self.db_path + ".vectors.npz")
+        attach_interactions(index, db)
+        db.apply_batch([
+            {"kind": "interaction", "user_id": "u1", "channel_id": "c1", "content_summary": f"build de tanque {i}",
+             "topics": [], "timestamp": timestamp}
+            for i, timestamp in enumerate(["2026-01-10T10:00:00", "2026-01-11T10:00:00",
+                                           "2026-03-30T09:00:00", "2026-03-31T09:00:00"])
+        ])
+        self.assertEqual(index.get_stats()["vectors"], 4)
+        
+        # A retenção avisa o índice: as linhas arquivadas saem antes de qualquer busca
+        MemoryRetention(db, retention_days=30).apply_retention(now=datetime(2026, 4, 1))
+        self.assertEqual(index.get_stats()["vectors"], 2)
+        self.assertEqual(len(index.retrieve("build de tanque", k=2)), 2)
+        
+        # Apagada por fora dos avisos: a busca é refeita para completar os k resultados
+        db.apply_batch([{"kind": "interaction", "user_id": "u1", "channel_id": "c1",
+                         "content_summary": "build de tanque 4", "topics": []}])
+        db.pool.execute("DELETE FROM interactions WHERE interaction_id = 5")
+        self.assertEqual(sorted(item["id"] for item in index.retrieve("build de tanque", k=2)), [3, 4])
+        
+        # Salvar compacta as linhas zeradas
+        self.assertEqual(index.get_stats()["rows"], 5)
+        self.assertTrue(index.save())
+        self.assertEqual((index.get_stats()["rows"], index.get_stats()["vectors"]), (2, 2))
+        self.assertEqual(SemanticIndex(self.db_path + ".vectors.npz").get_stats()["rows"], 2)
+
+
+class TestIngestionQueue(unittest.TestCase):
+    """
+    Testes para a fila de ingestão com escrita adiada.
+    """
+    
+    def setUp(self):
+        """
+        Configuração para cada teste individual.
+        """
+        import tempfile
+        from memory.database import MemoryDatabase
+        self.test_dir = tempfile.mkdtemp(prefix="nina_ingestion_test_")
+        self.db = MemoryDatabase(os.path.join(self.test_dir, "memory.db"), os.path.join(self.test_dir, "json"))
+    
+    def tearDown(self):
+        """
+        Limpeza após cada teste.
+        """
+        import shutil
+        from memory.connection_pool import close_all_pools
+        close_all_pools()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+    
+    def _message_items(self, index):
+        """
+        Cria as operações de ingestão de uma mensagem.
+        """
+        return [
+            {"kind": "user", "user_id": "u1", "username": "Ana"},
+            {"kind": "channel", "channel_id": "c1", "guild_id": "g1", "channel_name": "geral", "channel_type": "text"},
+            {"kind": "interaction", "user_id": "u1", "channel_id": "c1", "content_summary": f"mensagem {index}",
+             "sentiment_score": 0.0, "topics": []},
+            {"kind": "expression", "user_id": "u1", "expression": "tipo assim"}
+        ]
+    
+    def test_batches_and_read_your_writes(self):
+        """
+        Testa se as mensagens são gravadas em lotes e visíveis antes da leitura do canal.
+        """
+        from memory.ingestion_queue import IngestionQueue
+        
+        queue = IngestionQueue(self.db, flush_interval_ms=60000, max_batch=1000)
+        for i in range(50):
+            self.assertTrue(queue.put_many(self._message_items(i)))
+        
+        # Nada gravado ainda: o intervalo de gravação é longo
+        self.assertTrue(queue.has_pending(channel_id="c1"))
+        self.assertEqual(self.db.get_channel_interactions("c1", 100), [])
+        
+        queue.ensure_written(channel_id="c1")
+        self.assertFalse(queue.has_pending(channel_id="c1"))
+        self.assertEqual(len(self.db.get_channel_interactions("c1", 100)), 50)
+        
+        stats = queue.get_stats()
+        self.assertEqual(stats["written"], 200)
+        self.assertEqual(stats["batches"], 1)
+        
+        row = self.db.pool.query_one("SELECT count FROM user_frequent_words WHERE user_id = ?", ("u1",))
+        self.assertEqual(row["count"], 50)
+        queue.close()
+    
+    def test_back_pressure_and_graceful_close(self):
+        """
+        Testa a rejeição com a fila cheia e a gravação dos pendentes no encerramento.
+        """
+        import threading
+        from memory.ingestion_queue import IngestionQueue
+        
+        # Bloquear a gravação para encher a fila
+        release = threading.Event()
+        apply_batch = self.db.apply_batch
+        
+        def slow_apply(items):
+            release.wait(5)
+            return apply_batch(items)
+        
+        self.db.apply_batch = slow_apply
+        queue = IngestionQueue(self.db, flush_interval_ms=10, max_batch=4, max_pending=8, put_timeout=0.05)
+        
+        results = [queue.put_many(self._message_items(i)) for i in range(5)]
+        self.assertIn(False, results)
+        self.assertGreater(queue.get_stats()["rejected"], 0)
+        
+        release.set()
+        queue.close()
+        
+        accepted = results.count(True)
+        self.assertEqual(len(self.db.get_channel_interactions("c1", 100)), accepted)
+        self.assertFalse(queue.put(self._message_items(0)[0]))
+    
+    def test_retries_transient_errors_and_isolates_bad_group(self):
+        """
+        Testa a nova tentativa com banco ocupado e o descarte apenas da mensagem inválida do lote.
+        """
+        import sqlite3
+        from memory.ingestion_queue import IngestionQueue
+        
+        apply_batch = self.db.apply_batch
+        locked = [2]
+        
+        def flaky_apply(items):
+            if locked[0]:
+                locked[0] -= 1
+                raise sqlite3.OperationalError("database is locked")
+            return apply_batch(items)
+        
+        self.db.apply_batch = flaky_apply
+        queue = IngestionQueue(self.db, flush_interval_ms=60000, max_batch=1000, retry_backoff=0.001)
+        for i in range(5):
+            items = self._message_items(i)
+            if i == 3:
+                del items[2]["user_id"]  # Mensagem inválida: falha o lote inteiro
+            queue.put_many(items)
+        
+        self.assertEqual(queue.flush(), 16)
+        contents = [row["content_summary"] for row in self.db.get_channel_interactions("c1", 100)]
+        self.assertEqual(sorted(contents), ["mensagem 0", "mensagem 1", "mensagem 2", "mensagem 4"])
+        
+        stats = queue.get_stats()
+        self.assertEqual((stats["retries"], stats["failed"], stats["failed_groups"]), (2, 4, 1))
+        self.assertFalse(queue.has_pending(user_id="u1"))
+        queue.close()
+
+
+class TestPostResponseQueue(unittest.TestCase):
+    """
+    Testes para a fila de atualizações pós-resposta.
+    """
+    
+    def test_per_channel_order_and_drain_on_close(self):
+        """
+        Testa a ordem por canal, o paralelismo entre canais e o encerramento com a fila cheia.
+        """
+        import threading
+        from memory.update_queue import PostResponseQueue
+        
+        queue = PostResponseQueue(workers=3)
+        done = {"a": [], "b": []}
+        release = threading.Event()
+        
+        def task(channel, index):
+            if channel == "a" and index == 0:
+                release.wait(5.0)
+            done[channel].append(index)
+        
+        for i in range(20):
+            self.assertTrue(queue.submit("a", task, "a", i))
+            self.assertTrue(queue.submit("b", task, "b", i))
+        
+        # O canal "b" avança enquanto a primeira tarefa de "a" está bloqueada
+        self.assertTrue(queue.wait_for_channel("b", timeout=5.0))
+        self.assertEqual(done["b"], list(range(20)))
+        self.assertEqual(done["a"], [])
+        self.assertFalse(queue.drain(timeout=0.05))
+        self.assertGreater(queue.get_stats()["oldest_pending_ms"], 0.0)
+        
+        # Encerrar executa tudo o que estava pendente, na ordem, e recusa novas tarefas
+        release.set()
+        self.assertTrue(queue.close(timeout=5.0))
+        self.assertEqual(done["a"], list(range(20)))
+        self.assertFalse(queue.submit("a", task, "a", 99))
+        
+        stats = queue.get_stats()
+        self.assertEqual((stats["pending"], stats["processed"], stats["rejected"]), (0, 40, 1))
+        self.assertGreater(stats["max_lag_ms"], 0.0)
+    
+    def test_failed_task_does_not_block_channel(self):
+        """
+        Testa se uma tarefa com erro é contada e não impede as seguintes do canal.
+        """
+        from memory.update_queue import PostResponseQueue
+        
+        queue = PostResponseQueue(workers=1)
+        results = []
+        queue.submit("c", lambda: 1 / 0)
+        queue.submit("c", results.append, "ok")
+        self.assertTrue(queue.drain(timeout=5.0))
+        self.assertEqual(results, ["ok"])
+        self.assertEqual(queue.get_stats()["failed"], 1)
+        queue.close()
+
+class TestPatternAnalyzer(unittest.TestCase):
+    """
+    Testes para o analisador de padrões.
+    """
+    
+    def setUp(self):
+        """
+        Configuração para cada teste individual.
+        """
+        from social.pattern_analyzer import PatternAnalyzer
+        self.analyzer = PatternAnalyzer()
+    
+    def test_single_pass_matches_keyword_counts(self):
+        """
+        Testa se o passe único encontra o mesmo que a busca termo a termo.
+        """
+        text = "Estou infeliz, sei lá... o jogo no xbox foi péssimo, tipo assim 😢 sei lá"
+        analysis = self.analyzer.analyze_message(text)
+        
+        # "feliz" dentro de "infeliz" também conta, como em str.count
+        lowered = text.lower()
+        expected_score = (lowered.count("feliz") * 0.5 - lowered.count("infeliz") * 0.3
+                          - lowered.count("péssimo") * 0.3 - lowered.count("😢") * 0.3) / 4
+        self.assertAlmostEqual(analysis["sentiment"], expected_score)
+        self.assertEqual(analysis["topics"], ["jogos", "esportes"])
+        self.assertEqual(analysis["expressions"], ["tipo assim", "sei lá"])
+        self.assertEqual(analysis["word_count"], 15)
+    
+    def test_batch_analysis_matches_single_messages(self):
+        """
+        Testa se a análise em lote devolve o mesmo que a análise mensagem a mensagem.
+        """
+        messages = ["Que filme incrível!", "", "meu deus, que raiva do chefe", "tanto faz, pode ser", "ok"]
+        self.assertEqual(self.analyzer.analyze_messages(messages),
+                         [self.analyzer.analyze_message(m) for m in messages])
+        
+        # Palavras-chave alteradas passam a valer após recompilar o reconhecedor
+        self.analyzer.topic_keywords["jogos"].append("roguelike")
+        self.analyzer.rebuild_matcher()
+        self.assertEqual(self.analyzer.extract_topics("um roguelike novo"), ["jogos"])
+        
+        pattern = self.analyzer.analyze_channel_pattern([{"user_id": "u1", "content": m} for m in messages])
+        suggestion = self.analyzer.suggest_nina_personality(pattern)
+        self.assertEqual(suggestion["verbosity"], "baixo")
+        self.assertEqual(set(suggestion), {"formality_level", "humor_level", "technicality_level",
+                                           "response_speed", "verbosity"})
+
+
+class TestContextCache(unittest.TestCase):
+    """
+    Testes para o cache de contexto da memória.
+    """
+    
+    def setUp(self):
+        """
+        Configuração para cada teste individual.
+        """
+        from memory.context_cache import ContextCache
+        self.cache = ContextCache(max_entries=2)
+        self.loads = 0
+    
+    def _loader(self, value):
+        def load():
+            self.loads += 1
+            return value
+        return load
+    
+    def test_hit_until_version_bump(self):
+        """
+        Testa se o valor é servido da memória até uma escrita incrementar a versão.
+        """
+        self.assertEqual(self.cache.get_or_load("user", "1", self._loader({"v": 1})), {"v": 1})
+        self.assertEqual(self.cache.get_or_load("user", "1", self._loader({"v": 2})), {"v": 1})
+        self.assertEqual(self.loads, 1)
+        
+        self.cache.bump("user", "1")
+        self.assertEqual(self.cache.get_or_load("user", "1", self._loader({"v": 2})), {"v": 2})
+        self.assertEqual(self.loads, 2)
+        
+        # Write-through: o valor gravado é servido sem leitura e invalida as outras variantes
+        self.cache.get_or_load("recent", "c", self._loader([1]), variant=5)
+        self.cache.put("recent", "c", [1, 2], variant=10)
+        self.assertEqual(self.cache.get_or_load("recent", "c", self._loader([]), variant=10), [1, 2])
+        self.assertEqual(self.cache.get_or_load("recent", "c", self._loader([2]), variant=5), [2])
+        
+        stats = self.cache.get_stats()
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["invalidations"], 2)
+    
+    def test_lru_eviction_and_stale_load(self):
+        """
+        Testa o descarte LRU e se uma leitura concorrente com uma escrita não é guardada.
+        """
+        self.cache.get_or_load("user", "1", self._loader(1))
+        self.cache.get_or_load("user", "2", self._loader(2))
+        self.cache.get_or_load("user", "1", self._loader(1))
+        self.cache.get_or_load("user", "3", self._loader(3))
+        self.assertEqual(self.cache.get_stats()["evictions"], 1)
+        
+        # "2" foi o menos usado e saiu; "1" continua em cache
+        self.cache.get_or_load("user", "1", self._loader(1))
+        self.assertEqual(self.loads, 3)
+        
+        def racing_load():
+            self.cache.bump("channel", "c")
+            return "antigo"
+        
+        self.assertEqual(self.cache.get_or_load("channel", "c", racing_load), "antigo")
+        self.assertEqual(self.cache.get_or_load("channel", "c", self._loader("novo")), "novo")
+        self.assertEqual(self.cache.get_stats()["stale_loads"], 1)
+        
+        self.cache.clear()
+        self.assertEqual(self.cache.get_stats()["entries"], 0)
+    
+    def test_version_registry_is_bounded(self):
+        """
+        Testa se o registro de versões fica limitado e se descartar uma versão não valida um valor antigo.
+        """
+        for i in range(50):
+            self.cache.bump("user", str(i))
+        self.assertLessEqual(self.cache.get_stats()["versions"], self.cache.max_entries)
+        
+        # A escrita que acontece durante a leitura sai do registro antes do fim da leitura
+        def racing_load():
+            self.cache.bump("user", "x")
+            for i in range(50):
+                self.cache.bump("channel", str(i))
+            return "antigo"
+        
+        self.assertEqual(self.cache.get_or_load("user", "x", racing_load), "antigo")
+        self.assertEqual(self.cache.get_or_load("user", "x", self._loader("novo")), "novo")
+        self.assertEqual(self.cache.get_stats()["stale_loads"], 1)
+        
+        # Sem escritas novas, a chave fora do registro continua em cache
+        self.assertEqual(self.cache.get_or_load("user", "x", self._loader("outro")), "novo")
+    
+    def test_memory_system_contexts(self):
+        """
+        Testa os contextos de usuário e canal do MemorySystem servidos pelo cache e invalidados por escritas.
+        """
+        import tempfile
+        import shutil
+        from memory.memory_system import MemorySystem
+        
+        test_dir = tempfile.mkdtemp(prefix="nina_context_test_")
+        self.addCleanup(shutil.rmtree, test_dir, True)
+        memory = MemorySystem(db_path=os.path.join(test_dir, "memory.db"),
+                              data_dir=os.path.join(test_dir, "data"), semantic_index=False)
+        self.addCleanup(memory.close)
+        
+        self.assertEqual(memory.get_user_context("u1"), {})
+        memory.process_message("u1", "Ana", "c1", "g1", "geral", "text", "Bora jogar ranqueada hoje?")
+        
+        user_context = memory.get_user_context("u1")
+        self.assertEqual(user_context["username"], "Ana")
+        self.assertEqual(user_context["interaction_count"], 1)
+        self.assertEqual(len(user_context["recent_interactions"]), 1)
+        
+        # Segunda leitura vem do cache; uma nova mensagem invalida usuário e canal
+        memory.get_user_context("u1")
+        self.assertGreaterEqual(memory.context_cache.get_stats()["hits"], 1)
+        memory.process_message("u1", "Ana", "c1", "g1", "geral", "text", "Alguém viu o dragão?")
+        
+        combined = memory.get_combined_context("u1", "c1")
+        self.assertEqual(combined["user"]["interaction_count"], 2)
+        self.assertEqual(combined["channel"]["channel_name"], "geral")
+        self.assertEqual(combined["channel"]["recent_interactions"][0]["content_summary"], "Alguém viu o dragão?")
+    
+    def test_memory_system_prompt_context(self):
+        """
+        Testa o contexto de memória do prompt com perfil, canal e memórias relacionadas ao texto atual.
+        """
+        import tempfile
+        import shutil
+        from llm.token_budget import estimate_tokens
+        from memory.memory_system import MemorySystem
+        
+        test_dir = tempfile.mkdtemp(prefix="nina_context_test_")
+        self.addCleanup(shutil.rmtree, test_dir, True)
+        memory = MemorySystem(db_path=os.path.join(test_dir, "memory.db"), data_dir=os.path.join(test_dir, "data"))
+        self.addCleanup(memory.close)
+        
+        self.assertEqual(memory.get_prompt_context("local", "voz", query="oi")["text"], "")
+        for text in ("meu campeão favorito é a Jinx", "hoje o jantar foi pizza", "amanhã tem treino do time"):
+            memory.process_message("local", "Ana", "voz", "local", "conversa por voz", "voice", text)
+        
+        context = memory.get_prompt_context("local", "voz", query="qual é meu campeão favorito?", related_limit=1)
+        self.assertIn("Nome do usuário: Ana", context["text"])
+        self.assertIn("Canal: conversa por voz", context["text"])
+        self.assertIn("Memórias Relacionadas:\n- local: meu campeão favorito é a Jinx", context["text"])
+        self.assertNotIn("pizza", context["text"])
+        self.assertGreaterEqual(context["tokens"], estimate_tokens(context["text"]))
+        
+        # Sem escritas novas, os blocos de usuário e canal são reaproveitados
+        rebuilds = memory.prompt_blocks.get_stats()["rebuilds"]
+        memory.get_prompt_context("local", "voz", query="e o treino?")
+        self.assertEqual(memory.prompt_blocks.get_stats()["rebuilds"], rebuilds)
+        memory.process_message("local", "Ana", "voz", "local", "conversa por voz", "voice", "bora")
+        memory.get_prompt_context("local", "voz")
+        self.assertEqual(memory.prompt_blocks.get_stats()["rebuilds"], rebuilds + 2)
+        
+        # Acertos e faltas do cache aparecem no status (exposto pelo orquestrador em /status)
+        status = memory.get_status()
+        self.assertGreater(status["context_cache"]["hits"], 0)
+        self.assertEqual(status["prompt_blocks"]["rebuilds"], rebuilds + 2)
+    
+    def test_search_related_does_not_flush_ingestion(self):
+        """
+        Testa se a busca semântica não grava a fila de ingestão no caminho do turno.
+        """
+        import tempfile
+        import shutil
+        from memory.memory_system import MemorySystem
+        
+        test_dir = tempfile.mkdtemp(prefix="nina_context_test_")
+        self.addCleanup(shutil.rmtree, test_dir, True)
+        memory = MemorySystem(db_path=os.path.join(test_dir, "memory.db"), data_dir=os.path.join(test_dir, "data"),
+                              flush_interval_ms=60000)
+        self.addCleanup(memory.close)
+        
+        memory.process_message("local", "Ana", "voz", "local", "conversa por voz", "voice", "meu campeão favorito é a Jinx")
+        self.assertEqual(memory.search_related("campeão favorito"), [])
+        self.assertEqual(memory.get_ingestion_stats()["batches"], 0)
+        
+        # O contexto do prompt grava antes os itens pendentes do próprio usuário e canal
+        context = memory.get_prompt_context("local", "voz", query="campeão favorito", related_limit=1)
+        self.assertIn("meu campeão favorito é a Jinx", context["text"])
+
+class TestPromptBlocks(unittest.TestCase):
+    """
+    Testes para os blocos de memória pré-formatados do prompt.
+    """
+    
+    def setUp(self):
+        """
+        Configuração para cada teste individual.
+        """
+        from memory.memory_orchestrator import MemoryOrchestrator
+        self.orchestrator = MemoryOrchestrator()
+        self.memory_data = {
+            "user_profile": {"user_id": "u1", "username": "Ana", "topics": {"jogos": 5, "música": 9},
+                             "emotions": {"feliz": 3}, "expressions": ["tipo assim"]},
+            "channel_profile": {"channel_id": "c1", "channel_name": "geral", "topics": {"jogos": 2}, "tone": "casual"},
+            "personality": {"formality_level": 20, "humor_level": 80},
+            "recent_interactions": [{"user_id": "u1", "content": "bora jogar?"}],
+            "versions": {"user": (0, 1), "channel": (0, 1), "personality": (0, 1)}
+        }
+    
+    def test_blocks_rebuilt_only_on_version_change(self):
+        """
+        Testa se os blocos são reaproveitados até a versão do perfil mudar.
+        """
+        from llm.token_budget import estimate_tokens
+        
+        prompt = self.orchestrator.build_memory_prompt(self.memory_data)
+        self.assertIn("Tópicos de interesse: música, jogos", prompt["text"])
+        self.assertIn("Humor: presente", prompt["text"])
+        self.assertTrue(prompt["text"].endswith("u1: bora jogar?"))
+        self.assertGreaterEqual(prompt["tokens"], estimate_tokens(prompt["text"]))
+        self.assertEqual(self.orchestrator.prompt_blocks.get_stats()["rebuilds"], 3)
+        
+        # Mesma versão: o texto antigo é reaproveitado mesmo com um perfil novo
+        self.memory_data["user_profile"] = dict(self.memory_data["user_profile"], username="Bia")
+        self.assertEqual(self.orchestrator.format_memory_for_llm(self.memory_data), prompt["text"])
+        self.assertEqual(self.orchestrator.prompt_blocks.get_stats()["hits"], 3)
+        
+        # Nova versão do usuário: apenas o bloco do usuário é refeito
+        self.memory_data["versions"]["user"] = (0, 2)
+        self.assertIn("Nome do usuário: Bia", self.orchestrator.format_memory_for_llm(self.memory_data))
+        self.assertEqual(self.orchestrator.prompt_blocks.get_stats()["rebuilds"], 4)
+    
+    def test_blocks_without_version_compare_content(self):
+        """
+        Testa o reaproveitamento pelo conteúdo do perfil quando não há versão.
+        """
+        del self.memory_data["versions"]
+        first = self.orchestrator.build_memory_prompt(self.memory_data)
+        second = self.orchestrator.build_memory_prompt(dict(self.memory_data, user_profile=dict(self.memory_data["user_profile"])))
+        self.assertEqual(first, second)
+        self.assertEqual(self.orchestrator.prompt_blocks.get_stats()["hits"], 3)
+        
+        self.memory_data["channel_profile"] = dict(self.memory_data["channel_profile"], tone="sério")
+        self.assertIn("Tom do canal: sério", self.orchestrator.format_memory_for_llm(self.memory_data))
+        self.assertEqual(self.orchestrator.format_memory_for_llm({}), "")
+        
+        # Perfil alterado no próprio objeto: o bloco também é refeito
+        self.memory_data["user_profile"]["username"] = "Bia"
+        self.assertIn("Nome do usuário: Bia", self.orchestrator.format_memory_for_llm(self.memory_data))
+
+class TestEventBus(unittest.TestCase):
+    """
+    Testes para o barramento de eventos.
+    """
+    
+    def setUp(self):
+        from core.event_bus import EventBus
+        self.bus = EventBus(block_timeout=0.05)
+    
+    def tearDown(self):
+        self.bus.close()
+    
+    def test_ordered_delivery_and_validation(self):
+        """
+        Testa a entrega em ordem, o último evento por tópico e a validação dos campos.
+        """
+        from core.event_bus import TRANSCRIPT, RESPONSE
+        
+        received = []
+        self.bus.subscribe(TRANSCRIPT, lambda event: received.append(event.payload["text"]))
+        for i in range(50):
+            self.assertEqual(self.bus.publish(TRANSCRIPT, {"text": f"fala {i}"}), 1)
+        self.assertTrue(self.bus.wait_idle(timeout=5.0))
+        self.assertEqual(received, [f"fala {i}" for i in range(50)])
+        self.assertEqual(self.bus.get_latest(TRANSCRIPT).payload["text"], "fala 49")
+        self.assertIsNone(self.bus.get_latest(RESPONSE))
+        
+        # Tópicos conhecidos exigem os campos do payload; sem assinantes ninguém recebe
+        with self.assertRaises(ValueError):
+            self.bus.publish(RESPONSE, {"input": "oi"})
+        self.assertEqual(self.bus.publish(RESPONSE, {"text": "olá"}), 0)
+        
+        stats = self.bus.get_stats()
+        self.assertEqual((stats[TRANSCRIPT]["published"], stats[TRANSCRIPT]["delivered"]), (50, 50))
+        self.assertEqual(stats[TRANSCRIPT]["backlog"], 0)
+        self.assertEqual(stats[RESPONSE]["published"], 1)
+    
+    def test_realtime_topic_drops_oldest_without_blocking(self):
+        """
+        Testa o descarte dos quadros antigos quando um assinante lento fica para trás.
+        """
+        import threading
+        from core.event_bus import HUD_FRAME
+        
+        release = threading.Event()
+        slow, fast = [], []
+        
+        def slow_handler(event):
+            release.wait(5.0)
+            slow.append(event.payload["timestamp"])
+        
+        self.bus.subscribe(HUD_FRAME, slow_handler, name="lento")
+        self.bus.subscribe(HUD_FRAME, lambda event: fast.append(event.payload["timestamp"]), maxsize=100)
+        for i in range(20):
+            self.bus.publish(HUD_FRAME, {"timestamp": i})
+        
+        # O assinante rápido recebe tudo; o lento fica só com os quadros mais recentes
+        release.set()
+        self.assertTrue(self.bus.wait_idle(timeout=5.0))
+        self.assertEqual(fast, list(range(20)))
+        self.assertEqual(slow[-2:], [18, 19])
+        self.assertLess(len(slow), 20)
+        
+        stats = self.bus.get_stats()[HUD_FRAME]
+        self.assertEqual(stats["dropped"], 20 - len(slow))
+        self.assertEqual(stats["delivered"], 20 + len(slow))
+        self.assertGreater(stats["max_latency_ms"], 0.0)
+    
+    def test_handler_error_and_close_drains(self):
+        """
+        Testa se um erro no assinante é contado e se o encerramento entrega o que está na fila.
+        """
+        from core.event_bus import CALLOUT
+        
+        received = []
+        
+        def handler(event):
+            if event.payload["text"] == "erro":
+                raise RuntimeError("falha")
+            received.append(event.payload["text"])
+        
+        self.bus.subscribe(CALLOUT, handler)
+        self.bus.publish(CALLOUT, {"text": "erro"})
+        self.bus.publish(CALLOUT, {"text": "Dragão vivo"})
+        self.bus.close()
+        self.assertEqual(received, ["Dragão vivo"])
+        self.assertEqual(self.bus.get_stats()[CALLOUT]["failed"], 1)
+        self.assertEqual(self.bus.publish(CALLOUT, {"text": "tarde"}), 0)
+    
+    def test_vision_and_coach_wiring(self):
+        """
+        Testa a publicação do minimapa e o recebimento pelo coach sem consulta repetida.
+        """
+        from core.event_bus import MAP_UPDATE
+        from vision.minimap_tracker import MinimapTracker
+        from modules.team_coach import TeamCoach
+        
+        tracker = MinimapTracker(event_bus=self.bus, max_age=60.0)
+        coach = TeamCoach(event_bus=self.bus)
+        data = tracker.get_latest_map_data()
+        self.assertIs(tracker.get_latest_map_data(), data)
+        self.assertTrue(self.bus.wait_idle(timeout=5.0))
+        self.assertIs(coach.last_map_data, data)
+        self.assertEqual(self.bus.get_stats()[MAP_UPDATE]["published"], 1)
+
+class TestVoicePipeline(unittest.TestCase):
+    """
+    Testes para o pipeline de voz assíncrono.
+    """
+    
+    def test_capture_overlaps_think_and_speak(self):
+        """
+        Testa se a captura continua durante a geração e a fala, com ordem e latências por turno.
+        """
+        import time
+        import threading
+        from core.pipeline import VoicePipeline
+        
+        utterances = ["áudio 1", "áudio 2", "áudio 3"]
+        events = []
+        lock = threading.Lock()
+        finished = threading.Event()
+        
+        def log(entry):
+            with lock:
+                events.append(entry)
+        
+        def capture():
+            time.sleep(0.02)
+            with lock:
+                audio = utterances.pop(0) if utterances else None
+            if audio:
+                log(("capture", audio))
+            return audio
+        
+        def think(text):
+            log(("think_start", text))
+            time.sleep(0.1)
+            return text.upper() if text != "fala 2" else None
+        
+        def speak(response):
+            time.sleep(0.05)
+            log(("speak", response))
+        
+        turns = []
+        pipeline = VoicePipeline(
+            capture=capture,
+            transcribe=lambda audio: (audio.replace("áudio", "fala"), {"lang": "pt"}),
+            think=think,
+            speak=speak,
+            on_turn=lambda turn: (turns.append(turn.to_dict()), len(turns) == 2 and finished.set())
+        )
+        self.addCleanup(pipeline.stop)
+        thread = threading.Thread(target=pipeline.run_forever, daemon=True)
+        thread.start()
+        self.assertTrue(finished.wait(5.0))
+        pipeline.stop()
+        thread.join(5.0)
+        self.assertFalse(thread.is_alive())
+        
+        # Todas as falas foram capturadas antes de a primeira resposta terminar de ser gerada
+        self.assertLess(events.index(("capture", "áudio 3")), events.index(("speak", "FALA 1")))
+        self.assertEqual([turn["response"] for turn in turns], ["FALA 1", "FALA 3"])
+        self.assertGreater(turns[0]["response_latency_ms"], 0.0)
+        self.assertEqual(set(turns[0]["stages_ms"]), {"capture", "transcribe", "think", "speak"})
+        
+        stats = pipeline.get_stats()
+        self.assertFalse(stats["running"])
+        self.assertEqual((stats["completed"], stats["discarded"], stats["failed"]), (2, 1, 0))
+        self.assertEqual(stats["stages"]["think"]["count"], 3)
+        self.assertEqual(stats["end_to_end"]["count"], 2)
+        self.assertGreater(stats["response_latency"]["p95_ms"], 0.0)
+    
+    def test_stop_cancels_blocked_stage(self):
+        """
+        Testa se parar cancela todas as etapas e chama a interrupção da etapa bloqueada.
+        """
+        import time
+        import threading
+        from core.pipeline import VoicePipeline
+        
+        release = threading.Event()
+        speaking = threading.Event()
+        
+        def speak(response):
+            speaking.set()
+            release.wait(5.0)
+        
+        pipeline = VoicePipeline(
+            capture=lambda: (time.sleep(0.01), "áudio")[1],
+            transcribe=lambda audio: "fala",
+            think=lambda text: "resposta",
+            speak=speak,
+            interrupt=release.set
+        )
+        self.addCleanup(pipeline.stop)
+        thread = threading.Thread(target=pipeline.run_forever, daemon=True)
+        thread.start()
+        self.assertTrue(speaking.wait(5.0))
+        pipeline.stop()
+        thread.join(5.0)
+        self.assertFalse(thread.is_alive())
+        self.assertTrue(release.is_set())
+        self.assertEqual(pipeline.get_stats()["completed"], 0)
+    
+    def test_speech_gate_blocks_capture_while_speaking(self):
+        """
+        Testa se a captura espera a fala (e a guarda) terminar e se gravações sobrepostas à fala são descartadas.
+        """
+        import time
+        import threading
+        from core.speech_gate import SpeechGate
+        
+        gate = SpeechGate(guard_ms=50)
+        self.assertFalse(gate.is_speaking)
+        self.assertTrue(gate.wait_until_quiet())
+        
+        # Captura iniciada antes da fala: a gravação é descartada
+        epoch = gate.epoch
+        gate.begin()
+        self.assertTrue(gate.is_speaking)
+        self.assertTrue(gate.overlapped(epoch))
+        
+        # Enquanto fala, a captura espera (e pode ser interrompida)
+        self.assertFalse(gate.wait_until_quiet(should_stop=lambda: True))
+        released = []
+        waiter = threading.Thread(target=lambda: released.append((gate.wait_until_quiet(), time.monotonic())))
+        waiter.start()
+        time.sleep(0.1)
+        self.assertEqual(released, [])
+        ended = time.monotonic()
+        gate.end()
+        waiter.join(2.0)
+        self.assertTrue(released[0][0])
+        self.assertGreaterEqual(released[0][1] - ended, 0.045)
+        
+        # Captura iniciada depois da fala: a gravação é mantida
+        epoch = gate.epoch
+        self.assertFalse(gate.overlapped(epoch))
+        with gate.speaking():
+            self.assertTrue(gate.is_speaking)
+        self.assertTrue(gate.overlapped(epoch))
+        self.assertEqual(gate.discarded, 2)
+
+class TestTracing(unittest.TestCase):
+    """
+    Testes para o rastreamento de latência.
+    """
+    
+    def setUp(self):
+        import tempfile
+        self.test_dir = tempfile.mkdtemp(prefix="nina_tracing_test_")
+    
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+    
+    def test_disabled_tracer_is_noop(self):
+        """
+        Testa se o rastreamento desativado não cria spans nem grava arquivos.
+        """
+        from core.tracing import Tracer, NOOP_SPAN
+        
+        path = os.path.join(self.test_dir, "trace.jsonl")
+        tracer = Tracer(enabled=False, path=path, flush_every=1)
+        self.assertIs(tracer.span("llm.chat"), NOOP_SPAN)
+        self.assertIs(tracer.turn(), NOOP_SPAN)
+        with tracer.span("llm.chat") as span:
+            span.set(model="mistral")
+        tracer.mark("tts.playback_start")
+        tracer.close()
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(tracer.get_summary()["spans"], {})
+    
+    def test_nested_spans_jsonl_and_summary(self):
+        """
+        Testa spans aninhados de um turno, o decorador, erros e o resumo.
+        """
+        import json
+        from core import tracing
+        
+        path = os.path.join(self.test_dir, "trace.jsonl")
+        tracer = tracing.Tracer(enabled=True, path=path, flush_every=100)
+        previous = tracing.set_tracer(tracer)
+        self.addCleanup(tracing.set_tracer, previous)
+        
+        @tracing.traced("stt.transcribe_file")
+        def transcribe():
+            return "olá"
+        
+        @tracing.traced("llm.chat")
+        def chat():
+            raise RuntimeError("offline")
+        
+        with tracing.trace_turn("t1"), tracing.span("turn", voice=True):
+            self.assertEqual(transcribe(), "olá")
+            with self.assertRaises(RuntimeError):
+                chat()
+            tracing.mark("tts.playback_start")
+        tracer.close()
+        
+        with open(path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        by_name = {record["name"]: record for record in records}
+        self.assertEqual(len(records), 4)
+        self.assertTrue(all(record["trace_id"] == "t1" for record in records))
+        self.assertIsNone(by_name["turn"]["parent_id"])
+        self.assertEqual(by_name["stt.transcribe_file"]["parent_id"], by_name["turn"]["span_id"])
+        self.assertEqual(by_name["llm.chat"]["attrs"]["error"], "RuntimeError")
+        self.assertIsNone(by_name["tts.playback_start"]["dur_ms"])
+        
+        summary = tracer.get_summary()
+        self.assertEqual(summary["spans"]["llm.chat"]["errors"], 1)
+        self.assertEqual(summary["spans"]["turn"]["count"], 1)
+        self.assertGreaterEqual(summary["spans"]["turn"]["max_ms"], summary["spans"]["stt.transcribe_file"]["max_ms"])
+        self.assertEqual(summary["last_turn"]["trace_id"], "t1")
+        self.assertEqual(len(summary["last_turn"]["spans"]), 4)
+
+    def test_pipeline_stages_share_turn_trace(self):
+        """
+        Testa se as etapas de um turno do pipeline formam um único trace, mesmo com a captura seguinte em andamento.
+        """
+        import time
+        import threading
+        from core import tracing
+        from core.pipeline import VoicePipeline
+
+        tracer = tracing.Tracer(enabled=True)
+        previous = tracing.set_tracer(tracer)
+        self.addCleanup(tracing.set_tracer, previous)
+
+        utterances = ["áudio 1", "áudio 2"]
+        finished = threading.Event()
+
+        def capture():
+            time.sleep(0.02)
+            return utterances.pop(0) if utterances else None
+
+        def think(text):
+            with tracing.span("memory.context"):
+                time.sleep(0.01)
+            return text
+
+        pipeline = VoicePipeline(
+            capture=capture,
+            transcribe=lambda audio: audio,
+            think=think,
+            speak=lambda response: time.sleep(0.02),
+            on_turn=lambda turn: turn.turn_id == 2 and finished.set()
+        )
+        self.addCleanup(pipeline.stop)
+        thread = threading.Thread(target=pipeline.run_forever, daemon=True)
+        thread.start()
+        self.assertTrue(finished.wait(5.0))
+        time.sleep(0.05)  # Capturas vazias seguem abrindo turnos novos
+        pipeline.stop()
+        thread.join(5.0)
+
+        last_turn = tracer.get_summary()["last_turn"]
+        self.assertEqual(last_turn["trace_id"], "turn-2")
+        self.assertEqual({span["name"] for span in last_turn["spans"]},
+                         {"pipeline.capture", "pipeline.transcribe", "pipeline.think", "memory.context", "pipeline.speak"})
+
+    def test_chrome_format_rotation(self):
+        """
+        Testa o formato de eventos do Chrome e a rotação por tamanho.
+        """
+        import json
+        from core.tracing import Tracer
+        
+        path = os.path.join(self.test_dir, "trace.json")
+        tracer = Tracer(enabled=True, path=path, fmt="chrome", max_bytes=2000, backup_count=2, flush_every=5)
+        for i in range(60):
+            with tracer.span("memory.context", index=i):
+                pass
+        tracer.close()
+        
+        self.assertTrue(os.path.exists(path + ".1"))
+        self.assertTrue(os.path.exists(path + ".2"))
+        self.assertFalse(os.path.exists(path + ".3"))
+        with open(path, encoding="utf-8") as f:
+            content = f.read()
+        self.assertTrue(content.startswith("[\n"))
+        events = json.loads(content.rstrip().rstrip(",") + "]")
+        self.assertEqual(events[0]["ph"], "X")
+        self.assertEqual(events[0]["cat"], "memory")
+        self.assertLessEqual(os.path.getsize(path), 2000)
+        with self.assertRaises(ValueError):
+            Tracer(fmt="xml")
+
+class TestComponentLoader(unittest.TestCase):
+    """
+    Testes para a inicialização paralela dos componentes.
+    """
+    
+    def test_parallel_init_and_readiness_gates(self):
+        """
+        Testa se componentes independentes inicializam em paralelo e se `get` espera cada um.
+        """
+        import time
+        from core.startup import ComponentLoader, StartupProfiler
+        
+        profiler = StartupProfiler()
+        loader = ComponentLoader(max_workers=3, profiler=profiler)
+        self.addCleanup(loader.shutdown)
+        
+        def slow(value):
+            def factory():
+                time.sleep(0.3)
+                return value
+            return factory
+        
+        start = time.perf_counter()
+        loader.submit("stt", slow("stt"))
+        loader.submit("tts", slow("tts"))
+        loader.submit("llm", lambda: "llm")
+        self.assertLess(time.perf_counter() - start, 0.1)
+        
+        self.assertEqual(loader.get("llm", timeout=1.0), "llm")
+        self.assertFalse(loader.is_ready("stt"))
+        self.assertIsNone(loader.peek("stt"))
+        
+        self.assertTrue(loader.wait_all(timeout=5.0))
+        elapsed = time.perf_counter() - start
+        self.assertLess(elapsed, 0.55)
+        self.assertEqual(loader.get("stt"), "stt")
+        self.assertEqual(loader.get_status()["tts"]["state"], "ready")
+        
+        names = [entry["name"] for entry in profiler.to_dict()["entries"]]
+        self.assertEqual(sorted(names), ["llm", "stt", "tts"])
+        self.assertIn("stt", profiler.report())
+    
+    def test_failure_dependencies_and_sequential_mode(self):
+        """
+        Testa a propagação de falhas, as dependências e o modo sequencial.
+        """
+        from core.startup import ComponentLoader
+        
+        loader = ComponentLoader(max_workers=2)
+        self.addCleanup(loader.shutdown)
+        
+        def broken():
+            raise ImportError("No module named 'TTS'")
+        
+        loader.submit("tts", broken)
+        loader.submit("llm", lambda: {"model": "mistral"})
+        loader.submit("speculator", lambda: loader.get("llm")["model"], depends_on=("llm",))
+        
+        with self.assertRaises(RuntimeError):
+            loader.get("tts", timeout=2.0)
+        self.assertEqual(loader.get("speculator", timeout=2.0), "mistral")
+        self.assertEqual(loader.get_status()["tts"]["state"], "failed")
+        self.assertIn("TTS", loader.get_status()["tts"]["error"])
+        with self.assertRaises(KeyError):
+            loader.get("stt")
+        
+        sequential = ComponentLoader(parallel=False)
+        sequential.submit("playback", lambda: "pronto")
+        self.assertTrue(sequential.is_ready("playback"))
+
+
 class TestSessionManager(unittest.TestCase):
     """
     Testes para o gerenciador de sessões.
@@ -467,6 +2233,57 @@ class TestSessionManager(unittest.TestCase):
         self.assertIn(session1, session_ids)
         self.assertIn(session2, session_ids)
         self.assertIn(session3, session_ids)
+    
+    def test_session_persistence_tail_and_export_import(self):
+        """
+        Testa a persistência em SQLite, a leitura das últimas mensagens e a exportação/importação em lotes.
+        """
+        import json
+        from core import session_manager as session_module
+        from core.session_manager import SessionManager
+        
+        manager = SessionManager(self.test_dir)
+        session_id = manager.create_session("Sessão longa")
+        for i in range(25):
+            manager.add_message(session_id, "user" if i % 2 == 0 else "assistant", f"Mensagem {i}",
+                                metadata={"turn": i} if i == 24 else None)
+        
+        # Sessões e mensagens sobrevivem a um novo gerenciador
+        reopened = SessionManager(self.test_dir)
+        self.assertEqual(reopened.get_session(session_id)["name"], "Sessão longa")
+        self.assertEqual(len(reopened.get_messages(session_id)), 25)
+        
+        tail = reopened.get_messages_for_llm(session_id, limit=3)
+        self.assertEqual(tail, [
+            {"role": "user", "content": "Mensagem 22"},
+            {"role": "assistant", "content": "Mensagem 23"},
+            {"role": "user", "content": "Mensagem 24"}
+        ])
+        self.assertEqual(reopened.get_messages(session_id, limit=1, roles=["assistant"])[0]["content"], "Mensagem 23")
+        
+        export_file = os.path.join(self.test_dir, "sessao.json")
+        self.assertTrue(reopened.export_session(session_id, export_file))
+        with open(export_file, encoding="utf-8") as f:
+            exported = json.load(f)
+        self.assertEqual(exported["session_id"], session_id)
+        self.assertEqual(len(exported["messages"]), 25)
+        
+        # Blocos de leitura e lotes pequenos exercitam a leitura incremental
+        original = (session_module._READ_CHUNK, session_module.IMPORT_BATCH_SIZE)
+        session_module._READ_CHUNK, session_module.IMPORT_BATCH_SIZE = 16, 4
+        try:
+            imported_id = reopened.import_session(export_file)
+        finally:
+            session_module._READ_CHUNK, session_module.IMPORT_BATCH_SIZE = original
+        
+        self.assertIsNotNone(imported_id)
+        self.assertEqual(reopened.get_session(imported_id)["imported_from"], session_id)
+        imported = reopened.get_messages(imported_id)
+        self.assertEqual([m["content"] for m in imported], [f"Mensagem {i}" for i in range(25)])
+        self.assertEqual(imported[-1]["metadata"], {"turn": 24})
+        
+        self.assertTrue(reopened.delete_session(imported_id))
+        self.assertIsNone(SessionManager(self.test_dir).get_session(imported_id))
 
 
 class TestAudioPlayback(unittest.TestCase):
@@ -10,6 +10,8 @@ import queue
 import time
 from typing import Optional, Callable # Removed Dict, Any, List, Union as they were not used in type hints here after review
 
+from core import tracing
+
 # Configuração de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -160,6 +162,7 @@ class AudioPlaybackManager:
                         logger.error(f"Erro ao executar callback específico (start): {cb_e}")
                 
                 logger.debug(f"Reproduzindo: {audio_path}")
+                tracing.mark("tts.playback_start", queued=self.playback_queue.qsize())
                 
                 self._play_audio_file(audio_path)
                 
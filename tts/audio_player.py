@@ -9,6 +9,8 @@ import tempfile
 import threading
 from typing import Optional, Union, Tuple
 
+from core import tracing
+
 # Configuração de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -59,6 +61,7 @@ class AudioPlayer:
                 # Carregar e reproduzir
                 pygame.mixer.music.load(audio_path)
                 pygame.mixer.music.play()
+                tracing.mark("tts.playback_start", backend="pygame")
                 
                 self.is_playing = True
                 
@@ -80,6 +83,7 @@ class AudioPlayer:
                     
                     # Carregar áudio
                     sound = AudioSegment.from_file(audio_path)
+                    tracing.mark("tts.playback_start", backend="pydub")
                     
                     if blocking:
                         # Reprodução bloqueante
@@ -8,6 +8,8 @@ import logging
 import tempfile
 from typing import Optional, Dict, Any, List, Union
 
+from core.tracing import traced
+
 # Configuração de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -98,6 +100,7 @@ class TTSSynthesizer:
             logger.error(f"Erro ao listar modelos: {e}")
             return []
     
+    @traced("tts.synthesize")
     def synthesize(self, 
                    text: str, 
                    output_path: Optional[str] = None,
@@ -148,6 +151,7 @@ class TTSSynthesizer:
             logger.error(f"Erro na síntese de voz: {e}")
             raise
     
+    @traced("tts.synthesize_to_array")
     def synthesize_to_array(self, 
                             text: str,
                             speaker: Optional[str] = None,
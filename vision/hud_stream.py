@@ -13,20 +13,29 @@ except ImportError:
             return True
         return default
 
+try:
+    from core.event_bus import HUD_FRAME
+except ImportError:
+    HUD_FRAME = "hud_frame"
+
 logger = logging.getLogger(__name__)
 
 class HUDStream:
     """Handles continuous screen capture and HUD element detection (Placeholder)."""
 
-    def __init__(self, screen_capture_source=None):
+    def __init__(self, screen_capture_source=None, event_bus=None, max_age=None):
         """
         Initializes the HUD Stream.
         Args:
             screen_capture_source: Object or function to get screen frames.
+            event_bus: Optional EventBus; each analysis is published as a "hud_frame" event.
+            max_age: Seconds the latest analysis is reused before analyzing a new frame.
         """
         self.enabled = get_config("v2_4.enable_macro_streaming", True) # Link to config
         self.capture_source = screen_capture_source # Needs a real capture mechanism
         self.last_hud_data = {}
+        self.event_bus = event_bus
+        self.max_age = max_age if max_age is not None else get_config("v2_4.vision_max_age", 0.5)
         self.is_streaming = False
         if self.enabled:
             logger.info("HUD Stream initialized (Placeholder). Requires screen capture implementation.")
@@ -44,9 +53,7 @@ class HUDStream:
         # while self.is_streaming:
         #     frame = self.capture_source.get_frame()
         #     if frame:
-        #         hud_data = self._analyze_frame(frame)
-        #         self.last_hud_data = hud_data
-        #         # Optionally, emit events or update a shared state
+        #         self.process_frame(frame) # Stores and publishes the analysis
         #     time.sleep(0.5) # Adjust analysis frequency
         # logger.info("HUD stream analysis stopped.")
         print("Placeholder: HUD Stream started. Needs real implementation for screen capture and analysis.")
@@ -86,17 +93,25 @@ class HUDStream:
         # logger.debug(f"Simulated HUD analysis: {simulated_data}")
         return simulated_data
 
+    def process_frame(self, frame=None) -> dict:
+        """Analyzes a frame, keeps it as the latest HUD data and publishes it on the event bus."""
+        data = self._analyze_frame(frame)
+        self.last_hud_data = data
+        if self.event_bus is not None:
+            try:
+                self.event_bus.publish(HUD_FRAME, data)
+            except Exception as e:
+                logger.error(f"Failed to publish hud_frame event: {e}")
+        return data
+
     def get_latest_hud_data(self) -> dict:
-        """Returns the most recently analyzed HUD data (Placeholder)."""
-        # In a real scenario, this might return the actual latest data
-        # For placeholder, we just simulate analysis on demand
+        """Returns the most recently analyzed HUD data, analyzing a new frame only when it is stale."""
         if not self.enabled:
              return {}
-        # Simulate getting a frame and analyzing it if not streaming
-        # if not self.is_streaming:
-        #      return self._analyze_frame(None) # Pass None as frame for placeholder
-        # return self.last_hud_data
-        return self._analyze_frame(None) # Placeholder always analyzes on demand
+        # Reuse the latest analysis while it is fresh instead of re-analyzing on every call
+        if self.last_hud_data and time.time() - self.last_hud_data.get("timestamp", 0) <= self.max_age:
+            return self.last_hud_data
+        return self.process_frame(None) # Placeholder: no capture source, analyze on demand
 
 # Example Usage
 # if __name__ == "__main__":
@@ -13,20 +13,29 @@ except ImportError:
             return True
         return default
 
+try:
+    from core.event_bus import MAP_UPDATE
+except ImportError:
+    MAP_UPDATE = "map_update"
+
 logger = logging.getLogger(__name__)
 
 class MinimapTracker:
     """Handles continuous minimap analysis for tracking entities and events (Placeholder)."""
 
-    def __init__(self, screen_capture_source=None):
+    def __init__(self, screen_capture_source=None, event_bus=None, max_age=None):
         """
         Initializes the Minimap Tracker.
         Args:
             screen_capture_source: Object or function to get screen frames (specifically minimap area).
+            event_bus: Optional EventBus; each analysis is published as a "map_update" event.
+            max_age: Seconds the latest analysis is reused before analyzing a new frame.
         """
         self.enabled = get_config("v2_4.enable_macro_streaming", True) # Link to config
         self.capture_source = screen_capture_source # Needs a real capture mechanism focused on minimap
         self.last_map_data = {}
+        self.event_bus = event_bus
+        self.max_age = max_age if max_age is not None else get_config("v2_4.vision_max_age", 0.5)
         self.is_streaming = False
         if self.enabled:
             logger.info("Minimap Tracker initialized (Placeholder). Requires screen capture and CV implementation.")
@@ -44,9 +53,7 @@ class MinimapTracker:
         # while self.is_streaming:
         #     minimap_frame = self.capture_source.get_minimap_frame() # Method to get only minimap
         #     if minimap_frame:
-        #         map_data = self._analyze_minimap(minimap_frame)
-        #         self.last_map_data = map_data
-        #         # Optionally, emit events or update a shared tactical map state
+        #         self.process_frame(minimap_frame) # Stores and publishes the analysis
         #     time.sleep(1.0) # Minimap analysis might be less frequent than HUD
         # logger.info("Minimap Tracker analysis stopped.")
         print("Placeholder: Minimap Tracker started. Needs real implementation for minimap capture and analysis.")
@@ -104,15 +111,25 @@ class MinimapTracker:
         # logger.debug(f"Simulated minimap analysis: {simulated_data}")
         return simulated_data
 
+    def process_frame(self, minimap_frame=None) -> dict:
+        """Analyzes a frame, keeps it as the latest minimap data and publishes it on the event bus."""
+        data = self._analyze_minimap(minimap_frame)
+        self.last_map_data = data
+        if self.event_bus is not None:
+            try:
+                self.event_bus.publish(MAP_UPDATE, data)
+            except Exception as e:
+                logger.error(f"Failed to publish map_update event: {e}")
+        return data
+
     def get_latest_map_data(self) -> dict:
-        """Returns the most recently analyzed minimap data (Placeholder)."""
+        """Returns the most recently analyzed minimap data, analyzing a new frame only when it is stale."""
         if not self.enabled:
              return {}
-        # Simulate getting a frame and analyzing it if not streaming
-        # if not self.is_streaming:
-        #      return self._analyze_minimap(None) # Pass None as frame for placeholder
-        # return self.last_map_data
-        return self._analyze_minimap(None) # Placeholder always analyzes on demand
+        # Reuse the latest analysis while it is fresh instead of re-analyzing on every call
+        if self.last_map_data and time.time() - self.last_map_data.get("timestamp", 0) <= self.max_age:
+            return self.last_map_data
+        return self.process_frame(None) # Placeholder: no capture source, analyze on demand
 
 # Example Usage
 # if __name__ == "__main__":
@@ -153,17 +153,25 @@ export const channelApi = {
 
 // API de Interações
 export const interactionApi = {
-  // Obter interações com filtros opcionais
+  // Obter uma página de interações com filtros opcionais
+  // Retorna { items, nextCursor }; passe nextCursor em options.cursor para a próxima página
   getInteractions: async (options = {}) => {
     try {
-      const { limit = 100, offset = 0, userId, channelId } = options;
-      let url = `/interactions?limit=${limit}&offset=${offset}`;
+      const { limit = 100, cursor, userId, channelId, interactionType, since, until } = options;
+      const params = { limit };
       
-      if (userId) url += `&user_id=${userId}`;
-      if (channelId) url += `&channel_id=${channelId}`;
+      if (cursor) params.cursor = cursor;
+      if (userId) params.user_id = userId;
+      if (channelId) params.channel_id = channelId;
+      if (interactionType) params.interaction_type = interactionType;
+      if (since) params.since = since;
+      if (until) params.until = until;
       
-      const response = await apiClient.get(url);
-      return response.data;
+      const response = await apiClient.get('/interactions', { params });
+      return {
+        items: response.data,
+        nextCursor: response.headers['x-next-cursor'] || null
+      };
     } catch (error) {
       console.error('Erro ao obter interações:', error);
       throw error;
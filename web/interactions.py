@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Path
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Response
 from typing import List, Dict, Any, Optional
 from utils.memory_client import MemoryClient
 
@@ -7,15 +7,34 @@ memory_client = MemoryClient()
 
 @router.get("/interactions", response_model=List[Dict[str, Any]])
 async def get_interactions(
-    limit: int = Query(20, description="Número máximo de interações a retornar"),
-    offset: int = Query(0, description="Número de interações a pular")
+    response: Response,
+    limit: int = Query(20, ge=1, le=200, description="Número máximo de interações a retornar"),
+    cursor: Optional[str] = Query(None, description="Cursor da página anterior (cabeçalho X-Next-Cursor)"),
+    user_id: Optional[str] = Query(None, description="Filtrar por usuário"),
+    channel_id: Optional[str] = Query(None, description="Filtrar por canal"),
+    interaction_type: Optional[str] = Query(None, description="Filtrar por tipo de interação"),
+    since: Optional[str] = Query(None, description="Timestamp ISO mínimo (inclusivo)"),
+    until: Optional[str] = Query(None, description="Timestamp ISO máximo (exclusivo)")
 ):
     """
-    Retorna a lista de interações recentes no sistema de memória.
+    Retorna uma página de interações, das mais recentes para as mais antigas.
+    O cursor da próxima página é enviado no cabeçalho X-Next-Cursor.
     """
     try:
-        interactions = memory_client.get_interactions(limit=limit, offset=offset)
-        return interactions
+        page = memory_client.get_interactions(
+            limit=limit,
+            cursor=cursor,
+            user_id=user_id,
+            channel_id=channel_id,
+            interaction_type=interaction_type,
+            since=since,
+            until=until
+        )
+        if page["next_cursor"]:
+            response.headers["X-Next-Cursor"] = page["next_cursor"]
+        return page["items"]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -71,13 +90,14 @@ async def delete_interaction(
 @router.get("/search/interactions", response_model=List[Dict[str, Any]])
 async def search_interactions(
     query: str = Query(..., description="Termo de busca"),
-    limit: int = Query(20, description="Número máximo de resultados")
+    limit: int = Query(20, ge=1, le=100, description="Número máximo de resultados"),
+    offset: int = Query(0, ge=0, description="Número de resultados a pular")
 ):
     """
-    Busca interações por conteúdo.
+    Busca interações por conteúdo (ordenadas por relevância).
     """
     try:
-        results = memory_client.search_interactions(query, limit=limit)
+        results = memory_client.search_interactions(query, limit=limit, offset=offset)
         return results
     except Exception as e:
         raise HTTPException(
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, File, UploadFile
+from starlette.concurrency import run_in_threadpool
 from typing import List, Dict, Any, Optional
 from utils.memory_client import MemoryClient
 import os
@@ -45,10 +46,11 @@ async def update_settings(
 
 @router.post("/settings/backup", response_model=Dict[str, Any])
 async def create_backup(
-    backup_name: str = Query(None, description="Nome personalizado para o backup (opcional)")
+    backup_name: str = Query(None, description="Nome personalizado para o backup (opcional)"),
+    incremental: bool = Query(False, description="Gravar apenas as páginas alteradas desde o último backup")
 ):
     """
-    Cria um backup do sistema de memória.
+    Cria um backup online do sistema de memória (as escritas continuam durante a cópia).
     """
     try:
         # Gerar nome do backup se não fornecido
@@ -56,29 +58,26 @@ async def create_backup(
             from datetime import datetime
             backup_name = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
-        # Adicionar extensão .db se não presente
-        if not backup_name.endswith(".db"):
-            backup_name += ".db"
-        
-        # Definir caminho do backup
+        # Definir caminho do backup (a extensão depende do tipo e da compressão)
         backup_dir = os.path.join(os.getcwd(), "backups")
         os.makedirs(backup_dir, exist_ok=True)
-        backup_path = os.path.join(backup_dir, backup_name)
+        backup_path = os.path.join(backup_dir, os.path.basename(backup_name))
         
-        # Criar backup
-        success = memory_client.backup(backup_path)
+        # Criar backup fora do loop de eventos
+        stats = await run_in_threadpool(memory_client.backup, backup_path, incremental)
         
-        if not success:
+        if not stats:
             raise HTTPException(
                 status_code=500,
                 detail="Não foi possível criar o backup"
             )
         
         return {
-            "status": "success", 
+            "status": "success",
             "message": "Backup criado com sucesso",
-            "backup_path": backup_path,
-            "backup_name": backup_name
+            "backup_path": stats["path"],
+            "backup_name": stats["name"],
+            "stats": stats
         }
     except HTTPException:
         raise
@@ -96,34 +95,24 @@ async def restore_backup(
     Restaura o sistema de memória a partir de um backup.
     """
     try:
-        # Salvar arquivo de backup temporariamente
-        temp_backup_path = os.path.join(os.getcwd(), "temp_backup.db")
-        with open(temp_backup_path, "wb") as buffer:
-            buffer.write(await backup_file.read())
-        
-        # Restaurar a partir do backup
-        success = memory_client.restore(temp_backup_path)
-        
-        # Remover arquivo temporário
-        os.remove(temp_backup_path)
+        # O upload é lido em blocos e descomprimido direto para um arquivo temporário
+        backup_dir = os.path.join(os.getcwd(), "backups")
+        stats = await run_in_threadpool(memory_client.restore_stream, backup_file.file, backup_dir)
         
-        if not success:
+        if not stats:
             raise HTTPException(
                 status_code=500,
                 detail="Não foi possível restaurar o backup"
             )
         
-        return {"status": "success", "message": "Sistema restaurado com sucesso a partir do backup"}
+        return {
+            "status": "success",
+            "message": "Sistema restaurado com sucesso a partir do backup",
+            "stats": stats
+        }
     except HTTPException:
         raise
     except Exception as e:
-        # Tentar remover arquivo temporário em caso de erro
-        try:
-            if os.path.exists(temp_backup_path):
-                os.remove(temp_backup_path)
-        except:
-            pass
-        
         raise HTTPException(
             status_code=500,
             detail=f"Erro ao restaurar backup: {str(e)}"
@@ -132,29 +121,13 @@ async def restore_backup(
 @router.get("/settings/backups", response_model=List[Dict[str, Any]])
 async def list_backups():
     """
-    Lista todos os backups disponíveis.
+    Lista todos os backups disponíveis (completos e incrementais).
     """
     try:
         backup_dir = os.path.join(os.getcwd(), "backups")
         os.makedirs(backup_dir, exist_ok=True)
         
-        backups = []
-        for filename in os.listdir(backup_dir):
-            if filename.endswith(".db"):
-                file_path = os.path.join(backup_dir, filename)
-                file_stats = os.stat(file_path)
-                
-                backups.append({
-                    "name": filename,
-                    "path": file_path,
-                    "size": file_stats.st_size,
-                    "created_at": file_stats.st_ctime
-                })
-        
-        # Ordenar por data de criação (mais recente primeiro)
-        backups.sort(key=lambda x: x["created_at"], reverse=True)
-        
-        return backups
+        return memory_client.list_backups(backup_dir)
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -21,18 +21,18 @@ async def get_statistics():
 
 @router.get("/statistics/users", response_model=Dict[str, Any])
 async def get_user_statistics(
-    limit: int = Query(10, description="Número máximo de usuários a incluir nas estatísticas")
+    limit: int = Query(10, ge=1, le=100, description="Número máximo de usuários a incluir nas estatísticas")
 ):
     """
     Retorna estatísticas específicas de usuários.
     """
     try:
-        statistics = memory_client.get_statistics()
+        statistics = memory_client.get_statistics(top_n=limit)
         
         # Extrair estatísticas de usuários
         user_stats = {
             "user_count": statistics.get("user_count", 0),
-            "top_users": statistics.get("top_users", [])[:limit],
+            "top_users": statistics.get("top_users", []),
             "average_interactions_per_user": statistics.get("interaction_count", 0) / max(1, statistics.get("user_count", 1))
         }
         
@@ -45,18 +45,18 @@ async def get_user_statistics(
 
 @router.get("/statistics/channels", response_model=Dict[str, Any])
 async def get_channel_statistics(
-    limit: int = Query(10, description="Número máximo de canais a incluir nas estatísticas")
+    limit: int = Query(10, ge=1, le=100, description="Número máximo de canais a incluir nas estatísticas")
 ):
     """
     Retorna estatísticas específicas de canais.
     """
     try:
-        statistics = memory_client.get_statistics()
+        statistics = memory_client.get_statistics(top_n=limit)
         
         # Extrair estatísticas de canais
         channel_stats = {
             "channel_count": statistics.get("channel_count", 0),
-            "top_channels": statistics.get("top_channels", [])[:limit],
+            "top_channels": statistics.get("top_channels", []),
             "average_interactions_per_channel": statistics.get("interaction_count", 0) / max(1, statistics.get("channel_count", 1))
         }
         
@@ -69,17 +69,17 @@ async def get_channel_statistics(
 
 @router.get("/statistics/topics", response_model=Dict[str, Any])
 async def get_topic_statistics(
-    limit: int = Query(10, description="Número máximo de tópicos a incluir nas estatísticas")
+    limit: int = Query(10, ge=1, le=100, description="Número máximo de tópicos a incluir nas estatísticas")
 ):
     """
     Retorna estatísticas específicas de tópicos.
     """
     try:
-        statistics = memory_client.get_statistics()
+        statistics = memory_client.get_statistics(top_n=limit)
         
         # Extrair estatísticas de tópicos
         topic_stats = {
-            "top_topics": statistics.get("top_topics", [])[:limit]
+            "top_topics": statistics.get("top_topics", [])
         }
         
         return topic_stats